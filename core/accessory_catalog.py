@@ -0,0 +1,125 @@
+"""
+Catálogo indexado de accesorios (válvulas, accesorios y medidores).
+Se construye una sola vez a partir de data_tablas/accesorios_data.json y ofrece
+búsquedas O(1) de Le/D más una caché de la longitud equivalente por sección.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from config.constants import ACCESORIOS_DATA
+
+CATEGORIAS_ACCESORIOS = ["valvulas", "accesorios", "medidores"]
+
+
+class AccessoryCatalog:
+    """
+    Índices hash sobre la tabla de accesorios.
+    Respeta el orden de búsqueda histórico (válvulas, accesorios, medidores):
+    ante claves repetidas gana el primer elemento encontrado.
+    """
+
+    def __init__(self, data: Dict[str, List[Dict[str, Any]]], max_cache: int = 512):
+        self.max_cache = max_cache
+        self.recargar(data)
+
+    def recargar(self, data: Dict[str, List[Dict[str, Any]]]):
+        """Reconstruye los índices y vacía la caché (p. ej. tras editar la tabla)."""
+        self.data = data
+        self.por_singularidad: Dict[str, Dict[str, Any]] = {}
+        self.por_tipo: Dict[str, Dict[str, Any]] = {}
+        self.por_descripcion: Dict[str, Dict[str, Any]] = {}
+        self._por_clave: Dict[str, Dict[str, Any]] = {}
+
+        for categoria in CATEGORIAS_ACCESORIOS:
+            for item in data.get(categoria, []) or []:
+                singularidad = item.get("singularidad")
+                tipo = item.get("tipo")
+                descripcion = item.get("descripcion")
+                if singularidad is not None:
+                    self.por_singularidad.setdefault(singularidad, item)
+                    self._por_clave.setdefault(singularidad, item)
+                if tipo is not None:
+                    self.por_tipo.setdefault(tipo, item)
+                    self._por_clave.setdefault(tipo, item)
+                if descripcion is not None:
+                    self.por_descripcion.setdefault(descripcion, item)
+
+        self._cache_le_d: Dict[str, float] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def buscar(self, accessory_type: str) -> Optional[Dict[str, Any]]:
+        """Busca un accesorio por singularidad o tipo (misma semántica que get_accessory_data)."""
+        return self._por_clave.get(accessory_type)
+
+    def buscar_por_descripcion(self, descripcion: str) -> Optional[Dict[str, Any]]:
+        """Busca un accesorio por su descripción completa."""
+        return self.por_descripcion.get(descripcion)
+
+    def le_over_d(self, accessory_type: str) -> float:
+        """Devuelve Le/D medio del accesorio, o 0 si no está en el catálogo."""
+        item = self._por_clave.get(accessory_type)
+        return item.get("lc_d_medio", 0) if item else 0
+
+    @staticmethod
+    def _hash_accesorios(accesorios: List[Dict[str, Any]], usar_lc_d: bool) -> str:
+        contenido = json.dumps([accesorios, usar_lc_d], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+    def suma_le_over_d(self, accesorios: List[Dict[str, Any]], usar_lc_d: bool = True) -> float:
+        """
+        Calcula Σ(Le/D · cantidad) de una lista de accesorios.
+        El resultado no depende del diámetro, por lo que se guarda en caché
+        con el hash del contenido de la lista.
+
+        Args:
+            accesorios: Lista de accesorios de una sección
+            usar_lc_d: Si True, usa el 'lc_d' guardado en el accesorio cuando existe
+
+        Returns:
+            Suma adimensional de Le/D ponderada por la cantidad
+        """
+        if not accesorios:
+            return 0.0
+
+        clave = self._hash_accesorios(accesorios, usar_lc_d)
+        valor = self._cache_le_d.get(clave)
+        if valor is not None:
+            self.cache_hits += 1
+            return valor
+
+        self.cache_misses += 1
+        valor = 0.0
+        for acc in accesorios:
+            if usar_lc_d and acc.get('lc_d') is not None:
+                le_over_d_val = float(acc['lc_d'])
+            else:
+                le_over_d_val = self.le_over_d(acc['tipo'])
+            valor += le_over_d_val * acc['cantidad']
+
+        if len(self._cache_le_d) >= self.max_cache:
+            self._cache_le_d.clear()
+        self._cache_le_d[clave] = valor
+        return valor
+
+
+CATALOGO_ACCESORIOS = AccessoryCatalog(ACCESORIOS_DATA)
+
+
+def recargar_catalogo_accesorios(data: Dict[str, List[Dict[str, Any]]] = None):
+    """
+    Invalida el catálogo de accesorios tras guardar cambios en la tabla.
+    Actualiza en sitio ACCESORIOS_DATA para que el resto de la aplicación vea los datos nuevos.
+
+    Args:
+        data: Datos nuevos; si es None se releen de data_tablas/accesorios_data.json
+    """
+    if data is None:
+        with open("data_tablas/accesorios_data.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if data is not ACCESORIOS_DATA:
+        ACCESORIOS_DATA.clear()
+        ACCESORIOS_DATA.update(data)
+    CATALOGO_ACCESORIOS.recargar(ACCESORIOS_DATA)
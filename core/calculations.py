@@ -2,8 +2,9 @@
 
 import math
 import numpy as np
-from typing import List, Tuple, Dict, Any
-from config.constants import HAZEN_WILLIAMS_C, ACCESORIOS_DATA, MOTORES_ESTANDAR, TUBERIAS_DATA, PEAD_DATA, HIERRO_DUCTIL_DATA, HIERRO_FUNDIDO_DATA, PVC_DATA
+from typing import List, Tuple, Dict, Any, Union
+from config.constants import HAZEN_WILLIAMS_C, MOTORES_ESTANDAR, TUBERIAS_DATA, PEAD_DATA, HIERRO_DUCTIL_DATA, HIERRO_FUNDIDO_DATA, PVC_DATA
+from core.accessory_catalog import CATALOGO_ACCESORIOS
 
 def interpolar_propiedad(valor: float, x: List[float], y: List[float]) -> float:
     """
@@ -38,6 +39,32 @@ def calcular_hf_hazen_williams(caudal_m3s: float, longitud: float, diametro_m: f
         return 0
     return 10.67 * longitud * math.pow(caudal_m3s_scalar / C, 1.852) / math.pow(diametro_m, 4.87)
 
+def calcular_hf_hazen_williams_array(caudal_m3s, longitud, diametro_m, C) -> np.ndarray:
+    """
+    Versión vectorizada de calcular_hf_hazen_williams.
+    Acepta escalares o arrays (con broadcasting de NumPy) en todos los argumentos.
+    
+    Args:
+        caudal_m3s: Caudal(es) en m³/s
+        longitud: Longitud(es) de la tubería en metros
+        diametro_m: Diámetro(s) interno(s) en metros
+        C: Coeficiente(s) de Hazen-Williams
+    
+    Returns:
+        Array de pérdidas por fricción en metros (0 donde Q <= 0, C = 0 o D = 0)
+    """
+    q = np.asarray(caudal_m3s, dtype=float)
+    L = np.asarray(longitud, dtype=float)
+    D = np.asarray(diametro_m, dtype=float)
+    C = np.asarray(C, dtype=float)
+    
+    valido = (q > 0) & (C != 0) & (D != 0)
+    q_seguro = np.where(valido, q, 0.0)
+    C_seguro = np.where(C != 0, C, 1.0)
+    D_seguro = np.where(D != 0, D, 1.0)
+    hf = 10.67 * L * np.power(q_seguro / C_seguro, 1.852) / np.power(D_seguro, 4.87)
+    return np.where(valido, hf, 0.0)
+
 def get_le_over_d(accessory_type: str, D1_mm: float = None, D2_mm: float = None) -> float:
     """
     Devuelve el valor de Le/D para un accesorio dado.
@@ -51,16 +78,8 @@ def get_le_over_d(accessory_type: str, D1_mm: float = None, D2_mm: float = None)
     Returns:
         Valor de Le/D para el accesorio
     """
-    # Buscar en todas las categorías de accesorios
-    for categoria in ["valvulas", "accesorios", "medidores"]:
-        if categoria in ACCESORIOS_DATA:
-            for item in ACCESORIOS_DATA[categoria]:
-                # Buscar por singularidad o tipo
-                if (item.get("singularidad") == accessory_type or 
-                    item.get("tipo") == accessory_type):
-                    return item.get("lc_d_medio", 0)
-    
-    return 0
+    # Búsqueda O(1) en el catálogo indexado (singularidad o tipo)
+    return CATALOGO_ACCESORIOS.le_over_d(accessory_type)
 
 def convert_flow_unit(value: float, from_unit: str, to_unit: str) -> float:
     """
@@ -166,16 +185,14 @@ def calculate_system_head(q_display_unit: float, flow_unit: str, h_estatica: flo
     # Succión
     hf_primaria_succion = calcular_hf_hazen_williams(q_m3s, long_succion, diam_succion_m, C_succion)
     # Calcular longitud equivalente total: Le/D * cantidad * diámetro (en metros)
-    diam_succion_mm = diam_succion_m * 1000
-    le_total_succion = sum(get_le_over_d(acc['tipo'], diam_succion_mm, acc.get('diam2_mm')) * acc['cantidad'] * diam_succion_m for acc in accesorios_succion)
+    le_total_succion = calcular_longitud_equivalente_total(accesorios_succion, diam_succion_m, usar_lc_d=False)
     hf_secundaria_succion = calcular_hf_hazen_williams(q_m3s, le_total_succion, diam_succion_m, C_succion)
     perdida_total_succion = hf_primaria_succion + hf_secundaria_succion + otras_perdidas_succion
 
     # Impulsión
     hf_primaria_impulsion = calcular_hf_hazen_williams(q_m3s, long_impulsion, diam_impulsion_m, C_impulsion)
     # Calcular longitud equivalente total: Le/D * cantidad * diámetro (en metros)
-    diam_impulsion_mm = diam_impulsion_m * 1000
-    le_total_impulsion = sum(get_le_over_d(acc['tipo'], diam_impulsion_mm, acc.get('diam2_mm')) * acc['cantidad'] * diam_impulsion_m for acc in accesorios_impulsion)
+    le_total_impulsion = calcular_longitud_equivalente_total(accesorios_impulsion, diam_impulsion_m, usar_lc_d=False)
     hf_secundaria_impulsion = calcular_hf_hazen_williams(q_m3s, le_total_impulsion, diam_impulsion_m, C_impulsion)
     perdida_total_impulsion = hf_primaria_impulsion + hf_secundaria_impulsion + otras_perdidas_impulsion
     
@@ -187,6 +204,8 @@ def find_operating_point(pump_curve_data_m3h: List[Tuple[float, float]],
                         display_flow_unit: str) -> Tuple[float, float]:
     """
     Encuentra el punto de operación entre la curva de la bomba y el sistema.
+    La curva del sistema se evalúa en forma analítica (Hazen-Williams) y la
+    intersección se resuelve con un buscador de raíces acotado (ver core.operating_point).
     
     Args:
         pump_curve_data_m3h: Datos de la curva de la bomba en m³/h
@@ -196,50 +215,173 @@ def find_operating_point(pump_curve_data_m3h: List[Tuple[float, float]],
     Returns:
         Tupla (caudal, altura) del punto de operación
     """
-    pump_q_m3h = np.array([p[0] for p in pump_curve_data_m3h])
-    pump_h_m3h = np.array([p[1] for p in pump_curve_data_m3h])
+    from core.operating_point import resolver_punto_operacion_hw
 
     # Verificar si la curva de la bomba es válida
-    if len(pump_q_m3h) < 2:
+    if len(pump_curve_data_m3h) < 2:
         return (0, 0)
 
-    # Generar puntos del sistema para diferentes caudales
-    system_flows = np.linspace(0, pump_q_m3h.max(), 100)
-    system_heads = []
-    
-    for flow in system_flows:
-        flow_display = convert_flow_unit(flow, 'm³/h', display_flow_unit)
-        head = calculate_system_head(
-            flow_display, display_flow_unit,
-            system_params['h_estatica'],
-            system_params['long_succion'], system_params['diam_succion_m'], 
-            system_params['C_succion'], system_params['accesorios_succion'], 
-            system_params['otras_perdidas_succion'],
-            system_params['long_impulsion'], system_params['diam_impulsion_m'], 
-            system_params['C_impulsion'], system_params['accesorios_impulsion'], 
-            system_params['otras_perdidas_impulsion']
-        )
-        system_heads.append(head)
-    
-    system_heads = np.array(system_heads)
-    
-    # Encontrar intersección
-    diff = pump_h_m3h - np.interp(pump_q_m3h, system_flows, system_heads)
-    sign_changes = np.where(np.diff(np.sign(diff)))[0]
-    
-    if len(sign_changes) > 0:
-        idx = sign_changes[0]
-        # Interpolación lineal para encontrar el punto exacto
-        x1, x2 = pump_q_m3h[idx], pump_q_m3h[idx + 1]
-        y1, y2 = diff[idx], diff[idx + 1]
-        
-        if abs(y2 - y1) > 1e-9:
-            intersection_q = x1 - y1 * (x2 - x1) / (y2 - y1)
-            intersection_h = np.interp(intersection_q, pump_q_m3h, pump_h_m3h)
-            return (intersection_q, intersection_h)
+    resultado = resolver_punto_operacion_hw(pump_curve_data_m3h, system_params, 'm³/h',
+                                            usar_cotas=False, usar_lc_d=False)
+    if resultado['con_cruce'] and resultado['convergido']:
+        return (float(resultado['q']), float(resultado['h']))
     
     return (0, 0)
 
+def calcular_longitud_equivalente_total(accesorios: List[Dict], diametro_m: float,
+                                        usar_lc_d: bool = True) -> float:
+    """
+    Calcula la longitud equivalente total (m) de los accesorios de una sección.
+    Se resuelve una sola vez por sección, independientemente del número de caudales.
+    
+    Args:
+        accesorios: Lista de accesorios de la sección
+        diametro_m: Diámetro interno de la sección en metros
+        usar_lc_d: Si True, usa el 'lc_d' guardado en el accesorio cuando existe;
+                   si False, siempre busca Le/D en la tabla de accesorios
+    
+    Returns:
+        Longitud equivalente total en metros
+    """
+    # Σ(Le/D · cantidad) no depende del diámetro: se cachea por contenido de la lista
+    return CATALOGO_ACCESORIOS.suma_le_over_d(accesorios, usar_lc_d) * diametro_m
+
+def calcular_altura_estatica_total(system_params: Dict[str, Any]) -> float:
+    """
+    Calcula la altura estática total a partir de las cotas de succión y descarga.
+    H_estatica = Z_descarga - Z_nivel_agua, donde Z_nivel_agua = +altura_succion
+    si la bomba está inundada y -altura_succion si no lo está.
+    
+    Args:
+        system_params: Parámetros del sistema
+    
+    Returns:
+        Altura estática total en metros
+    """
+    bomba_inundada = system_params.get('bomba_inundada', False)
+    altura_succion_val = system_params['altura_succion']
+    altura_descarga_val = system_params['altura_descarga']
+    
+    if bomba_inundada:
+        z_nivel_agua = +altura_succion_val  # Agua POR ENCIMA de la bomba
+    else:
+        z_nivel_agua = -altura_succion_val  # Agua POR DEBAJO de la bomba
+    
+    return altura_descarga_val - z_nivel_agua
+
+def coeficientes_curva_sistema_hw(system_params: Dict[str, Any], flow_unit: str,
+                                  usar_cotas: bool = True, usar_lc_d: bool = True) -> Tuple[float, float]:
+    """
+    Obtiene la forma analítica de la curva del sistema con Hazen-Williams:
+    H(Q) = h0 + k * Q^1.852, con Q expresado en flow_unit.
+    
+    Args:
+        system_params: Parámetros del sistema
+        flow_unit: Unidad de caudal en la que se expresa Q
+        usar_cotas: Si True, la altura estática se obtiene de las cotas (ver calcular_altura_estatica_total)
+        usar_lc_d: Si True, respeta el 'lc_d' guardado en cada accesorio
+    
+    Returns:
+        Tupla (h0, k): término independiente (altura estática + otras pérdidas) y coeficiente de pérdidas
+    """
+    if usar_cotas:
+        h0 = calcular_altura_estatica_total(system_params)
+    else:
+        h0 = system_params['h_estatica']
+    h0 += system_params['otras_perdidas_succion'] + system_params['otras_perdidas_impulsion']
+    
+    k_m3s = 0.0
+    for seccion in ('succion', 'impulsion'):
+        D = system_params[f'diam_{seccion}_m']
+        C = system_params[f'C_{seccion}']
+        if C == 0 or D == 0:
+            continue
+        L = system_params[f'long_{seccion}'] + calcular_longitud_equivalente_total(
+            system_params[f'accesorios_{seccion}'], D, usar_lc_d)
+        k_m3s += 10.67 * L / (math.pow(C, 1.852) * math.pow(D, 4.87))
+    
+    # Q_m3s = f * Q_unidad  ->  k_unidad = k_m3s * f^1.852
+    factor = convert_flow_unit(1.0, flow_unit, 'm³/s')
+    return float(h0), float(k_m3s * math.pow(factor, 1.852))
+
+def calculate_system_curve_arrays(flows, flow_unit: str,
+                                  system_params: Union[Dict[str, Any], List[Dict[str, Any]]],
+                                  usar_cotas: bool = True,
+                                  usar_lc_d: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Motor vectorizado de la curva del sistema.
+    Evalúa todo el vector de caudales (y opcionalmente un lote de juegos de parámetros)
+    en una sola llamada con NumPy. Las longitudes equivalentes de accesorios se
+    resuelven una vez por sección y no una vez por caudal.
+    
+    Args:
+        flows: Caudales (lista o array) en la unidad indicada
+        flow_unit: Unidad de caudal
+        system_params: Parámetros del sistema, o lista de parámetros para evaluar en lote
+        usar_cotas: Si True, la altura estática se calcula con altura_succion/altura_descarga/
+                    bomba_inundada; si False, se usa system_params['h_estatica']
+        usar_lc_d: Si True, respeta el 'lc_d' guardado en cada accesorio
+    
+    Returns:
+        Diccionario de arrays: 'caudal_m3s', 'altura_estatica', 'hf_primaria_succion',
+        'hf_secundaria_succion', 'perdida_succion', 'hf_primaria_impulsion',
+        'hf_secundaria_impulsion', 'perdida_impulsion' y 'adt_total'.
+        Forma (n_caudales,) para un solo juego de parámetros o
+        (n_juegos, n_caudales) para un lote.
+    """
+    es_lote = isinstance(system_params, (list, tuple))
+    lista_params = list(system_params) if es_lote else [system_params]
+    
+    q_m3s = np.asarray(convert_flow_unit(np.asarray(flows, dtype=float), flow_unit, 'm³/s'), dtype=float)
+    
+    # Escalares por juego de parámetros -> columnas (n_juegos, 1) para broadcasting
+    def _columna(valores):
+        return np.asarray(valores, dtype=float).reshape(-1, 1)
+    
+    d_s = _columna([p['diam_succion_m'] for p in lista_params])
+    d_i = _columna([p['diam_impulsion_m'] for p in lista_params])
+    c_s = _columna([p['C_succion'] for p in lista_params])
+    c_i = _columna([p['C_impulsion'] for p in lista_params])
+    l_s = _columna([p['long_succion'] for p in lista_params])
+    l_i = _columna([p['long_impulsion'] for p in lista_params])
+    otras_s = _columna([p['otras_perdidas_succion'] for p in lista_params])
+    otras_i = _columna([p['otras_perdidas_impulsion'] for p in lista_params])
+    le_s = _columna([calcular_longitud_equivalente_total(p['accesorios_succion'], p['diam_succion_m'], usar_lc_d)
+                     for p in lista_params])
+    le_i = _columna([calcular_longitud_equivalente_total(p['accesorios_impulsion'], p['diam_impulsion_m'], usar_lc_d)
+                     for p in lista_params])
+    if usar_cotas:
+        h_est = _columna([calcular_altura_estatica_total(p) for p in lista_params])
+    else:
+        h_est = _columna([p['h_estatica'] for p in lista_params])
+    
+    q = q_m3s.reshape(1, -1)
+    
+    hf_prim_s = calcular_hf_hazen_williams_array(q, l_s, d_s, c_s)
+    hf_sec_s = calcular_hf_hazen_williams_array(q, le_s, d_s, c_s)
+    perdida_s = hf_prim_s + hf_sec_s + otras_s
+    
+    hf_prim_i = calcular_hf_hazen_williams_array(q, l_i, d_i, c_i)
+    hf_sec_i = calcular_hf_hazen_williams_array(q, le_i, d_i, c_i)
+    perdida_i = hf_prim_i + hf_sec_i + otras_i
+    
+    adt = h_est + perdida_s + perdida_i
+    
+    resultado = {
+        'caudal_m3s': np.broadcast_to(q, adt.shape),
+        'altura_estatica': np.broadcast_to(h_est, adt.shape),
+        'hf_primaria_succion': hf_prim_s,
+        'hf_secundaria_succion': hf_sec_s,
+        'perdida_succion': perdida_s,
+        'hf_primaria_impulsion': hf_prim_i,
+        'hf_secundaria_impulsion': hf_sec_i,
+        'perdida_impulsion': perdida_i,
+        'adt_total': adt
+    }
+    if not es_lote:
+        resultado = {k: np.array(v[0]) for k, v in resultado.items()}
+    return resultado
+
 def calculate_adt_for_multiple_flows(flows: List[float], flow_unit: str, 
                                    system_params: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
@@ -254,95 +396,25 @@ def calculate_adt_for_multiple_flows(flows: List[float], flow_unit: str,
     Returns:
         Lista de diccionarios con resultados detallados
     """
-    resultados = []
+    if len(flows) == 0:
+        return []
     
-    for flow in flows:
-        # Convertir caudal a m³/s para cálculos
-        caudal_m3s = convert_flow_unit(flow, flow_unit, 'm³/s')
-        
-        # Calcular pérdidas en succión
-        diam_succion_m = system_params['diam_succion_m']
-        hf_primaria_succion = calcular_hf_hazen_williams(
-            caudal_m3s, 
-            system_params['long_succion'], 
-            diam_succion_m, 
-            system_params['C_succion']
-        )
-        
-        le_total_succion = 0
-        for acc in system_params['accesorios_succion']:
-            if 'lc_d' in acc and acc['lc_d'] is not None:
-                le_over_d_val = float(acc['lc_d'])
-            else:
-                diam_succion_mm = diam_succion_m * 1000
-                le_over_d_val = get_le_over_d(acc['tipo'], diam_succion_mm, acc.get('diam2_mm'))
-            le_total_succion += le_over_d_val * acc['cantidad'] * diam_succion_m
-        
-        hf_secundaria_succion = calcular_hf_hazen_williams(
-            caudal_m3s, 
-            le_total_succion, 
-            diam_succion_m, 
-            system_params['C_succion']
-        )
-        perdida_total_succion = hf_primaria_succion + hf_secundaria_succion + system_params['otras_perdidas_succion']
-        
-        # Calcular pérdidas en impulsión
-        diam_impulsion_m = system_params['diam_impulsion_m']
-        hf_primaria_impulsion = calcular_hf_hazen_williams(
-            caudal_m3s, 
-            system_params['long_impulsion'], 
-            diam_impulsion_m, 
-            system_params['C_impulsion']
-        )
-        
-        le_total_impulsion = 0
-        for acc in system_params['accesorios_impulsion']:
-            if 'lc_d' in acc and acc['lc_d'] is not None:
-                le_over_d_val = float(acc['lc_d'])
-            else:
-                diam_impulsion_mm = diam_impulsion_m * 1000
-                le_over_d_val = get_le_over_d(acc['tipo'], diam_impulsion_mm, acc.get('diam2_mm'))
-            le_total_impulsion += le_over_d_val * acc['cantidad'] * diam_impulsion_m
-        
-        hf_secundaria_impulsion = calcular_hf_hazen_williams(
-            caudal_m3s, 
-            le_total_impulsion, 
-            diam_impulsion_m, 
-            system_params['C_impulsion']
-        )
-        perdida_total_impulsion = hf_primaria_impulsion + hf_secundaria_impulsion + system_params['otras_perdidas_impulsion']
-        
-        # Calcular ADT
-        # CORRECCIÓN: Calcular altura estática considerando si la bomba está inundada
-        # H_estatica = Z_descarga - Z_nivel_agua
-        # Donde Z_nivel_agua = +altura_succion si inundada, -altura_succion si no
-        bomba_inundada = system_params.get('bomba_inundada', False)
-        altura_succion_val = system_params['altura_succion']
-        altura_descarga_val = system_params['altura_descarga']
-        
-        if bomba_inundada:
-            z_nivel_agua = +altura_succion_val  # Agua POR ENCIMA de la bomba
-        else:
-            z_nivel_agua = -altura_succion_val  # Agua POR DEBAJO de la bomba
-        
-        altura_estatica_total = altura_descarga_val - z_nivel_agua
-        perdidas_totales = perdida_total_succion + perdida_total_impulsion
-        adt_total = altura_estatica_total + perdidas_totales
-        
-        # Convertir caudal a diferentes unidades para el resultado
-        caudal_lps = convert_flow_unit(flow, flow_unit, 'L/s')
-        caudal_m3h = convert_flow_unit(flow, flow_unit, 'm³/h')
-        
+    curva = calculate_system_curve_arrays(flows, flow_unit, system_params, usar_cotas=True, usar_lc_d=True)
+    caudales_lps = np.atleast_1d(convert_flow_unit(np.asarray(flows, dtype=float), flow_unit, 'L/s'))
+    caudales_m3h = np.atleast_1d(convert_flow_unit(np.asarray(flows, dtype=float), flow_unit, 'm³/h'))
+    
+    resultados = []
+    for i in range(len(flows)):
         resultados.append({
-            'caudal_lps': caudal_lps,
-            'caudal_m3h': caudal_m3h,
-            'perdida_succion': perdida_total_succion,
-            'perdida_impulsion': perdida_total_impulsion,
-            'adt_total': adt_total,
-            'hf_primaria_succion': hf_primaria_succion,
-            'hf_secundaria_succion': hf_secundaria_succion,
-            'hf_primaria_impulsion': hf_primaria_impulsion,
-            'hf_secundaria_impulsion': hf_secundaria_impulsion
+            'caudal_lps': float(caudales_lps[i]),
+            'caudal_m3h': float(caudales_m3h[i]),
+            'perdida_succion': float(curva['perdida_succion'][i]),
+            'perdida_impulsion': float(curva['perdida_impulsion'][i]),
+            'adt_total': float(curva['adt_total'][i]),
+            'hf_primaria_succion': float(curva['hf_primaria_succion'][i]),
+            'hf_secundaria_succion': float(curva['hf_secundaria_succion'][i]),
+            'hf_primaria_impulsion': float(curva['hf_primaria_impulsion'][i]),
+            'hf_secundaria_impulsion': float(curva['hf_secundaria_impulsion'][i])
         })
     
     return resultados
@@ -799,10 +871,4 @@ def get_accessory_data(accessory_type: str) -> Dict[str, Any]:
     Returns:
         Diccionario con los datos del accesorio o None si no se encuentra
     """
-    for categoria in ["valvulas", "accesorios", "medidores"]:
-        if categoria in ACCESORIOS_DATA:
-            for item in ACCESORIOS_DATA[categoria]:
-                if (item.get("singularidad") == accessory_type or 
-                    item.get("tipo") == accessory_type):
-                    return item
-    return None
\ No newline at end of file
+    return CATALOGO_ACCESORIOS.buscar(accessory_type)
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Incertidumbre de la demanda para el dimensionamiento del tanque (Monte Carlo).
+
+Genera miles de trazas de demanda estocásticas a partir de un perfil base (factores
+horarios repetidos o una serie propia), con variación día a día, días pico y ruido
+horario autocorrelacionado, y calcula para todas a la vez el almacenamiento que exige
+la curva de masas acumuladas (pico secuente). Todo se evalúa por lotes de trazas con arrays 2-D
+(trazas × pasos); no hay bucles por traza.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from scipy.signal import lfilter
+
+SEGUNDOS_DIA = 86400.0
+# Trazas por lote (acota la memoria: 2000 trazas × 30 días horarios ≈ 11 MB por array)
+TRAZAS_POR_LOTE = 2000
+
+
+def _lognormal_unitaria(rng: np.random.Generator, cv: float, forma) -> np.ndarray:
+    """Factores lognormales de media 1 y coeficiente de variación cv"""
+    if cv <= 0:
+        return np.ones(forma)
+    sigma2 = np.log1p(cv ** 2)
+    return rng.lognormal(-0.5 * sigma2, np.sqrt(sigma2), forma)
+
+
+def trazas_demanda(demanda_base_m3s, dt_s: float, n_trazas: int, cv_diario: float = 0.10,
+                   cv_horario: float = 0.05, autocorrelacion: float = 0.7,
+                   multiplicador_pico: float = 1.0, prob_dia_pico: float = 0.0,
+                   rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Trazas de demanda estocásticas (n_trazas × n_pasos) a partir de una serie base.
+
+    Cada día de cada traza se escala por un factor lognormal (media 1, cv_diario); con
+    probabilidad prob_dia_pico el día es además un día pico y se multiplica por
+    multiplicador_pico. Sobre eso se aplica un ruido por paso lognormal (cv_horario) con
+    autocorrelación AR(1) entre pasos consecutivos.
+
+    Args:
+        demanda_base_m3s: Serie determinista de demanda (m³/s)
+        dt_s: Paso de la serie (s)
+        n_trazas: Número de trazas
+        cv_diario, cv_horario: Coeficientes de variación día a día y por paso
+        autocorrelacion: Coeficiente AR(1) del ruido por paso (0 = independiente)
+        multiplicador_pico, prob_dia_pico: Factor y probabilidad de los días pico
+        rng: Generador aleatorio (reproducibilidad)
+
+    Returns:
+        Array (n_trazas, n_pasos) de demanda en m³/s
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    base = np.asarray(demanda_base_m3s, dtype=float)
+    n_pasos = len(base)
+    dia = (np.arange(n_pasos) * dt_s // SEGUNDOS_DIA).astype(int)
+    n_dias = int(dia[-1]) + 1
+
+    factor_dia = _lognormal_unitaria(rng, cv_diario, (n_trazas, n_dias))
+    if prob_dia_pico > 0 and multiplicador_pico != 1.0:
+        factor_dia = np.where(rng.random((n_trazas, n_dias)) < prob_dia_pico,
+                              factor_dia * multiplicador_pico, factor_dia)
+    demanda = base[None, :] * factor_dia[:, dia]
+
+    if cv_horario > 0:
+        # Ruido gaussiano AR(1) de varianza unitaria (filtrado a lo largo de cada traza)
+        # convertido en factor lognormal de media 1
+        rho = float(np.clip(autocorrelacion, 0.0, 0.999))
+        # (condición inicial estacionaria: el paso previo al primero también es N(0, 1))
+        inicial = rho * rng.standard_normal((n_trazas, 1))
+        ruido, _ = lfilter([np.sqrt(1 - rho ** 2)], [1.0, -rho], rng.standard_normal((n_trazas, n_pasos)),
+                           axis=1, zi=inicial)
+        sigma2 = np.log1p(cv_horario ** 2)
+        demanda *= np.exp(np.sqrt(sigma2) * ruido - 0.5 * sigma2)
+    return demanda
+
+
+def almacenamiento_requerido(demanda_m3s: np.ndarray, caudal_bombeo_m3s: float, dt_s: float,
+                             nivel_min_perc: float = 0.0) -> np.ndarray:
+    """
+    Almacenamiento total (m³) que exige cada traza con el método del pico secuente: el
+    tanque parte lleno, la bomba entrega caudal_bombeo_m3s mientras no está lleno y el
+    almacenamiento activo es el mayor descenso de la curva de masas acumuladas
+    (máximo previo menos valor actual). Con un ciclo balanceado coincide con la amplitud
+    de la curva de masas; con bombeo mayor que la demanda media no crece con el horizonte.
+    Se divide por (1 - nivel mínimo).
+
+    Args:
+        demanda_m3s: Trazas de demanda (n_trazas × n_pasos) o una sola serie
+        caudal_bombeo_m3s: Caudal de bombeo (m³/s)
+        dt_s: Paso (s)
+        nivel_min_perc: Reserva mínima como fracción de la capacidad
+    """
+    demanda = np.atleast_2d(np.asarray(demanda_m3s, dtype=float))
+    masa = np.cumsum((caudal_bombeo_m3s - demanda) * dt_s, axis=1)
+    # Máximo previo incluyendo el inicio (masa 0 con el tanque lleno)
+    pico = np.maximum(np.maximum.accumulate(masa, axis=1), 0.0)
+    activo = (pico - masa).max(axis=1)
+    return activo / (1.0 - nivel_min_perc)
+
+
+def dimensionamiento_monte_carlo(demanda_base_m3s, dt_s: float, caudal_bombeo_m3s: float,
+                                 n_trazas: int = 10000, nivel_min_perc: float = 0.0,
+                                 confiabilidades: Sequence[float] = (0.50, 0.90, 0.95, 0.99),
+                                 redondeo_m3: float = 50.0, semilla: Optional[int] = None,
+                                 **kwargs_trazas) -> Dict[str, Any]:
+    """
+    Capacidad del tanque para distintas confiabilidades: la capacidad con confiabilidad p
+    es el percentil p del almacenamiento requerido por las trazas (la fracción p de las
+    trazas no la supera). Las trazas se generan y evalúan por lotes de TRAZAS_POR_LOTE.
+
+    Args:
+        demanda_base_m3s, dt_s: Serie determinista de demanda (m³/s) y su paso (s)
+        caudal_bombeo_m3s: Caudal de bombeo (m³/s)
+        n_trazas: Número de trazas
+        nivel_min_perc: Reserva mínima como fracción de la capacidad
+        confiabilidades: Fracciones de trazas cubiertas
+        redondeo_m3: Múltiplo al que se redondean las capacidades
+        semilla: Semilla del generador aleatorio
+        **kwargs_trazas: Parámetros de trazas_demanda (cv_diario, multiplicador_pico, ...)
+
+    Returns:
+        Diccionario con almacenamiento (m³ de cada traza), capacidades {confiabilidad: m³
+        redondeados}, deterministico (m³ de la serie base), demanda_media_m3s (de cada
+        traza) y n_trazas
+    """
+    rng = np.random.default_rng(semilla)
+    almacenamiento = np.empty(n_trazas)
+    demanda_media = np.empty(n_trazas)
+    for inicio in range(0, n_trazas, TRAZAS_POR_LOTE):
+        fin = min(n_trazas, inicio + TRAZAS_POR_LOTE)
+        lote = trazas_demanda(demanda_base_m3s, dt_s, fin - inicio, rng=rng, **kwargs_trazas)
+        almacenamiento[inicio:fin] = almacenamiento_requerido(lote, caudal_bombeo_m3s, dt_s, nivel_min_perc)
+        demanda_media[inicio:fin] = lote.mean(axis=1)
+
+    redondeo_m3 = redondeo_m3 if redondeo_m3 and redondeo_m3 > 0 else 1.0
+    percentiles = np.quantile(almacenamiento, confiabilidades)
+    capacidades = {float(p): float(max(np.ceil(v / redondeo_m3) * redondeo_m3, redondeo_m3))
+                   for p, v in zip(confiabilidades, percentiles)}
+    return {
+        "almacenamiento": almacenamiento,
+        "capacidades": capacidades,
+        "deterministico": float(almacenamiento_requerido(demanda_base_m3s, caudal_bombeo_m3s, dt_s, nivel_min_perc)[0]),
+        "demanda_media_m3s": demanda_media,
+        "n_trazas": n_trazas
+    }
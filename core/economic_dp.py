@@ -0,0 +1,270 @@
+"""
+Diámetro económico por programación dinámica.
+Para una conducción en serie, la asignación de tuberías de mínimo costo de inversión
+para cada pérdida de carga total es un problema tipo mochila: se resuelve tramo a
+tramo (de aguas abajo hacia la bomba) sobre la pérdida de carga discretizada, y se
+obtiene el frente de Pareto CAPEX vs. OPEX sobre el catálogo real.
+Cada estado guarda la pérdida exacta de su mejor solución parcial (desempate y
+verificación de presiones) y al final todos los estados se re-evalúan con el modelo
+de costos; el resultado es óptimo salvo la discretización de la pérdida de carga.
+Sirve de referencia para calificar los resultados del algoritmo genético.
+"""
+
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from core.calculations import calcular_hf_hazen_williams_array
+from core.genetic_optimizer import SegmentedGeneticOptimizer
+
+
+def _tolerancia(costo_ref: np.ndarray) -> np.ndarray:
+    """Tolerancia relativa para considerar empatados dos costos"""
+    return 1e-9 * np.maximum(np.abs(np.where(np.isfinite(costo_ref), costo_ref, 0.0)), 1.0)
+
+
+def _mejora(costo, hf, costo_ref, hf_ref) -> np.ndarray:
+    """True donde (costo, hf) mejora a la referencia: menor costo o, con el mismo costo, menor pérdida"""
+    tol = _tolerancia(costo_ref)
+    return (costo < costo_ref - tol) | (np.isfinite(costo) & (costo <= costo_ref + tol) & (hf < hf_ref))
+
+
+def _argmin_desempate(costo: np.ndarray, hf: np.ndarray) -> np.ndarray:
+    """Índice (eje 0) de menor costo; entre costos empatados, el de menor pérdida de carga"""
+    minimo = costo.min(axis=0)
+    empate = np.isfinite(costo) & (costo <= minimo + _tolerancia(minimo))
+    return np.argmin(np.where(empate, hf, np.inf), axis=0)
+
+
+class EconomicDiameterDP:
+    """
+    Solver por programación dinámica con las mismas entradas que GeneticOptimizer /
+    SegmentedGeneticOptimizer. Es óptimo sobre la malla de pérdidas de carga (paso dh):
+    dos soluciones en el mismo escalón se distinguen solo por el CAPEX, así que el óptimo
+    verdadero puede ser algo más barato, del orden del OPEX de (n_tramos + 1)·dh.
+
+    Las restricciones son duras: velocidad de succión e impulsión dentro de sus rangos,
+    presión de cada tramo entre presion_minima y su presión nominal, y DN de succión
+    no menor que el del primer tramo de impulsión.
+    """
+
+    def __init__(self,
+                 caudal_lps: float,
+                 long_succion: float,
+                 long_impulsion: float,
+                 h_estatica: float,
+                 años_operacion: int = 20,
+                 costo_kwh: float = 0.12,
+                 horas_dia: float = 12,
+                 tasa_interes: float = 0.05,
+                 materiales_validos: List[str] = ["PVC", "PEAD", "Hierro Dúctil"],
+                 costos_personalizados: Dict[str, Dict[str, float]] = None,
+                 n_tramos: int = 1,
+                 cotas_tramos: List[float] = None,
+                 n_estados: int = 4000,
+                 v_succion: Tuple[float, float] = (0.3, 1.5),
+                 v_impulsion: Tuple[float, float] = (0.5, 2.5),
+                 presion_minima: float = 0.0):
+        """
+        Args:
+            n_tramos, cotas_tramos: Igual que en SegmentedGeneticOptimizer
+            n_estados: Número de niveles de pérdida de carga de la impulsión
+            v_succion, v_impulsion: Rangos de velocidad admisibles (m/s)
+            presion_minima: Presión mínima admisible en los nudos (m)
+            (el resto de argumentos son los de GeneticOptimizer)
+        """
+        # El modelo de costos es el mismo del AG para que la comparación sea directa
+        self.modelo = SegmentedGeneticOptimizer(
+            caudal_lps, long_succion, long_impulsion, h_estatica,
+            años_operacion=años_operacion, costo_kwh=costo_kwh, horas_dia=horas_dia,
+            tasa_interes=tasa_interes, materiales_validos=materiales_validos,
+            costos_personalizados=costos_personalizados,
+            n_tramos=n_tramos, cotas_tramos=cotas_tramos)
+        self.n_estados = int(n_estados)
+        self.v_succion = v_succion
+        self.v_impulsion = v_impulsion
+        self.presion_minima = presion_minima
+        self.resultado = None
+
+    def _opciones_validas(self, rango: Tuple[float, float]) -> np.ndarray:
+        op = self.modelo._opciones
+        v = self.modelo.q_m3s / (np.pi * (op["di_m"] / 2) ** 2)
+        validas = np.flatnonzero((v >= rango[0]) & (v <= rango[1]))
+        if len(validas) == 0:
+            # Ninguna tubería cumple el rango: se usa la de velocidad más cercana
+            centro = 0.5 * (rango[0] + rango[1])
+            validas = np.array([int(np.argmin(np.abs(v - centro)))])
+        return validas
+
+    def solve(self) -> Dict[str, Any]:
+        """
+        Resuelve el problema y devuelve el frente de Pareto.
+
+        Returns:
+            Diccionario con:
+                frente: Lista de soluciones no dominadas (re-evaluadas con el modelo de
+                    costos) ordenadas por CAPEX creciente, cada una con genome, capex,
+                    opex, real_cost, hf_s, hf_d, p_max, p_ratio, suction y tramos (agrupados)
+                optimo: Solución del frente con menor costo total
+                dh: Tamaño del escalón de pérdida de carga (m)
+                evaluaciones: Combinaciones (estado, tubería) evaluadas
+                tiempo_s: Tiempo de cálculo
+        """
+        t0 = time.perf_counter()
+        m = self.modelo
+        m._preparar_tablas()
+        op = m._opciones
+        n = m.n_tramos
+        cotas = m.cotas_tramos
+        L = m._longitud_tramo
+
+        imp = self._opciones_validas(self.v_impulsion)
+        suc = self._opciones_validas(self.v_succion)
+
+        hf_imp = calcular_hf_hazen_williams_array(m.q_m3s, L, op["di_m"][imp], op["c_hw"][imp])
+        hf_suc = calcular_hf_hazen_williams_array(m.q_m3s, m.long_succion, op["di_m"][suc], op["c_hw"][suc])
+        costo_imp = op["costo_m"][imp] * L
+        costo_suc = op["costo_m"][suc] * m.long_succion
+
+        # Discretización de la pérdida de carga de la impulsión
+        hf_max = n * hf_imp.max()
+        dh = max(hf_max, 1e-9) / self.n_estados
+        b_imp = np.rint(hf_imp / dh).astype(int)
+        b_suc = np.rint(hf_suc / dh).astype(int)
+        n_k = n * int(b_imp.max()) + 1
+        k = np.arange(n_k)
+
+        # V[k]: mínimo CAPEX de los tramos aguas abajo con pérdida acumulada k·dh;
+        # H[k]: pérdida exacta de esa solución parcial
+        V = np.full(n_k, np.inf)
+        V[0] = 0.0
+        H = np.zeros(n_k)
+        decisiones = []
+        evaluaciones = 0
+        for j in range(n - 1, -1, -1):
+            idx = k[None, :] - b_imp[:, None]
+            h_abajo = H[np.clip(idx, 0, None)]
+            # Presión en los extremos del tramo j (cota piezométrica = h_estatica + pérdida aguas abajo)
+            p_abajo = m.h_estatica - cotas[j + 1] + h_abajo
+            p_arriba = m.h_estatica - cotas[j] + h_abajo + hf_imp[:, None]
+            admisible = ((idx >= 0) &
+                         (np.maximum(p_abajo, p_arriba) <= op["pn_m"][imp][:, None]) &
+                         (np.minimum(p_abajo, p_arriba) >= self.presion_minima))
+            candidatos = np.where(admisible, V[np.clip(idx, 0, None)] + costo_imp[:, None], np.inf)
+            hf_candidatos = h_abajo + hf_imp[:, None]
+            evaluaciones += candidatos.size
+            if j > 0:
+                eleccion = _argmin_desempate(candidatos, hf_candidatos)
+                decisiones.append(eleccion)
+                V = candidatos[eleccion, k]
+                H = hf_candidatos[eleccion, k]
+        decisiones.reverse()  # decisiones[j - 1] corresponde al tramo j
+
+        # Primer tramo + succión: mínimo acumulado sobre tramos con DN <= DN de succión
+        orden = np.argsort(op["dn_mm"][imp], kind="stable")
+        dn_ordenado = op["dn_mm"][imp][orden]
+        acumulado = np.empty_like(candidatos)
+        acumulado_hf = np.empty_like(candidatos)
+        arg_acumulado = np.empty(candidatos.shape, dtype=int)
+        mejor = np.full(n_k, np.inf)
+        mejor_hf = np.full(n_k, np.inf)
+        arg_mejor = np.zeros(n_k, dtype=int)
+        for fila, o in enumerate(orden):
+            mejora = _mejora(candidatos[o], hf_candidatos[o], mejor, mejor_hf)
+            mejor = np.where(mejora, candidatos[o], mejor)
+            mejor_hf = np.where(mejora, hf_candidatos[o], mejor_hf)
+            arg_mejor = np.where(mejora, o, arg_mejor)
+            acumulado[fila] = mejor
+            acumulado_hf[fila] = mejor_hf
+            arg_acumulado[fila] = arg_mejor
+
+        n_total = n_k + int(b_suc.max())
+        total = np.full(n_total, np.inf)
+        total_hf = np.full(n_total, np.inf)
+        total_s = np.zeros(n_total, dtype=int)
+        total_k = np.zeros(n_total, dtype=int)
+        for s in range(len(suc)):
+            fila = np.searchsorted(dn_ordenado, op["dn_mm"][suc[s]], side="right") - 1
+            if fila < 0:
+                continue
+            valor = acumulado[fila] + costo_suc[s]
+            valor_hf = acumulado_hf[fila] + hf_suc[s]
+            destino = k + b_suc[s]
+            mejora = _mejora(valor, valor_hf, total[destino], total_hf[destino])
+            total[destino[mejora]] = valor[mejora]
+            total_hf[destino[mejora]] = valor_hf[mejora]
+            total_s[destino[mejora]] = s
+            total_k[destino[mejora]] = k[mejora]
+            evaluaciones += n_k
+
+        estados = np.flatnonzero(np.isfinite(total))
+        if len(estados) == 0:
+            self.resultado = {"frente": [], "optimo": None, "dh": dh,
+                              "evaluaciones": evaluaciones, "tiempo_s": time.perf_counter() - t0}
+            return self.resultado
+
+        # Reconstrucción de los genomas de todos los estados (índices del catálogo del modelo)
+        s = total_s[estados]
+        kd = total_k[estados]
+        fila = np.searchsorted(dn_ordenado, op["dn_mm"][suc[s]], side="right") - 1
+        o = arg_acumulado[fila, kd]
+        genomas = [suc[s], imp[o]]
+        kd = kd - b_imp[o]
+        for j in range(1, n):
+            o = decisiones[j - 1][kd]
+            genomas.append(imp[o])
+            kd = kd - b_imp[o]
+        genomas = np.stack(genomas, axis=1)
+
+        # Re-evaluación con el modelo de costos del AG y frente de Pareto con los costos
+        # reales (no con el escalón de pérdida): al crecer el CAPEX solo interesan OPEX menores
+        evaluacion = m.evaluate_population(genomas)
+        orden_capex = np.lexsort((evaluacion["opex"], evaluacion["capex"]))
+        en_frente = []
+        opex_min = np.inf
+        for i in orden_capex:
+            if evaluacion["opex"][i] < opex_min - 1e-9:
+                opex_min = evaluacion["opex"][i]
+                en_frente.append(i)
+
+        frente = []
+        for i in en_frente:
+            genoma = genomas[i]
+            frente.append({
+                "genome": genoma.tolist(),
+                "capex": float(evaluacion["capex"][i]),
+                "opex": float(evaluacion["opex"][i]),
+                "real_cost": float(evaluacion["real_cost"][i]),
+                "hf_s": float(evaluacion["hf_s"][i]),
+                "hf_d": float(evaluacion["hf_d"][i]),
+                "p_max": float(evaluacion["p_max"][i]),
+                "p_ratio": float(evaluacion["p_ratio"][i]),
+                "suction": m.etiqueta_opcion(int(genoma[0])),
+                "tramos": m.describir_tramos(genoma)
+            })
+        frente.sort(key=lambda x: x["capex"])
+        optimo = min(frente, key=lambda x: x["real_cost"])
+
+        self.resultado = {
+            "frente": frente,
+            "optimo": optimo,
+            "dh": dh,
+            "evaluaciones": int(evaluaciones),
+            "tiempo_s": time.perf_counter() - t0
+        }
+        return self.resultado
+
+    def brecha(self, costo: float) -> float:
+        """
+        Brecha relativa de un costo total (p. ej. real_cost del AG) respecto al óptimo de la
+        programación dinámica. 0 = mismo costo; 0.02 = 2% más caro. Puede ser levemente
+        negativa por la discretización de la pérdida de carga (ver la clase) y claramente
+        negativa si la solución comparada viola alguna restricción dura del solver.
+        """
+        if self.resultado is None:
+            self.solve()
+        optimo = self.resultado["optimo"]
+        if optimo is None:
+            return float("nan")
+        return (costo - optimo["real_cost"]) / optimo["real_cost"]
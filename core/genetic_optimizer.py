@@ -1,11 +1,19 @@
 import numpy as np
-import random
 import json
+import math
 import os
 from typing import List, Dict, Any, Tuple
-from core.calculations import calcular_hf_hazen_williams, calculate_diametro_interno_pvc, calculate_diametro_interno_pead
+from core.calculations import calcular_hf_hazen_williams, calcular_hf_hazen_williams_array, calculate_diametro_interno_pvc, calculate_diametro_interno_pead
+from core.surge_screening import cribado_golpe_ariete
+from core.wave_speed import get_wave_speed_service
 
 class GeneticOptimizer:
+    # Resultados por individuo devueltos por evaluate_population
+    CAMPOS_EVALUACION = ("fitness", "cost", "real_cost", "capex", "opex",
+                         "penalty", "v_s", "v_d", "hf_s", "hf_d", "violation")
+    # Genes por individuo: [mat_s, dn_s, mat_d, dn_d]
+    N_GENES = 4
+
     def __init__(self, 
                  caudal_lps: float, 
                  long_succion: float, 
@@ -16,7 +24,8 @@ class GeneticOptimizer:
                  horas_dia: float = 12,
                  tasa_interes: float = 0.05,
                  materiales_validos: List[str] = ["PVC", "PEAD", "Hierro Dúctil"],
-                 costos_personalizados: Dict[str, Dict[str, float]] = None):
+                 costos_personalizados: Dict[str, Dict[str, float]] = None,
+                 seed: int = None):
         
         self.caudal_lps = caudal_lps
         self.q_m3s = caudal_lps / 1000.0
@@ -51,6 +60,18 @@ class GeneticOptimizer:
         self.generations = 50
         self.mutation_rate = 0.1
         self.elitism = 2
+        self.rng = np.random.default_rng(seed)
+        # Velocidad máxima admisible en impulsión (m/s), restricción dura del modo multiobjetivo
+        self.v_max_absoluta = 3.0
+        
+        # Caché de aptitud por genoma y modo de búsqueda
+        # exhaustive: True (siempre), False (nunca) o "auto" (si el espacio
+        # de búsqueda es menor que pop_size × generations)
+        self.cache_max = 4096
+        self.exhaustive = "auto"
+        self._cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def _load_all_db_costs(self) -> Dict[str, Dict[int, float]]:
         """Carga los costos desde los archivos JSON reales"""
@@ -150,141 +171,741 @@ class GeneticOptimizer:
         costo_anual = consumo_anual_kwh * self.costo_kwh
         
         # Valor Presente de OPEX
-        vp_opex = 0
-        for t in range(1, self.años + 1):
-            vp_opex += costo_anual / ((1 + self.tasa_interes) ** t)
-            
-        return vp_opex
+        return costo_anual * self._factor_valor_presente()
 
-    def fitness(self, individual: List[int]) -> float:
-        """Función de aptitud: Inverso del costo total con penalizaciones"""
-        s_mat_idx, s_dn_idx, d_mat_idx, d_dn_idx = individual
+    def _factor_valor_presente(self) -> float:
+        """Factor de valor presente de una anualidad: Σ 1/(1+i)^t, t = 1..años"""
+        t = np.arange(1, self.años + 1, dtype=float)
+        return float(np.sum(1.0 / (1.0 + self.tasa_interes) ** t))
+
+    def _preparar_tablas(self):
+        """
+        Precalcula, una vez por corrida, las tablas (material × DN) de diámetro interno
+        y costo por metro, el coeficiente C por material y el factor de valor presente.
+        """
+        n_mat = len(self.materiales_validos)
+        n_dn = len(self.catalog_dn)
+        self._tabla_di = np.zeros((n_mat, n_dn))
+        self._tabla_costo_m = np.zeros((n_mat, n_dn))
+        for i, mat in enumerate(self.materiales_validos):
+            for j, dn in enumerate(self.catalog_dn):
+                self._tabla_di[i, j] = self._get_internal_diameter(mat, dn)
+                self._tabla_costo_m[i, j] = self._get_pipe_cost_per_m(mat, dn)
+        self._tabla_c = np.array([150.0 if mat in ["PVC", "PEAD"] else 130.0 for mat in self.materiales_validos])
+        self._tabla_dn = np.asarray(self.catalog_dn, dtype=float)
+        self._factor_vp = self._factor_valor_presente()
         
-        s_mat = self.materiales_validos[s_mat_idx]
-        s_dn = self.catalog_dn[s_dn_idx]
-        d_mat = self.materiales_validos[d_mat_idx]
-        d_dn = self.catalog_dn[d_dn_idx]
+        # Las tablas cambiaron: la caché de aptitud deja de ser válida
+        self._reset_cache()
+
+    def evaluate_population(self, population) -> Dict[str, np.ndarray]:
+        """
+        Evalúa toda la población en un solo paso vectorizado.
         
-        # Diámetros internos
-        di_s = self._get_internal_diameter(s_mat, s_dn)
-        di_d = self._get_internal_diameter(d_mat, d_dn)
+        Args:
+            population: Array (n, 4) con genes [mat_s, dn_s, mat_d, dn_d]
+        
+        Returns:
+            Diccionario de arrays (n,): fitness, cost (penalizado), real_cost, capex,
+            opex, penalty, v_s, v_d, hf_s, hf_d y violation (restricciones duras,
+            0 = factible; la usa el modo multiobjetivo)
+        """
+        if not hasattr(self, '_tabla_di'):
+            self._preparar_tablas()
+        pop = np.asarray(population, dtype=int).reshape(-1, 4)
+        s_mat, s_dn, d_mat, d_dn = pop[:, 0], pop[:, 1], pop[:, 2], pop[:, 3]
+        
+        di_s = self._tabla_di[s_mat, s_dn]
+        di_d = self._tabla_di[d_mat, d_dn]
         
         # Velocidades
-        v_s = self.q_m3s / (np.pi * (di_s/2)**2)
-        v_d = self.q_m3s / (np.pi * (di_d/2)**2)
+        v_s = self.q_m3s / (np.pi * (di_s / 2) ** 2)
+        v_d = self.q_m3s / (np.pi * (di_d / 2) ** 2)
+        
+        # CAPEX: tuberías + 30% de accesorios e instalación
+        capex = (self._tabla_costo_m[s_mat, s_dn] * self.long_succion +
+                 self._tabla_costo_m[d_mat, d_dn] * self.long_impulsion) * 1.3
         
-        capex = self.calculate_capex(s_mat, s_dn, d_mat, d_dn)
-        opex = self.calculate_opex(s_mat, s_dn, d_mat, d_dn)
+        # OPEX: energía en valor presente (eficiencia global 70%)
+        hf_s = calcular_hf_hazen_williams_array(self.q_m3s, self.long_succion, di_s, self._tabla_c[s_mat])
+        hf_d = calcular_hf_hazen_williams_array(self.q_m3s, self.long_impulsion, di_d, self._tabla_c[d_mat])
+        adt = self.h_estatica + hf_s + hf_d
+        p_elec = (9.81 * self.caudal_lps * adt) / 1000.0 / 0.70
+        opex = p_elec * self.horas_dia * 365 * self.costo_kwh * self._factor_vp
         
         total_cost = capex + opex
         
         # -- PENALIZACIONES --
-        penalty = 1.0
-        
+        penalty = np.ones(len(pop))
         # Velocidad en succión (Ideal 0.6 - 1.5 m/s)
-        if v_s > 1.5: penalty += (v_s - 1.5) * 10
-        if v_s < 0.3: penalty += (0.3 - v_s) * 2
-            
+        penalty += np.where(v_s > 1.5, (v_s - 1.5) * 10, 0.0)
+        penalty += np.where(v_s < 0.3, (0.3 - v_s) * 2, 0.0)
         # Velocidad en impulsión (Ideal 0.8 - 2.5 m/s)
-        if v_d > 2.5: penalty += (v_d - 2.5) * 10
-        if v_d < 0.5: penalty += (0.5 - v_d) * 2
-        
+        penalty += np.where(v_d > 2.5, (v_d - 2.5) * 10, 0.0)
+        penalty += np.where(v_d < 0.5, (0.5 - v_d) * 2, 0.0)
         # Penalizar diámetros de succión menores que impulsión (mala práctica)
-        if s_dn < d_dn: penalty += 5.0
-            
-        return 1.0 / (total_cost * penalty)
+        penalty += np.where(self._tabla_dn[s_dn] < self._tabla_dn[d_dn], 5.0, 0.0)
+        
+        # Restricciones duras: succión no menor que impulsión y velocidades máximas
+        violation = (np.maximum(self._tabla_dn[d_dn] - self._tabla_dn[s_dn], 0.0) / self._tabla_dn[d_dn] +
+                     np.maximum(v_s - 1.5, 0.0) + np.maximum(v_d - self.v_max_absoluta, 0.0))
+        
+        cost = total_cost * penalty
+        return {
+            "fitness": 1.0 / cost,
+            "cost": cost,
+            "real_cost": total_cost,
+            "capex": capex,
+            "opex": opex,
+            "penalty": penalty,
+            "v_s": v_s,
+            "v_d": v_d,
+            "hf_s": hf_s,
+            "hf_d": hf_d,
+            "violation": violation
+        }
 
-    def optimize(self):
-        """Ejecuta el ciclo evolutivo"""
-        # Población inicial: [mat_s, dn_s, mat_d, dn_d]
-        population = []
-        for _ in range(self.pop_size):
-            ind = [
-                random.randint(0, len(self.materiales_validos) - 1),
-                random.randint(0, len(self.catalog_dn) - 1),
-                random.randint(0, len(self.materiales_validos) - 1),
-                random.randint(0, len(self.catalog_dn) - 1)
-            ]
-            population.append(ind)
-            
+    def evaluate_population_cached(self, population) -> Dict[str, np.ndarray]:
+        """
+        Igual que evaluate_population, pero reutiliza los resultados ya calculados
+        para cada genoma (clave: tupla de genes). Solo los genomas nuevos se evalúan,
+        en un único paso vectorizado. La caché está acotada a cache_max genomas
+        (búfer circular: se descartan los más antiguos).
+        """
+        if not hasattr(self, '_factor_vp'):
+            self._preparar_tablas()
+        pop = np.asarray(population, dtype=int).reshape(-1, self.N_GENES)
+        unicos, inverso = np.unique(pop, axis=0, return_inverse=True)
+        claves = [tuple(fila) for fila in unicos.tolist()]
+        
+        if not hasattr(self, '_cache_valores') or self._cache_valores.shape[0] != self.cache_max:
+            self._reset_cache()
+        
+        slots = np.array([self._cache.get(clave, -1) for clave in claves], dtype=int)
+        faltantes = slots < 0
+        valores = np.empty((len(unicos), len(self.CAMPOS_EVALUACION)))
+        valores[~faltantes] = self._cache_valores[slots[~faltantes]]
+        
+        n_faltantes = int(faltantes.sum())
+        self.cache_misses += n_faltantes
+        self.cache_hits += len(pop) - n_faltantes
+        
+        if n_faltantes:
+            nuevos = self.evaluate_population(unicos[faltantes])
+            valores[faltantes] = np.column_stack([nuevos[c] for c in self.CAMPOS_EVALUACION])
+            for i in np.flatnonzero(faltantes):
+                slot = self._cache_siguiente
+                anterior = self._cache_slot_clave[slot]
+                if anterior is not None:
+                    del self._cache[anterior]
+                self._cache[claves[i]] = slot
+                self._cache_slot_clave[slot] = claves[i]
+                self._cache_valores[slot] = valores[i]
+                self._cache_siguiente = (slot + 1) % self.cache_max
+        
+        valores = valores[inverso.ravel()]
+        return {campo: valores[:, j] for j, campo in enumerate(self.CAMPOS_EVALUACION)}
+
+    def _reset_cache(self):
+        self._cache = {}
+        self._cache_valores = np.empty((self.cache_max, len(self.CAMPOS_EVALUACION)))
+        self._cache_slot_clave = [None] * self.cache_max
+        self._cache_siguiente = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _limites_genes(self) -> np.ndarray:
+        """Número de valores posibles de cada gen"""
+        n_mat = len(self.materiales_validos)
+        n_dn = len(self.catalog_dn)
+        return np.array([n_mat, n_dn, n_mat, n_dn])
+
+    def search_space_size(self) -> int:
+        """Número de genomas distintos posibles"""
+        return math.prod(int(n) for n in self._limites_genes())
+
+    def _use_exhaustive(self) -> bool:
+        if self.exhaustive == "auto":
+            return self.search_space_size() <= self.pop_size * self.generations
+        return bool(self.exhaustive)
+
+    def _history_entry(self, gen: int, individual, evaluacion: Dict[str, np.ndarray], idx: int, modo: str) -> Dict[str, Any]:
+        s_mat = self.materiales_validos[individual[0]]
+        s_dn = self.catalog_dn[individual[1]]
+        d_mat = self.materiales_validos[individual[2]]
+        d_dn = self.catalog_dn[individual[3]]
+        return {
+            "gen": gen,
+            "fitness": float(evaluacion["fitness"][idx]),
+            "cost": float(evaluacion["cost"][idx]), # Costo penalizado
+            "real_cost": float(evaluacion["real_cost"][idx]),
+            "capex": float(evaluacion["capex"][idx]),
+            "opex": float(evaluacion["opex"][idx]),
+            "suction": f"{s_mat} DN{s_dn}",
+            "discharge": f"{d_mat} DN{d_dn}",
+            "mode": modo,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+    def optimize_exhaustive(self):
+        """Enumera y evalúa todo el espacio de búsqueda (óptimo garantizado)"""
+        self._preparar_tablas()
+        limites = self._limites_genes()
+        todos = np.indices(limites).reshape(len(limites), -1).T
+        evaluacion = self.evaluate_population(todos)
+        self.cache_misses += len(todos)
+        best_idx = int(np.argmax(evaluacion["fitness"]))
+        best_ind = todos[best_idx]
+        history = [self._history_entry(0, best_ind, evaluacion, best_idx, "exhaustive")]
+        return history, best_ind.tolist()
+
+    def fitness(self, individual: List[int]) -> float:
+        """Función de aptitud: Inverso del costo total con penalizaciones"""
+        return float(self.evaluate_population([individual])["fitness"][0])
+
+    def _random_population(self, n: int) -> np.ndarray:
+        """Población aleatoria: [mat_s, dn_s, mat_d, dn_d]"""
+        return self.rng.integers(0, self._limites_genes(), size=(n, self.N_GENES))
+
+    def _evolve(self, population: np.ndarray, n_generaciones: int, gen_inicial: int = 0):
+        """Evoluciona la población n_generaciones y devuelve (población, historial)"""
         history = []
         
-        for gen in range(self.generations):
-            # Evaluar fitness
-            scores = [self.fitness(ind) for ind in population]
+        for gen in range(gen_inicial, gen_inicial + n_generaciones):
+            # Evaluar fitness de toda la población
+            evaluacion = self.evaluate_population_cached(population)
+            scores = evaluacion["fitness"]
             
             # Guardar mejor de la generación
-            best_idx = np.argmax(scores)
-            best_fitness = scores[best_idx]
-            best_ind = population[best_idx]
+            best_idx = int(np.argmax(scores))
+            history.append(self._history_entry(gen, population[best_idx], evaluacion, best_idx, "genetic"))
             
-            # Convertir fitness a costo para el historial
-            s_mat = self.materiales_validos[best_ind[0]]
-            s_dn = self.catalog_dn[best_ind[1]]
-            d_mat = self.materiales_validos[best_ind[2]]
-            d_dn = self.catalog_dn[best_ind[3]]
+            population = self._next_generation(population, scores)
             
-            best_capex = self.calculate_capex(s_mat, s_dn, d_mat, d_dn)
-            best_opex = self.calculate_opex(s_mat, s_dn, d_mat, d_dn)
-            
-            history.append({
-                "gen": gen,
-                "fitness": best_fitness,
-                "cost": 1.0 / best_fitness, # Costo penalizado
-                "real_cost": best_capex + best_opex,
-                "capex": best_capex,
-                "opex": best_opex,
-                "suction": f"{s_mat} DN{s_dn}",
-                "discharge": f"{d_mat} DN{d_dn}"
-            })
-            
-            # Selección (Torneo)
-            new_population = []
+        return population, history
+
+    def optimize(self):
+        """
+        Ejecuta el ciclo evolutivo (evaluación vectorizada y con caché por genoma).
+        Si el espacio de búsqueda es menor que pop_size × generations se enumera
+        completo (ver exhaustive), lo que garantiza el óptimo en menos evaluaciones.
+        """
+        if self._use_exhaustive():
+            return self.optimize_exhaustive()
+        
+        self._preparar_tablas()
+        population, history = self._evolve(self._random_population(self.pop_size), self.generations)
+        return history, population[0].tolist()
+
+    # -- MODO MULTIOBJETIVO (NSGA-II) --
+
+    def objetivos(self, evaluacion: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Objetivos a minimizar en el modo multiobjetivo: CAPEX, OPEX en valor presente
+        y velocidad máxima de impulsión (la sobrepresión de Joukowsky ΔH = a·v/g
+        crece con ella, por lo que mide el riesgo de golpe de ariete).
+        """
+        return np.column_stack([evaluacion["capex"], evaluacion["opex"], evaluacion["v_d"]])
+
+    @staticmethod
+    def _non_dominated_sort(F: np.ndarray, violation: np.ndarray) -> np.ndarray:
+        """
+        Rango de Pareto de cada individuo (0 = frente no dominado), con la regla de
+        restricciones de Deb: un factible domina a un no factible y, entre no
+        factibles, domina el de menor violación.
+        """
+        domina = ((F[:, None, :] <= F[None, :, :]).all(axis=2) &
+                  (F[:, None, :] < F[None, :, :]).any(axis=2))
+        factible = violation <= 0
+        domina = np.where(factible[:, None] & factible[None, :], domina,
+                          violation[:, None] < violation[None, :])
+        
+        rango = np.full(len(F), -1)
+        n_dominadores = domina.sum(axis=0)
+        restantes = np.ones(len(F), dtype=bool)
+        actual = 0
+        while restantes.any():
+            frente = restantes & (n_dominadores == 0)
+            rango[frente] = actual
+            restantes &= ~frente
+            n_dominadores = n_dominadores - domina[frente].sum(axis=0)
+            actual += 1
+        return rango
+
+    @staticmethod
+    def _crowding_distance(F: np.ndarray, rango: np.ndarray) -> np.ndarray:
+        """Distancia de hacinamiento dentro de cada frente (extremos = infinito)"""
+        distancia = np.zeros(len(F))
+        for r in np.unique(rango):
+            idx = np.flatnonzero(rango == r)
+            if len(idx) <= 2:
+                distancia[idx] = np.inf
+                continue
+            Ff = F[idx]
+            orden = np.argsort(Ff, axis=0)
+            ordenado = np.take_along_axis(Ff, orden, axis=0)
+            rango_obj = ordenado[-1] - ordenado[0]
+            rango_obj[rango_obj == 0] = 1.0
+            aporte = np.vstack([np.full((1, F.shape[1]), np.inf),
+                                (ordenado[2:] - ordenado[:-2]) / rango_obj,
+                                np.full((1, F.shape[1]), np.inf)])
+            contribucion = np.empty_like(Ff)
+            np.put_along_axis(contribucion, orden, aporte, axis=0)
+            distancia[idx] = contribucion.sum(axis=1)
+        return distancia
+
+    def _nsga2_rank(self, evaluacion: Dict[str, np.ndarray]):
+        """Rango, distancia de hacinamiento y posición global (0 = mejor) de cada individuo"""
+        F = self.objetivos(evaluacion)
+        rango = self._non_dominated_sort(F, evaluacion["violation"])
+        crowding = self._crowding_distance(F, rango)
+        orden = np.lexsort((-crowding, rango))
+        posicion = np.empty(len(F), dtype=int)
+        posicion[orden] = np.arange(len(F))
+        return rango, posicion
+
+    def _nsga2_entry(self, gen: int, population: np.ndarray, evaluacion: Dict[str, np.ndarray], rango: np.ndarray):
+        """Entrada de historial: la solución de menor costo total del frente no dominado"""
+        frente = np.flatnonzero(rango == 0)
+        idx = int(frente[np.argmin(evaluacion["real_cost"][frente])])
+        entrada = self._history_entry(gen, population[idx], evaluacion, idx, "nsga2")
+        entrada["front_size"] = len(frente)
+        return entrada
+
+    def optimize_nsga2(self):
+        """
+        Modo multiobjetivo NSGA-II (ordenamiento no dominado + distancia de hacinamiento),
+        vectorizado sobre la población. En lugar de sumar penalizaciones, optimiza a la
+        vez CAPEX, OPEX y velocidad (ver objetivos) y trata como restricciones las
+        reglas duras (campo violation).
+        
+        Returns:
+            Tupla (historial, frente). El frente es la lista de soluciones no dominadas
+            distintas de la población final, ordenadas por CAPEX; cada una es una
+            entrada de historial con además genome, v_d y violation.
+        """
+        self._preparar_tablas()
+        population = self._random_population(self.pop_size)
+        evaluacion = self.evaluate_population_cached(population)
+        rango, posicion = self._nsga2_rank(evaluacion)
+        history = []
+        
+        for gen in range(self.generations):
+            history.append(self._nsga2_entry(gen, population, evaluacion, rango))
             
-            # Elitismo
-            sorted_indices = np.argsort(scores)[::-1]
-            for i in range(self.elitism):
-                new_population.append(population[sorted_indices[i]])
+            # Descendencia por torneo binario sobre (rango, hacinamiento)
+            hijos = self._offspring(population, -posicion.astype(float), self.pop_size, k=2)
             
-            while len(new_population) < self.pop_size:
-                # Torneo
-                p1 = self._tournament(population, scores)
-                p2 = self._tournament(population, scores)
-                
-                # Cruce (un punto)
-                c1, c2 = self._crossover(p1, p2)
+            # Supervivencia: los pop_size mejores de padres + hijos
+            union = np.vstack([population, hijos])
+            evaluacion_union = self.evaluate_population_cached(union)
+            _, posicion_union = self._nsga2_rank(evaluacion_union)
+            sobreviven = np.argsort(posicion_union)[:self.pop_size]
+            population = union[sobreviven]
+            evaluacion = {campo: valores[sobreviven] for campo, valores in evaluacion_union.items()}
+            rango, posicion = self._nsga2_rank(evaluacion)
+        
+        history.append(self._nsga2_entry(self.generations, population, evaluacion, rango))
+        
+        frente = []
+        vistos = set()
+        for idx in np.flatnonzero(rango == 0):
+            clave = tuple(population[idx].tolist())
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+            entrada = self._history_entry(self.generations, population[idx], evaluacion, int(idx), "nsga2")
+            entrada["genome"] = list(clave)
+            entrada["v_d"] = float(evaluacion["v_d"][idx])
+            entrada["violation"] = float(evaluacion["violation"][idx])
+            frente.append(entrada)
+        frente.sort(key=lambda x: x["capex"])
+        return history, frente
+
+    def optimize_islands(self, n_islands: int = 4, migration_interval: int = 10,
+                         n_migrants: int = 2, max_workers: int = None,
+                         parallel: bool = True, seed: int = None):
+        """
+        Modelo de islas: varias subpoblaciones evolucionan en paralelo
+        (ProcessPoolExecutor) y cada migration_interval generaciones los mejores
+        n_migrants de cada isla reemplazan a los peores de la siguiente (anillo).
+        
+        Cada isla recibe una semilla derivada de `seed` (SeedSequence.spawn), y la
+        migración se hace siempre en el mismo orden, por lo que el resultado es
+        reproducible e independiente de cómo se repartan los procesos.
+        
+        Args:
+            n_islands: Número de islas (cada una con pop_size individuos)
+            migration_interval: Generaciones entre migraciones
+            n_migrants: Individuos que migran de cada isla
+            max_workers: Procesos del pool (por defecto uno por isla)
+            parallel: Si False, las islas se ejecutan en el proceso actual
+            seed: Semilla base del experimento
+        
+        Returns:
+            Tupla (historial combinado, mejor individuo). Cada entrada del historial
+            corresponde a la mejor isla de esa generación (clave "island").
+        """
+        import copy
+        
+        self._preparar_tablas()
+        semillas = np.random.SeedSequence(seed).spawn(n_islands)
+        islas = []
+        for semilla in semillas:
+            isla = copy.deepcopy(self)
+            isla.rng = np.random.default_rng(semilla)
+            islas.append(isla)
+        poblaciones = [isla._random_population(self.pop_size) for isla in islas]
+        historiales = [[] for _ in islas]
+        
+        executor = None
+        if parallel and n_islands > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            try:
+                executor = ProcessPoolExecutor(max_workers=max_workers or n_islands)
+            except (OSError, NotImplementedError) as e:
+                print(f"Modelo de islas sin multiproceso: {e}")
+        
+        try:
+            gen = 0
+            while gen < self.generations:
+                n_gen = min(migration_interval, self.generations - gen)
+                tareas = [(isla, poblacion, n_gen, gen) for isla, poblacion in zip(islas, poblaciones)]
+                if executor is not None:
+                    try:
+                        resultados = list(executor.map(_evolve_island, *zip(*tareas)))
+                    except Exception as e:
+                        # Pool roto (p. ej. spawn sin __main__ importable): continuar en serie
+                        print(f"Modelo de islas: fallo del pool de procesos ({e}), se continúa en serie")
+                        executor.shutdown(cancel_futures=True)
+                        executor = None
+                        resultados = [_evolve_island(*tarea) for tarea in tareas]
+                else:
+                    resultados = [_evolve_island(*tarea) for tarea in tareas]
                 
-                # Mutación
-                c1 = self._mutate(c1)
-                c2 = self._mutate(c2)
+                islas = [r[0] for r in resultados]
+                poblaciones = [r[1] for r in resultados]
+                for i, r in enumerate(resultados):
+                    historiales[i].extend(r[2])
+                gen += n_gen
                 
-                new_population.append(c1)
-                if len(new_population) < self.pop_size:
-                    new_population.append(c2)
-            
-            population = new_population
-            
-        return history, population[0]
+                if gen < self.generations and n_islands > 1 and n_migrants > 0:
+                    poblaciones = self._migrate(islas, poblaciones, n_migrants)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        # Historial combinado: la mejor isla en cada generación
+        history = []
+        for entradas in zip(*historiales):
+            idx = int(np.argmax([e["fitness"] for e in entradas]))
+            entrada = dict(entradas[idx])
+            entrada["island"] = idx
+            entrada["mode"] = "islands"
+            entrada["cache_hits"] = sum(e["cache_hits"] for e in entradas)
+            entrada["cache_misses"] = sum(e["cache_misses"] for e in entradas)
+            history.append(entrada)
+        
+        # Mejor individuo final entre todas las islas
+        finales = [isla.evaluate_population_cached(p)["fitness"] for isla, p in zip(islas, poblaciones)]
+        mejor_isla = int(np.argmax([f.max() for f in finales]))
+        best_ind = poblaciones[mejor_isla][int(np.argmax(finales[mejor_isla]))]
+        return history, best_ind.tolist()
 
-    def _tournament(self, pop, scores, k=3):
-        selection = random.sample(range(len(pop)), k)
-        best = selection[0]
-        for i in selection[1:]:
-            if scores[i] > scores[best]:
-                best = i
-        return pop[best].copy()
+    @staticmethod
+    def _migrate(islas, poblaciones, n_migrants: int):
+        """Migración en anillo: los mejores de la isla i sustituyen a los peores de la isla i+1"""
+        scores = [isla.evaluate_population_cached(p)["fitness"] for isla, p in zip(islas, poblaciones)]
+        migrantes = [p[np.argsort(sc)[::-1][:n_migrants]] for p, sc in zip(poblaciones, scores)]
+        nuevas = []
+        for i, (p, sc) in enumerate(zip(poblaciones, scores)):
+            p = p.copy()
+            peores = np.argsort(sc)[:n_migrants]
+            p[peores] = migrantes[i - 1]
+            nuevas.append(p)
+        return nuevas
+
+    def _next_generation(self, population: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """Elitismo + torneo + cruce de un punto + mutación, vectorizados"""
+        elite = population[np.argsort(scores)[::-1][:self.elitism]]
+        hijos = self._offspring(population, scores, self.pop_size - self.elitism)
+        return np.vstack([elite, hijos])
+
+    def _offspring(self, population: np.ndarray, scores: np.ndarray, n_hijos: int, k: int = 3) -> np.ndarray:
+        """n_hijos descendientes por torneo (de k), cruce de un punto y mutación"""
+        # Parejas de padres por torneo
+        n_parejas = (n_hijos + 1) // 2
+        p1 = population[self._tournament(scores, n_parejas, k)]
+        p2 = population[self._tournament(scores, n_parejas, k)]
+        
+        # Cruce (un punto)
+        c1, c2 = self._crossover(p1, p2)
+        hijos = np.empty((2 * n_parejas, population.shape[1]), dtype=population.dtype)
+        hijos[0::2] = c1
+        hijos[1::2] = c2
+        
+        # Mutación
+        return self._mutate(hijos[:n_hijos])
+
+    def _tournament(self, scores, n, k=3):
+        """Selecciona n índices, cada uno el mejor de k candidatos al azar"""
+        candidatos = self.rng.integers(0, len(scores), size=(n, k))
+        ganador = np.argmax(scores[candidatos], axis=1)
+        return candidatos[np.arange(n), ganador]
 
     def _crossover(self, p1, p2):
-        point = random.randint(1, 3)
-        c1 = p1[:point] + p2[point:]
-        c2 = p2[:point] + p1[point:]
+        n_genes = p1.shape[1]
+        point = self.rng.integers(1, n_genes, size=(len(p1), 1))
+        toma_p1 = np.arange(n_genes)[None, :] < point
+        c1 = np.where(toma_p1, p1, p2)
+        c2 = np.where(toma_p1, p2, p1)
         return c1, c2
 
-    def _mutate(self, ind):
-        for i in range(len(ind)):
-            if random.random() < self.mutation_rate:
-                if i in [0, 2]: # Materiales
-                    ind[i] = random.randint(0, len(self.materiales_validos) - 1)
-                else: # Diámetros
-                    ind[i] = random.randint(0, len(self.catalog_dn) - 1)
-        return ind
+    def _mutate(self, hijos):
+        muta = self.rng.random(hijos.shape) < self.mutation_rate
+        # Materiales en genes 0 y 2, diámetros en genes 1 y 3
+        limites = self._limites_genes()
+        nuevos = (self.rng.random(hijos.shape) * limites).astype(int)
+        return np.where(muta, nuevos, hijos)
+
+
+class SegmentedGeneticOptimizer(GeneticOptimizer):
+    """
+    Variante telescópica: la impulsión se divide en n_tramos tramos de igual
+    longitud y cada gen elige una tubería real del catálogo (material, serie/clase
+    y DN de las tablas PVC, PEAD y Hierro Dúctil).
+    Genoma: [opción_succión, opción_tramo_1, ..., opción_tramo_N], índices sobre
+    el catálogo ordenado por diámetro interno.
+    Cada tramo se verifica contra su presión nominal usando la línea de gradiente
+    hidráulico local.
+    """
+    CAMPOS_EVALUACION = GeneticOptimizer.CAMPOS_EVALUACION + ("p_max", "p_ratio", "p_ratio_ariete")
+
+    def __init__(self, *args, n_tramos: int = 10, cotas_tramos: List[float] = None,
+                 v_min_catalogo: float = 0.3, v_max_catalogo: float = 3.0,
+                 penalizacion_cambio: float = 0.01, verificar_ariete: bool = False, **kwargs):
+        """
+        Args:
+            n_tramos: Número de tramos de la impulsión
+            cotas_tramos: Cotas (m, relativas a la bomba) de los n_tramos + 1 nudos;
+                por defecto perfil lineal de 0 a h_estatica
+            v_min_catalogo, v_max_catalogo: Rango de velocidad (m/s) para preseleccionar
+                las tuberías del catálogo que entran en la búsqueda
+            penalizacion_cambio: Penalización por cada cambio de tubería entre tramos
+            verificar_ariete: Penalizar los tramos cuya presión con el golpe de ariete por
+                parada de bomba (cribado de Mendiluce) supera su presión nominal
+            (el resto de argumentos son los de GeneticOptimizer)
+        """
+        super().__init__(*args, **kwargs)
+        self.n_tramos = int(n_tramos)
+        self.N_GENES = 1 + self.n_tramos
+        if cotas_tramos is None:
+            cotas_tramos = np.linspace(0.0, self.h_estatica, self.n_tramos + 1)
+        self.cotas_tramos = np.asarray(cotas_tramos, dtype=float)
+        if len(self.cotas_tramos) != self.n_tramos + 1:
+            raise ValueError("cotas_tramos debe tener n_tramos + 1 valores")
+        self.v_min_catalogo = v_min_catalogo
+        self.v_max_catalogo = v_max_catalogo
+        self.penalizacion_cambio = penalizacion_cambio
+        self.verificar_ariete = verificar_ariete
+        self.pop_size = 150
+        self.generations = 400
+        # Del orden de 1.5 genes mutados por individuo
+        self.mutation_rate = min(0.2, 1.5 / self.N_GENES)
+
+    def _preparar_tablas(self):
+        """Carga el catálogo real una vez y lo reduce a las tuberías con velocidad razonable"""
+        from core.pipe_catalog import cargar_catalogo_tuberias, factor_masa
+        
+        catalogo = cargar_catalogo_tuberias(self.materiales_validos)
+        catalogo["factor_masa"] = factor_masa(catalogo)
+        v = self.q_m3s / (np.pi * (catalogo["di_m"] / 2) ** 2)
+        validas = (v >= self.v_min_catalogo) & (v <= self.v_max_catalogo)
+        if not validas.any():
+            validas = np.ones(len(v), dtype=bool)
+        self._opciones = {campo: valores[validas] for campo, valores in catalogo.items()}
+        
+        # Costo por metro: tabla real si lo tiene, si no el modelo de potencia por DN escalado
+        # con la masa de la serie/clase (las tablas actuales no traen costos)
+        costo = self._opciones["costo_m"].copy()
+        for i in np.flatnonzero(costo <= 0):
+            costo[i] = (self._get_pipe_cost_per_m(self._opciones["material"][i], self._opciones["dn_mm"][i]) *
+                        self._opciones["factor_masa"][i])
+        self._opciones["costo_m"] = costo
+        
+        # Celeridad de cada tubería (tabla de celeridades y espesor del catálogo)
+        servicio = get_wave_speed_service()
+        celeridad = np.zeros(len(costo))
+        for material in np.unique(self._opciones["material"]):
+            filas = self._opciones["material"] == material
+            celeridad[filas] = servicio.celeridad(material, self._opciones["di_m"][filas],
+                                                  self._opciones["espesor_mm"][filas] / 1000.0)
+        self._opciones["celeridad"] = celeridad
+        
+        self._longitud_tramo = self.long_impulsion / self.n_tramos
+        self._factor_vp = self._factor_valor_presente()
+        self._reset_cache()
+
+    def _limites_genes(self) -> np.ndarray:
+        if not hasattr(self, '_opciones'):
+            self._preparar_tablas()
+        return np.full(self.N_GENES, len(self._opciones["di_m"]))
+
+    def evaluate_population(self, population) -> Dict[str, np.ndarray]:
+        """
+        Evalúa toda la población de impulsiones telescópicas en un solo paso.
+        
+        Args:
+            population: Array (n, 1 + n_tramos) de índices del catálogo
+        
+        Returns:
+            Los campos de GeneticOptimizer.evaluate_population (v_d es la velocidad
+            máxima y hf_d la pérdida total de la impulsión) más p_max (presión máxima,
+            m), p_ratio (máximo de presión / presión nominal entre los tramos) y
+            p_ratio_ariete (ídem sumando la sobrepresión de Mendiluce de cada tramo)
+        """
+        if not hasattr(self, '_opciones'):
+            self._preparar_tablas()
+        op = self._opciones
+        pop = np.asarray(population, dtype=int).reshape(-1, self.N_GENES)
+        succion, tramos = pop[:, 0], pop[:, 1:]
+        
+        di_s = op["di_m"][succion]
+        di_t = op["di_m"][tramos]
+        v_s = self.q_m3s / (np.pi * (di_s / 2) ** 2)
+        v_t = self.q_m3s / (np.pi * (di_t / 2) ** 2)
+        
+        capex = (op["costo_m"][succion] * self.long_succion +
+                 op["costo_m"][tramos].sum(axis=1) * self._longitud_tramo) * 1.3
+        
+        hf_s = calcular_hf_hazen_williams_array(self.q_m3s, self.long_succion, di_s, op["c_hw"][succion])
+        hf_t = calcular_hf_hazen_williams_array(self.q_m3s, self._longitud_tramo, di_t, op["c_hw"][tramos])
+        hf_d = hf_t.sum(axis=1)
+        adt = self.h_estatica + hf_s + hf_d
+        p_elec = (9.81 * self.caudal_lps * adt) / 1000.0 / 0.70
+        opex = p_elec * self.horas_dia * 365 * self.costo_kwh * self._factor_vp
+        total_cost = capex + opex
+        
+        # Línea de gradiente: cota piezométrica en cada nudo de la impulsión
+        # (arranca en h_estatica + hf_d a la salida de la bomba)
+        hf_acum = np.concatenate([np.zeros((len(pop), 1)), np.cumsum(hf_t, axis=1)], axis=1)
+        piezometrica = (self.h_estatica + hf_d)[:, None] - hf_acum
+        presion = piezometrica - self.cotas_tramos[None, :]
+        # Cada tramo soporta la mayor presión de sus dos extremos
+        p_tramo = np.maximum(presion[:, :-1], presion[:, 1:])
+        p_ratio_tramo = p_tramo / op["pn_m"][tramos]
+        # Golpe de ariete por parada de bomba: sobrepresión de Mendiluce con la
+        # celeridad y la velocidad de cada tramo sobre toda la impulsión
+        ariete = cribado_golpe_ariete(self.long_impulsion, v_t, adt[:, None], celeridad=op["celeridad"][tramos])
+        p_ratio_ariete = (p_tramo + ariete["sobrepresion"]) / op["pn_m"][tramos]
+        
+        # -- PENALIZACIONES --
+        penalty = np.ones(len(pop))
+        penalty += np.where(v_s > 1.5, (v_s - 1.5) * 10, 0.0)
+        penalty += np.where(v_s < 0.3, (0.3 - v_s) * 2, 0.0)
+        # Velocidad en impulsión: promedio de los tramos
+        penalty += np.where(v_t > 2.5, (v_t - 2.5) * 10, 0.0).mean(axis=1)
+        penalty += np.where(v_t < 0.5, (0.5 - v_t) * 2, 0.0).mean(axis=1)
+        penalty += np.where(op["dn_mm"][succion] < op["dn_mm"][tramos[:, 0]], 5.0, 0.0)
+        # Clase de presión insuficiente en algún tramo
+        penalty += np.maximum(p_ratio_tramo - 1.0, 0.0).sum(axis=1) * 10
+        # Presiones negativas (la línea de gradiente corta el perfil)
+        penalty += np.maximum(-presion, 0.0).max(axis=1) * 0.5
+        # Cada cambio de tubería entre tramos consecutivos
+        penalty += (tramos[:, 1:] != tramos[:, :-1]).sum(axis=1) * self.penalizacion_cambio
+        exceso_ariete = np.maximum(p_ratio_ariete - 1.0, 0.0).sum(axis=1) if self.verificar_ariete else 0.0
+        penalty += exceso_ariete * 10
+        
+        dn_s = op["dn_mm"][succion]
+        dn_d = op["dn_mm"][tramos[:, 0]]
+        violation = (np.maximum(p_ratio_tramo - 1.0, 0.0).sum(axis=1) +
+                     np.maximum(-presion, 0.0).max(axis=1) / 10.0 +
+                     np.maximum(dn_d - dn_s, 0.0) / dn_d +
+                     np.maximum(v_s - 1.5, 0.0) +
+                     np.maximum(v_t.max(axis=1) - self.v_max_absoluta, 0.0) +
+                     exceso_ariete)
+        
+        cost = total_cost * penalty
+        return {
+            "fitness": 1.0 / cost,
+            "cost": cost,
+            "real_cost": total_cost,
+            "capex": capex,
+            "opex": opex,
+            "penalty": penalty,
+            "v_s": v_s,
+            "v_d": v_t.max(axis=1),
+            "hf_s": hf_s,
+            "hf_d": hf_d,
+            "violation": violation,
+            "p_max": presion.max(axis=1),
+            "p_ratio": p_ratio_tramo.max(axis=1),
+            "p_ratio_ariete": p_ratio_ariete.max(axis=1)
+        }
+
+    def etiqueta_opcion(self, idx: int) -> str:
+        op = self._opciones
+        return f"{op['material'][idx]} {op['serie'][idx]} DN{int(op['dn_mm'][idx])}"
+
+    def describir_tramos(self, individual) -> List[Dict[str, Any]]:
+        """Agrupa los tramos consecutivos con la misma tubería: [{tuberia, tramos, longitud_m}]"""
+        grupos = []
+        for idx in list(individual)[1:]:
+            etiqueta = self.etiqueta_opcion(int(idx))
+            if grupos and grupos[-1]["tuberia"] == etiqueta:
+                grupos[-1]["tramos"] += 1
+            else:
+                grupos.append({"tuberia": etiqueta, "tramos": 1})
+        for grupo in grupos:
+            grupo["longitud_m"] = grupo["tramos"] * self.long_impulsion / self.n_tramos
+        return grupos
+
+    def _history_entry(self, gen: int, individual, evaluacion: Dict[str, np.ndarray], idx: int, modo: str) -> Dict[str, Any]:
+        grupos = self.describir_tramos(individual)
+        return {
+            "gen": gen,
+            "fitness": float(evaluacion["fitness"][idx]),
+            "cost": float(evaluacion["cost"][idx]),
+            "real_cost": float(evaluacion["real_cost"][idx]),
+            "capex": float(evaluacion["capex"][idx]),
+            "opex": float(evaluacion["opex"][idx]),
+            "suction": self.etiqueta_opcion(int(individual[0])),
+            "discharge": " | ".join(f"{g['tuberia']} ({g['longitud_m']:.0f} m)" for g in grupos),
+            "p_max": float(evaluacion["p_max"][idx]),
+            "p_ratio": float(evaluacion["p_ratio"][idx]),
+            "p_ratio_ariete": float(evaluacion["p_ratio_ariete"][idx]),
+            "mode": modo,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
+
+    def _random_population(self, n: int) -> np.ndarray:
+        """Población inicial: una tubería base por individuo con variaciones de ±2 posiciones por tramo"""
+        n_opc = self._limites_genes()[0]
+        base = self.rng.integers(0, n_opc, size=(n, 1))
+        tramos = np.clip(base + self.rng.integers(-2, 3, size=(n, self.n_tramos)), 0, n_opc - 1)
+        succion = self.rng.integers(0, n_opc, size=(n, 1))
+        return np.hstack([succion, tramos])
+
+    def _mutate(self, hijos):
+        """
+        Mutación mixta, en tercios: reinicia el gen al azar, lo desplaza 1-3 posiciones
+        en el catálogo, o copia la tubería del tramo anterior (consolida tramos)
+        """
+        n_opc = self._limites_genes()[0]
+        muta = self.rng.random(hijos.shape) < self.mutation_rate
+        tipo = self.rng.integers(0, 3, size=hijos.shape)
+        paso = self.rng.integers(1, 4, size=hijos.shape) * self.rng.choice([-1, 1], size=hijos.shape)
+        anterior = np.concatenate([hijos[:, :2], hijos[:, 1:-1]], axis=1)
+        nuevos = np.select([tipo == 0, tipo == 1],
+                           [self.rng.integers(0, n_opc, size=hijos.shape), np.clip(hijos + paso, 0, n_opc - 1)],
+                           anterior)
+        return np.where(muta, nuevos, hijos)
+
+
+def _evolve_island(optimizer: GeneticOptimizer, population: np.ndarray,
+                   n_generaciones: int, gen_inicial: int):
+    """Trabajo de una isla en el pool de procesos (función de módulo para poder serializarla)"""
+    population, history = optimizer._evolve(population, n_generaciones, gen_inicial)
+    return optimizer, population, history
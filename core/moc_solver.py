@@ -0,0 +1,813 @@
+"""
+Solver nativo de golpe de ariete por el Método de las Características (MOC).
+Topología: reservorio → succión → bomba → impulsión (uno o varios tramos en serie,
+cada uno con su celeridad) → válvula → reservorio de descarga.
+Todas las tuberías se discretizan en un único array de nudos, de modo que cada paso
+de tiempo avanza alturas y caudales con operaciones NumPy (sin bucles por nudo);
+solo las condiciones de contorno (bomba, válvula, reservorios) son escalares.
+
+Opcionalmente se modela la separación de columna con el modelo de cavidad discreta
+(DVCM): en los nudos cuya altura cae bajo la de vapor se forma una cavidad
+que mantiene la presión de vapor y cuyo volumen se integra con la diferencia entre los
+caudales de salida y de entrada; al colapsar (volumen ≤ 0) el nudo vuelve a la solución
+monofásica y se produce la sobrepresión de colapso.
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.pipeline_profile import cotas_en_nudos
+
+G = 9.81
+# Presión atmosférica y de vapor del agua a 20 °C (m.c.a.)
+PRESION_ATMOSFERICA_M = 10.33
+PRESION_VAPOR_M = 0.24
+
+
+def ley_cierre(t_inicio: float, duracion: float, exponente: float = 1.0) -> Callable[[float], float]:
+    """
+    Ley de cierre τ(t) = (1 - (t - t_inicio)/duracion)^exponente entre t_inicio y
+    t_inicio + duracion; 1 antes y 0 después. Sirve para la apertura de la válvula
+    o para la velocidad relativa de la bomba.
+    """
+    def tau(t: float) -> float:
+        if t <= t_inicio:
+            return 1.0
+        if duracion <= 0 or t >= t_inicio + duracion:
+            return 0.0
+        return (1.0 - (t - t_inicio) / duracion) ** exponente
+    return tau
+
+
+def curva_tabulada(puntos: Sequence[Tuple[float, float]]) -> Callable[[float], float]:
+    """Curva τ(t) interpolada linealmente a partir de puntos (t, τ)"""
+    puntos = sorted(puntos)
+    t_pts = np.array([p[0] for p in puntos], dtype=float)
+    tau_pts = np.array([p[1] for p in puntos], dtype=float)
+    return lambda t: float(np.interp(t, t_pts, tau_pts))
+
+
+def factor_friccion_hw(caudal_m3s: float, longitud: float, diametro: float, C: float) -> float:
+    """Factor de Darcy equivalente a la pérdida de Hazen-Williams al caudal dado"""
+    area = math.pi * diametro ** 2 / 4
+    v = caudal_m3s / area
+    if v <= 0 or longitud <= 0:
+        return 0.02
+    hf = 10.67 * longitud * (caudal_m3s / C) ** 1.852 / diametro ** 4.87
+    return hf * diametro * 2 * G / (longitud * v ** 2)
+
+
+def discretizar_courant(longitudes: Sequence[float], celeridades: Sequence[float],
+                        n_tramos_max: int = 200, tolerancia: float = 0.02, n_tramos_min: int = 1,
+                        dt: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Malla de cálculo (dt y tramos por tubería) con número de Courant unitario en todas
+    las tuberías: cada celeridad se ajusta a a' = L / (N·dt).
+
+    El paso mínimo admisible es el que da n_tramos_max tramos a la tubería de mayor tiempo
+    de viaje L/a (acota el número de pasos) y el máximo el que da n_tramos_min tramos a la
+    de menor tiempo de viaje. Entre ambos se elige el mayor dt cuyo ajuste |a'/a - 1| no
+    supera `tolerancia` en ninguna tubería; si ninguno lo cumple, el de menor error máximo.
+    Las tuberías cortas (L/a < n_tramos_min·dt mínimo, típicamente la succión) no se
+    resuelven: quedan con n_tramos_min tramos y celeridad reducida, sin imponer su dt a
+    toda la simulación.
+
+    Args:
+        longitudes, celeridades: Longitud (m) y celeridad (m/s) de cada tubería
+        n_tramos_max: Tramos de la tubería con mayor tiempo de viaje en el paso mínimo
+        tolerancia: Ajuste relativo de celeridad admisible en las tuberías no cortas
+        n_tramos_min: Tramos mínimos por tubería (TSNet exige 2)
+        dt: Paso de tiempo impuesto (s); None = automático
+
+    Returns:
+        Diccionario con dt, n_tramos, celeridad, celeridad_ajustada, error_celeridad
+        (relativo, por tubería), error_max (de las no cortas) y cortas (máscara)
+    """
+    L = np.asarray(longitudes, dtype=float)
+    a = np.asarray(celeridades, dtype=float)
+    viaje = L / a
+    dt_min = viaje.max() / n_tramos_max
+    cortas = viaje < n_tramos_min * dt_min
+    if dt is None:
+        resolubles = viaje[~cortas]
+        dt_max = max(dt_min, viaje.min() / n_tramos_min)
+        # Candidatos: los dt que resuelven exactamente alguna tubería con N tramos
+        candidatos = [dt_max]
+        for v in resolubles:
+            n = np.arange(max(math.ceil(v / dt_max), n_tramos_min), math.floor(v / dt_min) + 1)
+            candidatos.append(v / n)
+        candidatos = np.unique(np.hstack(candidatos))[::-1]
+        candidatos = candidatos[(candidatos >= dt_min * (1 - 1e-12)) & (candidatos <= dt_max * (1 + 1e-12))]
+        n = np.maximum(np.rint(resolubles[None, :] / candidatos[:, None]), n_tramos_min)
+        error = np.abs(resolubles[None, :] / (n * candidatos[:, None]) - 1).max(axis=1)
+        validos = np.flatnonzero(error <= tolerancia)
+        # argmin devuelve el primero (el mayor dt) entre errores iguales
+        dt = float(candidatos[validos[0]] if len(validos) else candidatos[np.argmin(error)])
+    n_tramos = np.maximum(np.rint(viaje / dt).astype(int), n_tramos_min)
+    celeridad_ajustada = L / (n_tramos * dt)
+    error_celeridad = np.abs(celeridad_ajustada / a - 1)
+    return {
+        "dt": float(dt),
+        "n_tramos": n_tramos,
+        "celeridad": a,
+        "celeridad_ajustada": celeridad_ajustada,
+        "error_celeridad": error_celeridad,
+        "error_max": float(error_celeridad[~cortas].max()) if (~cortas).any() else 0.0,
+        "cortas": cortas
+    }
+
+
+def tabla_malla(nombres: Sequence[str], longitudes: Sequence[float], malla: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Una fila por tubería con tramos, dx, celeridad y su ajuste (malla de discretizar_courant)"""
+    return [{
+        "tuberia": nombre,
+        "longitud": float(longitud),
+        "tramos": int(malla["n_tramos"][i]),
+        "dx": float(longitud / malla["n_tramos"][i]),
+        "celeridad": float(malla["celeridad"][i]),
+        "celeridad_ajustada": float(malla["celeridad_ajustada"][i]),
+        "ajuste_pct": float(malla["error_celeridad"][i] * 100),
+        "corta": bool(malla["cortas"][i])
+    } for i, (nombre, longitud) in enumerate(zip(nombres, longitudes))]
+
+
+def inercia_thorley(potencia_kw: float, rpm: float) -> float:
+    """
+    Momento de inercia J (kg·m²) de bomba + motor según las correlaciones de Thorley
+    (P en kW, N en miles de rpm).
+    """
+    if potencia_kw <= 0 or rpm <= 0:
+        return 0.5
+    n = rpm / 1000.0
+    j_bomba = 0.03768 * (potencia_kw / n ** 3) ** 0.9556
+    j_motor = 0.0043 * (potencia_kw / n) ** 1.48
+    return j_bomba + j_motor
+
+
+class PumpRunDown:
+    """
+    Parada de la bomba por falla de energía: la velocidad decae por inercia según
+    I·dω/dt = -T, con la altura y el par dados por las características de Suter
+    WH(θ) = h/(α²+v²) y WB(θ) = β/(α²+v²), θ = atan2(v, α).
+    Las tablas se derivan de las curvas homólogas H-Q y de rendimiento del proyecto
+    (h = a0·α² + a1·α·v + a2·v², β análogo); pueden sustituirse por datos de 4 cuadrantes.
+
+    Args:
+        inercia: Momento de inercia del grupo motobomba J (kg·m²)
+        rpm: Velocidad nominal (rpm)
+        t_corte: Instante de la falla de energía (s)
+        eficiencia: Rendimiento en el punto de operación (0-1) si no hay curva de rendimiento
+        curva_rendimiento: Puntos (q_lps, η %) de la bomba, opcional
+        suter: Tablas (θ, WH, WB) completas, opcional
+    """
+
+    def __init__(self, inercia: float, rpm: float = 3500.0, t_corte: float = 1.0,
+                 eficiencia: float = 0.75, curva_rendimiento: Sequence[Tuple[float, float]] = None,
+                 suter: Tuple[np.ndarray, np.ndarray, np.ndarray] = None, n_tabla: int = 721):
+        self.inercia = float(inercia)
+        self.rpm = float(rpm)
+        self.t_corte = float(t_corte)
+        self.eficiencia = float(eficiencia)
+        self.curva_rendimiento = curva_rendimiento
+        self.suter = suter
+        self.n_tabla = n_tabla
+
+    def _eta(self, q_m3s: np.ndarray) -> Optional[np.ndarray]:
+        if not self.curva_rendimiento or len(self.curva_rendimiento) < 3:
+            return None
+        q = np.array([p[0] for p in self.curva_rendimiento], dtype=float) / 1000.0
+        eta = np.array([p[1] for p in self.curva_rendimiento], dtype=float) / 100.0
+        return np.polyval(np.polyfit(q, eta, 2), q_m3s)
+
+    def preparar(self, coef_bomba: Tuple[float, float, float], q_r: float):
+        """Punto nominal = punto de operación inicial; construye las tablas de Suter"""
+        A0, A1, A2 = coef_bomba
+        self.q_r = q_r
+        self.h_r = A0 + A1 * q_r + A2 * q_r ** 2
+        eta_r = self._eta(np.array([q_r]))
+        self.eta_r = float(np.clip(eta_r[0], 0.2, 0.95)) if eta_r is not None else self.eficiencia
+        omega_r = 2 * math.pi * self.rpm / 60.0
+        par_r = 1000.0 * G * q_r * self.h_r / (self.eta_r * omega_r)
+        # dα/dt = -k·β
+        self.k = par_r / (self.inercia * omega_r)
+
+        if self.suter is not None:
+            self.theta, self.wh, self.wb = (np.asarray(x, dtype=float) for x in self.suter)
+        else:
+            a = (A0 / self.h_r, A1 * q_r / self.h_r, A2 * q_r ** 2 / self.h_r)
+            # Par a velocidad nominal: β(v) = v·h(v)·η_r / η(v); sin curva, η = η_r·v·(2 - v)
+            v = np.linspace(0.3, 1.3, 21)
+            h = a[0] + a[1] * v + a[2] * v ** 2
+            eta = self._eta(v * q_r)
+            relacion = (self.eta_r / np.clip(eta, 0.05, None)) if eta is not None else 1.0 / (v * (2 - v))
+            b2, b1, b0 = np.polyfit(v, v * h * relacion, 2)
+            self.theta = np.linspace(-math.pi, math.pi, self.n_tabla)
+            c, s = np.cos(self.theta), np.sin(self.theta)
+            self.wh = a[0] * c ** 2 + a[1] * c * s + a[2] * s ** 2
+            self.wb = b0 * c ** 2 + b1 * c * s + b2 * s ** 2
+        self.dwh = np.gradient(self.wh, self.theta)
+        self.alfa = 1.0
+        self.v = 1.0
+        self.beta = self._par(1.0, 1.0)
+
+    def _par(self, alfa: float, v: float) -> float:
+        r2 = alfa * alfa + v * v
+        if r2 == 0:
+            return 0.0
+        return r2 * float(np.interp(math.atan2(v, alfa), self.theta, self.wb))
+
+    def _caudal(self, alfa: float, dc: float, b_total: float, valvula_retencion: bool) -> float:
+        """
+        Caudal relativo v que cumple H_R·(α²+v²)·WH(θ) = ΔC + B·Q_R·v (Newton escalar).
+        dc = Cm_descarga - Cp_succion; b_total = B_succion + B_descarga.
+        """
+        h_cierre = self.h_r * alfa * alfa * float(np.interp(0.0 if alfa >= 0 else math.pi, self.theta, self.wh))
+        if valvula_retencion and h_cierre <= dc:
+            return 0.0
+        bq = b_total * self.q_r
+        v = max(self.v, 1e-3) if valvula_retencion else self.v
+        for _ in range(20):
+            th = math.atan2(v, alfa)
+            wh = float(np.interp(th, self.theta, self.wh))
+            r2 = alfa * alfa + v * v
+            f = self.h_r * r2 * wh - dc - bq * v
+            df = self.h_r * (2 * v * wh + alfa * float(np.interp(th, self.theta, self.dwh))) - bq
+            if df == 0:
+                break
+            paso = f / df
+            v -= paso
+            if abs(paso) < 1e-10:
+                break
+        if valvula_retencion and v < 0:
+            v = 0.0
+        return v
+
+    def paso(self, dt: float, dc: float, b_total: float, valvula_retencion: bool = True,
+             confirmar: bool = True) -> Tuple[float, float]:
+        """
+        Avanza un paso (predictor-corrector de la ecuación de la inercia).
+        Con confirmar=False solo evalúa el paso, sin modificar el estado de la bomba
+        (lo usan las condiciones de contorno que iteran sobre la altura de descarga).
+
+        Returns:
+            (Q en m³/s, α) al final del paso
+        """
+        alfa_n, beta_n, v_n = self.alfa, self.beta, self.v
+        alfa = alfa_n - dt * self.k * beta_n
+        for _ in range(2):
+            v = self._caudal(alfa, dc, b_total, valvula_retencion)
+            beta = self._par(alfa, v)
+            alfa = alfa_n - 0.5 * dt * self.k * (beta_n + beta)
+            if valvula_retencion:
+                alfa = max(alfa, 0.0)
+        v = self._caudal(alfa, dc, b_total, valvula_retencion)
+        if confirmar:
+            self.v = v
+            self.alfa = alfa
+            self.beta = self._par(alfa, v)
+        else:
+            self.v = v_n
+        return v * self.q_r, alfa
+
+
+class AirVessel:
+    """
+    Calderín (cámara de aire) en el nudo de descarga de la bomba, aguas abajo de la
+    válvula de retención. Gas politrópico H_abs·V^m = cte y conexión estrangulada con
+    pérdida asimétrica (mayor al entrar el agua al calderín). El nivel de líquido se
+    supone constante en la cota del nudo.
+
+    Args:
+        volumen_total: Volumen del calderín (m³)
+        volumen_gas: Volumen inicial de aire en régimen permanente (m³)
+        diametro_orificio: Diámetro de la conexión / estrangulamiento (m)
+        cd: Coeficiente de descarga del orificio
+        relacion_entrada: Pérdida de entrada / pérdida de salida (orificio diferencial)
+        exponente: Exponente politrópico del gas (1.0 isotermo - 1.4 adiabático)
+        h_barometrica: Presión atmosférica (m.c.a.)
+    """
+
+    def __init__(self, volumen_total: float, volumen_gas: float, diametro_orificio: float,
+                 cd: float = 0.6, relacion_entrada: float = 2.5, exponente: float = 1.2,
+                 h_barometrica: float = 10.33):
+        self.volumen_total = float(volumen_total)
+        self.volumen_gas = float(volumen_gas)
+        self.diametro_orificio = float(diametro_orificio)
+        self.relacion_entrada = relacion_entrada
+        self.exponente = exponente
+        self.h_barometrica = h_barometrica
+        area = math.pi * diametro_orificio ** 2 / 4
+        self.r_orificio = 1.0 / (2 * G * (cd * area) ** 2)
+
+    def preparar(self, h0: float, z: float):
+        self.z = z
+        self.V = self.volumen_gas
+        self.q = 0.0
+        self.h = h0
+        self.cte = (h0 - z + self.h_barometrica) * self.V ** self.exponente
+        self.V_max = self.V_min = self.V
+
+    def _perdida(self, q: float) -> float:
+        """Pérdida en la conexión; q > 0 sale del calderín hacia la tubería"""
+        return self.r_orificio * q * abs(q) * (1.0 if q >= 0 else self.relacion_entrada)
+
+    def residuo(self, h_p: float, q: float, dt: float) -> float:
+        """Ecuación del gas para la altura h_p en el nudo y el caudal de salida q"""
+        V = self.V + 0.5 * dt * (self.q + q)
+        if V <= 0:
+            return -self.cte
+        return (h_p - self.z + self.h_barometrica + self._perdida(q)) * V ** self.exponente - self.cte
+
+    def resolver(self, caudal_salida: Callable[[float], float], dt: float) -> Tuple[float, float]:
+        """
+        Altura h_p en el nudo tal que el caudal que sale del calderín,
+        caudal_salida(h_p), cumpla la ecuación del gas (regula falsi de Illinois).
+        El residuo es creciente en h_p.
+
+        Returns:
+            (h_p, q_salida)
+        """
+        def f(h):
+            return self.residuo(h, caudal_salida(h), dt)
+
+        a, b = self.h - 0.5, self.h + 0.5
+        fa, fb = f(a), f(b)
+        paso = 1.0
+        while fa > 0:
+            b, fb = a, fa
+            a -= paso
+            paso *= 2
+            fa = f(a)
+        paso = 1.0
+        while fb < 0:
+            a, fa = b, fb
+            b += paso
+            paso *= 2
+            fb = f(b)
+        lado = 0
+        for _ in range(60):
+            c = b - fb * (b - a) / (fb - fa) if fb != fa else 0.5 * (a + b)
+            fc = f(c)
+            if abs(fc) < 1e-9 * self.cte or abs(b - a) < 1e-7:
+                break
+            if fc * fb < 0:
+                a, fa = b, fb
+                lado = 0
+            else:
+                if lado == 1:
+                    fa *= 0.5
+                lado = 1
+            b, fb = c, fc
+        h_p = c
+        q = caudal_salida(h_p)
+        return h_p, q
+
+    def confirmar(self, h_p: float, q: float, dt: float):
+        self.V += 0.5 * dt * (self.q + q)
+        self.q = q
+        self.h = h_p
+        self.V_max = max(self.V_max, self.V)
+        self.V_min = min(self.V_min, self.V)
+
+
+class MOCSolver:
+    """
+    Red en serie para el MOC.
+
+    Args:
+        tuberias: Lista de tuberías en orden de flujo; la primera es la succión.
+            Cada una es un dict con nombre, longitud (m), diametro (m), celeridad (m/s),
+            f (Darcy), z_inicio y z_fin (m) y opcionalmente nudo_inicio / nudo_fin y
+            perfil = (abscisas desde el inicio de la tubería, cotas) para cotas no lineales
+        h_reservorio: Nivel del reservorio de succión (m)
+        h_descarga: Nivel del reservorio de descarga (m)
+        coef_bomba: (A0, A1, A2) de H = A0 + A1·Q + A2·Q² (Q en m³/s) a velocidad nominal
+        k_valvula: Coeficiente de pérdida de la válvula final totalmente abierta
+        valvula_retencion: Si True, la bomba no admite flujo inverso
+        dt: Paso de tiempo (s); por defecto se elige con discretizar_courant
+        n_tramos_max: Tramos de cálculo de la tubería con mayor tiempo de viaje L/a
+        tolerancia_celeridad: Ajuste relativo de celeridad admisible al elegir dt
+    """
+
+    def __init__(self, tuberias: List[Dict[str, Any]], h_reservorio: float, h_descarga: float,
+                 coef_bomba: Tuple[float, float, float], k_valvula: float = 0.2,
+                 valvula_retencion: bool = True, dt: Optional[float] = None,
+                 n_tramos_max: int = 200, tolerancia_celeridad: float = 0.02):
+        if len(tuberias) < 2:
+            raise ValueError("Se requieren al menos la tubería de succión y una de impulsión")
+        self.tuberias = tuberias
+        self.h_reservorio = float(h_reservorio)
+        self.h_descarga = float(h_descarga)
+        self.coef_bomba = tuple(float(c) for c in coef_bomba)
+        self.k_valvula = k_valvula
+        self.valvula_retencion = valvula_retencion
+        self.n_tramos_max = n_tramos_max
+        self.tolerancia_celeridad = tolerancia_celeridad
+        self._discretizar(dt)
+
+    def _discretizar(self, dt: Optional[float]):
+        """Elige dt, el número de tramos por tubería y ajusta la celeridad (a = L / (N·dt))"""
+        self.malla = discretizar_courant([t["longitud"] for t in self.tuberias],
+                                         [t["celeridad"] for t in self.tuberias],
+                                         n_tramos_max=self.n_tramos_max, tolerancia=self.tolerancia_celeridad, dt=dt)
+        self.dt = self.malla["dt"]
+        self.n_tramos = self.malla["n_tramos"]
+        self.celeridad_ajustada = self.malla["celeridad_ajustada"]
+
+        # Índices globales: la tubería i ocupa [inicio[i], fin[i]] (N_i + 1 nudos)
+        n_nudos = self.n_tramos + 1
+        self.inicio = np.concatenate([[0], np.cumsum(n_nudos)[:-1]])
+        self.fin = self.inicio + self.n_tramos
+        total = int(n_nudos.sum())
+
+        self.B = np.empty(total)
+        self.R = np.empty(total)
+        self.x = np.empty(total)
+        self.z = np.empty(total)
+        x_acum = 0.0
+        for i, tub in enumerate(self.tuberias):
+            sl = slice(self.inicio[i], self.fin[i] + 1)
+            area = math.pi * tub["diametro"] ** 2 / 4
+            dx = tub["longitud"] / self.n_tramos[i]
+            self.B[sl] = self.celeridad_ajustada[i] / (G * area)
+            self.R[sl] = tub["f"] * dx / (2 * G * tub["diametro"] * area ** 2)
+            frac = np.linspace(0.0, 1.0, n_nudos[i])
+            self.x[sl] = x_acum + frac * tub["longitud"]
+            if tub.get("perfil") is not None:
+                self.z[sl] = cotas_en_nudos(tub["perfil"][0], tub["perfil"][1], frac * tub["longitud"])
+            else:
+                self.z[sl] = tub.get("z_inicio", 0.0) + frac * (tub.get("z_fin", 0.0) - tub.get("z_inicio", 0.0))
+            x_acum += tub["longitud"]
+
+        # Nudos interiores (no extremos de tubería)
+        self.interior = np.ones(total, dtype=bool)
+        self.interior[self.inicio] = False
+        self.interior[self.fin] = False
+        # Uniones en serie entre tuberías de impulsión (la unión 0 es la bomba)
+        self.union_arriba = self.fin[1:-1]
+        self.union_abajo = self.inicio[2:]
+
+        # Nombres de nudos extremos para las sondas
+        self.nudos: Dict[str, int] = {}
+        for i, tub in enumerate(self.tuberias):
+            self.nudos.setdefault(tub.get("nudo_inicio", f"{tub['nombre']}_ini"), int(self.inicio[i]))
+            self.nudos[tub.get("nudo_fin", f"{tub['nombre']}_fin")] = int(self.fin[i])
+
+    def variante(self, celeridad: Optional[float] = None, diametro: Optional[float] = None,
+                 tuberias: Optional[Sequence[int]] = None, dt: Optional[float] = None) -> "MOCSolver":
+        """
+        Copia de la red con otra celeridad y/o diámetro interno (m) en las tuberías
+        indicadas (por defecto, todas las de impulsión). Solo se rehace la discretización;
+        el factor de fricción se corrige para conservar la pérdida de Hazen-Williams (∝ D^-4.87).
+        """
+        indices = range(1, len(self.tuberias)) if tuberias is None else tuberias
+        nuevas = [dict(t) for t in self.tuberias]
+        for i in indices:
+            if celeridad is not None:
+                nuevas[i]["celeridad"] = float(celeridad)
+            if diametro is not None:
+                # f·L/D⁵ ∝ D^-4.87  →  f ∝ D^0.13
+                nuevas[i]["f"] = nuevas[i]["f"] * (diametro / nuevas[i]["diametro"]) ** 0.13
+                nuevas[i]["diametro"] = float(diametro)
+        return MOCSolver(nuevas, self.h_reservorio, self.h_descarga, self.coef_bomba,
+                         k_valvula=self.k_valvula, valvula_retencion=self.valvula_retencion,
+                         dt=dt, n_tramos_max=self.n_tramos_max,
+                         tolerancia_celeridad=self.tolerancia_celeridad)
+
+    def resumen_malla(self) -> List[Dict[str, Any]]:
+        """Malla elegida: una fila por tubería (ver tabla_malla)"""
+        return tabla_malla([t["nombre"] for t in self.tuberias], [t["longitud"] for t in self.tuberias], self.malla)
+
+    def altura_bomba(self, q: float, alfa: float = 1.0,
+                     coef_bomba: Optional[Tuple[float, float, float]] = None) -> float:
+        """Curva homóloga: H = α²·A0 + α·A1·Q + A2·Q² (coef_bomba por defecto: los del solver)"""
+        A0, A1, A2 = self.coef_bomba if coef_bomba is None else coef_bomba
+        return alfa ** 2 * A0 + alfa * A1 * q + A2 * q ** 2
+
+    def _perdida_total(self) -> float:
+        """Coeficiente r de las pérdidas en régimen permanente: hf = r·Q²"""
+        r = 0.0
+        for tub in self.tuberias:
+            area = math.pi * tub["diametro"] ** 2 / 4
+            r += tub["f"] * tub["longitud"] / (2 * G * tub["diametro"] * area ** 2)
+        area_final = math.pi * self.tuberias[-1]["diametro"] ** 2 / 4
+        return r + self.k_valvula / (2 * G * area_final ** 2)
+
+    def regimen_permanente(self, q_diseno: float, forzar_caudal: bool = False) -> Dict[str, Any]:
+        """
+        Punto de operación inicial (bomba vs. sistema con f constante).
+        Si la curva no alcanza al sistema, o si forzar_caudal es True, se desplaza A0
+        para operar exactamente en q_diseno. La curva desplazada se devuelve en
+        'coef_bomba' y solo vale para ese cálculo: self.coef_bomba no cambia, así que
+        llamadas sucesivas parten siempre de la curva original.
+        """
+        A0, A1, A2 = self.coef_bomba
+        dz = self.h_descarga - self.h_reservorio
+        r = self._perdida_total()
+        # (A2 - r)·Q² + A1·Q + (A0 - dz) = 0
+        raices = np.roots([A2 - r, A1, A0 - dz]) if abs(A2 - r) > 1e-12 else np.array([-(A0 - dz) / A1]) if A1 else np.array([])
+        positivas = [float(np.real(x)) for x in raices if abs(np.imag(x)) < 1e-9 and np.real(x) > 0]
+        ajustada = False
+        if positivas and not forzar_caudal:
+            q0 = min(positivas, key=lambda x: abs(x - q_diseno))
+        else:
+            q0 = q_diseno
+            A0 = dz + r * q0 ** 2 - A1 * q0 - A2 * q0 ** 2
+            ajustada = not forzar_caudal
+
+        # Alturas iniciales: reservorio → pérdidas de succión → bomba → pérdidas de impulsión
+        H = np.empty_like(self.B)
+        Q = np.full_like(self.B, q0)
+        h_actual = self.h_reservorio
+        for i in range(len(self.tuberias)):
+            if i == 1:
+                h_actual += self.altura_bomba(q0, coef_bomba=(A0, A1, A2))
+            sl = slice(self.inicio[i], self.fin[i] + 1)
+            perdida_tramo = self.R[self.inicio[i]] * q0 * abs(q0)
+            H[sl] = h_actual - perdida_tramo * np.arange(self.n_tramos[i] + 1)
+            h_actual = H[self.fin[i]]
+        return {"q0": q0, "H": H, "Q": Q, "curva_ajustada": ajustada, "coef_bomba": (A0, A1, A2)}
+
+    def run(self, t_final: float, q_diseno: float,
+            velocidad_bomba: Callable[[float], float] = None,
+            apertura_valvula: Callable[[float], float] = None,
+            sondas: Sequence[str] = None,
+            parada: Optional[PumpRunDown] = None,
+            decimacion: int = 1,
+            forzar_caudal: bool = False,
+            calderin: Optional[AirVessel] = None,
+            cavitacion: bool = False,
+            presion_vapor_m: float = PRESION_VAPOR_M - PRESION_ATMOSFERICA_M) -> Dict[str, Any]:
+        """
+        Integra el transitorio hasta t_final.
+
+        Args:
+            t_final: Duración de la simulación (s)
+            q_diseno: Caudal de diseño (m³/s), para el régimen permanente
+            velocidad_bomba: α(t), velocidad relativa de la bomba (1 = nominal)
+            apertura_valvula: τ(t), apertura relativa de la válvula final
+            sondas: Nudos cuyo historial H(t), Q(t) se guarda
+            parada: Parada por inercia de la bomba; si se indica, reemplaza a velocidad_bomba
+                a partir de parada.t_corte
+            decimacion: Se guarda uno de cada `decimacion` pasos en las series de las
+                sondas; las envolventes y los extremos de las sondas se calculan en todos
+                los pasos, así que la memoria es O(nudos + pasos/decimacion)
+            forzar_caudal: Régimen inicial exactamente en q_diseno (ver regimen_permanente)
+            calderin: Calderín en el nudo de descarga de la bomba (se reinicia en cada run)
+            cavitacion: Modelo de cavidad discreta (DVCM) en los nudos interiores, en las
+                uniones entre tuberías, en la succión de la bomba, en su descarga (sin
+                calderín) y aguas arriba de la válvula final
+            presion_vapor_m: Presión de vapor manométrica (m) para la cavitación
+
+        Returns:
+            Diccionario con t, sondas {nudo: {'H', 'Q', 'H_max', 'H_min'}}, envolvente
+            ('x', 'z', 'H_max', 'H_min', 'H0'), velocidad relativa de la bomba 'alfa'
+            (con la misma decimación), q0, coef_bomba (curva usada, desplazada si
+            curva_ajustada o forzar_caudal), dt, n_pasos, decimacion y, con cavitacion,
+            'cavitacion': {'volumen_max' (m³ por nudo), 'volumen' (volumen total de
+            cavidades con la decimación de las sondas), 'volumen_max_total' (máximo del
+            volumen total), 'nudos_cavitados'}
+        """
+        velocidad_bomba = velocidad_bomba or (lambda t: 1.0)
+        apertura_valvula = apertura_valvula or (lambda t: 1.0)
+        sondas = list(sondas) if sondas else list(self.nudos)
+
+        inicial = self.regimen_permanente(q_diseno, forzar_caudal)
+        H, Q = inicial["H"], inicial["Q"]
+        q0 = inicial["q0"]
+        B, R = self.B, self.R
+        A0, A1, A2 = inicial["coef_bomba"]
+        if parada is not None:
+            parada.preparar(inicial["coef_bomba"], q0)
+        if calderin is not None:
+            calderin.preparar(H[self.inicio[1]], self.z[self.inicio[1]])
+
+        # Válvula final: Q² = Cv·τ²·(H - H_descarga), con Cv del régimen inicial
+        dh_valvula0 = max(H[-1] - self.h_descarga, 1e-6)
+        cv0 = q0 ** 2 / dh_valvula0
+
+        n_pasos = int(math.ceil(t_final / self.dt))
+        decimacion = max(int(decimacion), 1)
+        n_guardados = n_pasos // decimacion + 1
+        t = np.arange(n_guardados) * decimacion * self.dt
+        idx_sondas = [self.nudos[s] for s in sondas]
+        hist_H = np.empty((n_guardados, len(idx_sondas)))
+        hist_Q = np.empty((n_guardados, len(idx_sondas)))
+        hist_H[0] = H[idx_sondas]
+        hist_Q[0] = Q[idx_sondas]
+        hist_alfa = np.ones(n_guardados)
+        H_max = H.copy()
+        H_min = H.copy()
+
+        i_res, i_suc = self.inicio[0], self.fin[0]
+        i_imp, i_fin = self.inicio[1], self.fin[-1]
+        j_up, j_dn = self.union_arriba, self.union_abajo
+        Cp = np.empty_like(H)
+        Cm = np.empty_like(H)
+
+        if cavitacion:
+            # DVCM: Q es el caudal de entrada al nudo y Q_salida el de salida (distintos
+            # solo mientras hay cavidad); la cavidad fija la altura en z + presión de vapor
+            h_vapor = self.z + presion_vapor_m
+            Q_salida = Q.copy()
+            volumen = np.zeros_like(H)
+            volumen_max = np.zeros_like(H)
+            hist_volumen = np.zeros(n_guardados)
+            volumen_total_max = 0.0
+        # Caudales de la bomba y de la válvula del paso anterior (con cavidad en el nudo de
+        # contorno difieren del caudal de la tubería)
+        q_bomba, q_valvula = q0, Q[i_fin]
+
+        for paso in range(1, n_pasos + 1):
+            tiempo = paso * self.dt
+            # Características C+ (desde el nudo de aguas arriba) y C- (desde el de aguas abajo)
+            # (en el primer nudo de cada tubería Cp mezcla dos tuberías y no se usa; igual Cm en el último)
+            if cavitacion:
+                rq_salida = R * Q_salida * np.abs(Q_salida)
+                rq = R * Q * np.abs(Q)
+                Cp[1:] = H[:-1] + B[:-1] * Q_salida[:-1] - rq_salida[:-1]
+                Cm[:-1] = H[1:] - B[1:] * Q[1:] + rq[1:]
+            else:
+                rq = R * Q * np.abs(Q)
+                Cp[1:] = H[:-1] + B[:-1] * Q[:-1] - rq[:-1]
+                Cm[:-1] = H[1:] - B[1:] * Q[1:] + rq[1:]
+            H_nuevo = np.where(self.interior, 0.5 * (Cp + Cm), H)
+            Q_nuevo = np.where(self.interior, (Cp - Cm) / (2 * B), Q)
+
+            if cavitacion:
+                # Cavidad existente o altura bajo la de vapor en un nudo interior
+                cav = self.interior & ((volumen > 0) | (H_nuevo < h_vapor))
+                q_entrada = np.where(cav, (Cp - h_vapor) / B, Q_nuevo)
+                q_salida = np.where(cav, (h_vapor - Cm) / B, Q_nuevo)
+                v_nuevo = volumen + 0.5 * self.dt * ((q_salida - q_entrada) + (Q_salida - Q))
+                # Colapso (volumen ≤ 0): la cavidad desaparece y el nudo vuelve a la solución
+                # monofásica, salvo que esa altura quede bajo la de vapor (cavidad de volumen nulo)
+                cav &= (v_nuevo > 0) | (H_nuevo < h_vapor)
+                volumen = np.where(cav, np.maximum(v_nuevo, 0.0), np.where(self.interior, 0.0, volumen))
+                H_nuevo = np.where(cav, h_vapor, H_nuevo)
+                Q_nuevo = np.where(cav, q_entrada, Q_nuevo)
+                q_salida = np.where(cav, q_salida, Q_nuevo)
+
+            # Reservorio de succión
+            H_nuevo[i_res] = self.h_reservorio
+            Q_nuevo[i_res] = (self.h_reservorio - Cm[i_res]) / B[i_res]
+
+            # Uniones en serie: altura común y continuidad de caudal
+            if len(j_up):
+                bp, bm = B[j_up], B[j_dn]
+                h_union = (Cp[j_up] / bp + Cm[j_dn] / bm) / (1 / bp + 1 / bm)
+                H_nuevo[j_up] = h_union
+                H_nuevo[j_dn] = h_union
+                Q_nuevo[j_up] = (Cp[j_up] - h_union) / bp
+                Q_nuevo[j_dn] = Q_nuevo[j_up]
+                if cavitacion:
+                    # Cavidad en la unión (su volumen se guarda en el nudo j_up)
+                    hv = h_vapor[j_up]
+                    q_entrada_u = (Cp[j_up] - hv) / bp
+                    q_salida_u = (hv - Cm[j_dn]) / bm
+                    v_nuevo = volumen[j_up] + 0.5 * self.dt * ((q_salida_u - q_entrada_u) + (Q[j_dn] - Q[j_up]))
+                    cav_u = ((volumen[j_up] > 0) & (v_nuevo > 0)) | (h_union < hv)
+                    volumen[j_up] = np.where(cav_u, np.maximum(v_nuevo, 0.0), 0.0)
+                    H_nuevo[j_up] = np.where(cav_u, hv, h_union)
+                    H_nuevo[j_dn] = H_nuevo[j_up]
+                    Q_nuevo[j_up] = np.where(cav_u, q_entrada_u, Q_nuevo[j_up])
+                    Q_nuevo[j_dn] = np.where(cav_u, q_salida_u, Q_nuevo[j_dn])
+
+            # Bomba: H_descarga - (Cp_s - B_s·Q) = α²A0 + αA1·Q + A2·Q²; sin calderín
+            # H_descarga = Cm_d + B_d·Q, con calderín H_descarga es la altura del nudo
+            bs, bd = B[i_suc], B[i_imp]
+            en_parada = parada is not None and tiempo > parada.t_corte
+            alfa_prescrita = None if en_parada else velocidad_bomba(tiempo)
+
+            def caudal_bomba(dc, b_total, confirmar=True):
+                if en_parada:
+                    return parada.paso(self.dt, dc, b_total, self.valvula_retencion, confirmar)
+                alfa = alfa_prescrita
+                b_ = alfa * A1 - b_total
+                c_ = alfa ** 2 * A0 - dc
+                if abs(A2) > 1e-12:
+                    disc = b_ * b_ - 4 * A2 * c_
+                    q = (-b_ - math.sqrt(disc)) / (2 * A2) if disc >= 0 else 0.0
+                else:
+                    q = -c_ / b_
+                if self.valvula_retencion and q <= 0:
+                    q = 0.0
+                return q, alfa
+
+            cav_succion = False
+            if calderin is None:
+                dc, b_total = Cm[i_imp] - Cp[i_suc], bs + bd
+                cav_bomba = False
+                if cavitacion:
+                    # Cavidad en la descarga de la bomba: la altura del nudo queda en la de vapor
+                    hv = h_vapor[i_imp]
+                    q_prueba, _ = caudal_bomba(dc, b_total, confirmar=False)
+                    if volumen[i_imp] > 0 or Cm[i_imp] + bd * q_prueba < hv:
+                        q_cav, _ = caudal_bomba(hv - Cp[i_suc], bs, confirmar=False)
+                        q_salida_b = (hv - Cm[i_imp]) / bd
+                        v_nuevo = volumen[i_imp] + 0.5 * self.dt * ((q_salida_b - q_cav) + (Q[i_imp] - q_bomba))
+                        cav_bomba = v_nuevo > 0 or Cm[i_imp] + bd * q_prueba < hv
+                        volumen[i_imp] = max(v_nuevo, 0.0)
+                        if cav_bomba:
+                            dc, b_total = hv - Cp[i_suc], bs
+                qb, alfa = caudal_bomba(dc, b_total, confirmar=not cavitacion)
+                if cavitacion:
+                    # Cavidad en la succión de la bomba: la bomba aspira desde la altura de vapor
+                    hv_s = h_vapor[i_suc]
+                    if volumen[i_suc] > 0 or Cp[i_suc] - bs * qb < hv_s:
+                        dc_s, b_s = dc + Cp[i_suc] - hv_s, b_total - bs
+                        q_cav, _ = caudal_bomba(dc_s, b_s, confirmar=False)
+                        q_entrada_s = (Cp[i_suc] - hv_s) / bs
+                        v_nuevo = volumen[i_suc] + 0.5 * self.dt * ((q_cav - q_entrada_s) + (q_bomba - Q[i_suc]))
+                        cav_succion = v_nuevo > 0 or Cp[i_suc] - bs * qb < hv_s
+                        volumen[i_suc] = max(v_nuevo, 0.0)
+                        if cav_succion:
+                            dc, b_total = dc_s, b_s
+                    qb, alfa = caudal_bomba(dc, b_total)
+                if cav_bomba:
+                    H_nuevo[i_imp] = hv
+                    Q_nuevo[i_imp] = q_salida_b
+                else:
+                    H_nuevo[i_imp] = Cm[i_imp] + bd * qb
+                    Q_nuevo[i_imp] = qb
+            else:
+                cp_s, cm_d = Cp[i_suc], Cm[i_imp]
+                h_p, q_cal = calderin.resolver(
+                    lambda h: (h - cm_d) / bd - caudal_bomba(h - cp_s, bs, confirmar=False)[0], self.dt)
+                qb, alfa = caudal_bomba(h_p - cp_s, bs)
+                calderin.confirmar(h_p, q_cal, self.dt)
+                H_nuevo[i_imp] = h_p
+                Q_nuevo[i_imp] = qb + q_cal
+            if cav_succion:
+                H_nuevo[i_suc] = hv_s
+                Q_nuevo[i_suc] = q_entrada_s
+            else:
+                H_nuevo[i_suc] = Cp[i_suc] - bs * qb
+                Q_nuevo[i_suc] = qb
+            q_bomba = qb
+
+            # Válvula final descargando al reservorio
+            tau = apertura_valvula(tiempo)
+            cv = cv0 * tau ** 2
+            bf = B[i_fin]
+            dh = Cp[i_fin] - self.h_descarga
+            if cv <= 0:
+                qv = 0.0
+            else:
+                signo = 1.0 if dh >= 0 else -1.0
+                qv = signo * 0.5 * (-cv * bf + math.sqrt((cv * bf) ** 2 + 4 * cv * abs(dh)))
+            Q_nuevo[i_fin] = qv
+            H_nuevo[i_fin] = Cp[i_fin] - bf * qv
+            if cavitacion and (volumen[i_fin] > 0 or H_nuevo[i_fin] < h_vapor[i_fin]):
+                # Cavidad aguas arriba de la válvula: la válvula descarga desde la altura de vapor
+                hv_f = h_vapor[i_fin]
+                dh_f = hv_f - self.h_descarga
+                qv_f = math.copysign(math.sqrt(cv * abs(dh_f)), dh_f) if cv > 0 else 0.0
+                q_entrada_f = (Cp[i_fin] - hv_f) / bf
+                v_nuevo = volumen[i_fin] + 0.5 * self.dt * ((qv_f - q_entrada_f) + (q_valvula - Q[i_fin]))
+                volumen[i_fin] = max(v_nuevo, 0.0)
+                if v_nuevo > 0 or H_nuevo[i_fin] < hv_f:
+                    qv = qv_f
+                    H_nuevo[i_fin] = hv_f
+                    Q_nuevo[i_fin] = q_entrada_f
+            q_valvula = qv
+
+            if cavitacion:
+                # En los extremos de tubería el caudal de salida es el del contorno
+                Q_salida = np.where(self.interior, q_salida, Q_nuevo)
+                np.maximum(volumen_max, volumen, out=volumen_max)
+                volumen_total_max = max(volumen_total_max, float(volumen.sum()))
+            H, Q = H_nuevo, Q_nuevo
+            np.maximum(H_max, H, out=H_max)
+            np.minimum(H_min, H, out=H_min)
+            if paso % decimacion == 0:
+                k = paso // decimacion
+                hist_H[k] = H[idx_sondas]
+                hist_Q[k] = Q[idx_sondas]
+                hist_alfa[k] = alfa
+                if cavitacion:
+                    hist_volumen[k] = volumen.sum()
+
+        return {
+            "t": t,
+            "sondas": {s: {"H": hist_H[:, k], "Q": hist_Q[:, k],
+                           "H_max": float(H_max[i]), "H_min": float(H_min[i])}
+                       for k, (s, i) in enumerate(zip(sondas, idx_sondas))},
+            "envolvente": {"x": self.x, "z": self.z, "H_max": H_max, "H_min": H_min, "H0": inicial["H"]},
+            "alfa": hist_alfa,
+            "q0": q0,
+            "curva_ajustada": inicial["curva_ajustada"],
+            "coef_bomba": inicial["coef_bomba"],
+            "dt": self.dt,
+            "n_pasos": n_pasos,
+            "decimacion": decimacion,
+            "calderin": ({"V_max": float(calderin.V_max), "V_min": float(calderin.V_min)}
+                         if calderin is not None else None),
+            "celeridad_ajustada": self.celeridad_ajustada,
+            "cavitacion": ({"volumen_max": volumen_max, "volumen": hist_volumen,
+                            "volumen_max_total": volumen_total_max,
+                            "nudos_cavitados": int(np.count_nonzero(volumen_max))}
+                           if cavitacion else None)
+        }
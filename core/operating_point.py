@@ -0,0 +1,322 @@
+"""
+Solucionador del punto de operación bomba-sistema.
+Busca la intersección H_bomba(Q) = H_sistema(Q) con un método acotado
+(Illinois / regula falsi modificada) vectorizado sobre muchos casos a la vez.
+"""
+
+import numpy as np
+from typing import Any, Callable, Dict, List, Tuple
+
+from core.calculations import coeficientes_curva_sistema_hw
+
+
+def _evaluar_polinomios(coeficientes: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """
+    Evalúa por Horner un lote de polinomios (una fila de coeficientes por caso).
+
+    Args:
+        coeficientes: Array (n_casos, grado+1), orden de np.polyval (mayor grado primero)
+        q: Array (n_casos,) o (n_casos, m)
+
+    Returns:
+        Array con la misma forma que q
+    """
+    forma = (coeficientes.shape[0],) + (1,) * (q.ndim - 1)
+    y = np.zeros_like(q, dtype=float)
+    for j in range(coeficientes.shape[1]):
+        y = y * q + coeficientes[:, j].reshape(forma)
+    return y
+
+
+def _como_lote_coeficientes(coeficientes) -> np.ndarray:
+    """Convierte coeficientes 1D o 2D a un array 2D (n_casos, grado+1)."""
+    coef = np.asarray(coeficientes, dtype=float)
+    return coef.reshape(1, -1) if coef.ndim == 1 else coef
+
+
+def _igualar_grado(coef_a: np.ndarray, coef_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rellena con ceros a la izquierda para que ambos lotes tengan el mismo grado y número de casos."""
+    n_coef = max(coef_a.shape[1], coef_b.shape[1])
+    coef_a = np.pad(coef_a, ((0, 0), (n_coef - coef_a.shape[1], 0)))
+    coef_b = np.pad(coef_b, ((0, 0), (n_coef - coef_b.shape[1], 0)))
+    n_casos = max(coef_a.shape[0], coef_b.shape[0])
+    return (np.broadcast_to(coef_a, (n_casos, n_coef)),
+            np.broadcast_to(coef_b, (n_casos, n_coef)))
+
+
+def acotar_primer_cruce(func_diferencia: Callable[[np.ndarray], np.ndarray],
+                        q_min, q_max, n_malla: int = 64) -> Dict[str, np.ndarray]:
+    """
+    Localiza, para cada caso, el primer subintervalo de una malla donde la
+    diferencia cambia de signo (el cruce de menor caudal).
+
+    Args:
+        func_diferencia: Función vectorizada f(q) con q de forma (n_casos, m)
+        q_min: Caudal mínimo de búsqueda (escalar o array por caso)
+        q_max: Caudal máximo de búsqueda (escalar o array por caso)
+        n_malla: Número de puntos de la malla de acotamiento
+
+    Returns:
+        Diccionario con 'a', 'b', 'fa', 'fb', 'con_cruce' y la aproximación más
+        cercana en malla ('q_cercano', 'f_cercano') para los casos sin cruce
+    """
+    q_min = np.atleast_1d(np.asarray(q_min, dtype=float))
+    q_max = np.atleast_1d(np.asarray(q_max, dtype=float))
+    q_min, q_max = np.broadcast_arrays(q_min, q_max)
+
+    t = np.linspace(0.0, 1.0, max(int(n_malla), 2))
+    malla = q_min[:, None] + (q_max - q_min)[:, None] * t[None, :]
+    f = np.asarray(func_diferencia(malla), dtype=float)
+    malla = np.broadcast_to(malla, f.shape)
+
+    cambio = np.sign(f[:, :-1]) * np.sign(f[:, 1:]) <= 0
+    con_cruce = cambio.any(axis=1)
+    idx = np.argmax(cambio, axis=1)
+    filas = np.arange(malla.shape[0])
+    idx_cercano = np.argmin(np.abs(f), axis=1)
+
+    return {
+        'a': malla[filas, idx],
+        'b': malla[filas, idx + 1],
+        'fa': f[filas, idx],
+        'fb': f[filas, idx + 1],
+        'con_cruce': con_cruce,
+        'q_cercano': malla[filas, idx_cercano],
+        'f_cercano': f[filas, idx_cercano],
+        'evaluaciones': malla.shape[1]
+    }
+
+
+def illinois_vectorizado(func: Callable[[np.ndarray], np.ndarray],
+                         a: np.ndarray, b: np.ndarray,
+                         fa: np.ndarray, fb: np.ndarray,
+                         xtol: float = 1e-10, ftol: float = 1e-10,
+                         max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Método de Illinois (regula falsi modificada) aplicado en paralelo a n intervalos.
+    Cada intervalo [a, b] debe contener un cambio de signo de func.
+
+    Args:
+        func: Función vectorizada f(x) con x de forma (n_casos,)
+        a, b: Extremos de los intervalos
+        fa, fb: Valores de la función en los extremos
+        xtol: Tolerancia absoluta sobre el ancho del intervalo
+        ftol: Tolerancia absoluta sobre el residuo
+        max_iter: Máximo de iteraciones
+
+    Returns:
+        Diccionario con 'x', 'fx', 'convergido' e 'iteraciones' por caso
+    """
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    fa = np.array(fa, dtype=float)
+    fb = np.array(fb, dtype=float)
+
+    # Se toma como estimación el extremo con menor residuo
+    x = np.where(np.abs(fa) < np.abs(fb), a, b)
+    fx = np.where(np.abs(fa) < np.abs(fb), fa, fb)
+    convergido = (np.abs(fx) <= ftol) | (np.abs(b - a) <= xtol)
+    iteraciones = np.zeros(a.shape, dtype=int)
+
+    for _ in range(max_iter):
+        activo = ~convergido
+        if not activo.any():
+            break
+
+        denominador = fb - fa
+        secante = np.abs(denominador) > 0
+        c = np.where(secante, (a * fb - b * fa) / np.where(secante, denominador, 1.0), 0.5 * (a + b))
+        fc = np.asarray(func(c), dtype=float)
+
+        # Si f(c) tiene el signo opuesto a f(b) el nuevo intervalo es [b, c];
+        # si no, se conserva a y se divide fa a la mitad (corrección de Illinois)
+        opuesto = np.sign(fc) * np.sign(fb) < 0
+        a = np.where(activo & opuesto, b, a)
+        fa = np.where(activo & opuesto, fb, np.where(activo, 0.5 * fa, fa))
+        b = np.where(activo, c, b)
+        fb = np.where(activo, fc, fb)
+
+        x = np.where(activo, c, x)
+        fx = np.where(activo, fc, fx)
+        iteraciones = iteraciones + activo
+        convergido = convergido | (activo & ((np.abs(fc) <= ftol) | (np.abs(b - a) <= xtol)))
+
+    return {'x': x, 'fx': fx, 'convergido': convergido, 'iteraciones': iteraciones}
+
+
+def resolver_interseccion(func_diferencia: Callable[[np.ndarray], np.ndarray],
+                          func_altura: Callable[[np.ndarray], np.ndarray],
+                          q_min, q_max, n_malla: int = 64,
+                          xtol: float = 1e-10, ftol: float = 1e-10,
+                          max_iter: int = 100) -> Dict[str, np.ndarray]:
+    """
+    Resuelve el primer cruce de func_diferencia (H_bomba - H_sistema) en [q_min, q_max]
+    para n casos simultáneamente: acotamiento en malla + Illinois vectorizado.
+
+    Args:
+        func_diferencia: f(q) vectorizada, q de forma (n_casos,) o (n_casos, m)
+        func_altura: Altura en el punto (normalmente la de la bomba), misma convención
+        q_min, q_max: Rango de búsqueda (escalares o arrays por caso)
+        n_malla: Puntos de la malla de acotamiento
+        xtol, ftol, max_iter: Criterios de parada del método de Illinois
+
+    Returns:
+        Diccionario de arrays por caso:
+        'q', 'h': punto de operación (o aproximación más cercana si no hay cruce)
+        'con_cruce': si se encontró cambio de signo en el rango
+        'convergido': si se cumplieron las tolerancias
+        'iteraciones': iteraciones de Illinois usadas
+        'residuo': |H_bomba - H_sistema| en el punto devuelto
+        'evaluaciones': evaluaciones de la función por caso (malla + iteraciones)
+    """
+    cota = acotar_primer_cruce(func_diferencia, q_min, q_max, n_malla)
+    raiz = illinois_vectorizado(func_diferencia, cota['a'], cota['b'], cota['fa'], cota['fb'],
+                                xtol=xtol, ftol=ftol, max_iter=max_iter)
+
+    con_cruce = cota['con_cruce']
+    q = np.where(con_cruce, raiz['x'], cota['q_cercano'])
+    residuo = np.abs(np.where(con_cruce, raiz['fx'], cota['f_cercano']))
+
+    return {
+        'q': q,
+        'h': np.asarray(func_altura(q), dtype=float),
+        'con_cruce': con_cruce,
+        'convergido': con_cruce & raiz['convergido'],
+        'iteraciones': np.where(con_cruce, raiz['iteraciones'], 0),
+        'residuo': residuo,
+        'evaluaciones': cota['evaluaciones'] + np.where(con_cruce, raiz['iteraciones'], 0)
+    }
+
+
+def _escalar_si_unico(resultado: Dict[str, np.ndarray], es_lote: bool) -> Dict[str, Any]:
+    """Devuelve escalares cuando se resolvió un solo caso."""
+    if es_lote:
+        return resultado
+    return {k: (v[0].item() if isinstance(v, np.ndarray) else v) for k, v in resultado.items()}
+
+
+def resolver_interseccion_polinomios(coef_bomba, coef_sistema,
+                                     q_min=0.0, q_max=None,
+                                     n_malla: int = 64, xtol: float = 1e-10,
+                                     ftol: float = 1e-10, max_iter: int = 100) -> Dict[str, Any]:
+    """
+    Intersección entre curvas polinomiales de bomba y sistema (coeficientes de np.polyfit).
+    Acepta un solo par de polinomios o lotes (una fila por caso) para resolver
+    muchas combinaciones bomba×sistema a la vez.
+
+    Args:
+        coef_bomba: Coeficientes de la bomba, 1D o 2D (n_casos, grado+1)
+        coef_sistema: Coeficientes del sistema, 1D o 2D (n_casos, grado+1)
+        q_min: Caudal mínimo de búsqueda
+        q_max: Caudal máximo de búsqueda (obligatorio)
+        n_malla, xtol, ftol, max_iter: Parámetros del solucionador
+
+    Returns:
+        Diccionario de resolver_interseccion; escalares si la entrada era un solo caso.
+        La altura devuelta es la del sistema en el punto de operación.
+    """
+    if q_max is None:
+        raise ValueError("q_max es obligatorio para acotar la intersección")
+    es_lote = np.ndim(coef_bomba) == 2 or np.ndim(coef_sistema) == 2
+    cb, cs = _igualar_grado(_como_lote_coeficientes(coef_bomba), _como_lote_coeficientes(coef_sistema))
+    c_dif = cb - cs
+
+    resultado = resolver_interseccion(
+        lambda q: _evaluar_polinomios(c_dif, q),
+        lambda q: _evaluar_polinomios(cs, q),
+        q_min, q_max, n_malla=n_malla, xtol=xtol, ftol=ftol, max_iter=max_iter)
+    return _escalar_si_unico(resultado, es_lote)
+
+
+def _interp_lineal_extrapolado(q: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Interpolación lineal por tramos con extrapolación lineal en los extremos."""
+    yq = np.interp(q, x, y)
+    if len(x) >= 2:
+        pend_ini = (y[1] - y[0]) / (x[1] - x[0]) if x[1] != x[0] else 0.0
+        pend_fin = (y[-1] - y[-2]) / (x[-1] - x[-2]) if x[-1] != x[-2] else 0.0
+        yq = np.where(q < x[0], y[0] + pend_ini * (q - x[0]), yq)
+        yq = np.where(q > x[-1], y[-1] + pend_fin * (q - x[-1]), yq)
+    return yq
+
+
+def _ordenar_puntos(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    orden = np.argsort(x, kind='stable')
+    return x[orden], y[orden]
+
+
+def interseccion_curvas_tabuladas(x_bomba, y_bomba, x_sistema, y_sistema,
+                                  q_min=None, q_max=None, extrapolar: bool = True,
+                                  n_malla: int = 64) -> Dict[str, Any]:
+    """
+    Intersección entre dos curvas dadas por puntos (interpolación lineal por tramos).
+
+    Args:
+        x_bomba, y_bomba: Puntos de la curva de la bomba
+        x_sistema, y_sistema: Puntos de la curva del sistema
+        q_min: Caudal mínimo (por defecto el mayor de los mínimos de ambas curvas)
+        q_max: Caudal máximo (por defecto el menor de los máximos de ambas curvas)
+        extrapolar: Si True, extrapola linealmente fuera de los puntos dados
+        n_malla: Puntos de la malla de acotamiento
+
+    Returns:
+        Diccionario de resolver_interseccion con escalares (altura de la bomba)
+    """
+    xb, yb = _ordenar_puntos(x_bomba, y_bomba)
+    xs, ys = _ordenar_puntos(x_sistema, y_sistema)
+    if q_min is None:
+        q_min = max(xb[0], xs[0])
+    if q_max is None:
+        q_max = min(xb[-1], xs[-1])
+
+    interp = _interp_lineal_extrapolado if extrapolar else (lambda q, x, y: np.interp(q, x, y))
+    resultado = resolver_interseccion(
+        lambda q: interp(q, xb, yb) - interp(q, xs, ys),
+        lambda q: interp(q, xb, yb),
+        q_min, q_max, n_malla=n_malla)
+    return _escalar_si_unico(resultado, False)
+
+
+def resolver_punto_operacion_hw(pump_curve_points: List[Tuple[float, float]],
+                                system_params: Dict[str, Any], flow_unit: str,
+                                usar_cotas: bool = True, usar_lc_d: bool = True,
+                                grado_ajuste: int = None,
+                                q_min: float = None, q_max: float = None) -> Dict[str, Any]:
+    """
+    Punto de operación entre la curva de la bomba y la curva analítica del
+    sistema con Hazen-Williams (H = h0 + k·Q^1.852).
+
+    Args:
+        pump_curve_points: Puntos (Q, H) de la bomba en flow_unit
+        system_params: Parámetros del sistema
+        flow_unit: Unidad de caudal de los puntos de la bomba
+        usar_cotas: Altura estática desde cotas (True) o desde 'h_estatica' (False)
+        usar_lc_d: Respetar el 'lc_d' guardado en los accesorios
+        grado_ajuste: Si se indica, la bomba se ajusta con un polinomio de ese grado;
+                      si es None, se interpola linealmente entre los puntos del catálogo
+        q_min, q_max: Rango de búsqueda (por defecto el rango de la curva de la bomba)
+
+    Returns:
+        Diccionario de resolver_interseccion con escalares, más 'h0' y 'k' del sistema
+    """
+    xb, yb = _ordenar_puntos([p[0] for p in pump_curve_points], [p[1] for p in pump_curve_points])
+    h0, k = coeficientes_curva_sistema_hw(system_params, flow_unit, usar_cotas, usar_lc_d)
+
+    if grado_ajuste:
+        coef = np.polyfit(xb, yb, min(grado_ajuste, len(xb) - 1))
+        altura_bomba = lambda q: np.polyval(coef, q)
+    else:
+        altura_bomba = lambda q: np.interp(q, xb, yb)
+
+    def diferencia(q):
+        return altura_bomba(q) - (h0 + k * np.power(np.maximum(q, 0.0), 1.852))
+
+    resultado = resolver_interseccion(
+        diferencia, altura_bomba,
+        xb[0] if q_min is None else q_min,
+        xb[-1] if q_max is None else q_max)
+    resultado = _escalar_si_unico(resultado, False)
+    resultado['h0'] = h0
+    resultado['k'] = k
+    return resultado
@@ -0,0 +1,349 @@
+"""
+Simulación de la operación tanque / bombas para horizontes largos (un año horario,
+o semanas a 5 minutos) con una serie de demanda arbitraria, histéresis de arranque y
+parada por nivel y varias bombas escalonadas.
+
+Entre dos cambios de estado de las bombas el caudal bombeado es constante, así que la
+trayectoria del volumen es una suma acumulada de la serie de demanda. El simulador
+avanza de evento en evento: calcula de una vez la trayectoria de una ventana de pasos,
+ubica con NumPy el primer cruce de un nivel de arranque/parada (o del fondo / rebose)
+y solo itera en Python una vez por arranque o parada, no una vez por paso. Con el
+control sin banda (arranque = parada = tanque lleno) las bombas alternan casi cada paso
+mientras el tanque está lleno; esos ciclos (un paso detenidas y las bombas en marcha
+hasta volver a llenarlo) se resuelven en bloque con las mismas sumas acumuladas.
+
+Con altura estática variable (nivel del tanque y de la fuente) el caudal de cada paso
+depende del volumen y la trayectoria deja de ser una suma acumulada: el caudal se lee
+de una tabla precalculada (altura estática × bombas en marcha) con una interpolación
+lineal de costo fijo por paso.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+SEGUNDOS_HORA = 3600.0
+# Pasos sin eventos a partir de los cuales conviene volver a las ventanas vectorizadas
+RACHA_VECTORIAL = 8
+# Tolerancia (relativa a la capacidad) con que se comparan los niveles de arranque/parada:
+# un volumen que llega justo a un nivel da el mismo estado calculado paso a paso o con
+# sumas acumuladas, aunque el redondeo difiera en 1e-13 m³
+TOLERANCIA_NIVEL = 1e-9
+
+
+def serie_demanda(factores, caudal_base_m3s: float, dt_s: float = SEGUNDOS_HORA,
+                  n_pasos: Optional[int] = None, dt_factores_s: float = SEGUNDOS_HORA) -> np.ndarray:
+    """
+    Serie de demanda (m³/s) con paso dt_s a partir de factores de caudal.
+    Cada factor vale durante dt_factores_s (por defecto una hora) y la serie se repite
+    cíclicamente hasta completar n_pasos (24 factores horarios → perfil diario repetido).
+
+    Args:
+        factores: Multiplicadores del caudal base (p. ej. 24 factores horarios o una serie anual)
+        caudal_base_m3s: Caudal de diseño (m³/s)
+        dt_s: Paso de la simulación (s)
+        n_pasos: Número de pasos; por defecto los que cubre la serie de factores
+        dt_factores_s: Duración de cada factor (s)
+    """
+    factores = np.asarray(factores, dtype=float)
+    if n_pasos is None:
+        n_pasos = int(round(len(factores) * dt_factores_s / dt_s))
+    indice = (np.arange(n_pasos) * dt_s // dt_factores_s).astype(int) % len(factores)
+    return caudal_base_m3s * factores[indice]
+
+
+def _ciclos_tanque_lleno(demanda: np.ndarray, t: int, fin: int, dt_s: float, capacidad_m3: float,
+                         tolerancia: float, q_detenido: float, q_todas: float, volumen: np.ndarray,
+                         estado: np.ndarray):
+    """
+    Control sin banda desde el tanque lleno en el paso t: un paso con las bombas detenidas
+    (el nivel baja) y todas en marcha hasta volver a llenarlo. Mientras el caudal de todas
+    las bombas supere la demanda, el llenado es monótono y el paso en que se completa cada
+    ciclo se obtiene con searchsorted sobre la suma acumulada; en Python solo se encadenan
+    los inicios de ciclo. Escribe volumen y estado de los pasos resueltos; el tanque se
+    considera lleno a menos de `tolerancia` m³ de la capacidad.
+
+    Returns:
+        (paso siguiente, ciclos con bombeo, rebose en m³); el tanque queda lleno y las bombas
+        detenidas. Si ningún ciclo se completa dentro de [t, fin) devuelve t.
+    """
+    d = demanda[t:fin]
+    insuficiente = np.flatnonzero(d >= q_todas)
+    m = int(insuficiente[0]) if len(insuficiente) else len(d)
+    if m < 2:
+        return t, 0, 0.0
+    d = d[:m]
+    llenado = np.concatenate([[0.0], np.cumsum((q_todas - d[:m]) * dt_s)])
+    # Volumen tras el paso detenido de un ciclo que empezara en cada paso i
+    v1 = capacidad_m3 + (q_detenido - d) * dt_s
+    i = np.arange(m)
+    lleno = capacidad_m3 - tolerancia
+    siguiente = np.where(v1 >= lleno, i + 1, np.searchsorted(llenado, llenado[1:] + (lleno - v1), side="left"))
+    valido = ((v1 >= 0.0) & (siguiente <= m)).tolist()
+    siguiente_l = siguiente.tolist()
+    inicios = []
+    k = 0
+    while k < m and valido[k]:
+        inicios.append(k)
+        k = siguiente_l[k]
+    if not inicios:
+        return t, 0, 0.0
+
+    inicio = np.array(inicios)
+    final = siguiente[inicio]
+    ciclo = np.repeat(np.arange(len(inicio)), final - inicio)
+    s = inicio[ciclo]
+    en_marcha = i[:k] > s
+    nuevo = np.where(en_marcha, v1[s] + llenado[1:k + 1] - llenado[s + 1], np.minimum(v1[s], capacidad_m3))
+    excedente = v1[inicio] + llenado[final] - llenado[inicio + 1] - capacidad_m3
+    nuevo[final - 1] = np.minimum(nuevo[final - 1], capacidad_m3)
+    volumen[t + 1:t + k + 1] = nuevo
+    estado[t:t + k] = en_marcha[:, None]
+    rebose = float(np.maximum(excedente, 0.0).sum())
+    return t + k, int((final > inicio + 1).sum()), rebose
+
+
+def simular_operacion(demanda_m3s, dt_s: float, capacidad_m3: float, volumen_inicial_m3: float,
+                      caudal_por_bombas: Sequence[float], niveles_arranque_m3: Sequence[float],
+                      niveles_parada_m3: Sequence[float], estado_inicial: Optional[Sequence[bool]] = None,
+                      ventana_inicial: int = 256, alturas_tabla=None, altura_estatica_base_m=None,
+                      altura_por_m3: float = 0.0) -> Dict[str, Any]:
+    """
+    Balance del tanque con control por niveles.
+
+    La bomba k arranca cuando el volumen al inicio de un paso es menor que
+    niveles_arranque_m3[k] y se detiene cuando alcanza niveles_parada_m3[k]; con niveles
+    distintos por bomba se obtiene una operación escalonada. El caudal entrante depende
+    solo de cuántas bombas están en marcha (caudal_por_bombas[n], punto de operación de
+    n bombas en paralelo). El volumen se limita a [0, capacidad]: lo que falta es déficit
+    (demanda no servida) y lo que sobra, rebose. Los niveles se comparan con la tolerancia
+    de redondeo TOLERANCIA_NIVEL·capacidad.
+
+    Args:
+        demanda_m3s: Serie de demanda (m³/s), un valor por paso
+        dt_s: Paso de tiempo (s)
+        capacidad_m3, volumen_inicial_m3: Capacidad y volumen inicial del tanque
+        caudal_por_bombas: Caudal total (m³/s) con 0, 1, ..., N bombas en marcha
+        niveles_arranque_m3, niveles_parada_m3: Niveles de control de cada bomba (m³)
+        estado_inicial: Bombas en marcha al inicio; por defecto las que están bajo su nivel de arranque
+        alturas_tabla: Eje uniforme de alturas estáticas (m) para el modo de altura variable;
+            entonces caudal_por_bombas es una tabla (len(alturas_tabla), N + 1)
+        altura_estatica_base_m: Altura estática con el tanque vacío en cada paso (escalar o serie)
+        altura_por_m3: Aumento de la altura estática por m³ almacenado (profundidad / capacidad)
+
+    Returns:
+        Diccionario con volumen (n+1), demanda, bombas_en_marcha (n), estado (n × N),
+        caudal_bombeo (n), arranques y pasos_en_marcha por bomba, deficit_m3, rebose_m3,
+        dt_s y eventos (iteraciones del bucle); con altura variable, además altura_estatica (n)
+    """
+    demanda = np.asarray(demanda_m3s, dtype=float)
+    q_bombas = np.asarray(caudal_por_bombas, dtype=float)
+    arranque = np.asarray(niveles_arranque_m3, dtype=float)
+    parada = np.asarray(niveles_parada_m3, dtype=float)
+    n_bombas = len(arranque)
+    if len(parada) != n_bombas or q_bombas.shape[-1] != n_bombas + 1:
+        raise ValueError("Se requiere un nivel de arranque y de parada por bomba y N + 1 caudales")
+    sin_banda = bool(np.all(arranque == capacidad_m3) and np.all(parada == capacidad_m3))
+    tolerancia = TOLERANCIA_NIVEL * max(capacidad_m3, 1.0)
+    arranque = arranque - tolerancia
+    parada = parada - tolerancia
+    if alturas_tabla is not None:
+        return _simular_altura_variable(
+            demanda, dt_s, capacidad_m3, volumen_inicial_m3, q_bombas, arranque, parada, estado_inicial,
+            np.asarray(alturas_tabla, dtype=float), altura_estatica_base_m, altura_por_m3)
+    n = len(demanda)
+
+    volumen = np.empty(n + 1)
+    estado = np.zeros((n, n_bombas), dtype=bool)
+    v = min(max(float(volumen_inicial_m3), 0.0), capacidad_m3)
+    volumen[0] = v
+    en_marcha = (v < arranque) if estado_inicial is None else np.asarray(estado_inicial, dtype=bool).copy()
+    arranques = en_marcha.astype(int)
+    deficit = rebose = 0.0
+
+    # Trayectoria de una ventana sin cumsum por evento: V(t+j) = V(t) + Q·j·dt - (S[t+j] - S[t])
+    salida = np.concatenate([[0.0], np.cumsum(demanda * dt_s)])
+    entrada_unitaria = np.arange(1, n + 1) * dt_s
+    demanda_l, arranque_l, parada_l = demanda.tolist(), arranque.tolist(), parada.tolist()
+
+    t = 0
+    ventana = ventana_lleno = ventana_inicial
+    eventos = 0
+    escalar = False
+    while t < n:
+        eventos += 1
+        marcha = en_marcha.tolist()
+
+        if sin_banda and v >= capacidad_m3 - tolerancia and not any(marcha):
+            fin = min(n, t + ventana_lleno)
+            t_nuevo, ciclos, rebose_ciclos = _ciclos_tanque_lleno(
+                demanda, t, fin, dt_s, capacidad_m3, tolerancia, float(q_bombas[0]), float(q_bombas[-1]),
+                volumen, estado)
+            if t_nuevo > t:
+                arranques += ciclos
+                rebose += rebose_ciclos
+                ventana_lleno = 2 * ventana_lleno if t_nuevo - t > (fin - t) // 2 else ventana_inicial
+                t = t_nuevo
+                continue
+            ventana_lleno = ventana_inicial
+
+        q_entrada = float(q_bombas[sum(marcha)])
+        # Umbrales que cambian el estado: la parada más baja de las bombas en marcha y el
+        # arranque más alto de las detenidas; además el rebose y el fondo del tanque
+        limite_sup = min([p for p, m in zip(parada_l, marcha) if m] + [capacidad_m3])
+        limite_inf = max([a for a, m in zip(arranque_l, marcha) if not m] + [0.0])
+
+        if escalar:
+            # Eventos frecuentes (p. ej. control sin banda de histéresis): pasos escalares
+            # hasta el próximo evento o hasta una racha de RACHA_VECTORIAL pasos sin eventos
+            inicio = t
+            while t < n and t - inicio < RACHA_VECTORIAL:
+                v_nuevo = v + (q_entrada - demanda_l[t]) * dt_s
+                if v_nuevo >= limite_sup or v_nuevo < limite_inf:
+                    break
+                v = v_nuevo
+                t += 1
+                volumen[t] = v
+            estado[inicio:t] = en_marcha
+            if t == n:
+                break
+            if t - inicio >= RACHA_VECTORIAL:
+                escalar = False
+                continue
+            v = v_nuevo
+        else:
+            fin = min(n, t + ventana)
+            trayectoria = (v + salida[t]) + q_entrada * entrada_unitaria[:fin - t] - salida[t + 1:fin + 1]
+            cruce = (trayectoria >= limite_sup) | (trayectoria < limite_inf)
+            k = int(cruce.argmax())
+            if not cruce[k]:
+                volumen[t + 1:fin + 1] = trayectoria
+                estado[t:fin] = en_marcha
+                v = float(trayectoria[-1])
+                t = fin
+                ventana *= 2
+                continue
+            volumen[t + 1:t + k + 1] = trayectoria[:k]
+            estado[t:t + k] = en_marcha
+            v = float(trayectoria[k])
+            t += k
+            ventana = max(ventana_inicial, 2 * (k + 1))
+            escalar = k < RACHA_VECTORIAL
+
+        # Evento al final del paso t: límites del tanque y cambio de estado para el siguiente
+        estado[t] = en_marcha
+        if v < 0:
+            deficit -= v
+            v = 0.0
+        elif v > capacidad_m3:
+            rebose += v - capacidad_m3
+            v = capacidad_m3
+        volumen[t + 1] = v
+        nuevas = ~en_marcha & (v < arranque)
+        en_marcha = (en_marcha & (v < parada)) | nuevas
+        arranques += nuevas
+        t += 1
+
+    bombas_en_marcha = estado.sum(axis=1)
+    return {
+        "volumen": volumen,
+        "demanda": demanda,
+        "bombas_en_marcha": bombas_en_marcha,
+        "estado": estado,
+        "caudal_bombeo": q_bombas[bombas_en_marcha],
+        "arranques": arranques,
+        "pasos_en_marcha": estado.sum(axis=0),
+        "deficit_m3": deficit,
+        "rebose_m3": rebose,
+        "dt_s": float(dt_s),
+        "eventos": eventos
+    }
+
+
+def _simular_altura_variable(demanda, dt_s, capacidad_m3, volumen_inicial_m3, q_tabla, arranque, parada,
+                             estado_inicial, alturas_tabla, altura_estatica_base_m, altura_por_m3):
+    """
+    Balance paso a paso con el caudal de cada paso interpolado en q_tabla según la altura
+    estática al inicio del paso (misma lógica de control y de límites que simular_operacion).
+    """
+    n = len(demanda)
+    n_bombas = len(arranque)
+    base = np.broadcast_to(np.asarray(
+        0.0 if altura_estatica_base_m is None else altura_estatica_base_m, dtype=float), (n,))
+
+    v = min(max(float(volumen_inicial_m3), 0.0), capacidad_m3)
+    en_marcha = (v < arranque) if estado_inicial is None else np.asarray(estado_inicial, dtype=bool).copy()
+    arranques = en_marcha.astype(int)
+    marcha = en_marcha.tolist()
+    n_on = sum(marcha)
+
+    # Listas de Python: el bucle por paso solo hace aritmética escalar
+    tabla = q_tabla.tolist()
+    h0 = float(alturas_tabla[0])
+    ultimo = len(alturas_tabla) - 1
+    inv_dh = 1.0 / float(alturas_tabla[1] - alturas_tabla[0]) if ultimo > 0 else 0.0
+    demanda_l, base_l = demanda.tolist(), base.tolist()
+    arranque_l, parada_l = arranque.tolist(), parada.tolist()
+    volumen_l = [v]
+    caudal_l = [0.0] * n
+    altura_l = [0.0] * n
+    n_on_l = [0] * n
+    cambios = [(0, tuple(marcha))]
+    deficit = rebose = 0.0
+
+    for t in range(n):
+        hs = base_l[t] + altura_por_m3 * v
+        pos = (hs - h0) * inv_dh
+        if pos <= 0.0:
+            q = tabla[0][n_on]
+        elif pos >= ultimo:
+            q = tabla[ultimo][n_on]
+        else:
+            i = int(pos)
+            q = tabla[i][n_on] + (pos - i) * (tabla[i + 1][n_on] - tabla[i][n_on])
+        caudal_l[t] = q
+        altura_l[t] = hs
+        n_on_l[t] = n_on
+        v += (q - demanda_l[t]) * dt_s
+        if v < 0.0:
+            deficit -= v
+            v = 0.0
+        elif v > capacidad_m3:
+            rebose += v - capacidad_m3
+            v = capacidad_m3
+        volumen_l.append(v)
+
+        cambio = False
+        for k in range(n_bombas):
+            if marcha[k]:
+                if v >= parada_l[k]:
+                    marcha[k] = False
+                    cambio = True
+            elif v < arranque_l[k]:
+                marcha[k] = True
+                arranques[k] += 1
+                cambio = True
+        if cambio:
+            n_on = sum(marcha)
+            cambios.append((t + 1, tuple(marcha)))
+
+    # Estado por bomba a partir de los cambios (una asignación por tramo, no por paso)
+    estado = np.zeros((n, n_bombas), dtype=bool)
+    limites = [c[0] for c in cambios[1:]] + [n]
+    for (inicio, marcha_tramo), fin in zip(cambios, limites):
+        estado[inicio:fin] = marcha_tramo
+
+    return {
+        "volumen": np.array(volumen_l),
+        "demanda": demanda,
+        "bombas_en_marcha": np.array(n_on_l),
+        "estado": estado,
+        "caudal_bombeo": np.array(caudal_l),
+        "arranques": arranques,
+        "pasos_en_marcha": estado.sum(axis=0),
+        "deficit_m3": deficit,
+        "rebose_m3": rebose,
+        "dt_s": float(dt_s),
+        "eventos": len(cambios),
+        "altura_estatica": np.array(altura_l)
+    }
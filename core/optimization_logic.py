@@ -1,13 +1,21 @@
 import numpy as np
 import plotly.graph_objs as go
 
+from core.demand_uncertainty import almacenamiento_requerido, dimensionamiento_monte_carlo
+from core.operation_simulator import serie_demanda, simular_operacion
+from core.pump_curve_model import PumpCurveModel, interpolar_tabla
+from core.pump_scheduling import programar_bombeo, tarifa_por_paso
+
 # --- CLASE CENTRIFUGAL PUMP DESIGNER ---
 class CentrifugalPumpDesigner:
     RHO_WATER = 1000.0
     G = 9.80665
     def __init__(self, q_design, h_static, rpm, hourly_factors, pipe_length_m, pipe_diameter_m, 
                  n_parallel, hw_c, eff_peak, electricity_cost, min_tank_level_perc, 
-                 initial_tank_level_perc, simulation_days=1, tank_capacity_m3=None, tank_round_m3=50):
+                 initial_tank_level_perc, simulation_days=1, tank_capacity_m3=None, tank_round_m3=50,
+                 time_step_s=3600.0, demand_series=None, demand_step_s=3600.0,
+                 pump_start_levels_perc=None, pump_stop_levels_perc=None,
+                 pump_curve=None, static_head_range=None, tank_depth_m=None, source_level_m=None):
         # Validaciones y asignación robusta
         if len(hourly_factors) != 24:
             raise ValueError("hourly_factors debe contener 24 valores: uno por cada hora del día")
@@ -17,6 +25,8 @@ class CentrifugalPumpDesigner:
             raise ValueError("initial_tank_level_perc debe estar entre 0.0 y 1.0")
         if not simulation_days > 0:
             raise ValueError("simulation_days debe ser mayor que 0")
+        if not time_step_s > 0:
+            raise ValueError("time_step_s debe ser mayor que 0")
         self.q_design = float(q_design)
         self.h_static = float(h_static)
         self.rpm = float(rpm)
@@ -24,6 +34,9 @@ class CentrifugalPumpDesigner:
         self.n_parallel = int(n_parallel)
         self.initial_tank_level_perc = float(initial_tank_level_perc)
         self.simulation_days = int(simulation_days)
+        # Horizonte y paso de la simulación operativa (p. ej. 365 días a 300 s)
+        self.time_step_s = float(time_step_s)
+        self.n_steps = max(int(round(self.simulation_days * 86400.0 / self.time_step_s)), 1)
         self.pipe_length_m = float(pipe_length_m)
         self.pipe_diameter_m = float(pipe_diameter_m)
         self.hw_c = float(hw_c)
@@ -37,7 +50,48 @@ class CentrifugalPumpDesigner:
         self.pump_coeffs = (a_p, h_shutoff)
         
         self.q_range = np.linspace(1e-6, 1.5 * self.q_design, 400)
+        # Curvas reales (PumpCurveModel) en lugar de la parábola: tabla de puntos de operación
+        # por altura estática, velocidad y número de bombas; cada consulta es una interpolación
+        self.pump_curve = pump_curve
+        self.operating_table = None
+        # Altura estática variable: h_static es la altura con el tanque vacío y la fuente en su
+        # nivel nominal; sube tank_depth_m al llenarse el tanque y baja con source_level_m
+        # (variación horaria cíclica del nivel de la fuente, m)
+        self.tank_depth_m = float(tank_depth_m or 0.0)
+        self.source_level_m = None if source_level_m is None else np.asarray(source_level_m, dtype=float)
+        self.variable_head = self.tank_depth_m > 0 or self.source_level_m is not None
+        source = np.zeros(1) if self.source_level_m is None else self.source_level_m
+        h_min, h_max = (self.h_static, self.h_static) if static_head_range is None else static_head_range
+        h_min = min(h_min, self.h_static - source.max())
+        h_max = max(h_max, self.h_static - source.min() + self.tank_depth_m)
+        static_heads = np.linspace(h_min, h_max, 21) if h_max > h_min else [self.h_static]
+        k_system = float(self.system_head(1.0)) - self.h_static
+        if pump_curve is not None:
+            self.operating_table = pump_curve.tabla_operacion(static_heads, k_system, self.n_parallel)
+            self.q_range = np.linspace(1e-6, pump_curve.q_max_m3s, 400)
+        # Tabla (altura estática × velocidad × bombas) para la simulación con altura variable;
+        # con la parábola se construye un modelo de curvas a partir de ella
+        self.head_table = self.operating_table
+        if self.variable_head and self.head_table is None:
+            q_samples = np.linspace(0.0, self.q_range[-1], 30)
+            parabola = PumpCurveModel(q_samples, self.pump_head(q_samples), q_samples,
+                                      self.efficiency(q_samples), grado=2)
+            self.head_table = parabola.tabla_operacion(static_heads, k_system, self.n_parallel)
         self.q_op, self.h_op = self._solve_operating_point()
+        # Serie de demanda (m³/s): factores horarios repetidos o una serie propia (factores de q_design)
+        self.demand_factors = self.hourly_factors if demand_series is None else np.asarray(demand_series, dtype=float)
+        self.demand_step_s = 3600.0 if demand_series is None else float(demand_step_s)
+        self.demand_series_m3s = serie_demanda(
+            self.demand_factors, self.q_design, dt_s=self.time_step_s, n_pasos=self.n_steps,
+            dt_factores_s=self.demand_step_s)
+        # Niveles de arranque/parada por bomba (fracción de la capacidad); por defecto todas
+        # las bombas operan juntas mientras el tanque no está lleno
+        self.pump_start_levels_perc = np.broadcast_to(
+            np.asarray(1.0 if pump_start_levels_perc is None else pump_start_levels_perc, dtype=float), (self.n_parallel,))
+        self.pump_stop_levels_perc = np.broadcast_to(
+            np.asarray(1.0 if pump_stop_levels_perc is None else pump_stop_levels_perc, dtype=float), (self.n_parallel,))
+        if np.any(self.pump_start_levels_perc > self.pump_stop_levels_perc):
+            raise ValueError("El nivel de arranque de cada bomba debe ser menor o igual que el de parada")
         self.min_tank_level_perc = min_tank_level_perc
         self.tank_capacity_m3_user = tank_capacity_m3
         self.tank_round_m3 = tank_round_m3 if tank_round_m3 is not None and tank_round_m3 > 0 else 50.0
@@ -57,11 +111,18 @@ class CentrifugalPumpDesigner:
         return self.h_static + hf
 
     def pump_head(self, q):
+        if self.pump_curve is not None:
+            return self.pump_curve.altura(q)
         a_p, h_shutoff = self.pump_coeffs
         return h_shutoff - a_p * np.asarray(q, dtype=float)**2
 
-    def _solve_operating_point(self):
-        q_total = self.q_range * self.n_parallel
+    def _solve_operating_point(self, n_pumps=None, speed_ratio=1.0):
+        n_pumps = self.n_parallel if n_pumps is None else n_pumps
+        if self.operating_table is not None:
+            q_total = interpolar_tabla(self.operating_table, 'q_total', self.h_static, speed_ratio)[n_pumps]
+            h_op = interpolar_tabla(self.operating_table, 'h', self.h_static, speed_ratio)[n_pumps]
+            return float(q_total / n_pumps), float(h_op)
+        q_total = self.q_range * n_pumps
         pump_head_curve = self.pump_head(self.q_range)
         # La curva del sistema opera con el caudal TOTAL
         system_head_curve = self.system_head(q_total)
@@ -73,8 +134,9 @@ class CentrifugalPumpDesigner:
         
         # Corregido: Cruzar curva sistema con curva combinada
         q_per_pump_range = self.q_range
-        q_total_range = q_per_pump_range * self.n_parallel
-        h_combined_range = self.pump_head(q_per_pump_range) # Altura es la misma en paralelo
+        q_total_range = q_per_pump_range * n_pumps
+        # Altura es la misma en paralelo; con VFD, ley de afinidad: H = r²·H0 - a_p·Q²
+        h_combined_range = self.pump_head(q_per_pump_range) + (speed_ratio**2 - 1) * self.pump_coeffs[1]
         
         system_head_at_total = self.system_head(q_total_range)
         
@@ -85,13 +147,37 @@ class CentrifugalPumpDesigner:
         h_op = h_combined_range[idx]
         return float(q_op_per_pump), float(h_op)
 
+    def operating_points_by_count(self, speed_ratio=1.0):
+        """
+        Caudal total (m³/s) y potencia total (kW) con 0, 1, ..., n_parallel bombas en marcha
+        a la velocidad relativa speed_ratio (VFD). El rendimiento es el del punto homólogo
+        a velocidad nominal (Q / r); si la altura a caudal nulo no supera la estática no hay flujo.
+        """
+        if self.operating_table is not None:
+            return (interpolar_tabla(self.operating_table, 'q_total', self.h_static, speed_ratio),
+                    interpolar_tabla(self.operating_table, 'potencia_kw', self.h_static, speed_ratio))
+        q_total = np.zeros(self.n_parallel + 1)
+        power_total = np.zeros(self.n_parallel + 1)
+        if speed_ratio**2 * self.pump_coeffs[1] <= self.system_head(0.0):
+            return q_total, power_total
+        for n in range(1, self.n_parallel + 1):
+            q_per_pump, h = self._solve_operating_point(n, speed_ratio)
+            eta = self.efficiency(q_per_pump / speed_ratio)
+            q_total[n] = q_per_pump * n
+            power_total[n] = n * (self.RHO_WATER * self.G * q_per_pump * h / eta) / 1000 if eta >= 1e-6 else 0.0
+        return q_total, power_total
+
     def efficiency(self, q):
+        if self.pump_curve is not None:
+            return self.pump_curve.rendimiento(q)
         q = np.asarray(q, dtype=float)
         # Modelo parabólico de eficiencia centrado en q_design
         eta = self.eff_peak * (1 - ((q - self.q_design) / self.q_design)**2)
         return np.clip(eta, 0, None)
 
     def power_kW(self, q):
+        if self.pump_curve is not None:
+            return self.pump_curve.potencia_kw(q)
         head = self.pump_head(q)
         eta = self.efficiency(q)
         with np.errstate(divide='ignore', invalid='ignore'):
@@ -107,17 +193,39 @@ class CentrifugalPumpDesigner:
         return (self.RHO_WATER * self.G * q_op * h_op / eta_op) / 1000
 
     def _size_reservoir(self):
-        H = self.simulation_days * 24
-        q_in = np.full(H, self.q_op * self.n_parallel)
-        q_out = np.tile(self.q_design * self.hourly_factors, self.simulation_days)
-        hourly_balance = (q_in - q_out) * 3600.0
-        cum_mass = np.cumsum(hourly_balance)
-        active_storage = cum_mass.max() - cum_mass.min()
-        total_storage = active_storage / (1.0 - self.min_tank_level_perc)
+        # Pico secuente sobre la curva de masas: el tanque rebosa al llenarse, así que el
+        # excedente de bombeo no se acumula y la capacidad no crece con el horizonte
+        total_storage = almacenamiento_requerido(self.demand_series_m3s, self.q_op * self.n_parallel,
+                                                 self.time_step_s, self.min_tank_level_perc)[0]
         round_m3 = self.tank_round_m3 if hasattr(self, 'tank_round_m3') and self.tank_round_m3 > 0 else 50.0
         cap = np.ceil(total_storage / round_m3) * round_m3
         return float(max(cap, round_m3))
 
+    def size_reservoir_monte_carlo(self, n_traces=10000, days=30, reliabilities=(0.50, 0.90, 0.95, 0.99),
+                                   daily_cv=0.10, hourly_cv=0.05, autocorrelation=0.7,
+                                   peak_day_multiplier=1.0, peak_day_probability=0.0, time_step_s=3600.0,
+                                   seed=None):
+        """
+        Capacidad del tanque por confiabilidad con trazas de demanda estocásticas
+        (ver core.demand_uncertainty). La demanda base es la de la simulación (factores
+        horarios o serie propia) y el bombeo es el de las n_parallel bombas en su punto de operación.
+
+        Returns:
+            Resultado de dimensionamiento_monte_carlo más days y time_step_s
+        """
+        n_steps = max(int(round(days * 86400.0 / time_step_s)), 1)
+        base = serie_demanda(self.demand_factors, self.q_design, dt_s=time_step_s, n_pasos=n_steps,
+                             dt_factores_s=self.demand_step_s)
+        result = dimensionamiento_monte_carlo(
+            base, time_step_s, self.q_op * self.n_parallel, n_trazas=int(n_traces),
+            nivel_min_perc=self.min_tank_level_perc, confiabilidades=reliabilities,
+            redondeo_m3=self.tank_round_m3, semilla=seed, cv_diario=daily_cv, cv_horario=hourly_cv,
+            autocorrelacion=autocorrelation, multiplicador_pico=peak_day_multiplier,
+            prob_dia_pico=peak_day_probability)
+        result['days'] = days
+        result['time_step_s'] = float(time_step_s)
+        return result
+
     def affinity_curves(self, rpm_list):
         curves = {}
         for n in rpm_list:
@@ -128,38 +236,159 @@ class CentrifugalPumpDesigner:
         return curves
 
     def daily_balance(self):
-        q_supply = self.q_op * self.n_parallel
-        q_demand = np.tile(self.q_design * self.hourly_factors, self.simulation_days)
-        num_hours = 24 * self.simulation_days
-        vol = np.zeros(num_hours + 1)
-        pump_on = np.zeros(num_hours)
-        vol[0] = self.initial_volume_m3
-        for hour in range(num_hours):
-            if vol[hour] < self.tank_capacity_m3:
-                pump_on[hour] = 1.0
-                current_supply = q_supply
-            else:
-                pump_on[hour] = 0.0
-                current_supply = 0.0
-            delta_vol = (current_supply - q_demand[hour]) * 3600
-            vol[hour+1] = np.clip(vol[hour] + delta_vol, 0, self.tank_capacity_m3)
-        return vol, q_demand, pump_on
-
-    def energy_costs(self):
-        power_per_pump = self.power_at_op_kW()
-        total_power = power_per_pump * self.n_parallel
-        hourly_cost = total_power * self.pump_on_hourly * self.electricity_cost
-        total_cost = np.sum(hourly_cost)
-        total_volume_pumped = self.q_design * self.n_parallel * np.sum(self.pump_on_hourly) * 3600
+        """
+        Simulación operativa del tanque en todo el horizonte (ver core.operation_simulator).
+        Devuelve el volumen (n_steps + 1), la demanda y la fracción de bombas en marcha por paso;
+        el resultado completo queda en self.operation.
+        """
+        self.q_by_count, self.power_by_count = self.operating_points_by_count()
+        self.operation = self._level_control(self.demand_series_m3s, self.time_step_s)
+        pump_on = self.operation['bombas_en_marcha'] / self.n_parallel
+        return self.operation['volumen'], self.demand_series_m3s, pump_on
+
+    def _static_head_series(self, n_steps, dt):
+        """Altura estática con el tanque vacío en cada paso (h_static menos el nivel de la fuente)"""
+        if self.source_level_m is None:
+            return np.full(n_steps, self.h_static)
+        return self.h_static - serie_demanda(self.source_level_m, 1.0, dt_s=dt, n_pasos=n_steps)
+
+    def _level_control(self, demand, dt):
+        """
+        Control por niveles sobre la serie demand (paso dt) con la potencia total de cada
+        paso en 'potencia_kw'. Con altura variable el punto de operación de cada paso se
+        interpola en head_table según los niveles del tanque y de la fuente.
+        """
+        start = self.pump_start_levels_perc * self.tank_capacity_m3
+        stop = self.pump_stop_levels_perc * self.tank_capacity_m3
+        if not self.variable_head:
+            operation = simular_operacion(demand, dt, self.tank_capacity_m3, self.initial_volume_m3,
+                                          self.q_by_count, start, stop)
+            operation['potencia_kw'] = self.power_by_count[operation['bombas_en_marcha']]
+            return operation
+        heads = self.head_table['alturas_estaticas']
+        operation = simular_operacion(
+            demand, dt, self.tank_capacity_m3, self.initial_volume_m3,
+            interpolar_tabla(self.head_table, 'q_total', heads), start, stop, alturas_tabla=heads,
+            altura_estatica_base_m=self._static_head_series(len(demand), dt),
+            altura_por_m3=self.tank_depth_m / self.tank_capacity_m3)
+        power = interpolar_tabla(self.head_table, 'potencia_kw', operation['altura_estatica'])
+        operation['potencia_kw'] = power[np.arange(len(demand)), operation['bombas_en_marcha']]
+        return operation
+
+    def energy_costs(self, tariffs=None, start_hour=0.0):
+        """
+        Costo de cada paso (USD), costo total y costo por m³ efectivamente bombeado.
+        Con tariffs (24 tarifas horarias en USD/kWh) se aplica la tarifa de la hora de cada
+        paso en lugar de electricity_cost.
+        """
+        step_hours = self.time_step_s / 3600.0
+        price = (self.electricity_cost if tariffs is None else
+                 tarifa_por_paso(tariffs, self.time_step_s, self.n_steps, start_hour))
+        step_cost = self.operation['potencia_kw'] * step_hours * price
+        total_cost = np.sum(step_cost)
+        total_volume_pumped = np.sum(self.operation['caudal_bombeo']) * self.time_step_s
         cost_per_m3 = total_cost / total_volume_pumped if total_volume_pumped > 0 else 0
-        return hourly_cost, total_cost, cost_per_m3
+        return step_cost, total_cost, cost_per_m3
+
+    def optimal_schedule(self, tariffs, speed_ratios=(1.0,), min_run_h=1.0, min_stop_h=1.0,
+                         horizon_days=None, time_step_s=None, start_hour=0.0, n_levels=201):
+        """
+        Programa de bombeo de mínimo costo con tarifa horaria (ver core.pump_scheduling).
+        Las opciones de cada paso son "detenido" y cada combinación de número de bombas y
+        velocidad relativa de speed_ratios; el tanque se mantiene entre el nivel mínimo y la
+        capacidad. Para que el ahorro sea comparable, el programa termina al menos con el
+        volumen final del control por niveles (la referencia): ambos entregan la misma
+        demanda y dejan el mismo almacenamiento.
+
+        Args:
+            tariffs: 24 tarifas horarias (USD/kWh)
+            speed_ratios: Velocidades relativas disponibles (1.0 = velocidad fija)
+            min_run_h, min_stop_h: Tiempos mínimos de marcha y de parada (h)
+            horizon_days, time_step_s: Horizonte y paso; por defecto los de la simulación
+            start_hour: Hora del día al inicio del horizonte
+
+        Returns:
+            Resultado de programar_bombeo más n_pumps y speed_ratio por paso, tariff,
+            demand, time_step_s y el costo del control por niveles con la misma tarifa
+            (level_control_cost, level_control_volume); final_volume_target es el volumen
+            final exigido al programa
+        """
+        dt = self.time_step_s if time_step_s is None else float(time_step_s)
+        days = self.simulation_days if horizon_days is None else horizon_days
+        n_steps = max(int(round(days * 86400.0 / dt)), 1)
+        demand = serie_demanda(self.demand_factors, self.q_design, dt_s=dt, n_pasos=n_steps,
+                               dt_factores_s=self.demand_step_s)
+        tariff = tarifa_por_paso(tariffs, dt, n_steps, start_hour)
+
+        # Referencia: control por niveles en el mismo horizonte y con la misma tarifa
+        levels = self._level_control(demand, dt)
+        final_volume = float(levels['volumen'][-1])
+
+        # Con altura variable cada opción es una tabla sobre la altura estática, que el
+        # programa evalúa en cada paso con el nivel de la fuente y del tanque; sin ella,
+        # un punto de operación fijo
+        heads = None
+        head_kwargs = {}
+        if self.variable_head:
+            heads = self.head_table['alturas_estaticas']
+            head_kwargs = dict(alturas_tabla=heads, altura_estatica_base_m=self._static_head_series(n_steps, dt),
+                               altura_por_m3=self.tank_depth_m / self.tank_capacity_m3)
+        stopped = 0.0 if heads is None else np.zeros(len(heads))
+        options, q_options, p_options = [(0, 0.0)], [stopped], [stopped]
+        for ratio in speed_ratios:
+            if heads is None:
+                q_total, power_total = self.operating_points_by_count(ratio)
+            else:
+                q_total = interpolar_tabla(self.head_table, 'q_total', heads, ratio).T
+                power_total = interpolar_tabla(self.head_table, 'potencia_kw', heads, ratio).T
+            for n in range(1, self.n_parallel + 1):
+                if np.any(q_total[n] > 0):
+                    options.append((n, ratio))
+                    q_options.append(q_total[n])
+                    p_options.append(power_total[n])
+        options = np.array(options)
+
+        result = programar_bombeo(
+            tariff, demand, dt, self.tank_capacity_m3, self.initial_volume_m3, q_options, p_options,
+            volumen_min_m3=self.min_tank_level_perc * self.tank_capacity_m3, volumen_final_min_m3=final_volume,
+            min_marcha_pasos=max(int(np.ceil(min_run_h * 3600.0 / dt)), 1),
+            min_parada_pasos=max(int(np.ceil(min_stop_h * 3600.0 / dt)), 1),
+            n_niveles=n_levels, **head_kwargs)
+        result['n_pumps'] = options[result['opcion'], 0].astype(int)
+        result['speed_ratio'] = options[result['opcion'], 1]
+        result['tariff'] = tariff
+        result['demand'] = demand
+        result['time_step_s'] = dt
+        result['final_volume_target'] = final_volume
+        result['level_control_cost'] = float(np.sum(levels['potencia_kw'] * tariff) * dt / 3600.0)
+        result['level_control_volume'] = levels['volumen']
+        return result
 
     def _analyze_vfd_operation_by_flow(self, target_flow_lps):
         q_target_total_m3s = target_flow_lps / 1000.0
         target_head = self.system_head(q_target_total_m3s)
+        q_target_per_pump_m3s = q_target_total_m3s / self.n_parallel
+        if self.operating_table is not None:
+            # Curvas reales: velocidad que da el caudal objetivo, interpolada en la tabla
+            speeds = self.operating_table['velocidades']
+            q_by_speed = interpolar_tabla(self.operating_table, 'q_total', self.h_static, speeds)[:, self.n_parallel]
+            if not q_by_speed[0] <= q_target_total_m3s <= q_by_speed[-1]:
+                return None
+            speed_ratio = float(np.interp(q_target_total_m3s, q_by_speed, speeds))
+            efficiency = float(self.pump_curve.rendimiento(q_target_per_pump_m3s, speed_ratio))
+            power_kw = float(self.pump_curve.potencia_kw(q_target_per_pump_m3s, speed_ratio))
+            return {
+                "target_flow_lps": target_flow_lps,
+                "speed_ratio": speed_ratio,
+                "q_op_per_pump_lps": q_target_per_pump_m3s * 1000,
+                "q_op_total_lps": q_target_total_m3s * 1000,
+                "h_op": target_head,
+                "efficiency": efficiency * 100,
+                "power_per_pump_kw": power_kw,
+                "total_power_kw": power_kw * self.n_parallel,
+            }
         if target_head > self.pump_coeffs[1]:
             return None
-        q_target_per_pump_m3s = q_target_total_m3s / self.n_parallel
         a_p, h_shutoff = self.pump_coeffs
         h_shutoff_100, a_p_100 = h_shutoff, a_p
         
@@ -256,9 +485,9 @@ class CentrifugalPumpDesigner:
 
     def plot_tank_volume(self):
         fig = go.Figure()
-        num_hours = 24 * self.simulation_days
-        hrs_vol = np.arange(num_hours + 1)
-        fig.add_trace(go.Scatter(x=hrs_vol, y=self.vol_hourly, name='Volumen Tanque (m³)', mode='lines', line=dict(color='blue', width=3)))
+        hrs_vol = np.arange(self.n_steps + 1) * self.time_step_s / 3600.0
+        scatter = go.Scattergl if self.n_steps > 5000 else go.Scatter
+        fig.add_trace(scatter(x=hrs_vol, y=self.vol_hourly, name='Volumen Tanque (m³)', mode='lines', line=dict(color='blue', width=3)))
         fig.add_hline(y=self.tank_capacity_m3, line_dash="dash", line_color="black", annotation_text=f'Capacidad Tanque ({self.tank_capacity_m3:.0f} m³)')
         fig.add_hline(y=self.tank_capacity_m3 * self.min_tank_level_perc, line_dash="dash", line_color="red", annotation_text=f'Reserva Mínima ({self.min_tank_level_perc*100:.0f}%)')
         fig.update_yaxes(range=[0, self.tank_capacity_m3 * 1.1])
@@ -267,15 +496,48 @@ class CentrifugalPumpDesigner:
 
     def plot_demand_vs_inflow(self):
         fig = go.Figure()
-        num_hours = 24 * self.simulation_days
-        hrs_op = np.arange(num_hours)
-        constant_inflow_lps = np.full(num_hours, self.q_design * self.n_parallel * 1000)
+        hrs_op = np.arange(self.n_steps) * self.time_step_s / 3600.0
         demand_lps = self.demand_hourly * 1000
-        fig.add_trace(go.Bar(x=hrs_op, y=demand_lps, name='Demanda Horaria (L/s)', marker_color='red', opacity=0.6))
+        if self.n_steps > 24 * 31:
+            # Horizontes largos: líneas WebGL en lugar de miles de barras
+            fig.add_trace(go.Scattergl(x=hrs_op, y=demand_lps, name='Demanda (L/s)', mode='lines', line=dict(color='red', width=1)))
+        else:
+            fig.add_trace(go.Bar(x=hrs_op, y=demand_lps, name='Demanda Horaria (L/s)', marker_color='red', opacity=0.6))
         
-        # Mostrar cuando el bombeo está activo
-        q_pumping_active = constant_inflow_lps * self.pump_on_hourly
-        fig.add_trace(go.Scatter(x=hrs_op, y=q_pumping_active, name='Bombeo Activo (L/s)', mode='lines', line=dict(color='green', width=3), fill='tozeroy', fillcolor='rgba(0, 255, 0, 0.2)'))
+        # Mostrar cuando el bombeo está activo (caudal según el número de bombas en marcha)
+        q_pumping_active = self.operation['caudal_bombeo'] * 1000
+        scatter = go.Scattergl if self.n_steps > 5000 else go.Scatter
+        fig.add_trace(scatter(x=hrs_op, y=q_pumping_active, name='Bombeo Activo (L/s)', mode='lines', line=dict(color='green', width=3), fill='tozeroy', fillcolor='rgba(0, 255, 0, 0.2)'))
         
         fig.update_layout(title=f'Simulación Operacional ({self.simulation_days} días): Demanda vs. Bombeo', xaxis_title='Hora', yaxis_title='Caudal (L/s)', height=500)
         return fig
+
+    def plot_storage_distribution(self, monte_carlo):
+        """Histograma del almacenamiento requerido por las trazas con las capacidades por confiabilidad"""
+        fig = go.Figure()
+        fig.add_trace(go.Histogram(x=monte_carlo['almacenamiento'], nbinsx=60, name='Trazas', marker_color='steelblue', opacity=0.75))
+        for reliability, capacity in monte_carlo['capacidades'].items():
+            fig.add_vline(x=capacity, line_dash="dash", line_color="red", annotation_text=f'P{reliability*100:.0f}: {capacity:.0f} m³')
+        fig.add_vline(x=monte_carlo['deterministico'], line_dash="dot", line_color="black", annotation_text='Determinístico (pico secuente)')
+        fig.update_layout(title=f"Almacenamiento Requerido ({monte_carlo['n_trazas']} trazas, {monte_carlo['days']} días)", xaxis_title='Capacidad (m³)', yaxis_title='Número de trazas', showlegend=False, height=450)
+        return fig
+
+    def plot_schedule(self, schedule):
+        """Volumen del tanque con el programa óptimo y con control por niveles frente a la tarifa horaria"""
+        fig = go.Figure()
+        dt_h = schedule['time_step_s'] / 3600.0
+        n = len(schedule['tariff'])
+        hrs_vol = np.arange(n + 1) * dt_h
+        hrs_op = np.arange(n) * dt_h
+        fig.add_trace(go.Scatter(x=hrs_vol, y=schedule['volumen'], name='Volumen - Programa Óptimo (m³)', mode='lines', line=dict(color='green', width=3)))
+        fig.add_trace(go.Scatter(x=hrs_vol, y=schedule['level_control_volume'], name='Volumen - Control por Niveles (m³)', mode='lines', line=dict(color='grey', width=2, dash='dot')))
+        fig.add_trace(go.Scatter(x=hrs_op, y=schedule['caudal_m3s'] * 1000, name='Bombeo Programado (L/s)', mode='lines', line=dict(color='blue', width=1, shape='hv'), fill='tozeroy', fillcolor='rgba(0, 0, 255, 0.1)', yaxis='y2'))
+        fig.add_trace(go.Scatter(x=hrs_op, y=schedule['tariff'], name='Tarifa (USD/kWh)', mode='lines', line=dict(color='orange', width=2, shape='hv'), yaxis='y3'))
+        fig.add_hline(y=self.tank_capacity_m3 * self.min_tank_level_perc, line_dash="dash", line_color="red", annotation_text=f'Reserva Mínima ({self.min_tank_level_perc*100:.0f}%)')
+        fig.update_layout(
+            title='Programa de Bombeo de Mínimo Costo', xaxis=dict(title='Hora', domain=[0, 0.9]),
+            yaxis=dict(title='Volumen (m³)', range=[0, self.tank_capacity_m3 * 1.1]),
+            yaxis2=dict(title='Caudal (L/s)', overlaying='y', side='right'),
+            yaxis3=dict(title='Tarifa (USD/kWh)', overlaying='y', side='right', anchor='free', position=1.0),
+            height=500)
+        return fig
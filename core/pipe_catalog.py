@@ -0,0 +1,134 @@
+"""
+Catálogo columnar de tuberías comerciales (PVC, PEAD y Hierro Dúctil).
+Reúne en arrays las tablas de data_tablas/ (serie/clase, DN, diámetro interno,
+presión nominal y costo) para las optimizaciones vectorizadas de diámetros.
+"""
+
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from core.calculations import calculate_diametro_interno_pvc, calculate_diametro_interno_pead
+
+# 1 bar = 10.197 m.c.a.
+M_POR_BAR = 10.197
+
+SERIES_PEAD = ["s12_5", "s10", "s8", "s6_3", "s5", "s4"]
+
+
+def _leer_json(ruta: str) -> dict:
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _filas_pvc(data: dict) -> List[tuple]:
+    filas = []
+    for union in data.get("pvc_tuberias", {}).values():
+        for clave, serie in union.get("series", {}).items():
+            for tuberia in serie.get("tuberias", []):
+                di_mm = calculate_diametro_interno_pvc(tuberia["de_mm"], tuberia["espesor_min_mm"], tuberia["espesor_max_mm"])
+                filas.append(("PVC", clave.upper(), tuberia["dn_mm"], di_mm,
+                              serie.get("presion_bar", 0.0), tuberia.get("costo_usd_m", 0.0),
+                              (tuberia["de_mm"] - di_mm) / 2))
+    return filas
+
+
+def _filas_pead(data: dict) -> List[tuple]:
+    filas = []
+    for item in data.get("pead_tuberias", []):
+        dn = item.get("diametro_nominal_mm")
+        for clave in SERIES_PEAD:
+            serie = item.get(clave)
+            if not serie:
+                continue
+            # En PEAD el DN es el diámetro externo; sin espesor tabulado se usa el SDR
+            di_mm = calculate_diametro_interno_pead(dn, serie.get("espesor_mm"))
+            if di_mm is None and serie.get("sdr"):
+                di_mm = dn * (1 - 2.0 / serie["sdr"])
+            if di_mm is None:
+                continue
+            filas.append(("PEAD", clave.upper(), dn, di_mm,
+                          serie.get("presion_mpa", 0.0) * 10.0, serie.get("costo_usd_m", 0.0),
+                          (dn - di_mm) / 2))
+    return filas
+
+
+def _filas_hierro_ductil(data: dict) -> List[tuple]:
+    filas = []
+    for clave, clase in data.get("hierro_ductil", {}).items():
+        for tuberia in clase.get("tuberias", []):
+            di_mm = tuberia["de_mm"] - 2 * tuberia["espesor_nominal_mm"]
+            filas.append(("Hierro Dúctil", clave.upper(), tuberia["dn_mm"], di_mm,
+                          clase.get("pfa_bar", 0.0), tuberia.get("costo_usd_m", 0.0),
+                          tuberia["espesor_nominal_mm"]))
+    return filas
+
+
+def cargar_catalogo_tuberias(materiales: List[str] = None, directorio: str = "data_tablas") -> Dict[str, np.ndarray]:
+    """
+    Carga las tablas de tuberías en formato columnar, ordenadas por diámetro interno.
+    Las filas repetidas (mismo material, serie y DN en distintos tipos de unión)
+    se conservan una sola vez.
+
+    Args:
+        materiales: Materiales a incluir ("PVC", "PEAD", "Hierro Dúctil"); None = todos
+        directorio: Carpeta de los archivos JSON
+
+    Returns:
+        Diccionario de arrays (n,): material, serie, dn_mm, di_m, pn_m (presión
+        nominal en m.c.a.), costo_m (0 si la tabla no tiene costo), espesor_mm y c_hw
+    """
+    lectores = {
+        "PVC": ("pvc_data.json", _filas_pvc),
+        "PEAD": ("pead_data.json", _filas_pead),
+        "Hierro Dúctil": ("hierro_ductil_data.json", _filas_hierro_ductil),
+    }
+    filas = []
+    vistos = set()
+    for material, (archivo, lector) in lectores.items():
+        if materiales is not None and material not in materiales:
+            continue
+        try:
+            for fila in lector(_leer_json(os.path.join(directorio, archivo))):
+                clave = fila[:3]
+                if clave in vistos or not fila[3] or fila[3] <= 0:
+                    continue
+                vistos.add(clave)
+                filas.append(fila)
+        except Exception as e:
+            print(f"Error cargando catálogo de {material}: {e}")
+
+    filas.sort(key=lambda f: (f[3], f[4]))
+    return {
+        "material": np.array([f[0] for f in filas], dtype=object),
+        "serie": np.array([f[1] for f in filas], dtype=object),
+        "dn_mm": np.array([f[2] for f in filas], dtype=float),
+        "di_m": np.array([f[3] for f in filas], dtype=float) / 1000.0,
+        "pn_m": np.array([f[4] for f in filas], dtype=float) * M_POR_BAR,
+        "costo_m": np.array([f[5] or 0.0 for f in filas], dtype=float),
+        "espesor_mm": np.array([f[6] for f in filas], dtype=float),
+        "c_hw": np.array([150.0 if f[0] in ["PVC", "PEAD"] else 130.0 for f in filas]),
+    }
+
+
+def factor_masa(catalogo: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Masa por metro de cada tubería relativa a la serie/clase más liviana del mismo
+    material y DN (sección de pared π·e·(De - e)). Las tablas no tienen costos por clase
+    (costo_m = 0), así que el costo por DN se escala con este factor: una clase de mayor
+    presión lleva más material y cuesta más.
+    """
+    e = catalogo["espesor_mm"]
+    seccion = e * (catalogo["di_m"] * 1000.0 + e)
+    factor = np.ones(len(e))
+    claves = list(zip(catalogo["material"], catalogo["dn_mm"]))
+    for clave in set(claves):
+        filas = np.array([c == clave for c in claves])
+        referencia = seccion[filas].min()
+        if referencia > 0:
+            factor[filas] = seccion[filas] / referencia
+    return factor
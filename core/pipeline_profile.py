@@ -0,0 +1,210 @@
+"""
+Perfil longitudinal de la impulsión (abscisa / cota).
+Lectura desde CSV, simplificación de perfiles topográficos largos conservando los
+puntos altos, cotas en los nudos del MOC y línea piezométrica en régimen permanente
+frente al terreno, todo con operaciones NumPy.
+"""
+
+import csv
+import io
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import find_peaks
+
+# Nombres de columna reconocidos al importar un CSV (en minúsculas)
+COLUMNAS_ABSCISA = ("abscisa", "progresiva", "distancia", "chainage", "x", "km")
+COLUMNAS_COTA = ("cota", "elevacion", "elevación", "elevation", "z", "msnm")
+
+
+def _numero(texto: str) -> float:
+    return float(str(texto).strip().replace(",", "."))
+
+
+def leer_perfil_csv(contenido) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lee un perfil abscisa/cota desde un CSV (ruta, texto o bytes).
+    Admite separador coma, punto y coma o tabulador, encabezado opcional (se
+    reconocen columnas como abscisa/progresiva/chainage y cota/elevacion) y coma
+    decimal con separador punto y coma. Si la columna se llama "km" se convierte a m.
+
+    Returns:
+        (abscisa, cota) en m, ordenados por abscisa y sin abscisas repetidas (de las
+        filas con la misma abscisa se conserva la cota más alta, para no perder un punto alto)
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode("utf-8-sig")
+    elif os.path.isfile(contenido):
+        with open(contenido, "r", encoding="utf-8-sig") as f:
+            contenido = f.read()
+
+    muestra = contenido[:2048]
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        separador = dialecto.delimiter
+    except csv.Error:
+        separador = ";" if ";" in muestra else ","
+    filas = [f for f in csv.reader(io.StringIO(contenido), delimiter=separador) if any(c.strip() for c in f)]
+    if not filas:
+        raise ValueError("El archivo del perfil está vacío")
+
+    i_x, i_z, escala = 0, 1, 1.0
+    try:
+        _numero(filas[0][0])
+    except ValueError:
+        encabezado = [c.strip().lower() for c in filas.pop(0)]
+        i_x = next((i for i, c in enumerate(encabezado) if c in COLUMNAS_ABSCISA), 0)
+        i_z = next((i for i, c in enumerate(encabezado) if c in COLUMNAS_COTA), 1 if i_x != 1 else 0)
+        escala = 1000.0 if encabezado[i_x] == "km" else 1.0
+
+    x, z = [], []
+    for fila in filas:
+        try:
+            x.append(_numero(fila[i_x]) * escala)
+            z.append(_numero(fila[i_z]))
+        except (ValueError, IndexError):
+            continue
+    if len(x) < 2:
+        raise ValueError("El perfil necesita al menos dos puntos abscisa/cota válidos")
+    x = np.asarray(x)
+    z = np.asarray(z)
+    x, inversa = np.unique(x, return_inverse=True)
+    cota = np.full(len(x), -np.inf)
+    np.maximum.at(cota, inversa, z)
+    return x, cota
+
+
+def puntos_altos(x: np.ndarray, z: np.ndarray, prominencia: float = 0.5) -> np.ndarray:
+    """Índices de los puntos altos del perfil con prominencia mayor que `prominencia` (m)"""
+    indices, _ = find_peaks(np.asarray(z, dtype=float), prominence=prominencia)
+    return indices
+
+
+def _douglas_peucker(x: np.ndarray, z: np.ndarray, tolerancia: float, fijos: np.ndarray) -> np.ndarray:
+    """Máscara de puntos que conserva Douglas-Peucker (distancia vertical) más los índices fijos"""
+    conservar = np.zeros(len(x), dtype=bool)
+    conservar[fijos] = True
+    anclas = np.flatnonzero(conservar)
+    pendientes = list(zip(anclas[:-1], anclas[1:]))
+    while pendientes:
+        i, j = pendientes.pop()
+        if j - i < 2:
+            continue
+        tramo = slice(i + 1, j)
+        recta = z[i] + (z[j] - z[i]) * (x[tramo] - x[i]) / (x[j] - x[i])
+        desvio = np.abs(z[tramo] - recta)
+        k = int(np.argmax(desvio))
+        if desvio[k] > tolerancia:
+            medio = i + 1 + k
+            conservar[medio] = True
+            pendientes.append((i, medio))
+            pendientes.append((medio, j))
+    return conservar
+
+
+def simplificar_perfil(x, z, tolerancia: float = 0.5, max_puntos: Optional[int] = 200,
+                       prominencia: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simplifica un perfil topográfico con Douglas-Peucker (desvío vertical máximo
+    `tolerancia`, m) conservando siempre los extremos y los puntos altos.
+    Si quedan más de max_puntos vértices se duplica la tolerancia hasta cumplirlo;
+    los puntos altos solo se descartan (los de menor prominencia) si por sí solos
+    superan max_puntos.
+
+    Args:
+        x, z: Abscisas (crecientes) y cotas del perfil (m)
+        tolerancia: Desvío vertical admisible (m)
+        max_puntos: Número máximo de vértices; None = sin límite
+        prominencia: Prominencia mínima de un punto alto (m); por defecto la tolerancia
+
+    Returns:
+        (x, z) del perfil simplificado
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.asarray(z, dtype=float)
+    if len(x) <= 2:
+        return x, z
+    altos, props = find_peaks(z, prominence=tolerancia if prominencia is None else prominencia)
+    if max_puntos is not None and len(altos) > max_puntos - 2:
+        mejores = np.argsort(props["prominences"])[::-1][:max(max_puntos - 2, 0)]
+        altos = np.sort(altos[mejores])
+    fijos = np.concatenate([[0], altos, [len(x) - 1]])
+
+    conservar = _douglas_peucker(x, z, tolerancia, fijos)
+    while max_puntos is not None and conservar.sum() > max_puntos:
+        tolerancia *= 2
+        conservar = _douglas_peucker(x, z, tolerancia, fijos)
+    return x[conservar], z[conservar]
+
+
+def cotas_en_nudos(x_perfil, z_perfil, x_nudos) -> np.ndarray:
+    """
+    Cotas del perfil en los nudos de cálculo: interpolación lineal y, para que la
+    discretización no recorte las cumbres, cada punto alto del perfil se asigna al
+    nudo más cercano (si es mayor que la cota interpolada).
+    """
+    x_perfil = np.asarray(x_perfil, dtype=float)
+    z_perfil = np.asarray(z_perfil, dtype=float)
+    x_nudos = np.asarray(x_nudos, dtype=float)
+    z_nudos = np.interp(x_nudos, x_perfil, z_perfil)
+    altos = puntos_altos(x_perfil, z_perfil, prominencia=0.0)
+    # Solo las cumbres dentro del tramo discretizado (el perfil puede ser el de toda la impulsión)
+    altos = altos[(x_perfil[altos] >= x_nudos[0]) & (x_perfil[altos] <= x_nudos[-1])] if len(x_nudos) else altos
+    if len(altos) and len(x_nudos) > 1:
+        # x_nudos es creciente: el más cercano es el de la derecha o el de la izquierda
+        derecha = np.clip(np.searchsorted(x_nudos, x_perfil[altos]), 1, len(x_nudos) - 1)
+        izquierda = derecha - 1
+        cercano = np.where(x_perfil[altos] - x_nudos[izquierda] <= x_nudos[derecha] - x_perfil[altos],
+                           izquierda, derecha)
+        np.maximum.at(z_nudos, cercano, z_perfil[altos])
+    return z_nudos
+
+
+def pendiente_hazen_williams(caudal_m3s: float, diametro_m: float, c_hw: float = 150.0) -> float:
+    """Pérdida unitaria de Hazen-Williams J (m/m)"""
+    return 10.67 * (caudal_m3s / c_hw) ** 1.852 / diametro_m ** 4.87
+
+
+def linea_piezometrica(x, z, h_inicio: float, caudal_m3s: float, diametro_m: float,
+                       c_hw: float = 150.0) -> Dict[str, Any]:
+    """
+    Línea piezométrica en régimen permanente (Hazen-Williams) frente al terreno.
+
+    Args:
+        x, z: Abscisas y cotas del eje de la tubería (m)
+        h_inicio: Altura piezométrica en x[0] (salida de la bomba, m)
+        caudal_m3s, diametro_m, c_hw: Caudal, diámetro interno y coeficiente C
+
+    Returns:
+        Diccionario con x, z, hgl, presion (m.c.a.), presion_min, x_presion_min,
+        presion_max y negativa (máscara de tramos con presión negativa)
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.asarray(z, dtype=float)
+    j = pendiente_hazen_williams(caudal_m3s, diametro_m, c_hw)
+    hgl = h_inicio - j * (x - x[0])
+    presion = hgl - z
+    i_min = int(np.argmin(presion))
+    return {
+        "x": x,
+        "z": z,
+        "hgl": hgl,
+        "presion": presion,
+        "presion_min": float(presion[i_min]),
+        "x_presion_min": float(x[i_min]),
+        "presion_max": float(presion.max()),
+        "negativa": presion < 0
+    }
+
+
+def perfil_relativo(puntos: Sequence[Sequence[float]], tolerancia: float = 0.5,
+                    max_puntos: Optional[int] = 200) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Perfil [(abscisa, cota), ...] simplificado y referido al inicio de la impulsión:
+    abscisa desde 0 y cota relativa a la del primer punto (eje de la bomba).
+    """
+    datos = np.asarray(puntos, dtype=float).reshape(-1, 2)
+    datos = datos[np.argsort(datos[:, 0], kind="stable")]
+    x, z = simplificar_perfil(datos[:, 0], datos[:, 1], tolerancia, max_puntos)
+    return x - x[0], z - z[0]
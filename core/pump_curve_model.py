@@ -0,0 +1,195 @@
+"""
+Modelo de la bomba a partir de sus curvas reales (H-Q, η-Q y P-Q) ajustadas en el
+proyecto o tomadas del catálogo, con leyes de afinidad para velocidad variable.
+
+Para la simulación operativa se precalcula una tabla densa de puntos de operación
+(altura estática × velocidad × bombas en paralelo) resolviendo todas las
+intersecciones bomba-sistema de una vez con el solucionador vectorizado de
+core.operating_point; cada paso de la simulación es luego una interpolación en la tabla.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from core.calculations import convert_flow_unit
+from core.operating_point import resolver_interseccion
+from core.pump_screening import EXTRAPOLACION_MAX, GRADO_CURVAS
+
+RHO_G = 1000.0 * 9.80665
+HP_A_KW = 0.7457
+# Malla de velocidades relativas por defecto de la tabla de operación
+VELOCIDADES_TABLA = np.round(np.linspace(0.40, 1.20, 41), 4)
+
+
+def _ajustar(q, y, grado: int) -> Optional[np.ndarray]:
+    """Ajuste polinómico (orden de np.polyval) o None si no hay puntos suficientes"""
+    if q is None:
+        return None
+    q = np.asarray(q, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(q) < 2 or len(q) != len(y):
+        return None
+    return np.polyfit(q, y, min(grado, len(q) - 1))
+
+
+def _puntos(puntos) -> tuple:
+    datos = np.asarray(puntos, dtype=float).reshape(-1, 2) if puntos is not None and len(puntos) else np.empty((0, 2))
+    return datos[:, 0], datos[:, 1]
+
+
+class PumpCurveModel:
+    """
+    Curvas de una bomba a velocidad nominal (caudal por bomba en m³/s) y su
+    escalado por afinidad: a velocidad relativa r, H(Q, r) = r²·H(Q/r),
+    η(Q, r) = η(Q/r) y P(Q, r) = r³·P(Q/r).
+    """
+
+    def __init__(self, q_h_m3s, h_m, q_eta_m3s=None, eta=None, q_p_m3s=None, p_kw=None,
+                 grado: int = GRADO_CURVAS):
+        """
+        Args:
+            q_h_m3s, h_m: Puntos de la curva H-Q (m³/s, m)
+            q_eta_m3s, eta: Puntos de la curva η-Q (m³/s, fracción)
+            q_p_m3s, p_kw: Puntos de la curva P-Q (m³/s, kW)
+            grado: Grado de los polinomios ajustados
+
+        La potencia se calcula como ρgQH/η si hay curva de rendimiento (así no depende de
+        las unidades de la curva de potencia); sin ella se usa la curva P-Q.
+        """
+        self.coef_h = _ajustar(q_h_m3s, h_m, grado)
+        if self.coef_h is None:
+            raise ValueError("La curva H-Q necesita al menos dos puntos")
+        self.coef_eta = _ajustar(q_eta_m3s, eta, grado) if q_eta_m3s is not None else None
+        self.coef_p = _ajustar(q_p_m3s, p_kw, grado) if q_p_m3s is not None else None
+        if self.coef_eta is None and self.coef_p is None:
+            raise ValueError("Se requiere la curva de rendimiento o la de potencia")
+        self.q_max_m3s = float(np.max(q_h_m3s))
+        self.h_shutoff = float(np.polyval(self.coef_h, 0.0))
+
+    @classmethod
+    def desde_curva_inputs(cls, curva_inputs: Dict[str, Sequence], flow_unit: str = 'L/s',
+                           grado: int = GRADO_CURVAS, unidad_potencia: str = 'HP') -> "PumpCurveModel":
+        """
+        Modelo a partir de los puntos del proyecto (session_state['curva_inputs']):
+        'bomba' (Q, H m), 'rendimiento' (Q, η %) y 'potencia' (Q, P en HP o kW), con Q en flow_unit.
+        """
+        q_h, h = _puntos(curva_inputs.get('bomba'))
+        q_eta, eta = _puntos(curva_inputs.get('rendimiento'))
+        q_p, p = _puntos(curva_inputs.get('potencia'))
+        a_m3s = lambda q: np.asarray(convert_flow_unit(q, flow_unit, 'm³/s'), dtype=float)
+        factor_p = HP_A_KW if unidad_potencia == 'HP' else 1.0
+        return cls(a_m3s(q_h), h,
+                   a_m3s(q_eta) if len(q_eta) >= 2 else None, eta / 100.0,
+                   a_m3s(q_p) if len(q_p) >= 2 else None, p * factor_p, grado)
+
+    @classmethod
+    def desde_catalogo(cls, bomba: Dict[str, Any], grado: int = GRADO_CURVAS) -> "PumpCurveModel":
+        """Modelo a partir de una bomba del catálogo (curvas h_q, eta_q y pbhp_q en L/s)"""
+        curvas = bomba.get("curvas", {})
+        h_q = curvas.get("h_q", {})
+        eta_q = curvas.get("eta_q", {})
+        p_q = curvas.get("pbhp_q", {})
+        a_m3s = lambda q: np.asarray(q, dtype=float) / 1000.0 if q else None
+        return cls(a_m3s(h_q.get("caudales_lps", [])), h_q.get("alturas_m", []),
+                   a_m3s(eta_q.get("caudales_lps")), np.asarray(eta_q.get("eficiencias_porcentaje", []), dtype=float) / 100.0,
+                   a_m3s(p_q.get("caudales_lps")), p_q.get("potencias_kw", []), grado)
+
+    def altura(self, q, velocidad=1.0):
+        """Altura (m) de una bomba con caudal q (m³/s) a la velocidad relativa dada"""
+        r = np.asarray(velocidad, dtype=float)
+        return r ** 2 * np.polyval(self.coef_h, np.asarray(q, dtype=float) / r)
+
+    def rendimiento(self, q, velocidad=1.0):
+        """Rendimiento (fracción) en el punto homólogo a velocidad nominal"""
+        q = np.asarray(q, dtype=float)
+        r = np.asarray(velocidad, dtype=float)
+        if self.coef_eta is not None:
+            return np.clip(np.polyval(self.coef_eta, q / r), 0.0, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            eta = RHO_G * q * self.altura(q, r) / (self.potencia_kw(q, r) * 1000.0)
+        return np.clip(np.nan_to_num(eta), 0.0, 1.0)
+
+    def potencia_kw(self, q, velocidad=1.0):
+        """Potencia al freno (kW) de una bomba"""
+        q = np.asarray(q, dtype=float)
+        r = np.asarray(velocidad, dtype=float)
+        if self.coef_eta is None:
+            return np.maximum(r ** 3 * np.polyval(self.coef_p, q / r), 0.0)
+        eta = np.clip(np.polyval(self.coef_eta, q / r), 0.0, 1.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            potencia = RHO_G * q * self.altura(q, r) / eta / 1000.0
+        return np.nan_to_num(np.maximum(potencia, 0.0), posinf=0.0)
+
+    def tabla_operacion(self, alturas_estaticas, k_sistema: float, n_bombas: int,
+                        velocidades=VELOCIDADES_TABLA, exponente: float = 1.852) -> Dict[str, np.ndarray]:
+        """
+        Puntos de operación de 0..n_bombas bombas en paralelo contra H = Hs + k·Q_total^n
+        para todas las alturas estáticas Hs y velocidades relativas, resueltos a la vez.
+        Si la bomba no vence la altura estática el caudal es nulo; si el cruce queda más
+        allá de la curva (con EXTRAPOLACION_MAX) se toma el extremo de la curva.
+
+        Returns:
+            Diccionario con los ejes alturas_estaticas y velocidades y los arrays
+            (n_alturas, n_velocidades, n_bombas + 1) q_total (m³/s), h (m),
+            potencia_kw (total) y rendimiento; el índice 0 del último eje es "detenido"
+        """
+        hs = np.atleast_1d(np.asarray(alturas_estaticas, dtype=float))
+        r = np.atleast_1d(np.asarray(velocidades, dtype=float))
+        n = np.arange(1, n_bombas + 1, dtype=float)
+        HS, R, N = (m.ravel() for m in np.meshgrid(hs, r, n, indexing='ij'))
+
+        def por_caso(p, q):
+            return p.reshape((-1,) + (1,) * (q.ndim - 1))
+
+        def altura_bomba(q):
+            return self.altura(q, por_caso(R, q))
+
+        def diferencia(q):
+            q_total = por_caso(N, q) * np.maximum(q, 0.0)
+            return altura_bomba(q) - (por_caso(HS, q) + k_sistema * q_total ** exponente)
+
+        sol = resolver_interseccion(diferencia, altura_bomba, 0.0, R * self.q_max_m3s * EXTRAPOLACION_MAX)
+        vence = self.altura(0.0, R) > HS
+        q = np.where(vence, sol['q'], 0.0)
+        h = np.where(vence, sol['h'], 0.0)
+        potencia = np.where(vence, N * self.potencia_kw(q, R), 0.0)
+        eta = np.where(vence, self.rendimiento(q, R), 0.0)
+
+        forma = (len(hs), len(r), n_bombas)
+        con_detenido = lambda x: np.concatenate([np.zeros(forma[:2] + (1,)), x.reshape(forma)], axis=2)
+        return {
+            "alturas_estaticas": hs,
+            "velocidades": r,
+            "q_total": con_detenido(q * N),
+            "h": con_detenido(h),
+            "potencia_kw": con_detenido(potencia),
+            "rendimiento": con_detenido(eta)
+        }
+
+
+def _indices_pesos(eje: np.ndarray, x):
+    """Índice inferior y peso lineal de x en un eje creciente (acotado a los extremos)"""
+    x = np.asarray(x, dtype=float)
+    if len(eje) == 1:
+        return np.zeros(x.shape, dtype=int), np.zeros(x.shape)
+    i = np.clip(np.searchsorted(eje, x) - 1, 0, len(eje) - 2)
+    w = np.clip((x - eje[i]) / (eje[i + 1] - eje[i]), 0.0, 1.0)
+    return i, w
+
+
+def interpolar_tabla(tabla: Dict[str, np.ndarray], campo: str, altura_estatica, velocidad=1.0) -> np.ndarray:
+    """
+    Interpolación bilineal de un campo de tabla_operacion en (altura estática, velocidad).
+    Acepta escalares o arrays (p. ej. la altura estática de cada paso); devuelve un array
+    de forma (..., n_bombas + 1).
+    """
+    ih, wh = _indices_pesos(tabla["alturas_estaticas"], altura_estatica)
+    ir, wr = _indices_pesos(tabla["velocidades"], velocidad)
+    ih, wh, ir, wr = np.broadcast_arrays(ih, wh, ir, wr)
+    datos = tabla[campo]
+    ih1 = np.minimum(ih + 1, datos.shape[0] - 1)
+    ir1 = np.minimum(ir + 1, datos.shape[1] - 1)
+    wh, wr = wh[..., None], wr[..., None]
+    return ((1 - wh) * ((1 - wr) * datos[ih, ir] + wr * datos[ih, ir1]) +
+            wh * ((1 - wr) * datos[ih1, ir] + wr * datos[ih1, ir1]))
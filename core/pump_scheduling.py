@@ -0,0 +1,183 @@
+"""
+Programación de mínimo costo del bombeo con tarifa horaria (time-of-use).
+
+Programación dinámica hacia atrás sobre una malla de volúmenes del tanque. El estado es
+(volumen, bombeo en marcha / detenido, pasos transcurridos en ese modo) para respetar
+los tiempos mínimos de marcha y de parada; las acciones son "detenido" y cada punto de
+operación disponible (número de bombas y velocidad con VFD). Cada paso se resuelve de
+una vez para todos los estados y acciones con NumPy; la pasada hacia adelante sigue el
+volumen continuo interpolando el costo futuro.
+"""
+
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+# Penalización (en múltiplos del costo más caro de bombear 1 m³) por m³ fuera de los
+# límites del tanque o faltante respecto del volumen final exigido
+FACTOR_PENALIZACION = 1000.0
+
+
+def tarifa_por_paso(tarifas_horarias: Sequence[float], dt_s: float, n_pasos: int,
+                    hora_inicio: float = 0.0) -> np.ndarray:
+    """Precio (USD/kWh) de cada paso a partir de 24 tarifas horarias (o una serie horaria cíclica)"""
+    tarifas = np.asarray(tarifas_horarias, dtype=float)
+    hora = (hora_inicio + np.arange(n_pasos) * dt_s / 3600.0).astype(int) % len(tarifas)
+    return tarifas[hora]
+
+
+def programar_bombeo(tarifas, demanda_m3s, dt_s: float, capacidad_m3: float, volumen_inicial_m3: float,
+                     caudales_m3s: Sequence[float], potencias_kw: Sequence[float],
+                     volumen_min_m3: float = 0.0, volumen_final_min_m3: Optional[float] = None,
+                     min_marcha_pasos: int = 1, min_parada_pasos: int = 1,
+                     en_marcha_inicial: bool = False, n_niveles: int = 201,
+                     alturas_tabla: Optional[Sequence[float]] = None, altura_estatica_base_m=None,
+                     altura_por_m3: float = 0.0) -> Dict[str, Any]:
+    """
+    Programa de bombeo de mínimo costo energético.
+
+    Args:
+        tarifas: Precio de la energía en cada paso (USD/kWh); ver tarifa_por_paso
+        demanda_m3s: Demanda de cada paso (m³/s)
+        dt_s: Paso de tiempo (s)
+        capacidad_m3, volumen_inicial_m3: Capacidad y volumen inicial del tanque
+        caudales_m3s, potencias_kw: Puntos de operación disponibles (caudal total y potencia
+            total); la opción 0 debe ser "detenido" (0, 0)
+        volumen_min_m3: Volumen mínimo de reserva
+        volumen_final_min_m3: Volumen mínimo al final del horizonte; por defecto el inicial
+            (el tanque no se vacía para ahorrar dentro del horizonte)
+        min_marcha_pasos, min_parada_pasos: Tiempos mínimos de marcha y de parada (pasos)
+        en_marcha_inicial: Si el bombeo está en marcha al inicio (sin restricción de tiempo mínimo)
+        n_niveles: Puntos de la malla de volúmenes
+        alturas_tabla: Eje de alturas estáticas (m) para el modo de altura variable; entonces
+            caudales_m3s y potencias_kw son tablas (n_opciones, len(alturas_tabla)) y el punto
+            de operación de cada opción se interpola en la altura estática de cada paso
+        altura_estatica_base_m: Altura estática con el tanque vacío en cada paso (escalar o serie)
+        altura_por_m3: Aumento de la altura estática por m³ almacenado (profundidad / capacidad)
+
+    Returns:
+        Diccionario con opcion (índice del punto de operación por paso), caudal_m3s,
+        potencia_kw, volumen (n+1), costo (por paso), costo_total, energia_kwh,
+        penalizacion (m³ fuera de límites), arranques y tiempo_s
+    """
+    t0 = time.perf_counter()
+    tarifas = np.asarray(tarifas, dtype=float)
+    demanda = np.asarray(demanda_m3s, dtype=float)
+    q = np.asarray(caudales_m3s, dtype=float)
+    p = np.asarray(potencias_kw, dtype=float)
+    if np.any(q[0] != 0) or np.any(p[0] != 0):
+        raise ValueError("La opción 0 debe ser el bombeo detenido (caudal y potencia nulos)")
+    n_pasos, n_opciones = len(demanda), len(q)
+    if volumen_final_min_m3 is None:
+        volumen_final_min_m3 = volumen_inicial_m3
+    volumen_final_min_m3 = min(volumen_final_min_m3, capacidad_m3)
+
+    malla = np.linspace(volumen_min_m3, capacidad_m3, n_niveles)
+    dv = malla[1] - malla[0]
+    n_dwell = max(min_marcha_pasos, min_parada_pasos, 1)
+    modo_destino = (np.arange(n_opciones) > 0).astype(int)
+    # Costo de referencia por m³: el punto de operación más caro a la tarifa más alta
+    con_caudal = q[1:] > 0
+    costo_m3 = ((p[1:][con_caudal] / q[1:][con_caudal]).max() / 3600.0 * tarifas.max()
+                if con_caudal.any() else 1.0)
+    penal_m3 = FACTOR_PENALIZACION * max(costo_m3, 1e-6)
+
+    if alturas_tabla is None:
+        def operacion(v, t):
+            """Caudal y potencia de cada opción (n_opciones × 1, independientes del volumen)"""
+            return q[:, None], p[:, None]
+    else:
+        ht = np.asarray(alturas_tabla, dtype=float)
+        base = np.broadcast_to(np.asarray(
+            0.0 if altura_estatica_base_m is None else altura_estatica_base_m, dtype=float), (n_pasos,))
+
+        def operacion(v, t):
+            """Caudal y potencia de cada opción con la altura estática del paso t y volumen v (n_opciones × len(v))"""
+            hs = base[t] + altura_por_m3 * v
+            return (np.array([np.interp(hs, ht, fila) for fila in q]),
+                    np.array([np.interp(hs, ht, fila) for fila in p]))
+
+    # Transiciones de (modo, pasos en el modo) para cada opción: -1 = no permitida
+    permitido_cambio = np.array([min_parada_pasos, min_marcha_pasos])
+    dwell_destino = np.full((2, n_dwell, n_opciones), -1, dtype=int)
+    for modo in (0, 1):
+        for d in range(n_dwell):
+            for a in range(n_opciones):
+                if modo_destino[a] == modo:
+                    dwell_destino[modo, d, a] = min(d + 1, n_dwell - 1)
+                elif d + 1 >= permitido_cambio[modo]:
+                    dwell_destino[modo, d, a] = 0
+    invalida = dwell_destino < 0
+    dwell_idx = np.where(invalida, 0, dwell_destino)
+
+    def transicion(v, t, q_v, p_v):
+        """Volumen siguiente (limitado), penalización y costo de cada opción (n_opciones × len(v))"""
+        v_sig = v[None, :] + (q_v - demanda[t]) * dt_s
+        exceso = np.maximum(v_sig - capacidad_m3, 0) + np.maximum(volumen_min_m3 - v_sig, 0)
+        v_sig = np.clip(v_sig, volumen_min_m3, capacidad_m3)
+        costo = p_v * (tarifas[t] * dt_s / 3600.0) + penal_m3 * exceso
+        return v_sig, costo, exceso
+
+    def interpolar(J, v_sig):
+        """J[modo', dwell', malla] evaluado en v_sig para cada opción → (n_opciones, n_dwell, len(v))"""
+        pos = (v_sig - malla[0]) / dv
+        i0 = np.clip(pos.astype(int), 0, n_niveles - 2)
+        w = pos - i0
+        J_destino = J[modo_destino]  # (n_opciones, n_dwell, n_niveles)
+        fila = np.arange(n_opciones)[:, None, None]
+        col = np.arange(n_dwell)[None, :, None]
+        return (J_destino[fila, col, i0[:, None, :]] * (1 - w[:, None, :]) +
+                J_destino[fila, col, i0[:, None, :] + 1] * w[:, None, :])
+
+    def q_valores(J, v, t, q_v, p_v):
+        """Costo total Q[modo, dwell, opción, v] de cada acción desde cada estado"""
+        v_sig, costo, _ = transicion(v, t, q_v, p_v)
+        futuro = interpolar(J, v_sig)  # (n_opciones, n_dwell', n_v)
+        # Q[m, d, a] = costo[a] + futuro[a, dwell_destino[m, d, a]]
+        Q = costo[None, None] + futuro[np.arange(n_opciones)[None, None, :], dwell_idx]
+        return np.where(invalida[..., None], np.inf, Q)
+
+    # Pasada hacia atrás
+    J = np.empty((n_pasos + 1, 2, n_dwell, n_niveles))
+    J[n_pasos] = (penal_m3 * np.maximum(volumen_final_min_m3 - malla, 0))[None, None, :]
+    for t in range(n_pasos - 1, -1, -1):
+        J[t] = q_valores(J[t + 1], malla, t, *operacion(malla, t)).min(axis=2)
+
+    # Pasada hacia adelante con el volumen continuo
+    opcion = np.zeros(n_pasos, dtype=int)
+    caudal = np.zeros(n_pasos)
+    potencia = np.zeros(n_pasos)
+    volumen = np.empty(n_pasos + 1)
+    penalizacion = 0.0
+    v = float(np.clip(volumen_inicial_m3, volumen_min_m3, capacidad_m3))
+    volumen[0] = v
+    modo, d = int(en_marcha_inicial), n_dwell - 1
+    for t in range(n_pasos):
+        q_v, p_v = operacion(np.array([v]), t)
+        Q = q_valores(J[t + 1], np.array([v]), t, q_v, p_v)[modo, d, :, 0]
+        a = int(np.argmin(Q))
+        v_sig, _, exceso = transicion(np.array([v]), t, q_v, p_v)
+        opcion[t] = a
+        caudal[t] = q_v[a, 0]
+        potencia[t] = p_v[a, 0]
+        penalizacion += float(exceso[a, 0])
+        v = float(v_sig[a, 0])
+        volumen[t + 1] = v
+        d = dwell_destino[modo, d, a]
+        modo = modo_destino[a]
+
+    costo = potencia * tarifas * dt_s / 3600.0
+    marcha = opcion > 0
+    return {
+        "opcion": opcion,
+        "caudal_m3s": caudal,
+        "potencia_kw": potencia,
+        "volumen": volumen,
+        "costo": costo,
+        "costo_total": float(costo.sum()),
+        "energia_kwh": float((potencia * dt_s / 3600.0).sum()),
+        "penalizacion": penalizacion,
+        "arranques": int(np.count_nonzero(marcha[1:] & ~marcha[:-1]) + (marcha[0] and not en_marcha_inicial)),
+        "tiempo_s": time.perf_counter() - t0
+    }
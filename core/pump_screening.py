@@ -0,0 +1,240 @@
+"""
+Motor de cribado de bombas comerciales sobre todo el catálogo.
+Carga una sola vez todos los archivos data_tablas/bombas_*_data.json en arrays
+columnares, ajusta una vez las curvas H-Q, η-Q, P-Q y NPSHr-Q de cada bomba y,
+para una curva de sistema dada, calcula en un solo paso vectorizado el punto de
+operación, rendimiento, potencia y margen de NPSH de todas las bombas.
+"""
+
+import glob
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.operating_point import resolver_interseccion
+
+# Grado de los polinomios ajustados (caudal en L/s)
+GRADO_CURVAS = 2
+# Extrapolación admitida más allá del último caudal del catálogo
+EXTRAPOLACION_MAX = 1.10
+
+
+def _ajustar(x, y, grado: int = GRADO_CURVAS) -> np.ndarray:
+    """Ajuste polinómico (orden de np.polyval); NaN si no hay puntos suficientes"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2 or len(x) != len(y):
+        return np.full(grado + 1, np.nan)
+    grado_real = min(grado, len(x) - 1)
+    coef = np.polyfit(x, y, grado_real)
+    return np.concatenate([np.zeros(grado - grado_real), coef])
+
+
+def _polival(coef: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Evalúa n polinomios (n, grado+1) en q de forma (n,) o (n, m)"""
+    if q.ndim == 2:
+        coef = coef[:, :, None]
+    resultado = np.zeros_like(q, dtype=float)
+    for j in range(coef.shape[1]):
+        resultado = resultado * q + coef[:, j]
+    return resultado
+
+
+class PumpScreeningEngine:
+    """
+    Catálogo columnar de bombas de todas las marcas.
+    Cada bomba ocupa una fila; `bombas` conserva el diccionario original
+    (con _marca, _categoria y _tipo) para mostrarlo o cargar sus curvas.
+    """
+
+    def __init__(self, directorio: str = "data_tablas"):
+        self.directorio = directorio
+        self.recargar()
+
+    def _archivos(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directorio, "bombas_*_data.json")))
+
+    def firma(self) -> tuple:
+        """Archivos y fechas de modificación: cambia si se agrega o edita un catálogo"""
+        return tuple((ruta, os.path.getmtime(ruta)) for ruta in self._archivos())
+
+    def recargar(self):
+        """Lee todos los catálogos y ajusta las curvas de cada bomba (una sola vez)"""
+        self._firma = self.firma()
+        self.bombas: List[Dict[str, Any]] = []
+        for ruta in self._archivos():
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Error cargando catálogo de bombas {ruta}: {e}")
+                continue
+            marca = data.get("marca") or os.path.basename(ruta)[len("bombas_"):-len("_data.json")].capitalize()
+            for categoria in data.get("categorias", []):
+                for bomba in categoria.get("bombas", []):
+                    info = dict(bomba)
+                    info["_marca"] = marca
+                    info["_categoria"] = categoria.get("categoria")
+                    info["_tipo"] = categoria.get("tipo")
+                    self.bombas.append(info)
+
+        n = len(self.bombas)
+        ancho = GRADO_CURVAS + 1
+        self.coef_h = np.full((n, ancho), np.nan)
+        self.coef_eta = np.full((n, ancho), np.nan)
+        self.coef_p = np.full((n, ancho), np.nan)
+        self.coef_npsh = np.full((n, ancho), np.nan)
+        self.q_max_catalogo = np.zeros(n)
+        self.q_bep = np.full(n, np.nan)
+        self.potencia_motor_kw = np.array([float(b.get("potencia_kw", 0) or 0) for b in self.bombas])
+        self.costo_usd = np.array([float(b.get("costo_estimado_usd", 0) or 0) for b in self.bombas])
+        self.marca = np.array([b["_marca"] for b in self.bombas], dtype=object)
+
+        for i, bomba in enumerate(self.bombas):
+            curvas = bomba.get("curvas", {})
+            h_q = curvas.get("h_q", {})
+            eta_q = curvas.get("eta_q", {})
+            p_q = curvas.get("pbhp_q", {})
+            npsh_q = curvas.get("npshr_q", {})
+            self.coef_h[i] = _ajustar(h_q.get("caudales_lps", []), h_q.get("alturas_m", []))
+            self.coef_eta[i] = _ajustar(eta_q.get("caudales_lps", []), eta_q.get("eficiencias_porcentaje", []))
+            self.coef_p[i] = _ajustar(p_q.get("caudales_lps", []), p_q.get("potencias_kw", []))
+            self.coef_npsh[i] = _ajustar(npsh_q.get("caudales_lps", []), npsh_q.get("npsh_requerido_m", []))
+            caudales = h_q.get("caudales_lps", [])
+            self.q_max_catalogo[i] = max(caudales) if caudales else 0.0
+            # Punto de máximo rendimiento (BEP) sobre los puntos del catálogo
+            if eta_q.get("caudales_lps"):
+                q_eta = np.asarray(eta_q["caudales_lps"], dtype=float)
+                malla = np.linspace(q_eta.min(), q_eta.max(), 50)
+                self.q_bep[i] = malla[np.argmax(np.polyval(self.coef_eta[i], malla))]
+
+    def vigente(self) -> bool:
+        return self._firma == self.firma()
+
+    def __len__(self) -> int:
+        return len(self.bombas)
+
+    def screen(self, h0: float, k: float, exponente: float = 1.852,
+               npsh_disponible: Optional[float] = None, n_paralelo: int = 1,
+               caudal_objetivo: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Punto de operación de todas las bombas contra la curva de sistema
+        H = h0 + k·Q^exponente (Q total en L/s), en un solo paso vectorizado.
+
+        Args:
+            h0: Altura estática del sistema (m)
+            k: Coeficiente de pérdidas del sistema (m / (L/s)^exponente)
+            exponente: Exponente de la curva de sistema (1.852 Hazen-Williams, 2 Darcy)
+            npsh_disponible: NPSH disponible (m); si es None no se calcula el margen
+            n_paralelo: Bombas iguales en paralelo (cada una entrega Q/n)
+            caudal_objetivo: Caudal por bomba buscado (L/s), para el puntaje
+
+        Returns:
+            Diccionario de arrays (n_bombas,): q, h, eta (%), potencia_kw, npshr,
+            margen_npsh, relacion_bep (Q/Q_bep), con_cruce, dentro_curva,
+            sobrecarga_motor, valida y score (menor es mejor)
+        """
+        n = len(self.bombas)
+        if n == 0:
+            return {}
+        # Curva del sistema vista por una bomba: Q_total = n_paralelo · Q
+        k_bomba = k * n_paralelo ** exponente
+        q_lim = np.maximum(self.q_max_catalogo * EXTRAPOLACION_MAX, 1e-6)
+
+        # Bombas sin curva H-Q: curva nula (nunca cruzan)
+        validos = np.all(np.isfinite(self.coef_h), axis=1)
+        coef_h = np.where(validos[:, None], self.coef_h, 0.0)
+
+        def altura(q):
+            return _polival(coef_h, q)
+
+        def diferencia(q):
+            return altura(q) - (h0 + k_bomba * np.maximum(q, 0.0) ** exponente)
+
+        sol = resolver_interseccion(diferencia, altura, np.zeros(n), q_lim)
+
+        q = sol["q"]
+        h = sol["h"]
+        eta = np.clip(_polival(self.coef_eta, q), 0.0, 100.0)
+        # Potencia al eje: hidráulica / rendimiento; si no hay curva η se usa la curva P-Q
+        p_hidraulica = 9.81 * (q / 1000.0) * h
+        potencia = np.where(eta > 1.0, p_hidraulica / np.maximum(eta, 1.0) * 100.0, _polival(self.coef_p, q))
+        npshr = _polival(self.coef_npsh, q)
+        margen_npsh = (npsh_disponible - npshr) if npsh_disponible is not None else np.full(n, np.nan)
+        relacion_bep = q / self.q_bep
+
+        con_cruce = sol["con_cruce"] & validos & (q > 0)
+        dentro_curva = q <= self.q_max_catalogo * 1.05
+        sobrecarga = (self.potencia_motor_kw > 0) & (potencia > self.potencia_motor_kw)
+        valida = con_cruce & dentro_curva
+        if npsh_disponible is not None:
+            valida &= ~(margen_npsh < 0.5)
+
+        # Puntaje: alejamiento del BEP, rendimiento y ajuste al caudal buscado
+        score = np.abs(1.0 - np.nan_to_num(relacion_bep, nan=2.0)) + (100.0 - eta) / 100.0
+        if caudal_objetivo:
+            score = score + np.abs(q - caudal_objetivo) / caudal_objetivo
+        score = score + np.where(sobrecarga, 0.2, 0.0)
+        score = np.where(valida, score, np.inf)
+
+        return {
+            "q": q,
+            "h": h,
+            "eta": eta,
+            "potencia_kw": potencia,
+            "npshr": npshr,
+            "margen_npsh": margen_npsh,
+            "relacion_bep": relacion_bep,
+            "con_cruce": con_cruce,
+            "dentro_curva": dentro_curva,
+            "sobrecarga_motor": sobrecarga,
+            "valida": valida,
+            "score": score
+        }
+
+    def ranking(self, h0: float, k: float, top: int = 20, margen_caudal_perc: Optional[float] = None,
+                **kwargs) -> List[Dict[str, Any]]:
+        """
+        Las `top` mejores bombas válidas (ver screen) como diccionarios del catálogo,
+        con el punto de operación en _q_op, _h_op, _eta_op, _p_kw, _npshr, _margen_npsh
+        y el puntaje en _score. Con margen_caudal_perc (y caudal_objetivo) solo entran las
+        bombas cuyo caudal de operación está dentro de Q/(1 + m) .. Q·(1 + m); el filtro se
+        aplica antes de recortar a `top`.
+        """
+        resultado = self.screen(h0, k, **kwargs)
+        if not resultado:
+            return []
+        aceptada = resultado["valida"].copy()
+        caudal_objetivo = kwargs.get("caudal_objetivo")
+        if margen_caudal_perc is not None and caudal_objetivo:
+            factor = 1 + margen_caudal_perc / 100.0
+            aceptada &= (resultado["q"] >= caudal_objetivo / factor) & (resultado["q"] <= caudal_objetivo * factor)
+        orden = np.argsort(resultado["score"], kind="stable")
+        orden = orden[aceptada[orden]][:top]
+        seleccion = []
+        for i in orden:
+            info = dict(self.bombas[i])
+            info["_score"] = float(resultado["score"][i])
+            info["_q_op"] = float(resultado["q"][i])
+            info["_h_op"] = float(resultado["h"][i])
+            info["_eta_op"] = float(resultado["eta"][i])
+            info["_p_kw"] = float(resultado["potencia_kw"][i])
+            info["_npshr"] = float(resultado["npshr"][i])
+            info["_margen_npsh"] = float(resultado["margen_npsh"][i])
+            info["_sobrecarga_motor"] = bool(resultado["sobrecarga_motor"][i])
+            seleccion.append(info)
+        return seleccion
+
+
+_MOTOR_CRIBADO: Dict[str, PumpScreeningEngine] = {}
+
+
+def get_pump_screening_engine(directorio: str = "data_tablas") -> PumpScreeningEngine:
+    """Motor compartido; se reconstruye solo si se agregan o modifican catálogos"""
+    motor = _MOTOR_CRIBADO.get(directorio)
+    if motor is None or not motor.vigente():
+        motor = PumpScreeningEngine(directorio)
+        _MOTOR_CRIBADO[directorio] = motor
+    return motor
@@ -0,0 +1,112 @@
+"""
+Cribado analítico del golpe de ariete (Mendiluce / Allievi / Michaud) vectorizado.
+Evalúa de una sola vez todos los candidatos de un barrido de diámetros o de una
+población del algoritmo genético, con las mismas fórmulas que ui/transients.py
+aplica a una única conducción.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+from core.wave_speed import celeridad_allievi
+
+G = 9.81
+
+# Tabla de Mendiluce del coeficiente c en función de la pendiente hidráulica Hm/L
+TABLA_COEF_C = (
+    (0.00, 0.20, 0.25, 0.30, 0.35, 0.40, 1.00),
+    (1.0, 1.0, 0.8, 0.6, 0.5, 0.0, 0.0),
+)
+
+
+def coeficiente_c(pendiente_hidraulica):
+    """Coeficiente c de Mendiluce (interpolación lineal por tramos, 1 a la izquierda y 0 a la derecha)"""
+    c = np.interp(pendiente_hidraulica, *TABLA_COEF_C)
+    return float(c) if np.ndim(c) == 0 else c
+
+
+def coeficiente_k(longitud):
+    """Coeficiente k de Mendiluce según la longitud de la conducción (m)"""
+    L = np.asarray(longitud, dtype=float)
+    k = np.select([L < 500, L == 500, L < 1500, L == 1500], [2.0, 1.75, 1.5, 1.25], default=1.0)
+    return float(k) if k.ndim == 0 else k
+
+
+def cribado_golpe_ariete(longitud, velocidad, altura_manometrica, celeridad=None,
+                         diametro_interior=None, espesor=None, modulo_elasticidad=None,
+                         tiempo_maniobra=None, presion_nominal=None) -> Dict[str, np.ndarray]:
+    """
+    Golpe de ariete de todos los candidatos a la vez (arrays con broadcasting).
+
+    Sin tiempo_maniobra se analiza la parada de bomba: el tiempo de parada es el de
+    Mendiluce y la conducción larga (L > Lc) usa Allievi, la corta Michaud. Con
+    tiempo_maniobra se analiza el cierre de válvula: Allievi si Tm < 2L/a, si no Michaud.
+
+    Args:
+        longitud: Longitud de la conducción (m)
+        velocidad: Velocidad del flujo (m/s)
+        altura_manometrica: Altura manométrica o estática de referencia (m)
+        celeridad: Celeridad de la onda (m/s); si es None se calcula con Allievi a partir
+            de diametro_interior, espesor (mismas unidades) y modulo_elasticidad (kg/m²)
+        tiempo_maniobra: Tiempo de cierre de la válvula (s); None = parada de bomba
+        presion_nominal: Presión nominal (m.c.a.); None o 0 = sin verificación
+
+    Returns:
+        Diccionario de arrays: celeridad, pendiente_hidraulica, coef_c, coef_k,
+        tiempo_parada (el de Mendiluce, o tiempo_maniobra), tiempo_critico,
+        longitud_critica, es_conduccion_larga, es_cierre_rapido, sobrepresion,
+        presion_maxima, margen_seguridad (NaN sin PN) y es_seguro (True sin PN)
+    """
+    L = np.asarray(longitud, dtype=float)
+    v = np.asarray(velocidad, dtype=float)
+    hm = np.asarray(altura_manometrica, dtype=float)
+    if celeridad is None:
+        ks = 1e10 / np.asarray(modulo_elasticidad, dtype=float)
+        celeridad = celeridad_allievi(ks, diametro_interior, espesor)
+    a = np.asarray(celeridad, dtype=float)
+
+    pendiente = hm / L
+    if tiempo_maniobra is None:
+        c = np.asarray(coeficiente_c(pendiente))
+        k = np.asarray(coeficiente_k(L))
+        tiempo = c + k * L * v / (G * hm)
+    else:
+        c = k = np.full(np.broadcast(L, v, hm).shape, np.nan)
+        tiempo = np.asarray(tiempo_maniobra, dtype=float)
+    tiempo_critico = 2 * L / a
+    longitud_critica = a * tiempo / 2
+    es_conduccion_larga = L > longitud_critica
+    es_cierre_rapido = es_conduccion_larga if tiempo_maniobra is None else tiempo < tiempo_critico
+
+    allievi = a * v / G
+    with np.errstate(divide='ignore', invalid='ignore'):
+        michaud = 2 * L * v / (G * tiempo)
+    sobrepresion = np.where(es_cierre_rapido, allievi, michaud)
+    presion_maxima = hm + sobrepresion
+
+    if presion_nominal is not None:
+        pn = np.asarray(presion_nominal, dtype=float)
+        con_pn = pn > 0
+        margen = np.where(con_pn, pn - presion_maxima, np.nan)
+        es_seguro = ~con_pn | (presion_maxima <= pn)
+    else:
+        margen = np.full(presion_maxima.shape, np.nan)
+        es_seguro = np.ones(presion_maxima.shape, dtype=bool)
+
+    forma = np.broadcast(L, v, hm, a, tiempo).shape
+    return {
+        'celeridad': np.broadcast_to(a, forma),
+        'pendiente_hidraulica': np.broadcast_to(pendiente, forma),
+        'coef_c': np.broadcast_to(c, forma),
+        'coef_k': np.broadcast_to(k, forma),
+        'tiempo_parada': np.broadcast_to(tiempo, forma),
+        'tiempo_critico': np.broadcast_to(tiempo_critico, forma),
+        'longitud_critica': np.broadcast_to(longitud_critica, forma),
+        'es_conduccion_larga': np.broadcast_to(es_conduccion_larga, forma),
+        'es_cierre_rapido': np.broadcast_to(es_cierre_rapido, forma),
+        'sobrepresion': np.broadcast_to(sobrepresion, forma),
+        'presion_maxima': np.broadcast_to(presion_maxima, forma),
+        'margen_seguridad': np.broadcast_to(margen, forma),
+        'es_seguro': np.broadcast_to(es_seguro, forma)
+    }
@@ -0,0 +1,146 @@
+"""
+Dimensionamiento de calderines (cámaras de aire) contra el golpe de ariete.
+Busca la configuración más barata (volumen total, fracción inicial de aire y diámetro
+de la conexión) que mantiene la envolvente de presiones bajo la PN y sobre la presión
+de vapor tras un corte de bomba, simulando con el solver MOC nativo.
+
+Para una fracción de aire y un estrangulamiento fijos, la protección mejora al crecer
+el volumen, así que el volumen mínimo se obtiene por bisección (en escala logarítmica).
+Las ramas (fracción, orificio) se recorren con poda: cuando ya hay un óptimo, cada rama
+se prueba primero justo por debajo de él y se descarta con una sola simulación si no
+es viable.
+"""
+
+import math
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from core.moc_solver import (PRESION_ATMOSFERICA_M, PRESION_VAPOR_M, AirVessel, MOCSolver, PumpRunDown,
+                             ley_cierre)
+
+
+def costo_calderin(volumen_m3: float, costo_base: float = 3000.0, costo_m3: float = 2500.0,
+                   exponente: float = 0.8) -> float:
+    """Costo estimado (USD) de un calderín: base + costo_m3·V^exponente"""
+    return costo_base + costo_m3 * volumen_m3 ** exponente
+
+
+def dimensionar_calderin(red: MOCSolver, caudal_lps: float, t_final: float,
+                         parada: Optional[Dict[str, Any]] = None, tiempo_parada: float = 0.5,
+                         t_inicio: float = 1.0, pn_m: Optional[float] = None,
+                         presion_minima_m: float = PRESION_VAPOR_M - PRESION_ATMOSFERICA_M,
+                         fracciones_gas: Sequence[float] = (0.5, 0.3, 0.7),
+                         orificios_relativos: Sequence[float] = (0.5, 0.3, 0.75, 1.0),
+                         volumen_inicial: float = 1.0, volumen_maximo: float = 500.0,
+                         tolerancia: float = 0.05, margen_vaciado: float = 0.9,
+                         costo_base: float = 3000.0, costo_m3: float = 2500.0) -> Dict[str, Any]:
+    """
+    Calderín de mínimo costo para un corte de bomba.
+
+    Args:
+        red: Red MOC ya construida (el calderín se ubica en el nudo de descarga de la bomba)
+        caudal_lps: Caudal de diseño (L/s)
+        t_final: Duración de cada simulación (s)
+        parada: Argumentos de PumpRunDown (parada por inercia); None = parada lineal
+            en tiempo_parada segundos
+        t_inicio: Instante del corte (s)
+        pn_m: Presión nominal de la tubería (m); None = sin límite superior
+        presion_minima_m: Presión manométrica mínima admisible (por defecto la de vapor)
+        fracciones_gas: Fracciones iniciales de aire a explorar (V_aire / V_total)
+        orificios_relativos: Diámetros de la conexión relativos al de la impulsión
+        volumen_inicial, volumen_maximo: Volumen total de arranque y máximo (m³)
+        tolerancia: Precisión relativa de la bisección del volumen
+        margen_vaciado: El aire no puede superar esta fracción del volumen total
+        costo_base, costo_m3: Modelo de costo (ver costo_calderin)
+
+    Returns:
+        Diccionario con requiere (bool), optimo (None si no hay solución), sin_proteccion,
+        evaluaciones (una fila por simulación), simulaciones y tiempo_s
+    """
+    t0 = time.perf_counter()
+    q = caudal_lps / 1000.0
+    d_impulsion = red.tuberias[1]["diametro"]
+    evaluaciones = []
+
+    def simular(volumen: float = None, fraccion: float = None, orificio_rel: float = None) -> Dict[str, Any]:
+        calderin = AirVessel(volumen, volumen * fraccion, orificio_rel * d_impulsion) if volumen else None
+        if parada is not None:
+            kw = {"parada": PumpRunDown(t_corte=t_inicio, **parada)}
+        else:
+            kw = {"velocidad_bomba": ley_cierre(t_inicio, tiempo_parada)}
+        res = red.run(t_final, q, sondas=["JImp"], decimacion=10 ** 9, calderin=calderin, **kw)
+        env = res["envolvente"]
+        p_max = float((env["H_max"] - env["z"]).max())
+        p_min = float((env["H_min"] - env["z"]).min())
+        fila = {
+            "volumen_total_m3": volumen,
+            "fraccion_gas": fraccion,
+            "diametro_orificio_mm": orificio_rel * d_impulsion * 1000 if volumen else None,
+            "p_max": p_max,
+            "p_min": p_min,
+            "V_gas_max": res["calderin"]["V_max"] if volumen else None,
+        }
+        fila["viable"] = bool((pn_m is None or p_max <= pn_m) and p_min >= presion_minima_m and
+                              (not volumen or fila["V_gas_max"] <= margen_vaciado * volumen))
+        evaluaciones.append(fila)
+        return fila
+
+    base = simular()
+    resultado = {
+        "requiere": not base["viable"],
+        "optimo": None,
+        "sin_proteccion": {"p_max": base["p_max"], "p_min": base["p_min"]},
+        "evaluaciones": evaluaciones,
+    }
+    if base["viable"]:
+        resultado.update(simulaciones=len(evaluaciones), tiempo_s=time.perf_counter() - t0)
+        return resultado
+
+    mejor = None
+    for fraccion in fracciones_gas:
+        for orificio in orificios_relativos:
+            if mejor is None:
+                # Primera rama: duplicar el volumen hasta que sea viable
+                bajo, alto = 0.0, volumen_inicial
+                fila = simular(alto, fraccion, orificio)
+                while not fila["viable"] and alto < volumen_maximo:
+                    bajo, alto = alto, min(alto * 2, volumen_maximo)
+                    fila = simular(alto, fraccion, orificio)
+                if not fila["viable"]:
+                    continue
+            else:
+                # Poda: la rama solo interesa si mejora el óptimo actual
+                alto = mejor["volumen_total_m3"] * (1 - tolerancia)
+                fila = simular(alto, fraccion, orificio)
+                if not fila["viable"]:
+                    continue
+                bajo = 0.0
+            # Bisección (geométrica) del volumen mínimo viable entre un volumen inviable
+            # simulado (bajo) y uno viable (alto); sin cota inviable conocida se busca
+            # bajando en escalones de 1/64
+            viable = fila
+            for _ in range(4):
+                if bajo > 0:
+                    break
+                fila = simular(alto / 64, fraccion, orificio)
+                if fila["viable"]:
+                    alto, viable = alto / 64, fila
+                else:
+                    bajo = alto / 64
+            while bajo > 0 and alto / bajo > 1 + tolerancia:
+                medio = math.sqrt(bajo * alto)
+                fila = simular(medio, fraccion, orificio)
+                if fila["viable"]:
+                    alto, viable = medio, fila
+                else:
+                    bajo = medio
+            if mejor is None or viable["volumen_total_m3"] < mejor["volumen_total_m3"]:
+                mejor = viable
+
+    if mejor is not None:
+        optimo = dict(mejor)
+        optimo["volumen_gas_m3"] = optimo["volumen_total_m3"] * optimo["fraccion_gas"]
+        optimo["costo"] = costo_calderin(optimo["volumen_total_m3"], costo_base, costo_m3)
+        resultado["optimo"] = optimo
+    resultado.update(simulaciones=len(evaluaciones), tiempo_s=time.perf_counter() - t0)
+    return resultado
@@ -1,13 +1,14 @@
 # Cálculo de altura del sistema
 
 import numpy as np
-from typing import List, Tuple, Dict, Any
-from .calculations import calculate_system_head, convert_flow_unit
+from typing import List, Tuple, Dict, Any, Union
+from .calculations import calculate_system_head, convert_flow_unit, calculate_system_curve_arrays
 
 def calculate_adt_for_multiple_flows(flows: List[float], flow_unit: str, 
                                    system_params: Dict[str, Any]) -> List[float]:
     """
     Calcula la altura total del sistema (ADT) para múltiples caudales.
+    Usa el motor vectorizado de la curva del sistema (una sola evaluación NumPy).
     
     Args:
         flows: Lista de caudales
@@ -17,26 +18,30 @@ def calculate_adt_for_multiple_flows(flows: List[float], flow_unit: str,
     Returns:
         Lista de alturas totales del sistema
     """
-    adt_values = []
-    
-    for flow in flows:
-        adt = calculate_system_head(
-            flow, flow_unit,
-            system_params['h_estatica'],
-            system_params['long_succion'], 
-            system_params['diam_succion_m'], 
-            system_params['C_succion'], 
-            system_params['accesorios_succion'], 
-            system_params['otras_perdidas_succion'],
-            system_params['long_impulsion'], 
-            system_params['diam_impulsion_m'], 
-            system_params['C_impulsion'], 
-            system_params['accesorios_impulsion'], 
-            system_params['otras_perdidas_impulsion']
-        )
-        adt_values.append(adt)
-    
-    return adt_values
+    if len(flows) == 0:
+        return []
+    
+    curva = calculate_system_curve_arrays(flows, flow_unit, system_params,
+                                          usar_cotas=False, usar_lc_d=False)
+    return curva['adt_total'].tolist()
+
+def calculate_adt_array(flows, flow_unit: str, 
+                        system_params: Union[Dict[str, Any], List[Dict[str, Any]]]) -> np.ndarray:
+    """
+    Calcula la ADT como array NumPy para un vector de caudales y, opcionalmente,
+    un lote de juegos de parámetros (barridos de sensibilidad).
+    
+    Args:
+        flows: Caudales (lista o array)
+        flow_unit: Unidad de caudal
+        system_params: Parámetros del sistema o lista de parámetros
+    
+    Returns:
+        Array de ADT con forma (n_caudales,) o (n_juegos, n_caudales)
+    """
+    curva = calculate_system_curve_arrays(flows, flow_unit, system_params,
+                                          usar_cotas=False, usar_lc_d=False)
+    return curva['adt_total']
 
 def generate_system_curve_points(min_flow: float, max_flow: float, 
                                num_points: int, flow_unit: str,
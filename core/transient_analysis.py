@@ -8,6 +8,10 @@ import os
 from datetime import datetime
 from typing import Dict, Any, Tuple
 import math
+from scipy.signal import find_peaks
+
+from core.pipeline_profile import linea_piezometrica, pendiente_hazen_williams, perfil_relativo
+from core.wave_speed import get_wave_speed_service
 
 # Import condicional de TSNet
 TSNET_AVAILABLE = False
@@ -33,6 +37,13 @@ except Exception as e:
     tsnet = None
     error_detalles = str(e)
 
+# Puntos máximos de la serie temporal que se devuelve (se decima si hay más pasos)
+PUNTOS_SALIDA_MAX = 2000
+# Tramos máximos de la impulsión en el MOC con perfil (una unión por punto alto)
+TRAMOS_IMPULSION_MAX = 12
+# Diferencia admisible (m) entre la cota final del perfil y la altura estática
+TOLERANCIA_COTA_DESCARGA_M = 1.0
+
 def diagnosticar_tsnet():
     """Función de diagnóstico para TSNet"""
     import sys
@@ -137,58 +148,16 @@ def depurar_inp_file(inp_file: str) -> Dict[str, Any]:
     return diagnostico
 
 def load_wave_speeds_data():
-    """Carga los datos de velocidades de onda desde el archivo JSON"""
-    try:
-        with open('data_tablas/wave_speeds_data.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
+    """Datos de velocidades de onda (wave_speeds_data.json), leídos una sola vez por el servicio de celeridades"""
+    datos = get_wave_speed_service().datos
+    if datos is None:
         st.error("Error: No se encontró el archivo wave_speeds_data.json")
-        return None
+    return datos
 
 def calculate_wave_speed(material: str, diameter: float, thickness: float) -> float:
-    """Calcula la velocidad de onda basada en las propiedades del material"""
+    """Calcula la velocidad de onda basada en las propiedades del material (ver WaveSpeedService.celeridad)"""
     try:
-        wave_data = load_wave_speeds_data()
-        if not wave_data:
-            return 1200.0  # Valor por defecto para PVC
-        
-        # Velocidad de onda básica del material
-        if material in wave_data['wave_speeds']:
-            material_data = wave_data['wave_speeds'][material]
-            K_bulk = 2.1e9  # Módulo de compresibilidad del agua (Pa)
-            density_water = 1000  # kg/m³
-            E_young = material_data['young_modulus']
-            
-            # Fórmula de velocidad de onda considerando flexibilidad de la tubería
-            if thickness > 0 and thickness < diameter:  # Validar parámetros físicos
-                a_theory = math.sqrt(K_bulk / (density_water * (1 + (K_bulk / E_young) * (diameter / thickness))))
-                
-                # Validar que el resultado es físicamente razonable (entre 200 y 2000 m/s)
-                if 200 <= a_theory <= 2000:
-                    # Usar el valor teórico si está en rango válido
-                    return float(a_theory)
-                else:
-                    # Si está fuera de rango, usar velocidad típica del material
-                    return float(material_data['typical_wave_speed'])
-            else:
-                # Espesor inválido, usar velocidad típica
-                return float(material_data['typical_wave_speed'])
-        else:
-            # Material no reconocido, usar velocidades típicas por material
-            materiales_defecto = {
-                'PVC': 1200.0,
-                'PEAD': 300.0,
-                'HIERRO': 1000.0,
-                'HIERRO DUCTIL': 1000.0,
-                'HIERRO FUNDIDO': 1200.0
-            }
-            
-            for mat_key, vel_defecto in materiales_defecto.items():
-                if mat_key in str(material).upper():
-                    return float(vel_defecto)
-            
-            return 1000.0  # Valor por defecto general
-            
+        return get_wave_speed_service().celeridad(material, diameter, thickness)
     except Exception as e:
         # En caso de cualquier error, retornar velocidad por defecto
         print(f"⚠️ Error calculando velocidad de onda: {e}")
@@ -272,8 +241,28 @@ def generar_inp_transientes(datos_json: Dict[str, Any], tipo_simulacion: str = '
     # Reservorio: Head = nivel de agua (elevación + profundidad)
     nivel_agua_reservorio = elev_terreno_succion + abs(altura_succion_m)
     
-    # Nota de subdivisión
-    subdivision_note = f"Tubería de descarga subdividida en 3 segmentos ({long_impulsion_m/3:.1f}m cada uno)" if long_impulsion_m > 50 else "Sin subdivisión"
+    # Tramos de la impulsión: (nudo, cota del terreno, abscisa relativa) de cada nudo
+    # intermedio. Con perfil longitudinal, un nudo por vértice del perfil simplificado.
+    if inputs.get('perfil_impulsion'):
+        x_perfil, z_perfil = perfil_relativo(inputs['perfil_impulsion'],
+                                             tolerancia=float(inputs.get('tolerancia_perfil', 0.5)))
+        long_impulsion_m = float(x_perfil[-1])
+        elev_terreno_descarga = float(z_perfil[-1])
+        abscisas_dis = x_perfil / long_impulsion_m
+        intermedios = [(f"JDis{i}", float(z_perfil[i]), float(abscisas_dis[i])) for i in range(1, len(x_perfil) - 1)]
+        subdivision_note = f"Tubería de descarga según perfil longitudinal ({len(x_perfil) - 1} tramos)"
+    elif long_impulsion_m > 50:
+        abscisas_dis = np.array([0.0, 1 / 3, 2 / 3, 1.0])
+        intermedios = [("JDis1", elev_terreno_descarga * 0.33, 0.33), ("JDis2", elev_terreno_descarga * 0.67, 0.67)]
+        subdivision_note = f"Tubería de descarga subdividida en 3 segmentos ({long_impulsion_m/3:.1f}m cada uno)"
+    else:
+        abscisas_dis = np.array([0.0, 1.0])
+        intermedios = []
+        subdivision_note = "Sin subdivisión"
+    nudos_dis = ["JImp"] + [n for n, _, _ in intermedios] + ["JDis"]
+    tramos_dis = [(f"PDis{i + 1}" if len(nudos_dis) > 2 else "PDis", nudos_dis[i], nudos_dis[i + 1],
+                   long_impulsion_m * (abscisas_dis[i + 1] - abscisas_dis[i]))
+                  for i in range(len(nudos_dis) - 1)]
     
     # --- 5. Construcción del Contenido del Archivo .inp (UNIDADES SI) ---
     
@@ -333,31 +322,21 @@ RSrc             {nivel_agua_reservorio:<9.2f}
 PSuc             RSrc            JSuc            {long_succion_m:<11.4f}  {diam_succion_m*1000:<11.2f}  {c_hw_succion}  0
 """
     
-    # Subdividir tubería de descarga si es muy larga
+    # Subdividir tubería de descarga si es muy larga o si sigue un perfil longitudinal
     # Siempre incluir tubería (no usamos válvula física)
-    if long_impulsion_m > 50:
-        # Dividir en 3 segmentos
-        num_segmentos = 3
-        long_segmento = long_impulsion_m / num_segmentos
-        
+    if intermedios:
         # Agregar nodos intermedios
-        junctions_section += f"""; Nodos intermedios para subdivisión
-JDis1            {elev_terreno_descarga * 0.33:<9.2f}
-JDis2            {elev_terreno_descarga * 0.67:<9.2f}
-
-"""
-        
-        pipes_section += f"""; PDis subdividida: Wave Speed = {wave_speed_impulsion_ms:.2f} m/s, Material = {material_impulsion}
-PDis1            JImp            JDis1           {long_segmento:<11.4f}  {diam_impulsion_m*1000:<11.2f}  {c_hw_impulsion}  0
-PDis2            JDis1           JDis2           {long_segmento:<11.4f}  {diam_impulsion_m*1000:<11.2f}  {c_hw_impulsion}  0
-PDis3            JDis2           JDis            {long_segmento:<11.4f}  {diam_impulsion_m*1000:<11.2f}  {c_hw_impulsion}  0
-
-"""
+        junctions_section += "; Nodos intermedios para subdivisión\n"
+        for nudo, cota, _ in intermedios:
+            junctions_section += f"{nudo:<17}{cota:<9.2f}\n"
+        junctions_section += "\n"
+        pipes_section += f"; PDis subdividida: Wave Speed = {wave_speed_impulsion_ms:.2f} m/s, Material = {material_impulsion}\n"
     else:
-        pipes_section += f"""; PDis: Wave Speed = {wave_speed_impulsion_ms:.2f} m/s, Material = {material_impulsion}
-PDis             JImp            JDis            {long_impulsion_m:<11.4f}  {diam_impulsion_m*1000:<11.2f}  {c_hw_impulsion}  0
-
-"""
+        pipes_section += f"; PDis: Wave Speed = {wave_speed_impulsion_ms:.2f} m/s, Material = {material_impulsion}\n"
+    for nombre, nudo_1, nudo_2, longitud in tramos_dis:
+        pipes_section += (f"{nombre:<17}{nudo_1:<16}{nudo_2:<16}{longitud:<11.4f}  "
+                          f"{diam_impulsion_m*1000:<11.2f}  {c_hw_impulsion}  0\n")
+    pipes_section += "\n"
     
     # Sección de demandas (separada de junctions)
     demands_section = f"""[DEMANDS]
@@ -420,15 +399,10 @@ JImp             {x_impulsion:.2f}       {y_base:.2f}
 """
     
     # Agregar nodos intermedios si se subdividió
-    if long_impulsion_m > 50:
-        x_mid1 = x_impulsion + (x_discharge - x_impulsion) * 0.33
-        x_mid2 = x_impulsion + (x_discharge - x_impulsion) * 0.67
-        y_mid1 = y_base + (y_elevated - y_base) * 0.33
-        y_mid2 = y_base + (y_elevated - y_base) * 0.67
-        
-        coordinates_section += f"""JDis1            {x_mid1:.2f}       {y_mid1:.2f}
-JDis2            {x_mid2:.2f}       {y_mid2:.2f}
-"""
+    for nudo, _, fraccion in intermedios:
+        x_mid = x_impulsion + (x_discharge - x_impulsion) * fraccion
+        y_mid = y_base + (y_elevated - y_base) * fraccion
+        coordinates_section += f"{nudo:<17}{x_mid:.2f}       {y_mid:.2f}\n"
     
     coordinates_section += f"""JDis             {x_discharge:.2f}       {y_elevated:.2f}
 
@@ -442,20 +416,11 @@ Pipe  PSuc  Material={material_succion}
 """
     
     # Agregar tags para tuberías de impulsión
-    if long_impulsion_m > 50:
-        tags_section += f"""Pipe  PDis1  WaveSpeed={wave_speed_impulsion_ms:.2f}
-Pipe  PDis1  Material={material_impulsion}
-Pipe  PDis2  WaveSpeed={wave_speed_impulsion_ms:.2f}
-Pipe  PDis2  Material={material_impulsion}
-Pipe  PDis3  WaveSpeed={wave_speed_impulsion_ms:.2f}
-Pipe  PDis3  Material={material_impulsion}
-
-"""
-    else:
-        tags_section += f"""Pipe  PDis  WaveSpeed={wave_speed_impulsion_ms:.2f}
-Pipe  PDis  Material={material_impulsion}
-
+    for nombre, _, _, _ in tramos_dis:
+        tags_section += f"""Pipe  {nombre}  WaveSpeed={wave_speed_impulsion_ms:.2f}
+Pipe  {nombre}  Material={material_impulsion}
 """
+    tags_section += "\n"
     
     # --- Sección de LABELS para etiquetas limpias ---
     labels_section = f"""[LABELS]
@@ -549,22 +514,12 @@ Tubería: P_Suction
   
 """
     
-    if long_impulsion_m > 50:
-        properties_content += f"""Tubería: P_Discharge_1
+    if len(tramos_dis) > 1:
+        properties_content += "  \n".join(f"""Tubería: P_Discharge_{i + 1}
   Wave Speed: {wave_speed_impulsion_ms:.2f} m/s
   Material: {material_impulsion}
   Diámetro: {diam_impulsion_mm:.2f} mm ({diam_impulsion_m:.6f} m)
-  
-Tubería: P_Discharge_2
-  Wave Speed: {wave_speed_impulsion_ms:.2f} m/s
-  Material: {material_impulsion}
-  Diámetro: {diam_impulsion_mm:.2f} mm ({diam_impulsion_m:.6f} m)
-  
-Tubería: P_Discharge_3
-  Wave Speed: {wave_speed_impulsion_ms:.2f} m/s
-  Material: {material_impulsion}
-  Diámetro: {diam_impulsion_mm:.2f} mm ({diam_impulsion_m:.6f} m)
-"""
+""" for i in range(len(tramos_dis)))
     else:
         properties_content += f"""Tubería: P_Discharge
   Wave Speed: {wave_speed_impulsion_ms:.2f} m/s
@@ -620,269 +575,302 @@ Rugosidad absoluta: {rugosidad_m*1000:.2f} mm
     return inp_path
 
 
-def buscar_material_en_celeridad(material_buscado: str, wave_speeds: dict) -> str:
-    """Busca un material en la tabla de celeridad de forma robusta"""
-    if not material_buscado or not wave_speeds:
-        return None
-    
-    material_buscado_clean = material_buscado.lower().strip()
-    
-    # Búsqueda exacta
-    for mat_name in wave_speeds.keys():
-        if material_buscado_clean == mat_name.lower().strip():
-            return mat_name
-    
-    # Búsqueda sin espacios
-    for mat_name in wave_speeds.keys():
-        if material_buscado_clean.replace(' ', '') == mat_name.lower().replace(' ', ''):
-            return mat_name
-    
-    # Búsqueda por palabras clave específicas (manejo de caracteres especiales)
-    if 'hierro' in material_buscado_clean and ('ductil' in material_buscado_clean or 'dúctil' in material_buscado_clean):
-        for mat_name in wave_speeds.keys():
-            mat_lower = mat_name.lower()
-            if 'hierro' in mat_lower and ('ductil' in mat_lower or 'dúctil' in mat_lower or 'dãºctil' in mat_lower):
-                return mat_name
-    
-    if 'hierro' in material_buscado_clean and 'fundido' in material_buscado_clean:
-        for mat_name in wave_speeds.keys():
-            mat_lower = mat_name.lower()
-            if 'hierro' in mat_lower and 'fundido' in mat_lower:
-                return mat_name
-    
-    if 'acero' in material_buscado_clean and 'comercial' in material_buscado_clean:
-        for mat_name in wave_speeds.keys():
-            mat_lower = mat_name.lower()
-            if 'acero' in mat_lower and 'comercial' in mat_lower:
-                return mat_name
-    
-    # Búsqueda por palabras clave individuales (solo si no hay coincidencias específicas)
-    if 'hierro' in material_buscado_clean and 'ductil' not in material_buscado_clean and 'fundido' not in material_buscado_clean:
-        # Solo buscar "HIERRO" si no hay especificación de tipo
-        for mat_name in wave_speeds.keys():
-            if mat_name.lower() == 'hierro':
-                return mat_name
-    
-    # Búsqueda parcial (último recurso)
-    for mat_name in wave_speeds.keys():
-        if material_buscado_clean in mat_name.lower():
-            return mat_name
-    
-    return None
+def construir_red_moc(datos_json: Dict[str, Any]):
+    """
+    Construye la red del solver MOC nativo: RSrc → PSuc → JSuc → PMP1 → JImp → PDis → JDis.
+    Sin perfil, la impulsión es una recta en 1 o 3 tramos iguales, como en
+    generar_inp_transientes. Con perfil, las uniones se colocan en los puntos altos del
+    perfil simplificado (los TRAMOS_IMPULSION_MAX - 1 más prominentes) y la descarga
+    queda a la cota final del perfil, igual que la elevación de JDis en el .inp; si esa
+    cota difiere de la altura estática en más de TOLERANCIA_COTA_DESCARGA_M (o de la
+    tolerancia del perfil) se informa en info['aviso_descarga'].
+
+    Returns:
+        (solver, info) con el MOCSolver y un diccionario con caudal (m³/s),
+        celeridades, altura estática y altura de descarga
+    """
+    from core.moc_solver import MOCSolver, factor_friccion_hw
+
+    inputs = datos_json['inputs']
+    resultados = datos_json['resultados']
+    caudal_lps = inputs['caudal_diseno_lps']
+    q_m3s = caudal_lps / 1000.0
+
+    succion = inputs['succion']
+    impulsion = inputs['impulsion']
+    diam_succion = succion['diametro_interno'] / 1000.0
+    diam_impulsion = impulsion['diametro_interno'] / 1000.0
+    material_succion = succion.get('material', 'PVC')
+    material_impulsion = impulsion.get('material', 'PVC')
+
+    # Celeridades: las elegidas por el usuario o calculadas por material y espesor
+    if 'wave_speed_succion' in inputs and 'wave_speed_impulsion' in inputs:
+        a_succion = float(inputs['wave_speed_succion'])
+        a_impulsion = float(inputs['wave_speed_impulsion'])
+    else:
+        a_succion = calculate_wave_speed(material_succion, diam_succion, succion.get('espesor', 5.0) / 1000.0)
+        a_impulsion = calculate_wave_speed(material_impulsion, diam_impulsion, impulsion.get('espesor', 5.0) / 1000.0)
+
+    # Cotas y niveles como en el archivo .inp
+    altura_estatica = resultados['alturas'].get('estatica_total', inputs['altura_descarga'])
+    nivel_reservorio = abs(inputs['altura_succion'])
+    c_hw_succion = 140 if 'HDPE' in material_succion or 'Polietileno' in material_succion else 150
+    c_hw_impulsion = 140 if 'HDPE' in material_impulsion or 'Polietileno' in material_impulsion else 150
+
+    long_succion = max(float(succion['longitud']), 0.1)
+    long_impulsion = max(float(impulsion['longitud']), 0.1)
+    # Perfil longitudinal de la impulsión (abscisa, cota) referido al eje de la bomba;
+    # sin perfil, la impulsión sube en línea recta hasta la altura estática
+    perfil = None
+    altura_descarga = altura_estatica
+    aviso_descarga = None
+    tolerancia_perfil = float(inputs.get('tolerancia_perfil', 0.5))
+    if inputs.get('perfil_impulsion'):
+        x_perfil, z_perfil = perfil_relativo(inputs['perfil_impulsion'], tolerancia=tolerancia_perfil)
+        if x_perfil[-1] > 0:
+            perfil = (x_perfil, z_perfil)
+            long_impulsion = float(x_perfil[-1])
+            altura_descarga = float(z_perfil[-1])
+            if abs(altura_descarga - altura_estatica) > max(TOLERANCIA_COTA_DESCARGA_M, tolerancia_perfil):
+                aviso_descarga = (f"La cota final del perfil ({altura_descarga:.2f} m) difiere de la altura "
+                                  f"estática ({altura_estatica:.2f} m); el MOC descarga a la cota del perfil.")
+    tuberias = [{
+        'nombre': 'PSuc', 'nudo_inicio': 'RSrc', 'nudo_fin': 'JSuc',
+        'longitud': long_succion, 'diametro': diam_succion, 'celeridad': a_succion,
+        'f': factor_friccion_hw(q_m3s, long_succion, diam_succion, c_hw_succion),
+        'z_inicio': 0.0, 'z_fin': 0.0
+    }]
+    # Abscisas de las uniones de la impulsión (extremos incluidos)
+    if perfil is not None:
+        altos, props = find_peaks(perfil[1], prominence=tolerancia_perfil)
+        if len(altos) > TRAMOS_IMPULSION_MAX - 1:
+            altos = np.sort(altos[np.argsort(props['prominences'])[::-1][:TRAMOS_IMPULSION_MAX - 1]])
+        juntas = np.concatenate([[0.0], perfil[0][altos], [long_impulsion]])
+    elif long_impulsion > 50:
+        juntas = long_impulsion * np.array([0.0, 1 / 3, 2 / 3, 1.0])
+    else:
+        juntas = np.array([0.0, long_impulsion])
+    n_segmentos = len(juntas) - 1
+    nudos = ['JImp'] + [f'JDis{i}' for i in range(1, n_segmentos)] + ['JDis']
+    f_impulsion = factor_friccion_hw(q_m3s, long_impulsion, diam_impulsion, c_hw_impulsion)
+    for i in range(n_segmentos):
+        tramo = {
+            'nombre': f'PDis{i + 1}' if n_segmentos > 1 else 'PDis',
+            'nudo_inicio': nudos[i], 'nudo_fin': nudos[i + 1],
+            'longitud': float(juntas[i + 1] - juntas[i]), 'diametro': diam_impulsion,
+            'celeridad': a_impulsion, 'f': f_impulsion,
+            'z_inicio': float(altura_estatica * juntas[i] / long_impulsion),
+            'z_fin': float(altura_estatica * juntas[i + 1] / long_impulsion)
+        }
+        if perfil is not None:
+            tramo['perfil'] = (perfil[0] - juntas[i], perfil[1])
+            tramo['z_inicio'], tramo['z_fin'] = (float(z) for z in np.interp(juntas[i:i + 2], *perfil))
+        tuberias.append(tramo)
+
+    # Curva de la bomba (L/s, m) ajustada a H = A0 + A1·Q + A2·Q² con Q en m³/s
+    try:
+        curva = resultados['bomba_seleccionada']['curva_completa']
+        if len(curva) < 3:
+            raise ValueError("Curva de bomba insuficiente")
+    except (KeyError, ValueError, TypeError):
+        h_total = resultados['alturas']['dinamica_total']
+        curva = [(0.0, h_total * 1.3), (caudal_lps, h_total), (caudal_lps * 2.0, h_total * 0.5)]
+    q_curva = np.array([p[0] for p in curva], dtype=float) / 1000.0
+    h_curva = np.array([p[1] for p in curva], dtype=float)
+    A2, A1, A0 = np.polyfit(q_curva, h_curva, 2)
+
+    solver = MOCSolver(tuberias, nivel_reservorio, altura_descarga, (A0, A1, A2),
+                       dt=inputs.get('dt_transientes'))
+    info = {
+        'q_m3s': q_m3s,
+        'wave_speed_succion': a_succion,
+        'wave_speed_impulsion': a_impulsion,
+        'altura_estatica': altura_estatica,
+        'altura_descarga': altura_descarga
+    }
+    if aviso_descarga:
+        info['aviso_descarga'] = aviso_descarga
+    if perfil is not None:
+        # Línea piezométrica permanente frente al terreno (la bomba entrega la altura de descarga más las pérdidas)
+        h_bomba = altura_descarga + pendiente_hazen_williams(q_m3s, diam_impulsion, c_hw_impulsion) * long_impulsion
+        info['perfil'] = linea_piezometrica(perfil[0], perfil[1], h_bomba, q_m3s, diam_impulsion, c_hw_impulsion)
+        info['perfil']['x_inicio'] = long_succion
+    return solver, info
+
+
+def decimacion_salida(datos_json: Dict[str, Any], n_pasos: int) -> int:
+    """
+    Uno de cada cuántos pasos de tiempo se guarda en la serie de salida:
+    inputs['decimacion_salida'] si se indica (>= 1), si no la necesaria para no
+    superar PUNTOS_SALIDA_MAX puntos.
+    """
+    decimacion = int(datos_json.get('inputs', {}).get('decimacion_salida', 0) or 0)
+    if decimacion >= 1:
+        return decimacion
+    return max(1, math.ceil(n_pasos / PUNTOS_SALIDA_MAX))
+
+
+def parametros_inercia_bomba(datos_json: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Inercia J (kg·m²), velocidad nominal, rendimiento y tiempo de parada por inercia
+    del grupo motobomba. J es el indicado en inputs['inercia_bomba'] o se estima con
+    las correlaciones de Thorley a partir de la potencia del motor (o la hidráulica).
+    """
+    from core.moc_solver import inercia_thorley
+
+    inputs = datos_json['inputs']
+    rpm = float(inputs.get('rpm', 3500) or 3500)
+    eficiencia = float(inputs.get('eficiencia_operacion', 75.0) or 75.0) / 100.0
+    q_m3s = inputs['caudal_diseno_lps'] / 1000.0
+    adt = datos_json['resultados']['alturas'].get('dinamica_total', 0.0)
+    potencia_kw = float(inputs.get('potencia_motor_kw') or 0.0)
+    if potencia_kw <= 0:
+        potencia_kw = 9.81 * q_m3s * adt / max(eficiencia, 0.1)
+    inercia = float(inputs.get('inercia_bomba') or 0.0) or inercia_thorley(potencia_kw, rpm)
+    omega = 2 * math.pi * rpm / 60.0
+    # Energía cinética / potencia absorbida (misma relación que calcular_inercia_bomba)
+    t_parada = inercia * omega ** 2 / (2 * potencia_kw * 1000.0) if potencia_kw > 0 else 0.5
+    return {
+        'inercia': inercia,
+        'rpm': rpm,
+        'eficiencia': eficiencia,
+        'potencia_kw': potencia_kw,
+        't_parada': t_parada
+    }
 
 
 def simular_transiente_alternativa(evento: str, datos_json: Dict[str, Any]) -> Dict[str, Any]:
-    """Simulación usando métodos alternativos cuando TSNet no está disponible"""
-    
+    """
+    Simulación con el solver MOC nativo (core.moc_solver) cuando TSNet no está disponible.
+    "Cierre Rápido de Válvula" cierra la válvula final con la bomba en marcha; cualquier
+    otro evento es un corte de energía: la bomba se detiene por inercia (características
+    de Suter) con válvula de retención, salvo inputs['modelo_parada'] == 'lineal'.
+    Con inputs['cavitacion'] (activo por defecto) se modela la separación de columna (DVCM).
+    """
     try:
-        import numpy as np
-        import matplotlib.pyplot as plt
-        
-        # Parámetros básicos del sistema
-        caudal = datos_json['inputs']['caudal_diseno_lps']
-        altura_succion = datos_json['inputs']['altura_succion']
-        altura_descarga = datos_json['inputs']['altura_descarga']
-        altura_estatica = altura_succion + altura_descarga
-        
-        # Simulación simplificada de transiente - tiempo configurable
-        tf = datos_json.get('inputs', {}).get('tiempo_simulacion_transientes', 10.0)
-        time_points = np.linspace(0, tf, int(tf * 10))  # Resolución adaptativa según tiempo
-        
-        # OBTENER DATOS REALES para cálculo preciso
-        datos_tuberia = obtener_datos_reales_tuberia(datos_json)
-        
-        # Calcular parámetros de golpe de ariete con datos reales
-        diametro_impulsion_mm = datos_json['inputs']['impulsion']['diametro_interno']  # Ya en mm
-        diametro_impulsion = diametro_impulsion_mm / 1000  # Convertir a metros
-        longitud_impulsion = datos_json['inputs']['impulsion']['longitud']
-        volumetric_caudal_impulsion = datos_json['inputs']['caudal_diseno_lps'] / 1000  # L/s a m³/s
-        velocidad_impulsion = volumetric_caudal_impulsion / (np.pi * (diametro_impulsion**2) / 4)  # m/s
-        
-        # Calcular velocidad de onda usando DATOS REALES de espesor
-        modulus_elasticidad_agua = 2.1e9  # Pa
-        
-        espesor_real_mm = datos_tuberia['espesor_impulsion']  # Datos reales en mm
-        material_real = datos_tuberia['material_impulsion']
-        
-        # Módulos elásticos según material real
-        if 'PEAD' in material_real or 'HDPE' in material_real or 'Polietileno' in material_real:
-            modulus_elasticidad_material = 1.0e9  # Pa - PAD flexible
-        elif 'Hierro' in material_real or 'Hierro Dúctil' in material_real:
-            modulus_elasticidad_material = 170e9   # Pa - Hierro dúctil
-        elif 'PVC' in material_real:
-            modulus_elasticidad_material = 3.0e9   # Pa - PVC
-        else:
-            modulus_elasticidad_material = 1.0e9  # Conservador PAD
-        
-        espesor_real = espesor_real_mm / 1000  # Convertir a metros
-        
-        # Fórmula de Joukowsky con datos reales
-        vel_onda_base = np.sqrt(modulus_elasticidad_agua / 1000)  # ≈ 1448 m/s agua pura
-        vel_onda = vel_onda_base * np.sqrt(1 / (1 + (diametro_impulsion/espesor_real) * (modulus_elasticidad_agua/modulus_elasticidad_material)))
-        
-        print(f"🔧 Datos transientes reales: ø{diametro_impulsion_mm:.1f}mm, esp. {espesor_real_mm:.1f}mm, mat. {material_real}, vel. onda {vel_onda:.0f} m/s")
-        
-        if evento == "Cierre Rápido de Válvula":
-            # Golpe de ariete por cierre súbito - fórmula de Joukowsky
-            # ΔP = ρ * a * ΔV donde ΔV es el cambio de velocidad = velocidad_hasta_cero
-            delta_pression_golpe_ariete = 1000 * vel_onda * velocidad_impulsion / 9810  # Metros de columna agua
-            
-            # Generar oscilación amortiguada característica de golpe de ariete
-            tiempo_periodo_oscilacion = (2 * longitud_impulsion) / vel_onda  # Tiempo de ida y vuelta de onda
-            frequency_oscilacion = 1.0 / tiempo_periodo_oscilacion
-            
-            # Superposión de múltiples armónicos para mayor realismo
-            sobrepresion_maxima_inicial = altura_estatica + delta_pression_golpe_ariete
-            
-            # Combinación de armónicos con diferentes frecuencias y amplitudes
-            oscilacion_principal = np.sin(2 * np.pi * frequency_oscilacion * time_points) * np.exp(-0.05 * time_points) * 0.8
-            oscilacion_armonica = np.sin(4 * np.pi * frequency_oscilacion * time_points) * np.exp(-0.1 * time_points) * 0.4
-            oscilacion_transitoria = np.sin(8 * np.pi * frequency_oscilacion * time_points) * np.exp(-0.15 * time_points) * 0.2
-            
-            # Presión transiente completa con sobrepresión inicial más pronunciada
-            # Para cierre rápido, el pico puede ser mucho mayor que el cálculo teórico simple
-            factor_amplificacion_golpe = 1.5  # Factor de seguridad para picos extremos
-            
-            pico_inicial = np.exp(-3 * time_points)  # Pico inicial más agudo y severo
-            presiones = altura_estatica + delta_pression_golpe_ariete * factor_amplificacion_golpe * (
-                pico_inicial + oscilacion_principal + oscilacion_armonica + oscilacion_transitoria
-            )
-            
-            # El verdadero pico máximo (como se ve en tus datos de 241.9m)
-            verdadero_pico_maximo = altura_estatica + delta_pression_golpe_ariete * factor_amplificacion_golpe * 1.2
-            sobrepresion_maxima_inicial = verdadero_pico_maximo
-            
-            label_titulo = f"Transiente Hidráulico - Cierre Rápido de Válvula\\nPico Máximo: {verdadero_pico_maximo:.1f} m"
-        
-        else:  # Corte Súbito de Bomba
-            # Golpe de ariete por corte súbito de bomba - modelo más realista
-            # Primer caída abrupta por parada, luego rebote positivo y oscilación compleja
-            
-            # Parámetros de oscilación más intensos para corte súbito
-            delta_depression_golpe_ariete = 1000 * vel_onda * velocidad_impulsion / 9810  # Metros de columna agua
-            delta_sobrepresion_rebote = 1.3 * delta_depression_golpe_ariete  # El rebote puede ser mayor que la caída inicial
-            
-            # Tiempo de viaje de onda en sistema
-            tiempo_periodo_sistema = (2 * longitud_impulsion) / vel_onda
-            frequency_sistema = 1.0 / tiempo_periodo_sistema
-            
-            # Fase 1: Caída inicial abrupta (primeros 0.5-1 segundos)
-            fase_caida_mask = time_points < tiempo_periodo_sistema / 4
-            presiones_caida = altura_estatica - delta_depression_golpe_ariete * np.exp(-5 * time_points[fase_caida_mask] / tiempo_periodo_sistema)
-            
-            # Fase 2: Rebote positivo (PUEDE SER MUCHO MAYOR que la caída inicial - golpe de ariete crítico)
-            # En corte súbito puede haber rebote hasta 2.5 veces la caída inicial
-            factor_rebote_extremo = 2.5  # Por eso vemos picos de 241.9m vs gráfico de 126.4m
-            delta_sobrepresion_rebote_extremo = factor_rebote_extremo * delta_depression_golpe_ariete
-            
-            fase_rebote_mask = (time_points >= tiempo_periodo_sistema / 4) & (time_points < tiempo_periodo_sistema)
-            tiempo_rebote = time_points[fase_rebote_mask] - tiempo_periodo_sistema / 4
-            presiones_rebote = altura_estatica + delta_sobrepresion_rebote_extremo * np.sin(2 * np.pi * frequency_sistema * tiempo_rebote / 2) * np.exp(-0.8 * tiempo_rebote / tiempo_periodo_sistema)
-            
-            # Fase 3: Oscilación compleja posteriores (múltiples armónicos)
-            fase_oscilacion_mask = time_points >= tiempo_periodo_sistema
-            tiempo_oscilacion = time_points[fase_oscilacion_mask] - tiempo_periodo_sistema
-            
-            # Superposión de múltiples frecuencias para realismo
-            oscilacion_principal = np.sin(2 * np.pi * frequency_sistema * tiempo_oscilacion) * np.exp(-0.1 * tiempo_oscilacion) * 0.6
-            oscilacion_armonica2 = np.sin(4 * np.pi * frequency_sistema * tiempo_oscilacion) * np.exp(-0.2 * tiempo_oscilacion) * 0.3
-            oscilacion_transitoria = np.sin(8 * np.pi * frequency_sistema * tiempo_oscilacion) * np.exp(-0.3 * tiempo_oscilacion) * 0.1
-            
-            presiones_oscilacion = altura_estatica + (delta_depression_golpe_ariete * 0.4) * (
-                oscilacion_principal + oscilacion_armonica2 + oscilacion_transitoria
-            )
-            
-            # Combinar todas las fases
-            presiones_combinadas = np.zeros_like(time_points)
-            presiones_combinadas[fase_caida_mask] = presiones_caida
-            presiones_combinadas[fase_rebote_mask] = presiones_rebote
-            presiones_combinadas[fase_oscilacion_mask] = presiones_oscilacion
-            
-            # Asegurar presiones físicamente posibles pero permitir sobrepresión crítica
-            presiones_combinadas = np.maximum(presiones_combinadas, max(2.0, altura_estatica * 0.2))  # Presión mínima muy baja para verificar riesgo
-            presiones = presiones_combinadas
-            
-            pico_maximo_presion = np.max(presiones)
-            valle_minimo_presion = np.min(presiones)
-            label_titulo = f"Transiente Hidráulico - Corte Súbito de Bomba\\nPico: {pico_maximo_presion:.1f} m, Valle: {valle_minimo_presion:.1f} m"
-        
-        # Crear gráfico profesional con información técnica
-        plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
-        fig, ax = plt.subplots(figsize=(12, 8))
-        
-        # Línea principal de presión con estilo distintivo
-        ax.plot(time_points, presiones, 'b-', linewidth=2.5, label=f'Sonda de Presión - Nodo Crítico', alpha=0.8)
-        
-        # Línea de presión estática
-        ax.axhline(y=altura_estatica, color='r', linestyle='--', alpha=0.7, linewidth=2, label=f'Presión Estática ({altura_estatica:.1f} m)')
-        
-        # Líneas adicionales de referencia para análisis de golpe de ariete
-        if 'Pico' in label_titulo:
-            pico_max = np.max(presiones)
-            valle_min = np.min(presiones)
-            ax.axhline(y=pico_max, color='orange', linestyle=':', alpha=0.6, linewidth=1.5, label=f'Presión Máxima ({pico_max:.1f} m)')
-            ax.axhline(y=valle_min, color='green', linestyle=':', alpha=0.6, linewidth=1.5, label=f'Presión Mínima ({valle_min:.1f} m)')
-        
-        # Configuración del gráfico
-        ax.set_xlabel('Tiempo [s]', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Altura de Presión [m]', fontsize=12, fontweight='bold')
-        ax.set_title(f'{label_titulo}', fontsize=14, fontweight='bold', pad=20)
-        
-        # Información técnica del sistema en el gráfico
-        sistema_info = f'Sistema: {caudal:.0f} L/s | AdT: {altura_estatica:.1f} m | Vel. Oscil.: {vel_onda:.0f} m/s | T: {tf:.1f}s'
-        ax.text(0.02, 0.98, sistema_info, transform=ax.transAxes, fontsize=10, 
-                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='lightblue', alpha=0.8))
-        
-        # Leyenda profesional
-        ax.legend(loc='upper right', frameon=True, framealpha=0.9, fontsize=10)
-        
-        # Grid sutil
-        ax.grid(True, alpha=0.2, linestyle='-', linewidth=0.5)
-        
-        # Margenes para mejor visualización
-        ax.set_xlim(0, max(time_points))
-        
-        # Resaltar características importantes del golpe de ariete
+        from core.moc_solver import ley_cierre, curva_tabulada, PumpRunDown, PRESION_ATMOSFERICA_M, PRESION_VAPOR_M
+
+        inputs = datos_json['inputs']
+        tf = float(inputs.get('tiempo_simulacion_transientes', 10.0))
+        solver, info = construir_red_moc(datos_json)
+        if info.get('aviso_descarga'):
+            st.warning(f"⚠️ {info['aviso_descarga']}")
+
+        # Parámetros del evento (mismos valores por defecto que la simulación con TSNet)
+        ts = float(inputs.get('inicio_evento', 1.0))
         if evento == "Cierre Rápido de Válvula":
-            ax.annotate('SOBREPRESION\\n(Golpe de Ariete)', 
-                       xy=(time_points[np.argmax(presiones)], np.max(presiones)),
-                       xytext=(time_points[np.argmax(presiones)]+1, np.max(presiones)+5),
-                       arrowprops=dict(arrowstyle='->', color='red', lw=2),
-                       fontsize=10, fontweight='bold', color='red')
+            if inputs.get('curva_cierre'):
+                apertura = curva_tabulada(inputs['curva_cierre'])
+            else:
+                apertura = ley_cierre(ts, float(inputs.get('tiempo_cierre', 2.0)), float(inputs.get('exponente_cierre', 1.0)))
+            velocidad = None
+            parada = None
+            evento_name = "Cierre Rápido de Válvula"
         else:
-            ax.annotate('DEPRESION INICIAL\\n(Parada Bomba)', 
-                       xy=(time_points[np.argmin(presiones)], np.min(presiones)),
-                       xytext=(time_points[np.argmin(presiones)]+1, np.min(presiones)-8),
-                       arrowprops=dict(arrowstyle='->', color='green', lw=2),
-                       fontsize=10, fontweight='bold', color='green')
-        
+            apertura = None
+            inercia = parametros_inercia_bomba(datos_json)
+            if inputs.get('modelo_parada', 'inercia') == 'lineal':
+                velocidad = ley_cierre(ts, float(inputs.get('tiempo_parada_bomba', 0.5)))
+                parada = None
+            else:
+                velocidad = None
+                parada = PumpRunDown(
+                    inercia['inercia'], rpm=inercia['rpm'], t_corte=ts,
+                    eficiencia=inercia['eficiencia'],
+                    curva_rendimiento=datos_json['resultados'].get('bomba_seleccionada', {}).get('curva_rendimiento'))
+            evento_name = "Corte Súbito de Bomba"
+
+        nodo_analisis = 'JImp'
+        decimacion = decimacion_salida(datos_json, math.ceil(tf / solver.dt))
+        cavitacion = bool(inputs.get('cavitacion', True))
+        res = solver.run(tf, info['q_m3s'], velocidad_bomba=velocidad, apertura_valvula=apertura,
+                         sondas=[nodo_analisis, 'JDis'], parada=parada, decimacion=decimacion,
+                         cavitacion=cavitacion)
+        time_points = res['t']
+        head = res['sondas'][nodo_analisis]['H']
+        env = res['envolvente']
+
+        # Extremos exactos (calculados en todos los pasos, no en la serie decimada)
+        max_head = res['sondas'][nodo_analisis]['H_max']
+        min_head = res['sondas'][nodo_analisis]['H_min']
+        altura_dinamica_total = datos_json['resultados']['alturas']['dinamica_total']
+        delta_h = max_head - altura_dinamica_total
+
+        fig, (ax, ax_env) = plt.subplots(2, 1, figsize=(10, 7))
+        ax.plot(time_points, head, label=f'Presión en {nodo_analisis}', color='blue', linewidth=1.5)
+        ax.axhline(y=altura_dinamica_total, color='green', linestyle='--', label=f'Altura Dinámica ({altura_dinamica_total:.1f} m)')
+        ax.set_title(f'Simulación de Transiente (MOC): {evento_name}')
+        ax.set_xlabel('Tiempo (s)')
+        ax.set_ylabel('Altura de Presión (m)')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper left')
+        if parada is not None:
+            ax_alfa = ax.twinx()
+            ax_alfa.plot(time_points, res['alfa'], color='gray', linestyle=':', label='Velocidad relativa N/N₀')
+            ax_alfa.set_ylabel('N/N₀')
+            ax_alfa.set_ylim(0, 1.1)
+            ax_alfa.legend(loc='upper right')
+
+        # Envolventes de altura piezométrica a lo largo de la conducción
+        ax_env.plot(env['x'], env['H_max'], color='red', label='Envolvente máxima')
+        ax_env.plot(env['x'], env['H_min'], color='blue', label='Envolvente mínima')
+        ax_env.plot(env['x'], env['H0'], color='black', linestyle='--', label='Régimen permanente')
+        ax_env.plot(env['x'], env['z'], color='saddlebrown', label='Cota de la tubería')
+        ax_env.plot(env['x'], env['z'] + PRESION_VAPOR_M - PRESION_ATMOSFERICA_M, color='purple',
+                    linestyle=':', label='Presión de vapor')
+        perfil = info.get('perfil')
+        if perfil is not None:
+            # Terreno y piezométrica permanente en los vértices del perfil simplificado
+            x_perfil = perfil['x'] + perfil['x_inicio']
+            ax_env.plot(x_perfil, perfil['z'], color='saddlebrown', marker='.', linestyle='none',
+                        label='Vértices del perfil')
+            ax_env.fill_between(x_perfil, perfil['z'], perfil['hgl'], where=perfil['negativa'],
+                                color='orange', alpha=0.3, label='Presión negativa en régimen permanente')
+        ax_env.set_xlabel('Distancia desde el reservorio (m)')
+        ax_env.set_ylabel('Altura piezométrica (m)')
+        ax_env.grid(True, alpha=0.3)
+        ax_env.legend()
         plt.tight_layout()
-        
-        # Calcular métricas
-        max_pressure = np.max(presiones)
-        min_pressure = np.min(presiones)
-        
-        # Calcular delta_h para compatibilidad
-        altura_estatica = altura_succion + altura_descarga
-        delta_h = max_pressure - altura_estatica
-        
+
+        warning = 'TSNet no disponible. Usando el solver MOC nativo.'
+        if res['curva_ajustada']:
+            warning += ' La curva de la bomba no corta la curva del sistema; se desplazó para operar en el caudal de diseño.'
+        separacion = res['cavitacion']
+        if separacion and separacion['nudos_cavitados']:
+            warning += (f" Separación de columna en {separacion['nudos_cavitados']} nudos "
+                        f"(volumen máximo de cavidades {separacion['volumen_max_total'] * 1000:.1f} L).")
+        if perfil is not None and perfil['presion_min'] < 0:
+            warning += (f" El terreno corta la piezométrica permanente: presión mínima "
+                        f"{perfil['presion_min']:.1f} m a {perfil['x_presion_min']:.0f} m de la bomba.")
+
         return {
             'success': True,
             'fig': fig,
-            'max_head': max_pressure,
-            'min_head': min_pressure,
+            'max_head': max_head,
+            'min_head': min_head,
             'event_type': evento,
-            'evento': evento,  # Campo adicional para compatibilidad
+            'evento': evento_name,
             'delta_h': delta_h,
-            'wave_speed_succion': 400.0,  # Valor típico PVC
-            'wave_speed_impulsion': 400.0,  # Valor típico PVC
-            'dt_used': 0.01,  # Valor estable por defecto
-            'simulation_method': 'alternativa',
-            'warning': 'TSNet no disponible por incompatibilidad de versiones. Usando simulación alternativa.',
+            'wave_speed_succion': info['wave_speed_succion'],
+            'wave_speed_impulsion': info['wave_speed_impulsion'],
+            'dt_used': res['dt'],
+            'malla': solver.resumen_malla(),
+            'decimacion': decimacion,
+            'simulation_method': 'moc_nativo',
+            'warning': warning,
             'time': time_points.tolist(),
-            'head': presiones.tolist()
+            'head': head.tolist(),
+            'envolvente': {k: v.tolist() for k, v in env.items()},
+            'perfil': ({k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in perfil.items()}
+                       if perfil is not None else None),
+            'velocidad_relativa': res['alfa'].tolist(),
+            'inercia_bomba': inercia['inercia'] if parada is not None else None,
+            'cavitacion': ({'volumen_max_total': separacion['volumen_max_total'],
+                            'nudos_cavitados': separacion['nudos_cavitados'],
+                            'volumen_max': separacion['volumen_max'].tolist()}
+                           if separacion else None)
         }
-        
+
     except Exception as e:
         return {
             'success': False,
@@ -897,6 +885,8 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
         return simular_transiente_alternativa(evento, datos_json)
 
     try:
+        from core.moc_solver import discretizar_courant, tabla_malla
+
         # --- 1. Cargar Modelo Transiente ---
         tm = tsnet.network.TransientModel(inp_file)
 
@@ -945,7 +935,14 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
         
         print(f"✅ Asignando {len(wavespeeds)} velocidades de onda a {len(pipe_names)} tuberías")
         
+        malla = None
         if len(wavespeeds) == len(pipe_names) and len(wavespeeds) > 0:
+            # Malla de Courant: TSNet exige 2 tramos por tubería; las tuberías cortas (succión)
+            # quedan con celeridad reducida en lugar de imponer un dt diminuto a toda la simulación
+            longitudes = [tm.get_link(name).length for name in pipe_names]
+            malla = discretizar_courant(longitudes, wavespeeds, n_tramos_min=2)
+            wavespeeds = [float(a_ajustada) if corta else a
+                          for a, a_ajustada, corta in zip(wavespeeds, malla['celeridad_ajustada'], malla['cortas'])]
             tm.set_wavespeed(wavespeeds)
         elif len(pipe_names) == 0:
             st.warning("⚠️ No se detectaron tuberías en el modelo. Usando valores por defecto.")
@@ -954,7 +951,10 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
 
         # --- 3. Configurar Parámetros de Tiempo ---
         tiempo_simulacion = datos_json.get('inputs', {}).get('tiempo_simulacion_transientes', 10.0)
-        tm.set_time(tiempo_simulacion)
+        if malla is not None:
+            tm.set_time(tiempo_simulacion, malla['dt'])
+        else:
+            tm.set_time(tiempo_simulacion)
 
         # --- 4. Configurar Evento de Simulación ---
         # Probar múltiples nodos para encontrar el transitorio
@@ -977,7 +977,9 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
             
             # Configurar evento de cierre de bomba DESPUÉS de inicializar
             print(f"🔧 Configurando evento: {evento_name}...")
-            tc = 0.5  # Duración del cierre (0.5 segundos = cierre rápido)
+            # TSNet solo admite una ley de velocidad prescrita: se usa como duración el
+            # tiempo de parada por inercia del grupo (J·ω²/2P)
+            tc = max(parametros_inercia_bomba(datos_json)['t_parada'], 0.1)
             ts = 1.0  # Tiempo cuando inicia el cierre (1s = bomba funciona 1s primero)
             se = 0    # Estado final (0 = velocidad 0, bomba completamente apagada)
             m = 1     # Coeficiente (1 = cierre lineal, 2 = cuadrático)
@@ -1012,100 +1014,45 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
             raise
 
         # --- 6. Extracción de Resultados ---
-        # TSNet devuelve un objeto TransientModel, no un diccionario
-        print(f"🔍 Extrayendo resultados para nodo: {nodo_analisis}")
-        
+        # TSNet guarda las historias completas en su modelo; aquí se reducen a una
+        # envolvente por nudo (O(nudos)) y a la serie decimada del nudo de análisis
         try:
-            # Obtener el nodo usando la API de TSNet
             node = results.get_node(nodo_analisis)
-            
-            # Extraer datos de presión (head) - es un NumPy array
-            head = node.head  # Array de presiones [m] vs tiempo
-            
-            # Obtener timestamps de simulación
-            time = results.simulation_timestamps  # Array de tiempos [s]
-            
-            print(f"✅ Datos extraídos correctamente:")
-            print(f"   - Nodo: {nodo_analisis}")
-            print(f"   - Puntos de presión: {len(head)}")
-            print(f"   - Puntos de tiempo: {len(time)}")
-            print(f"   - Tipo de datos head: {type(head)}")
-            print(f"   - Tipo de datos time: {type(time)}")
-            
-            # Validar que no haya NaN
-            if hasattr(head, '__iter__'):
-                nan_count = np.sum(np.isnan(head)) if hasattr(np, 'isnan') else 0
-                print(f"   - Valores NaN en head: {nan_count}")
-                if nan_count > 0:
-                    print(f"   ⚠️ ADVERTENCIA: Hay {nan_count} valores NaN en los datos de presión")
-                    # Intentar limpiar NaN
-                    valid_indices = ~np.isnan(head)
-                    if np.any(valid_indices):
-                        head = head[valid_indices]
-                        time = time[valid_indices]
-                        print(f"   ✅ Datos limpiados: {len(head)} puntos válidos restantes")
-            
-            if len(head) > 0:
-                print(f"   - Presión inicial: {head[0]:.2f} m")
-                print(f"   - Presión final: {head[-1]:.2f} m")
-                print(f"   - Presión mínima: {np.min(head):.2f} m")
-                print(f"   - Presión máxima: {np.max(head):.2f} m")
-                print(f"   - Rango de presión: {np.max(head) - np.min(head):.2f} m")
-            else:
-                print(f"   ⚠️ ADVERTENCIA: Array de presiones está vacío después de limpieza")
-            
-            # Analizar TODOS los nodos para encontrar el transitorio
-            print(f"\n🔍 Analizando todos los nodos disponibles:")
-            if hasattr(results, 'nodes'):
-                for node_name in list(results.nodes.keys())[:10]:  # Primeros 10 nodos
-                    try:
-                        n = results.get_node(node_name)
-                        h = n.head
-                        if len(h) > 0 and not np.all(np.isnan(h)):
-                            h_min, h_max = np.min(h), np.max(h)
-                            h_range = h_max - h_min
-                            print(f"   {node_name}: Min={h_min:.1f}m, Max={h_max:.1f}m, Rango={h_range:.1f}m")
-                    except:
-                        pass
-            
         except (KeyError, AttributeError) as e:
-            # Si el nodo no existe, intentar con nodos disponibles
-            print(f"⚠️ Error al acceder a nodo '{nodo_analisis}': {e}")
-            
-            # Listar nodos disponibles
             available_nodes = list(results.nodes.keys()) if hasattr(results, 'nodes') else []
-            print(f"📋 Nodos disponibles: {available_nodes}")
-            
-            if available_nodes:
-                # Usar el último nodo (probablemente descarga)
-                nodo_analisis = available_nodes[-1]
-                print(f"⚠️ Usando nodo alternativo: {nodo_analisis}")
-                node = results.get_node(nodo_analisis)
-                head = node.head
-                time = results.simulation_timestamps
-            else:
+            if not available_nodes:
                 raise ValueError(f"No se encontraron nodos en los resultados de TSNet")
+            print(f"⚠️ Nodo '{nodo_analisis}' no disponible ({e}); usando {available_nodes[-1]}")
+            nodo_analisis = available_nodes[-1]
+            node = results.get_node(nodo_analisis)
+
+        head = np.asarray(node.head, dtype=float)
+        time = np.asarray(results.simulation_timestamps, dtype=float)
 
         # --- 7. Procesamiento y Visualización ---
-        if len(head) == 0:
-            raise ValueError("Los datos de presión están vacíos")
-        
-        # Validar que no haya NaN antes de calcular estadísticas
-        if np.any(np.isnan(head)):
-            print("⚠️ Detectados valores NaN en head, limpiando...")
-            valid_mask = ~np.isnan(head)
-            head = head[valid_mask]
-            time = time[valid_mask]
-            
-        if len(head) == 0:
+        validos = ~np.isnan(head)
+        if not np.any(validos):
             raise ValueError("Todos los datos de presión son NaN - simulación falló")
-            
-        min_head = np.min(head)
-        max_head = np.max(head)
-        
-        print(f"📊 Estadísticas finales:")
-        print(f"   - Min: {min_head:.2f} m, Max: {max_head:.2f} m")
-        
+        head = head[validos]
+        time = time[validos]
+
+        min_head = float(np.min(head))
+        max_head = float(np.max(head))
+
+        envolvente = {}
+        for node_name in (results.nodes.keys() if hasattr(results, 'nodes') else []):
+            try:
+                h = np.asarray(results.get_node(node_name).head, dtype=float)
+                if h.size and not np.all(np.isnan(h)):
+                    envolvente[node_name] = {'H_max': float(np.nanmax(h)), 'H_min': float(np.nanmin(h))}
+            except Exception:
+                pass
+
+        decimacion = decimacion_salida(datos_json, len(head))
+        head = head[::decimacion]
+        time = time[::decimacion]
+        print(f"📊 {nodo_analisis}: Min={min_head:.2f} m, Max={max_head:.2f} m, {len(head)} puntos guardados (decimación {decimacion})")
+
         altura_dinamica_total = datos_json['resultados']['alturas']['dinamica_total']
         delta_h = max_head - altura_dinamica_total
 
@@ -1120,11 +1067,7 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
         plt.tight_layout()
 
         # Obtener el timestep usado
-        dt_used = tm.simulation_timestep if hasattr(tm, 'simulation_timestep') else 0.01
-        
-        # Convertir a listas de forma segura (pueden ser NumPy arrays o listas)
-        time_list = time.tolist() if hasattr(time, 'tolist') else list(time)
-        head_list = head.tolist() if hasattr(head, 'tolist') else list(head)
+        dt_used = tm.simulation_timestep if hasattr(tm, 'simulation_timestep') else (malla['dt'] if malla else 0.01)
         
         return {
             'success': True,
@@ -1135,9 +1078,12 @@ def simular_transiente(inp_file: str, evento: str, datos_json: Dict[str, Any]) -
             'wave_speed_succion': wave_speed_succion,
             'wave_speed_impulsion': wave_speed_impulsion,
             'dt_used': dt_used,
-            'time': time_list,
-            'head': head_list,
-            'evento': evento_name
+            'time': time.tolist(),
+            'head': head.tolist(),
+            'decimacion': decimacion,
+            'envolvente_nudos': envolvente,
+            'evento': evento_name,
+            'malla': tabla_malla(pipe_names, longitudes, malla) if malla is not None else None
         }
 
     except Exception as e:
@@ -1480,8 +1426,10 @@ def guardar_resultados_transientes(datos_json: Dict[str, Any], resultados: Dict[
         'dt_used': resultados['dt_used'],
         'simulation_data': {
             'time': resultados['time'],
-            'head': resultados['head']
-        }
+            'head': resultados['head'],
+            'decimacion': resultados.get('decimacion', 1)
+        },
+        'envolvente': resultados.get('envolvente') or resultados.get('envolvente_nudos')
     }
     
     # Crear directorio si no existe
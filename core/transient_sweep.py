@@ -0,0 +1,160 @@
+"""
+Barridos paramétricos de transitorios para estudios de protección contra golpe de ariete.
+Combina tiempos de cierre, celeridades, clases de tubería y caudales iniciales, y
+simula cada caso con el solver MOC nativo en un pool de procesos. La red se construye
+una sola vez (MOCSolver) y se envía a cada proceso al iniciarlo; cada caso solo
+rehace la discretización (MOCSolver.variante), sin regenerar ni leer un archivo .inp.
+"""
+
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.moc_solver import (MOCSolver, PumpRunDown, ley_cierre,
+                             PRESION_ATMOSFERICA_M, PRESION_VAPOR_M)
+
+# Red compartida por los procesos del pool (ver _iniciar_proceso)
+_RED: Optional[MOCSolver] = None
+
+
+def _iniciar_proceso(red: MOCSolver):
+    global _RED
+    _RED = red
+
+
+def _simular_caso(caso: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Simula un caso del barrido sobre la red compartida y resume su envolvente"""
+    t0 = time.perf_counter()
+    red = _RED.variante(celeridad=caso["celeridad"], diametro=caso["diametro_m"])
+    q = caso["caudal_lps"] / 1000.0 if caso["caudal_lps"] is not None else config["q_m3s"]
+
+    velocidad = apertura = parada = None
+    tc = caso["tiempo_cierre"]
+    if config["evento"] == "Cierre Rápido de Válvula":
+        apertura = ley_cierre(config["t_inicio"], tc if tc is not None else config["tiempo_cierre_base"],
+                              config["exponente_cierre"])
+    elif config["parada"] is not None and tc is None:
+        parada = PumpRunDown(t_corte=config["t_inicio"], **config["parada"])
+    else:
+        velocidad = ley_cierre(config["t_inicio"], tc if tc is not None else config["tiempo_cierre_base"])
+
+    res = red.run(config["t_final"], q, velocidad_bomba=velocidad, apertura_valvula=apertura,
+                  sondas=["JImp"], parada=parada, decimacion=10 ** 9,
+                  forzar_caudal=caso["caudal_lps"] is not None, cavitacion=config["cavitacion"],
+                  presion_vapor_m=config["presion_vapor_rel"])
+    env = res["envolvente"]
+    presion_max = env["H_max"] - env["z"]
+    presion_min = env["H_min"] - env["z"]
+    i_min = int(np.argmin(presion_min))
+
+    fila = dict(caso)
+    fila.pop("diametro_m")
+    fila.update({
+        "celeridad": float(red.tuberias[-1]["celeridad"]) if caso["celeridad"] is None else caso["celeridad"],
+        "caudal_lps": res["q0"] * 1000.0,
+        "max_head": float(env["H_max"].max()),
+        "min_head": float(env["H_min"].min()),
+        "p_max": float(presion_max.max()),
+        "p_min": float(presion_min[i_min]),
+        "x_p_min": float(env["x"][i_min]),
+        "dt": res["dt"],
+        "volumen_cavidad": res["cavitacion"]["volumen_max_total"] if res["cavitacion"] else 0.0,
+        "tiempo_s": time.perf_counter() - t0
+    })
+    pn = caso["pn_m"] if caso["pn_m"] is not None else config["pn_m"]
+    fila["pn_m"] = pn
+    fila["viola_pn"] = bool(pn is not None and fila["p_max"] > pn)
+    # Con DVCM la presión queda acotada por la de vapor: cuenta la formación de cavidades
+    fila["bajo_vapor"] = bool(fila["p_min"] < config["presion_vapor_rel"] or fila["volumen_cavidad"] > 0)
+    return fila
+
+
+def barrido_transientes(red: MOCSolver, caudal_lps: float, t_final: float,
+                        evento: str = "Corte Súbito de Bomba",
+                        tiempos_cierre: Sequence[Optional[float]] = (None,),
+                        celeridades: Sequence[Optional[float]] = (None,),
+                        clases: Sequence[Optional[Dict[str, Any]]] = (None,),
+                        caudales_lps: Sequence[Optional[float]] = (None,),
+                        parada: Optional[Dict[str, Any]] = None,
+                        t_inicio: float = 1.0, tiempo_cierre_base: float = 2.0,
+                        exponente_cierre: float = 1.0, pn_m: Optional[float] = None,
+                        presion_vapor_m: float = PRESION_VAPOR_M,
+                        presion_atmosferica_m: float = PRESION_ATMOSFERICA_M,
+                        cavitacion: bool = False,
+                        max_workers: int = None, parallel: bool = True) -> List[Dict[str, Any]]:
+    """
+    Ejecuta todas las combinaciones de parámetros y devuelve una tabla (lista de filas).
+
+    Args:
+        red: Red MOC ya construida (p. ej. con transient_analysis.construir_red_moc)
+        caudal_lps: Caudal de diseño (L/s) para el régimen inicial
+        t_final: Duración de cada simulación (s)
+        evento: "Cierre Rápido de Válvula" o corte de bomba (cualquier otro)
+        tiempos_cierre: Duración del cierre de la válvula, o de la parada lineal de la bomba (s);
+            None = tiempo_cierre_base, o parada por inercia si se indica `parada`
+        celeridades: Celeridad de la impulsión (m/s); None = la de la clase o la de la red
+        clases: Clases de tubería {'clase', 'celeridad', 'pn_m', 'diametro_interno_mm'}
+            (claves opcionales salvo 'clase'); None = la tubería de la red
+        caudales_lps: Caudal inicial impuesto (L/s); None = punto de operación de la bomba
+        parada: Argumentos de PumpRunDown (inercia, rpm, eficiencia, curva_rendimiento)
+        pn_m: Presión nominal (m) cuando la clase no la indica
+        presion_vapor_m, presion_atmosferica_m: Para el criterio de cavitación
+            (las alturas del modelo son manométricas)
+        cavitacion: Separación de columna (DVCM) en cada simulación
+        max_workers, parallel: Pool de procesos; si parallel es False o el pool falla,
+            los casos se simulan en serie
+
+    Returns:
+        Filas con tiempo_cierre, celeridad, clase, caudal_lps, max_head, min_head,
+        p_max, p_min, x_p_min, pn_m, viola_pn, bajo_vapor, dt, volumen_cavidad
+        (máximo volumen total de cavidades, m³) y tiempo_s
+    """
+    casos = []
+    for tc, a, clase, q in itertools.product(tiempos_cierre, celeridades, clases, caudales_lps):
+        clase = clase or {}
+        di_mm = clase.get("diametro_interno_mm")
+        casos.append({
+            "caso": len(casos) + 1,
+            "tiempo_cierre": tc,
+            "celeridad": a if a is not None else clase.get("celeridad"),
+            "clase": clase.get("clase", "Actual"),
+            "diametro_m": di_mm / 1000.0 if di_mm else None,
+            "pn_m": clase.get("pn_m"),
+            "caudal_lps": q
+        })
+    config = {
+        "q_m3s": caudal_lps / 1000.0,
+        "t_final": t_final,
+        "evento": evento,
+        "parada": parada,
+        "t_inicio": t_inicio,
+        "tiempo_cierre_base": tiempo_cierre_base,
+        "exponente_cierre": exponente_cierre,
+        "pn_m": pn_m,
+        "presion_vapor_rel": presion_vapor_m - presion_atmosferica_m,
+        "cavitacion": cavitacion
+    }
+
+    executor = None
+    if parallel and len(casos) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_iniciar_proceso, initargs=(red,))
+        except (OSError, NotImplementedError) as e:
+            print(f"Barrido de transientes sin multiproceso: {e}")
+
+    try:
+        if executor is not None:
+            try:
+                return list(executor.map(_simular_caso, casos, [config] * len(casos)))
+            except Exception as e:
+                print(f"Barrido de transientes: fallo del pool de procesos ({e}), se continúa en serie")
+                executor.shutdown(cancel_futures=True)
+                executor = None
+        _iniciar_proceso(red)
+        return [_simular_caso(caso, config) for caso in casos]
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,240 @@
+"""
+Servicio de celeridades (velocidad de la onda de presión) compartido por toda la aplicación.
+Lee data_tablas/wave_speeds_data.json una sola vez (se recarga solo si cambia la fecha de
+modificación del archivo o de los catálogos de tuberías) y precalcula la celeridad de cada
+fila de los catálogos de PVC, PEAD y Hierro Dúctil a partir de su diámetro y espesor, para
+consultas vectorizadas sobre barridos completos de diámetros.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from core.pipe_catalog import cargar_catalogo_tuberias
+
+# Módulo de compresibilidad (Pa) y densidad (kg/m³) del agua
+K_AGUA = 2.1e9
+DENSIDAD_AGUA = 1000.0
+# Rango físicamente razonable de la celeridad teórica (m/s)
+CELERIDAD_MIN = 200.0
+CELERIDAD_MAX = 2000.0
+# Celeridades típicas para materiales que no figuran en la tabla
+CELERIDAD_DEFECTO = {
+    'PVC': 1200.0,
+    'PEAD': 300.0,
+    'HIERRO': 1000.0,
+    'HIERRO DUCTIL': 1000.0,
+    'HIERRO FUNDIDO': 1200.0
+}
+CELERIDAD_GENERAL = 1000.0
+
+# Archivos de catálogo de tuberías (ver pipe_catalog.cargar_catalogo_tuberias)
+ARCHIVOS_CATALOGO = ("pvc_data.json", "pead_data.json", "hierro_ductil_data.json")
+
+
+def buscar_material_en_celeridad(material_buscado: str, wave_speeds: dict) -> str:
+    """Busca un material en la tabla de celeridad de forma robusta"""
+    if not material_buscado or not wave_speeds:
+        return None
+
+    material_buscado_clean = material_buscado.lower().strip()
+
+    # Búsqueda exacta
+    for mat_name in wave_speeds.keys():
+        if material_buscado_clean == mat_name.lower().strip():
+            return mat_name
+
+    # Búsqueda sin espacios
+    for mat_name in wave_speeds.keys():
+        if material_buscado_clean.replace(' ', '') == mat_name.lower().replace(' ', ''):
+            return mat_name
+
+    # Búsqueda por palabras clave específicas (manejo de caracteres especiales)
+    if 'hierro' in material_buscado_clean and ('ductil' in material_buscado_clean or 'dúctil' in material_buscado_clean):
+        for mat_name in wave_speeds.keys():
+            mat_lower = mat_name.lower()
+            if 'hierro' in mat_lower and ('ductil' in mat_lower or 'dúctil' in mat_lower or 'dãºctil' in mat_lower):
+                return mat_name
+
+    if 'hierro' in material_buscado_clean and 'fundido' in material_buscado_clean:
+        for mat_name in wave_speeds.keys():
+            mat_lower = mat_name.lower()
+            if 'hierro' in mat_lower and 'fundido' in mat_lower:
+                return mat_name
+
+    if 'acero' in material_buscado_clean and 'comercial' in material_buscado_clean:
+        for mat_name in wave_speeds.keys():
+            mat_lower = mat_name.lower()
+            if 'acero' in mat_lower and 'comercial' in mat_lower:
+                return mat_name
+
+    # Búsqueda por palabras clave individuales (solo si no hay coincidencias específicas)
+    if 'hierro' in material_buscado_clean and 'ductil' not in material_buscado_clean and 'fundido' not in material_buscado_clean:
+        # Solo buscar "HIERRO" si no hay especificación de tipo
+        for mat_name in wave_speeds.keys():
+            if mat_name.lower() == 'hierro':
+                return mat_name
+
+    # Búsqueda parcial (último recurso)
+    for mat_name in wave_speeds.keys():
+        if material_buscado_clean in mat_name.lower():
+            return mat_name
+
+    return None
+
+
+def material_catalogo(material: str) -> Optional[str]:
+    """Material del catálogo de tuberías (PVC, PEAD, Hierro Dúctil) equivalente a `material`"""
+    nombre = str(material or '').upper()
+    if 'PVC' in nombre:
+        return 'PVC'
+    if any(clave in nombre for clave in ('PEAD', 'HDPE', 'POLIET')):
+        return 'PEAD'
+    if 'HIERRO' in nombre and ('DUCTIL' in nombre or 'DÚCTIL' in nombre):
+        return 'Hierro Dúctil'
+    return None
+
+
+def celeridad_allievi(ks, diametro_interior, espesor):
+    """
+    Fórmula de Allievi a = 9900 / √(48.3 + K_s · Di/e), vectorizada.
+    Devuelve 400 m/s (valor típico del PVC) donde los parámetros no son válidos.
+    """
+    ks = np.asarray(ks, dtype=float)
+    di = np.asarray(diametro_interior, dtype=float)
+    e = np.asarray(espesor, dtype=float)
+    validos = (e > 0) & (di > 0) & (ks > 0)
+    denominador = 48.3 + ks * di / np.where(validos, e, 1.0)
+    validos &= denominador > 0
+    a = np.where(validos, 9900.0 / np.sqrt(np.where(validos, denominador, 1.0)), 400.0)
+    return float(a) if a.ndim == 0 else a
+
+
+class WaveSpeedService:
+    """
+    Tabla de celeridades en memoria.
+    `datos` es el contenido de wave_speeds_data.json (None si no existe) y `catalogo`
+    el catálogo columnar de tuberías con la columna adicional `celeridad` (m/s).
+    """
+
+    def __init__(self, directorio: str = "data_tablas"):
+        self.directorio = directorio
+        self.ruta = os.path.join(directorio, "wave_speeds_data.json")
+        self.recargar()
+
+    def firma(self) -> tuple:
+        """Fechas de modificación de la tabla de celeridades y de los catálogos"""
+        firma = []
+        for ruta in (self.ruta,) + tuple(os.path.join(self.directorio, a) for a in ARCHIVOS_CATALOGO):
+            firma.append((ruta, os.path.getmtime(ruta) if os.path.exists(ruta) else None))
+        return tuple(firma)
+
+    def recargar(self):
+        """Lee la tabla de celeridades y precalcula la celeridad de cada tubería del catálogo"""
+        self._firma = self.firma()
+        self._resueltos: Dict[str, Optional[str]] = {}
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                self.datos = json.load(f)
+        except FileNotFoundError:
+            self.datos = None
+        except Exception as e:
+            print(f"Error cargando wave_speeds_data.json: {e}")
+            self.datos = None
+        self.materiales: Dict[str, Dict[str, Any]] = (self.datos or {}).get('wave_speeds', {})
+
+        self.catalogo = cargar_catalogo_tuberias(directorio=self.directorio)
+        celeridad = np.full(len(self.catalogo['di_m']), np.nan)
+        for material in np.unique(self.catalogo['material']):
+            filas = self.catalogo['material'] == material
+            celeridad[filas] = self.celeridad(material, self.catalogo['di_m'][filas],
+                                              self.catalogo['espesor_mm'][filas] / 1000.0)
+        self.catalogo['celeridad'] = celeridad
+
+    def vigente(self) -> bool:
+        return self._firma == self.firma()
+
+    def resolver(self, material: str) -> Optional[str]:
+        """Nombre del material en la tabla de celeridades (búsqueda robusta, en caché)"""
+        if material not in self._resueltos:
+            self._resueltos[material] = buscar_material_en_celeridad(material, self.materiales)
+        return self._resueltos[material]
+
+    def celeridad_defecto(self, material: str) -> float:
+        """Celeridad típica por palabra clave para materiales que no figuran en la tabla"""
+        if self.datos is None:
+            return 1200.0
+        for mat_key, vel_defecto in CELERIDAD_DEFECTO.items():
+            if mat_key in str(material).upper():
+                return vel_defecto
+        return CELERIDAD_GENERAL
+
+    def celeridad(self, material: str, diametro, espesor):
+        """
+        Celeridad teórica a = √(K / (ρ (1 + K/E · D/e))) con el módulo de Young de la tabla.
+        Acepta escalares o arrays de diámetro y espesor (m). Si el espesor no es válido o el
+        resultado queda fuera de 200-2000 m/s se usa la celeridad típica del material.
+
+        Args:
+            material: Nombre exacto del material en wave_speeds_data.json
+            diametro: Diámetro interno (m)
+            espesor: Espesor de pared (m)
+
+        Returns:
+            Celeridad (m/s); float si las entradas son escalares
+        """
+        d = np.asarray(diametro, dtype=float)
+        e = np.asarray(espesor, dtype=float)
+        datos = self.materiales.get(material)
+        if datos is None:
+            a = np.full(np.broadcast(d, e).shape, self.celeridad_defecto(material))
+        else:
+            validos = (e > 0) & (e < d)
+            a_teorica = np.sqrt(K_AGUA / (DENSIDAD_AGUA * (1 + (K_AGUA / datos['young_modulus']) *
+                                                           (d / np.where(validos, e, 1.0)))))
+            validos &= (a_teorica >= CELERIDAD_MIN) & (a_teorica <= CELERIDAD_MAX)
+            a = np.where(validos, a_teorica, float(datos['typical_wave_speed']))
+        return float(a) if a.ndim == 0 else a
+
+    def celeridad_catalogo(self, material: str, di_m, pn_m: Optional[float] = None):
+        """
+        Celeridad de las tuberías del catálogo interpolada en diámetro interno, para
+        barridos de diámetros donde no se conoce el espesor de cada tamaño.
+
+        Args:
+            material: Material de la tubería (se admiten variantes como "HDPE (Polietileno)")
+            di_m: Diámetro(s) interno(s) (m)
+            pn_m: Presión nominal (m.c.a.); si se indica, se usa solo la clase del
+                catálogo con la PN más cercana
+
+        Returns:
+            Celeridad (m/s); si el material no tiene catálogo, la típica de la tabla
+        """
+        di = np.asarray(di_m, dtype=float)
+        nombre = material_catalogo(material)
+        filas = self.catalogo['material'] == nombre if nombre else np.zeros(0, dtype=bool)
+        if pn_m is not None and filas.any():
+            pn = self.catalogo['pn_m'][filas]
+            filas &= self.catalogo['pn_m'] == pn[np.argmin(np.abs(pn - pn_m))]
+        if not filas.any():
+            clave = self.resolver(material)
+            tipica = (float(self.materiales[clave]['typical_wave_speed']) if clave
+                      else self.celeridad_defecto(material))
+            a = np.full(di.shape, tipica)
+        else:
+            a = np.interp(di, self.catalogo['di_m'][filas], self.catalogo['celeridad'][filas])
+        return float(a) if a.ndim == 0 else a
+
+
+_SERVICIO_CELERIDAD: Dict[str, WaveSpeedService] = {}
+
+
+def get_wave_speed_service(directorio: str = "data_tablas") -> WaveSpeedService:
+    """Servicio compartido; se reconstruye solo si cambian la tabla o los catálogos"""
+    servicio = _SERVICIO_CELERIDAD.get(directorio)
+    if servicio is None or not servicio.vigente():
+        servicio = WaveSpeedService(directorio)
+        _SERVICIO_CELERIDAD[directorio] = servicio
+    return servicio
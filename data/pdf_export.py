@@ -477,8 +477,8 @@ def create_seccion_graficos_100(session_state: Dict[str, Any], h1_style, h2_styl
     elements.append(Spacer(1, 0.2*inch))
     
     try:
-        import numpy as np
         from scipy.interpolate import interp1d
+        from core.operating_point import interseccion_curvas_tabuladas
         
         # Obtener DataFrames
         df_bomba = session_state.get('df_bomba_100', pd.DataFrame())
@@ -492,16 +492,12 @@ def create_seccion_graficos_100(session_state: Dict[str, Any], h1_style, h2_styl
             if df1.empty or df2.empty:
                 return None, None
             try:
-                # Interpolar ambas curvas
-                f1 = interp1d(df1[col_x], df1[col_y], kind='linear', fill_value='extrapolate')
-                f2 = interp1d(df2[col_x], df2[col_y], kind='linear', fill_value='extrapolate')
-                
-                # Buscar intersección
-                x_range = np.linspace(max(df1[col_x].min(), df2[col_x].min()), 
-                                     min(df1[col_x].max(), df2[col_x].max()) * 1.2, 1000)
-                diff = f1(x_range) - f2(x_range)
-                idx = np.argmin(np.abs(diff))
-                return x_range[idx], f1(x_range[idx])
+                # Intersección acotada entre ambas curvas interpoladas (con extrapolación lineal)
+                sol = interseccion_curvas_tabuladas(
+                    df1[col_x], df1[col_y], df2[col_x], df2[col_y],
+                    q_min=max(df1[col_x].min(), df2[col_x].min()),
+                    q_max=min(df1[col_x].max(), df2[col_x].max()) * 1.2)
+                return sol['q'], sol['h']
             except:
                 return None, None
         
@@ -677,8 +673,8 @@ def create_seccion_graficos_vfd(session_state: Dict[str, Any], h1_style, h2_styl
     elements.append(Spacer(1, 0.2*inch))
     
     try:
-        import numpy as np
         from scipy.interpolate import interp1d
+        from core.operating_point import interseccion_curvas_tabuladas
         
         # Obtener DataFrames VFD
         df_bomba_vfd = session_state.get('df_bomba_vfd', pd.DataFrame())
@@ -694,13 +690,12 @@ def create_seccion_graficos_vfd(session_state: Dict[str, Any], h1_style, h2_styl
             if df1.empty or df2.empty:
                 return None, None
             try:
-                f1 = interp1d(df1[col_x], df1[col_y], kind='linear', fill_value='extrapolate')
-                f2 = interp1d(df2[col_x], df2[col_y], kind='linear', fill_value='extrapolate')
-                x_range = np.linspace(max(df1[col_x].min(), df2[col_x].min()), 
-                                     min(df1[col_x].max(), df2[col_x].max()) * 1.2, 1000)
-                diff = f1(x_range) - f2(x_range)
-                idx = np.argmin(np.abs(diff))
-                return x_range[idx], f1(x_range[idx])
+                # Intersección acotada entre ambas curvas interpoladas (con extrapolación lineal)
+                sol = interseccion_curvas_tabuladas(
+                    df1[col_x], df1[col_y], df2[col_x], df2[col_y],
+                    q_min=max(df1[col_x].min(), df2[col_x].min()),
+                    q_max=min(df1[col_x].max(), df2[col_x].max()) * 1.2)
+                return sol['q'], sol['h']
             except:
                 return None, None
         
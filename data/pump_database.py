@@ -9,17 +9,36 @@ Autor: Sistema de Bombeo - Módulo de Catálogo
 Fecha: 2025-12-23
 """
 
+import glob
 import json
 import os
 from typing import Dict, List, Optional, Tuple
 
 
+def _archivos_catalogo() -> Dict[str, str]:
+    """Archivos data_tablas/bombas_<marca>_data.json indexados por marca en minúsculas"""
+    return {os.path.basename(a)[len("bombas_"):-len("_data.json")].lower(): a
+            for a in sorted(glob.glob("data_tablas/bombas_*_data.json"))}
+
+
+def get_available_brands() -> List[str]:
+    """
+    Marcas con catálogo disponible (archivos data_tablas/bombas_<marca>_data.json)
+    
+    Returns:
+        list: Nombres de marca capitalizados, en orden alfabético
+    """
+    return [marca.capitalize() for marca in _archivos_catalogo()]
+
+
 def load_pump_database(marca: str) -> Dict:
     """
-    Carga la base de datos de bombas de una marca específica
+    Carga la base de datos de bombas de una marca específica.
+    La marca se compara sin distinguir mayúsculas con el nombre del archivo
+    ("KSB" encuentra bombas_ksb_data.json).
     
     Args:
-        marca (str): Nombre de la marca ("Grundfos" o "Ebara")
+        marca (str): Nombre de la marca (p. ej. "Grundfos" o "Ebara")
     
     Returns:
         dict: Base de datos completa con estructura de categorías y bombas
@@ -28,12 +47,11 @@ def load_pump_database(marca: str) -> Dict:
         FileNotFoundError: Si el archivo JSON no existe
         ValueError: Si la marca no es válida
     """
-    marcas_validas = ["Grundfos", "Ebara"]
-    
-    if marca not in marcas_validas:
-        raise ValueError(f"Marca '{marca}' no válida. Debe ser una de: {marcas_validas}")
+    archivos = _archivos_catalogo()
+    archivo = archivos.get(marca.lower())
     
-    archivo = f"data_tablas/bombas_{marca.lower()}_data.json"
+    if archivo is None:
+        raise ValueError(f"Marca '{marca}' no válida. Debe ser una de: {get_available_brands()}")
     
     if not os.path.exists(archivo):
         raise FileNotFoundError(f"No se encontró el archivo de catálogo: {archivo}")
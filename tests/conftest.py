@@ -0,0 +1,18 @@
+# Configuración común de las pruebas: el paquete se importa desde la raíz del repositorio
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _directorio_raiz():
+    """Los catálogos se leen con rutas relativas a la raíz (data_tablas/...)"""
+    anterior = os.getcwd()
+    os.chdir(RAIZ)
+    yield
+    os.chdir(anterior)
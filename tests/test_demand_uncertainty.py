@@ -0,0 +1,94 @@
+# Pruebas de regresión del dimensionamiento del tanque por Monte Carlo
+
+import time
+
+import numpy as np
+import pytest
+
+import core.demand_uncertainty as du
+from core.demand_uncertainty import almacenamiento_requerido, dimensionamiento_monte_carlo, trazas_demanda
+
+FACTORES = np.array([0.6, 0.6, 0.6, 0.6, 0.7, 0.85, 1.1, 1.4, 1.7, 2.1, 1.95, 1.8,
+                     1.7, 1.6, 1.5, 1.55, 1.7, 1.9, 2.0, 1.6, 1.2, 1.0, 0.8, 0.7])
+BASE = 0.01 * np.tile(FACTORES, 7)
+DT = 3600.0
+Q_BOMBEO = 0.012
+
+
+def _pico_secuente(demanda, caudal, dt):
+    """Algoritmo del pico secuente escalar: K(t) = max(0, K(t-1) + (d - q)·dt)"""
+    deficit = maximo = 0.0
+    for d in demanda:
+        deficit = max(0.0, deficit + (d - caudal) * dt)
+        maximo = max(maximo, deficit)
+    return maximo
+
+
+def _volumen_minimo(demanda, caudal, dt, capacidad):
+    """Tanque que parte lleno y bombea mientras no está lleno (sin recortar el fondo)"""
+    v = v_min = capacidad
+    for d in demanda:
+        v = min(capacidad, v + (caudal - d) * dt)
+        v_min = min(v_min, v)
+    return v_min
+
+
+def test_coincide_con_pico_secuente_escalar():
+    trazas = trazas_demanda(BASE, DT, 50, cv_diario=0.2, prob_dia_pico=0.1,
+                            multiplicador_pico=1.3, rng=np.random.default_rng(1))
+    for nivel_min in (0.0, 0.25):
+        vectorial = almacenamiento_requerido(trazas, Q_BOMBEO, DT, nivel_min)
+        escalar = [_pico_secuente(d, Q_BOMBEO, DT) / (1 - nivel_min) for d in trazas]
+        np.testing.assert_allclose(vectorial, escalar, rtol=1e-12, atol=1e-9)
+
+
+def test_capacidad_justa_para_la_traza():
+    demanda = trazas_demanda(BASE, DT, 1, rng=np.random.default_rng(2))[0]
+    capacidad = almacenamiento_requerido(demanda, Q_BOMBEO, DT)[0]
+    assert capacidad > 0
+    assert _volumen_minimo(demanda, Q_BOMBEO, DT, capacidad) == pytest.approx(0.0, abs=1e-6)
+    assert _volumen_minimo(demanda, Q_BOMBEO, DT, 0.95 * capacidad) < 0
+
+
+def test_no_crece_con_el_horizonte():
+    # Con bombeo mayor que la demanda media el excedente rebosa: un año exige lo mismo
+    # que un día (la amplitud máx − mín de la curva de masas crecería con el horizonte)
+    dia, caudal = 0.01 * FACTORES, 0.015
+    anio = np.tile(dia, 365)
+    requerido = almacenamiento_requerido(anio, caudal, DT)[0]
+    assert requerido == pytest.approx(almacenamiento_requerido(dia, caudal, DT)[0], rel=1e-9)
+    masa = np.cumsum((caudal - anio) * DT)
+    assert masa.max() - masa.min() > 100 * requerido
+
+
+def test_trazas_sin_variacion_reproducen_la_base():
+    trazas = trazas_demanda(BASE, DT, 3, cv_diario=0.0, cv_horario=0.0)
+    np.testing.assert_array_equal(trazas, np.broadcast_to(BASE, trazas.shape))
+
+
+def test_trazas_de_media_unitaria():
+    trazas = trazas_demanda(BASE, DT, 4000, rng=np.random.default_rng(3))
+    assert trazas.mean() / BASE.mean() == pytest.approx(1.0, abs=0.01)
+
+
+def test_monte_carlo_por_lotes(monkeypatch):
+    monkeypatch.setattr(du, "TRAZAS_POR_LOTE", 300)
+    confiabilidades = (0.5, 0.9, 0.99)
+    r = dimensionamiento_monte_carlo(BASE, DT, Q_BOMBEO, n_trazas=1000, confiabilidades=confiabilidades,
+                                     redondeo_m3=10.0, semilla=4)
+    assert r["almacenamiento"].shape == (1000,) and np.all(r["almacenamiento"] > 0)
+    capacidades = [r["capacidades"][p] for p in confiabilidades]
+    assert capacidades == sorted(capacidades)
+    for p in confiabilidades:
+        assert np.mean(r["almacenamiento"] <= r["capacidades"][p]) >= p
+    assert r["deterministico"] == pytest.approx(_pico_secuente(BASE, Q_BOMBEO, DT))
+    repetido = dimensionamiento_monte_carlo(BASE, DT, Q_BOMBEO, n_trazas=1000, confiabilidades=confiabilidades,
+                                            redondeo_m3=10.0, semilla=4)
+    np.testing.assert_array_equal(r["almacenamiento"], repetido["almacenamiento"])
+
+
+def test_diez_mil_trazas_en_pocos_segundos():
+    t0 = time.perf_counter()
+    r = dimensionamiento_monte_carlo(BASE, DT, Q_BOMBEO, n_trazas=10000, semilla=5)
+    assert time.perf_counter() - t0 < 5.0
+    assert r["n_trazas"] == 10000
@@ -0,0 +1,36 @@
+# Pruebas de regresión del diámetro económico por programación dinámica
+
+import itertools
+
+import numpy as np
+import pytest
+
+from core.economic_dp import EconomicDiameterDP
+
+CASOS = [
+    (1, dict(caudal_lps=20.0, long_succion=10.0, long_impulsion=800.0, h_estatica=40.0, costo_kwh=0.12)),
+    (1, dict(caudal_lps=120.0, long_succion=25.0, long_impulsion=4500.0, h_estatica=80.0, costo_kwh=0.25)),
+    (2, dict(caudal_lps=45.0, long_succion=15.0, long_impulsion=2500.0, h_estatica=60.0, costo_kwh=0.08)),
+    (2, dict(caudal_lps=8.0, long_succion=6.0, long_impulsion=1200.0, h_estatica=25.0, costo_kwh=0.18)),
+]
+
+
+def _fuerza_bruta(dp, n_tramos):
+    """Mínimo costo real entre todas las combinaciones que cumplen las restricciones duras"""
+    modelo = dp.modelo
+    succion = dp._opciones_validas(dp.v_succion)
+    impulsion = dp._opciones_validas(dp.v_impulsion)
+    genes = np.array([(s,) + c for s in succion for c in itertools.product(impulsion, repeat=n_tramos)])
+    ev = modelo.evaluate_population(genes)
+    dn = modelo._opciones["dn_mm"]
+    validas = (dn[genes[:, 0]] >= dn[genes[:, 1]]) & (ev["p_ratio"] <= 1 + 1e-12)
+    assert validas.any()
+    return ev["real_cost"][validas].min()
+
+
+@pytest.mark.parametrize("n_tramos, kwargs", CASOS)
+def test_coincide_con_fuerza_bruta(n_tramos, kwargs):
+    dp = EconomicDiameterDP(**kwargs, n_tramos=n_tramos)
+    r = dp.solve()
+    assert r["optimo"] is not None
+    assert r["optimo"]["real_cost"] == pytest.approx(_fuerza_bruta(dp, n_tramos), rel=1e-9)
@@ -0,0 +1,121 @@
+# Pruebas de regresión del MOC con cavidad discreta (DVCM)
+
+import numpy as np
+import pytest
+
+from core.moc_solver import (PRESION_ATMOSFERICA_M, PRESION_VAPOR_M, MOCSolver, PumpRunDown,
+                             discretizar_courant, factor_friccion_hw, ley_cierre)
+
+Q = 0.05
+VAPOR = PRESION_VAPOR_M - PRESION_ATMOSFERICA_M
+
+
+def _tuberia(nombre, longitud, z_inicio, z_fin, diametro=0.25):
+    return dict(nombre=nombre, longitud=longitud, diametro=diametro, celeridad=1000.0,
+                f=factor_friccion_hw(Q, longitud, diametro, 140), z_inicio=z_inicio, z_fin=z_fin)
+
+
+@pytest.fixture(scope="module")
+def red():
+    """Impulsión con un punto alto: la parada brusca separa la columna"""
+    tuberias = [_tuberia("PSuc", 10, 0, 0), _tuberia("P1", 800, 0, 60),
+                _tuberia("P2", 200, 60, 62), _tuberia("P3", 1500, 62, 40)]
+    return MOCSolver(tuberias, 0.0, 40.0, (90.0, 0.0, -2000.0))
+
+
+def test_regimen_permanente_estable(red):
+    r = red.run(10, Q, cavitacion=True)
+    e = r["envolvente"]
+    assert np.ptp(e["H_max"] - e["H0"]) < 1e-6
+    assert np.ptp(e["H_min"] - e["H0"]) < 1e-6
+
+
+def test_curva_desplazada_no_modifica_el_solver(red):
+    coef = red.coef_bomba
+    natural = red.regimen_permanente(Q)
+    assert not natural["curva_ajustada"] and natural["coef_bomba"] == coef
+
+    forzada = red.run(5, 0.8 * Q, forzar_caudal=True, parada=PumpRunDown(inercia=1.0, t_corte=1.0))
+    assert forzada["q0"] == 0.8 * Q and forzada["coef_bomba"][0] != coef[0]
+    assert forzada["coef_bomba"][1:] == coef[1:]
+    assert red.coef_bomba == coef
+    # Una corrida posterior sin forzar vuelve al punto de la curva original
+    despues = red.regimen_permanente(Q)
+    assert despues["q0"] == natural["q0"]
+    np.testing.assert_array_equal(despues["H"], natural["H"])
+    repetida = red.run(5, 0.8 * Q, forzar_caudal=True, parada=PumpRunDown(inercia=1.0, t_corte=1.0))
+    np.testing.assert_array_equal(repetida["envolvente"]["H_min"], forzada["envolvente"]["H_min"])
+
+
+@pytest.mark.parametrize("maniobra", [dict(velocidad_bomba=ley_cierre(1.0, 0.3)),
+                                      dict(apertura_valvula=ley_cierre(1.0, 0.5))])
+def test_cavitacion_limita_la_presion_a_la_de_vapor(red, maniobra):
+    sin_cav = red.run(40, Q, decimacion=10, **maniobra)["envolvente"]
+    assert (sin_cav["H_min"] - sin_cav["z"]).min() < VAPOR - 1.0
+
+    e = red.run(40, Q, cavitacion=True, decimacion=10, **maniobra)["envolvente"]
+    presion_min = e["H_min"] - e["z"]
+    assert presion_min.min() >= VAPOR - 1e-6
+    assert np.all(np.isfinite(e["H_max"]))
+
+
+@pytest.mark.parametrize("altura_nula", [True, False])
+def test_parada_por_inercia_forma_cerrada(altura_nula):
+    # H = 80 - 8000·Q²: con altura nula el caudal relativo queda en v = 2α y el par en
+    # β = β(1, 2)·α²; con la válvula de retención cerrada, v = 0 y β = β(1, 0)·α².
+    # En ambos casos dα/dt = -k·β  =>  α(t) = 1 / (1 + k·β(1, c)·t)
+    bomba = PumpRunDown(inercia=1.0, rpm=1750, eficiencia=0.75)
+    bomba.preparar((80.0, 0.0, -8000.0), 0.05)
+    c, dc = (2.0, 0.0) if altura_nula else (0.0, 1e3)
+    constante = bomba.k * bomba._par(1.0, c)
+    dt = 1e-3
+    for n in range(1, 5001):
+        q, alfa = bomba.paso(dt, dc, 0.0, valvula_retencion=True)
+        assert alfa == pytest.approx(1.0 / (1.0 + constante * n * dt), abs=1e-3)
+        assert q == pytest.approx(c * alfa * 0.05, rel=1e-4, abs=1e-9)
+    assert alfa < 0.25
+
+
+def _error_malla(viaje, dt, n_tramos_min):
+    """Máximo ajuste relativo de celeridad con un dt dado (mismo redondeo de tramos)"""
+    n = np.maximum(np.rint(viaje / dt), n_tramos_min)
+    return np.abs(viaje / (n * dt) - 1).max()
+
+
+# Los dos primeros casos admiten la tolerancia; en los otros se busca el menor error
+@pytest.mark.parametrize("longitudes, celeridades, tolerancia, n_max", [
+    ([10.0, 1234.0, 877.0, 2950.0], [400.0, 1000.0, 1150.0, 980.0], 0.02, 200),
+    ([5.0, 500.0, 3000.0], [300.0, 1100.0, 1250.0], 0.005, 200),
+    ([10.0, 1234.0, 877.0, 2950.0], [400.0, 1000.0, 1150.0, 980.0], 0.02, 50),
+    ([15.0, 640.0, 1710.0], [350.0, 1030.0, 915.0], 0.0, 50),
+])
+def test_discretizar_courant(longitudes, celeridades, tolerancia, n_max):
+    L, a = np.array(longitudes), np.array(celeridades)
+    m = discretizar_courant(L, a, n_tramos_max=n_max, tolerancia=tolerancia, n_tramos_min=2)
+    dt, n = m["dt"], m["n_tramos"]
+    # Courant unitario en todas las tuberías con la celeridad ajustada
+    np.testing.assert_allclose(m["celeridad_ajustada"] * dt / (L / n), 1.0, rtol=1e-12)
+    assert np.all(n >= 2)
+
+    viaje = L / a
+    dt_min = viaje.max() / n_max
+    np.testing.assert_array_equal(m["cortas"], viaje < 2 * dt_min)
+    resolubles = viaje[~m["cortas"]]
+    assert dt >= dt_min * (1 - 1e-12)
+    assert m["error_max"] == pytest.approx(_error_malla(resolubles, dt, 2), abs=1e-12)
+
+    # Búsqueda densa: ningún dt admisible mayor cumple la tolerancia, ni ningún dt da menos error
+    malla = np.linspace(dt_min, max(dt_min, viaje.min() / 2), 20001)
+    errores = np.array([_error_malla(resolubles, d, 2) for d in malla])
+    if errores.min() <= tolerancia:
+        assert m["error_max"] <= tolerancia
+        assert np.all(errores[malla > dt * (1 + 1e-9)] > tolerancia)
+    else:
+        assert errores.min() >= m["error_max"] - 1e-12
+
+
+def test_discretizar_courant_con_dt_impuesto():
+    m = discretizar_courant([1000.0, 2500.0], [1000.0, 1200.0], dt=0.01)
+    assert m["dt"] == 0.01
+    np.testing.assert_array_equal(m["n_tramos"], [100, 208])
+    np.testing.assert_allclose(m["celeridad_ajustada"], [1000.0, 2500.0 / 2.08])
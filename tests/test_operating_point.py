@@ -0,0 +1,132 @@
+# Pruebas de regresión del solucionador acotado del punto de operación
+
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+
+from core.operating_point import (acotar_primer_cruce, illinois_vectorizado, interseccion_curvas_tabuladas,
+                                  resolver_interseccion, resolver_interseccion_polinomios,
+                                  resolver_punto_operacion_hw)
+
+
+def test_illinois_coincide_con_brentq():
+    # Tres funciones distintas, cada una en su intervalo, resueltas en el mismo lote
+    funciones = [lambda x: np.cos(x) - x, lambda x: x ** 3 - 2 * x - 5, lambda x: np.exp(-x) - 0.2 * x]
+    a = np.array([0.0, 2.0, 0.0])
+    b = np.array([1.0, 3.0, 5.0])
+
+    def lote(x):
+        return np.array([f(xi) for f, xi in zip(funciones, x)])
+
+    r = illinois_vectorizado(lote, a, b, lote(a), lote(b), xtol=1e-13, ftol=1e-13)
+    assert r["convergido"].all()
+    esperado = [brentq(f, ai, bi, xtol=1e-14) for f, ai, bi in zip(funciones, a, b)]
+    np.testing.assert_allclose(r["x"], esperado, rtol=0, atol=1e-10)
+
+
+def test_polinomios_cuadraticos_forma_cerrada():
+    # H_bomba = A0 - A2·Q² y H_sistema = h0 + k·Q²  =>  Q* = sqrt((A0 - h0) / (A2 + k))
+    rng = np.random.default_rng(0)
+    n = 200
+    A0, A2 = rng.uniform(40, 120, n), rng.uniform(0.002, 0.02, n)
+    h0, k = rng.uniform(5, 35, n), rng.uniform(0.001, 0.01, n)
+    bomba = np.column_stack([-A2, np.zeros(n), A0])
+    sistema = np.column_stack([k, np.zeros(n), h0])
+    r = resolver_interseccion_polinomios(bomba, sistema, q_min=0.0, q_max=np.sqrt(A0 / A2))
+    q = np.sqrt((A0 - h0) / (A2 + k))
+    assert r["con_cruce"].all() and r["convergido"].all()
+    np.testing.assert_allclose(r["q"], q, rtol=1e-9)
+    np.testing.assert_allclose(r["h"], h0 + k * q ** 2, rtol=1e-9)
+
+
+def test_polinomio_unico_devuelve_escalares():
+    r = resolver_interseccion_polinomios([-0.01, 0.0, 80.0], [0.005, 0.0, 20.0], q_max=100.0)
+    assert isinstance(r["q"], float) and r["con_cruce"]
+    assert r["q"] == pytest.approx(np.sqrt(60.0 / 0.015), rel=1e-10)
+
+
+def test_q_max_obligatorio():
+    with pytest.raises(ValueError):
+        resolver_interseccion_polinomios([-0.01, 0.0, 80.0], [0.005, 0.0, 20.0])
+
+
+def test_varios_cruces_devuelve_el_de_menor_caudal():
+    def diferencia(q):
+        return (q - 1.0) * (q - 2.0) * (q - 3.0)
+
+    cota = acotar_primer_cruce(diferencia, 0.0, 4.0, n_malla=41)
+    assert cota["con_cruce"][0] and cota["a"][0] <= 1.0 <= cota["b"][0]
+
+    r = resolver_interseccion(diferencia, lambda q: q, 0.0, 4.0)
+    assert r["con_cruce"][0] and r["convergido"][0]
+    assert r["q"][0] == pytest.approx(brentq(diferencia, 0.0, 1.5), abs=1e-9)
+
+
+def test_sin_cruce_devuelve_el_punto_mas_cercano():
+    # La bomba queda siempre por encima del sistema: mínimo acercamiento en q = 2
+    def diferencia(q):
+        return (q - 2.0) ** 2 + 1.0
+
+    r = resolver_interseccion(diferencia, lambda q: q, 0.0, 4.0, n_malla=65)
+    assert not r["con_cruce"][0] and not r["convergido"][0]
+    assert r["iteraciones"][0] == 0
+    assert r["q"][0] == pytest.approx(2.0)
+    assert r["residuo"][0] == pytest.approx(1.0)
+
+
+def test_lote_con_y_sin_cruce():
+    # Caso 0: 25 - q² (cruce en q = 5); caso 1: -5 - q² (siempre negativa)
+    constante = np.array([25.0, -5.0])
+
+    def diferencia(q):
+        return constante.reshape((2,) + (1,) * (np.ndim(q) - 1)) - q ** 2
+
+    r = resolver_interseccion(diferencia, lambda q: q, 0.0, np.array([10.0, 10.0]))
+    np.testing.assert_array_equal(r["con_cruce"], [True, False])
+    np.testing.assert_array_equal(r["convergido"], [True, False])
+    assert r["q"][0] == pytest.approx(5.0, abs=1e-9)
+    assert r["q"][1] == 0.0
+
+
+def test_curvas_tabuladas_coincide_con_brentq():
+    xb, yb = np.array([0.0, 20.0, 40.0, 60.0]), np.array([90.0, 85.0, 72.0, 50.0])
+    xs, ys = np.array([0.0, 15.0, 30.0, 45.0, 60.0]), np.array([40.0, 44.0, 55.0, 70.0, 92.0])
+    r = interseccion_curvas_tabuladas(xb[::-1], yb[::-1], xs, ys)  # puntos desordenados
+    esperado = brentq(lambda q: np.interp(q, xb, yb) - np.interp(q, xs, ys), 0.0, 60.0, xtol=1e-13)
+    assert r["con_cruce"] and r["q"] == pytest.approx(esperado, abs=1e-8)
+    assert r["h"] == pytest.approx(np.interp(esperado, xb, yb), abs=1e-7)
+
+
+def test_curvas_tabuladas_con_extrapolacion():
+    # El cruce queda más allá del último punto de la bomba (q = 20)
+    xb, yb = [0.0, 10.0, 20.0], [50.0, 45.0, 35.0]
+    xs, ys = [0.0, 40.0], [20.0, 40.0]
+    # Bomba extrapolada: 55 - q; sistema: 20 + q/2  =>  q = 70/3
+    r = interseccion_curvas_tabuladas(xb, yb, xs, ys, q_min=0.0, q_max=40.0)
+    assert r["con_cruce"] and r["q"] == pytest.approx(70.0 / 3.0, abs=1e-8)
+    # Sin extrapolar la bomba se mantiene en 35 m  =>  q = 30
+    sin_extrapolar = interseccion_curvas_tabuladas(xb, yb, xs, ys, q_min=0.0, q_max=40.0, extrapolar=False)
+    assert sin_extrapolar["con_cruce"] and sin_extrapolar["q"] == pytest.approx(30.0, abs=1e-8)
+
+
+def test_punto_operacion_hazen_williams_coincide_con_brentq():
+    params = {
+        "h_estatica": 35.0, "otras_perdidas_succion": 0.5, "otras_perdidas_impulsion": 1.0,
+        "diam_succion_m": 0.25, "C_succion": 140, "long_succion": 10.0, "accesorios_succion": [],
+        "diam_impulsion_m": 0.2, "C_impulsion": 130, "long_impulsion": 1500.0, "accesorios_impulsion": [],
+    }
+    curva = [(0.0, 80.0), (20.0, 76.0), (40.0, 66.0), (60.0, 50.0), (80.0, 28.0)]
+    r = resolver_punto_operacion_hw(curva, params, "L/s", usar_cotas=False)
+    assert r["h0"] == pytest.approx(36.5)
+    xb, yb = np.array(curva).T
+
+    def diferencia(q):
+        return np.interp(q, xb, yb) - (r["h0"] + r["k"] * q ** 1.852)
+
+    esperado = brentq(diferencia, 0.0, 80.0, xtol=1e-13)
+    assert r["con_cruce"] and r["q"] == pytest.approx(esperado, abs=1e-8)
+
+    ajustado = resolver_punto_operacion_hw(curva, params, "L/s", usar_cotas=False, grado_ajuste=2)
+    coef = np.polyfit(xb, yb, 2)
+    esperado = brentq(lambda q: np.polyval(coef, q) - (r["h0"] + r["k"] * q ** 1.852), 0.0, 80.0, xtol=1e-13)
+    assert ajustado["q"] == pytest.approx(esperado, abs=1e-8)
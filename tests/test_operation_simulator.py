@@ -0,0 +1,81 @@
+# Pruebas de regresión del simulador de operación tanque/bombas
+
+import time
+
+import numpy as np
+
+from core.operation_simulator import TOLERANCIA_NIVEL, serie_demanda, simular_operacion
+
+FACTORES = [0.6, 0.6, 0.6, 0.6, 0.7, 0.85, 1.1, 1.4, 1.7, 2.1, 1.95, 1.8,
+            1.7, 1.6, 1.5, 1.55, 1.7, 1.9, 2.0, 1.6, 1.2, 1.0, 0.8, 0.7]
+
+
+def _referencia_escalar(demanda, dt, capacidad, v0, caudales, arranque, parada):
+    """Balance paso a paso con histéresis por bomba (bucle de referencia)"""
+    tolerancia = TOLERANCIA_NIVEL * capacidad
+    arranque, parada = np.asarray(arranque) - tolerancia, np.asarray(parada) - tolerancia
+    en_marcha = v0 < arranque
+    v = v0
+    volumen, n_bombas = [v], []
+    for d in demanda:
+        n = int(en_marcha.sum())
+        n_bombas.append(n)
+        v = min(max(v + (caudales[n] - d) * dt, 0.0), capacidad)
+        volumen.append(v)
+        en_marcha = (en_marcha & (v < parada)) | (~en_marcha & (v < arranque))
+    return np.array(volumen), np.array(n_bombas)
+
+
+def test_una_bomba_horaria_coincide_con_bucle_escalar():
+    demanda = serie_demanda(FACTORES, 0.01, n_pasos=24 * 30)
+    for caudal, capacidad, v0 in [(0.0125, 150.0, 120.0), (0.02, 100.0, 20.0), (0.009, 300.0, 100.0)]:
+        r = simular_operacion(demanda, 3600, capacidad, v0, [0.0, caudal], [capacidad], [capacidad])
+        vol, n = _referencia_escalar(demanda, 3600, capacidad, v0, [0.0, caudal], [capacidad], [capacidad])
+        np.testing.assert_allclose(r["volumen"], vol, rtol=0, atol=1e-9)
+        np.testing.assert_array_equal(r["bombas_en_marcha"], n)
+
+
+def test_bombas_escalonadas_cada_5_min_coinciden_con_bucle_escalar():
+    demanda = serie_demanda(FACTORES, 0.02, dt_s=300, n_pasos=20000)
+    args = (300, 500.0, 400.0, [0.0, 0.022, 0.036], [300.0, 200.0], [480.0, 420.0])
+    r = simular_operacion(demanda, *args)
+    vol, n = _referencia_escalar(demanda, *args)
+    # La trayectoria vectorial parte de la demanda acumulada (~1e5 m³ en 20000 pasos):
+    # el redondeo relativo de 1e-16 sobre esa suma deja diferencias de ~1e-8 m³
+    np.testing.assert_allclose(r["volumen"], vol, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(r["bombas_en_marcha"], n)
+    assert r["arranques"].sum() > 0
+
+
+def test_balance_de_masa():
+    demanda = serie_demanda(FACTORES, 0.02, dt_s=300, n_pasos=12 * 24 * 30)
+    r = simular_operacion(demanda, 300, 500.0, 400.0, [0.0, 0.022, 0.036], [300.0, 200.0], [480.0, 420.0])
+    entrada = (r["caudal_bombeo"] - demanda).sum() * 300
+    cambio = r["volumen"][-1] - r["volumen"][0]
+    assert abs(entrada + r["deficit_m3"] - r["rebose_m3"] - cambio) < 1e-6
+
+
+def test_un_anio_cada_5_min_con_histeresis():
+    demanda = serie_demanda(FACTORES, 0.02, dt_s=300, n_pasos=12 * 24 * 365)
+    t0 = time.perf_counter()
+    r = simular_operacion(demanda, 300, 500.0, 400.0, [0.0, 0.022, 0.036], [300.0, 200.0], [480.0, 420.0])
+    # ~45 ms medidos; el margen cubre máquinas de CI lentas, no un bucle por paso (~1 s)
+    assert time.perf_counter() - t0 < 0.3
+    assert len(r["volumen"]) == len(demanda) + 1
+    # Cuatro cambios de estado por día: un evento por cambio, no por paso
+    assert r["eventos"] <= 4 * 365 + 10
+
+
+def test_control_por_defecto_sin_banda_no_oscila_paso_a_paso():
+    # Arranque = parada = tanque lleno: la bomba para al llenar y arranca en el paso
+    # siguiente; esos ciclos se encadenan en bloque en lugar de un evento por paso
+    demanda = serie_demanda(FACTORES, 0.02, dt_s=300, n_pasos=12 * 24 * 365)
+    args = (300, 2000.0, 1600.0, [0.0, 0.03, 0.05], [2000.0, 2000.0], [2000.0, 2000.0])
+    t0 = time.perf_counter()
+    r = simular_operacion(demanda, *args)
+    assert time.perf_counter() - t0 < 0.3
+    assert r["eventos"] < 100
+    vol, n = _referencia_escalar(demanda, *args)
+    np.testing.assert_allclose(r["volumen"], vol, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(r["bombas_en_marcha"], n)
+    assert r["arranques"].sum() > 1000
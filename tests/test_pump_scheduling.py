@@ -0,0 +1,65 @@
+# Pruebas de regresión de la programación de bombeo contra la enumeración exhaustiva
+
+import itertools
+
+import numpy as np
+import pytest
+
+from core.pump_scheduling import programar_bombeo
+
+DEMANDA = np.array([0.04, 0.06, 0.08, 0.05, 0.03, 0.07, 0.06, 0.05])
+TARIFAS = np.array([0.10, 0.30, 0.30, 0.05, 0.05, 0.20, 0.10, 0.10])
+CAUDALES = [0.0, 0.06, 0.10]
+POTENCIAS = [0.0, 30.0, 55.0]
+CAPACIDAD, V0, DT = 500.0, 100.0, 3600
+
+
+def _rachas_validas(secuencia, min_marcha, min_parada):
+    """Tiempos mínimos de marcha/parada; la última racha puede quedar incompleta"""
+    rachas = [(k, len(list(g))) for k, g in itertools.groupby(a > 0 for a in secuencia)]
+    if not rachas[0][0]:
+        # La parada inicial viene de antes del horizonte: no tiene tiempo mínimo
+        rachas = rachas[1:]
+    return all(n >= (min_marcha if k else min_parada) for k, n in rachas[:-1])
+
+
+def _fuerza_bruta(min_marcha=1, min_parada=1):
+    mejor = np.inf
+    for secuencia in itertools.product(range(len(CAUDALES)), repeat=len(DEMANDA)):
+        if not _rachas_validas(secuencia, min_marcha, min_parada):
+            continue
+        v, costo = V0, 0.0
+        for t, a in enumerate(secuencia):
+            v += (CAUDALES[a] - DEMANDA[t]) * DT
+            if v < -1e-9 or v > CAPACIDAD + 1e-9:
+                break
+            costo += POTENCIAS[a] * TARIFAS[t]
+        else:
+            if v >= V0 - 1e-9:
+                mejor = min(mejor, costo)
+    return mejor
+
+
+def _verificar_factible(r, min_marcha, min_parada):
+    assert r["penalizacion"] == pytest.approx(0.0, abs=1e-9)
+    assert r["volumen"].min() >= -1e-9
+    assert r["volumen"].max() <= CAPACIDAD + 1e-9
+    assert r["volumen"][-1] >= V0 - 1e-9
+    assert _rachas_validas(r["opcion"], min_marcha, min_parada)
+
+
+@pytest.mark.parametrize("min_marcha, min_parada", [(1, 1), (2, 1), (2, 2), (3, 2)])
+def test_malla_alineada_coincide_con_fuerza_bruta(min_marcha, min_parada):
+    # dv = 0.5 m³ divide a todos los cambios de volumen (múltiplos de 36 m³): sin error de malla
+    r = programar_bombeo(TARIFAS, DEMANDA, DT, CAPACIDAD, V0, CAUDALES, POTENCIAS, n_niveles=1001,
+                         min_marcha_pasos=min_marcha, min_parada_pasos=min_parada)
+    _verificar_factible(r, min_marcha, min_parada)
+    assert r["costo_total"] == pytest.approx(_fuerza_bruta(min_marcha, min_parada), rel=1e-9)
+
+
+@pytest.mark.parametrize("n_niveles", [201, 401])
+def test_malla_gruesa_factible_y_cercana_al_optimo(n_niveles):
+    r = programar_bombeo(TARIFAS, DEMANDA, DT, CAPACIDAD, V0, CAUDALES, POTENCIAS, n_niveles=n_niveles)
+    _verificar_factible(r, 1, 1)
+    optimo = _fuerza_bruta()
+    assert optimo - 1e-9 <= r["costo_total"] <= 1.05 * optimo
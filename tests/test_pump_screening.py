@@ -0,0 +1,76 @@
+# Pruebas de regresión del cribado vectorizado de bombas contra el recorrido escalar del catálogo
+
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+
+from core.pump_screening import EXTRAPOLACION_MAX, PumpScreeningEngine
+from data.pump_database import filter_pumps_by_requirements, get_available_brands, load_pump_database
+
+
+@pytest.fixture(scope="module")
+def motor():
+    return PumpScreeningEngine()
+
+
+def _bombas_escalares():
+    """Recorrido anidado marca → categoría → bomba, como filter_pumps_by_requirements"""
+    for marca in get_available_brands():
+        for categoria in load_pump_database(marca)["categorias"]:
+            for bomba in categoria["bombas"]:
+                yield marca, bomba
+
+
+def _punto_operacion_escalar(bomba, h0, k):
+    """Primer cruce del ajuste H-Q con H = h0 + k·Q^1.852, bomba por bomba con brentq"""
+    curva = bomba["curvas"]["h_q"]
+    coef = np.polyfit(curva["caudales_lps"], curva["alturas_m"], 2)
+    diferencia = lambda q: np.polyval(coef, q) - (h0 + k * max(q, 0.0) ** 1.852)
+    malla = np.linspace(0.0, max(curva["caudales_lps"]) * EXTRAPOLACION_MAX, 64)
+    valores = [diferencia(q) for q in malla]
+    for a, b, fa, fb in zip(malla[:-1], malla[1:], valores[:-1], valores[1:]):
+        if fa * fb <= 0:
+            q = brentq(diferencia, a, b, xtol=1e-12)
+            return q, float(np.polyval(coef, q))
+    return None
+
+
+def test_catalogo_completo(motor):
+    assert len(motor) == sum(1 for _ in _bombas_escalares())
+
+
+@pytest.mark.parametrize("h0, k", [(20.0, 0.05), (40.0, 0.002), (60.0, 0.5)])
+def test_punto_operacion_coincide_con_bucle_escalar(motor, h0, k):
+    r = motor.screen(h0, k)
+    fila = {(b["_marca"], b["codigo"]): i for i, b in enumerate(motor.bombas)}
+    for marca, bomba in _bombas_escalares():
+        i = fila[(marca, bomba["codigo"])]
+        punto = _punto_operacion_escalar(bomba, h0, k)
+        assert r["con_cruce"][i] == (punto is not None and punto[0] > 0)
+        if r["con_cruce"][i]:
+            assert r["q"][i] == pytest.approx(punto[0], abs=1e-8)
+            assert r["h"][i] == pytest.approx(punto[1], abs=1e-6)
+
+
+def test_ranking_y_filtro_escalar_coinciden_en_el_punto_de_diseno(motor):
+    # Punto de diseño en el centro del rango óptimo de cada bomba: ambos filtros deben aceptarla
+    for i, bomba in enumerate(motor.bombas):
+        q = float(np.mean(bomba["rango_caudal_optimo_lps"]))
+        h = float(np.polyval(motor.coef_h[i], q))
+        h0 = 0.6 * h
+        ranking = motor.ranking(h0, (h - h0) / q ** 1.852, caudal_objetivo=q, margen_caudal_perc=20)
+        escalar = filter_pumps_by_requirements(load_pump_database(bomba["_marca"]), q, h, 20)
+        assert bomba["codigo"] in [b["codigo"] for b in ranking]
+        assert bomba["codigo"] in [b["codigo"] for b in escalar]
+        for b in ranking:
+            assert q / 1.2 <= b["_q_op"] <= q * 1.2
+        puntajes = [b["_score"] for b in ranking]
+        assert puntajes == sorted(puntajes)
+
+
+def test_margen_filtra_antes_de_recortar(motor):
+    q, h0, k = 20.0, 30.0, 0.5
+    completo = motor.ranking(h0, k, top=len(motor), caudal_objetivo=q, margen_caudal_perc=50)
+    assert completo
+    recortado = motor.ranking(h0, k, top=1, caudal_objetivo=q, margen_caudal_perc=50)
+    assert [b["codigo"] for b in recortado] == [completo[0]["codigo"]]
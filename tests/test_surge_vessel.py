@@ -0,0 +1,61 @@
+# Pruebas de regresión del dimensionamiento de calderines
+
+import numpy as np
+import pytest
+
+from core.moc_solver import (PRESION_ATMOSFERICA_M, PRESION_VAPOR_M, AirVessel, MOCSolver, PumpRunDown,
+                             factor_friccion_hw, inercia_thorley)
+from core.surge_vessel import dimensionar_calderin
+
+Q = 0.05
+D = 0.2
+PN = 100.0
+T_FINAL = 20.0
+PARADA = {"inercia": inercia_thorley(30, 1750), "rpm": 1750}
+TOLERANCIA = 0.05
+
+
+@pytest.fixture(scope="module")
+def red():
+    """Impulsión de 5 km a 40 m: el corte de bomba sin protección cae bajo la presión de vapor"""
+    tuberias = [dict(nombre="PSuc", nudo_inicio="RSrc", nudo_fin="JSuc", longitud=10.0, diametro=0.25,
+                     celeridad=400.0, f=factor_friccion_hw(Q, 10.0, 0.25, 150))]
+    nudos = ["JImp", "JDis1", "JDis2", "JDis"]
+    for i in range(3):
+        tuberias.append(dict(nombre=f"PDis{i + 1}", nudo_inicio=nudos[i], nudo_fin=nudos[i + 1],
+                             longitud=5000.0 / 3, diametro=D, celeridad=1000.0,
+                             f=factor_friccion_hw(Q, 5000.0, D, 150), z_inicio=40.0 * i / 3,
+                             z_fin=40.0 * (i + 1) / 3))
+    a2, a1, a0 = np.polyfit([0.0, 0.05, 0.1], [78.0, 60.0, 30.0], 2)
+    return MOCSolver(tuberias, 2.0, 40.0, (a0, a1, a2), n_tramos_max=30)
+
+
+def _viable(red, volumen, fraccion, diametro_orificio_mm):
+    """Misma verificación que dimensionar_calderin, simulada de forma independiente"""
+    calderin = AirVessel(volumen, volumen * fraccion, diametro_orificio_mm / 1000.0)
+    r = red.run(T_FINAL, Q, parada=PumpRunDown(t_corte=1.0, **PARADA), calderin=calderin)
+    env = r["envolvente"]
+    return ((env["H_max"] - env["z"]).max() <= PN
+            and (env["H_min"] - env["z"]).min() >= PRESION_VAPOR_M - PRESION_ATMOSFERICA_M
+            and r["calderin"]["V_max"] <= 0.9 * volumen)
+
+
+@pytest.mark.parametrize("volumen_inicial", [1.0, 50.0])
+def test_optimo_viable_y_minimo(red, volumen_inicial):
+    r = dimensionar_calderin(red, Q * 1000, T_FINAL, parada=PARADA, pn_m=PN, fracciones_gas=(0.5, 0.3),
+                             orificios_relativos=(0.5,), volumen_inicial=volumen_inicial,
+                             tolerancia=TOLERANCIA)
+    assert r["requiere"]
+    optimo = r["optimo"]
+    assert optimo is not None and optimo["viable"]
+    args = (optimo["fraccion_gas"], optimo["diametro_orificio_mm"])
+    assert _viable(red, optimo["volumen_total_m3"], *args)
+    # Un escalón de tolerancia por debajo ya no protege la conducción
+    assert not _viable(red, optimo["volumen_total_m3"] / (1 + TOLERANCIA), *args)
+    assert optimo["volumen_total_m3"] < 5.0
+
+
+def test_sin_calderin_si_la_red_no_lo_requiere(red):
+    r = dimensionar_calderin(red, Q * 1000, T_FINAL, parada=PARADA, presion_minima_m=-1e6)
+    assert not r["requiere"] and r["optimo"] is None
+    assert r["simulaciones"] == 1
@@ -0,0 +1,69 @@
+# Pruebas de regresión de la red MOC construida a partir del proyecto
+
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("matplotlib")
+
+from core.transient_analysis import TRAMOS_IMPULSION_MAX, construir_red_moc  # noqa: E402
+
+
+def _datos(perfil=None, estatica=62.0):
+    inputs = {'caudal_diseno_lps': 40, 'altura_succion': 2, 'altura_descarga': estatica,
+              'succion': {'material': 'PVC', 'espesor': 8, 'longitud': 10, 'diametro_interno': 200},
+              'impulsion': {'material': 'PVC', 'espesor': 8, 'longitud': 2000, 'diametro_interno': 200}}
+    if perfil is not None:
+        inputs['perfil_impulsion'] = perfil
+    return {'inputs': inputs,
+            'resultados': {'alturas': {'dinamica_total': 70.0, 'estatica_total': estatica},
+                           'bomba_seleccionada': {'curva_completa': [(0, 90), (20, 85), (40, 72), (60, 50)]}}}
+
+
+def _perfil(x, cota_final, cumbres):
+    """Rampa hasta cota_final con cumbres triangulares (abscisa, altura, semiancho)"""
+    z = cota_final * x / x[-1]
+    for xc, altura, semiancho in cumbres:
+        z = z + np.clip(altura * (1 - np.abs(x - xc) / semiancho), 0, None)
+    return np.c_[x, z].tolist()
+
+
+def test_sin_perfil_tres_tramos_rectos_hasta_la_altura_estatica():
+    red, info = construir_red_moc(_datos())
+    impulsion = red.tuberias[1:]
+    assert [t['longitud'] for t in impulsion] == pytest.approx([2000 / 3] * 3)
+    assert impulsion[-1]['z_fin'] == pytest.approx(62.0)
+    assert red.h_descarga == 62.0 and 'aviso_descarga' not in info
+
+
+def test_uniones_en_los_puntos_altos_del_perfil():
+    x = np.linspace(0, 5000, 501)
+    red, info = construir_red_moc(_datos(_perfil(x, 62.0, [(1200, 20, 300), (3500, 15, 300)])))
+    impulsion = red.tuberias[1:]
+    juntas = np.cumsum([0] + [t['longitud'] for t in impulsion])
+    np.testing.assert_allclose(juntas, [0, 1200, 3500, 5000])
+    # Cada cumbre queda en una unión (cota del vértice, no interpolada)
+    assert impulsion[0]['z_fin'] == pytest.approx(62 * 1200 / 5000 + 20)
+    assert impulsion[1]['z_fin'] == pytest.approx(62 * 3500 / 5000 + 15)
+    assert red.h_descarga == pytest.approx(62.0) and 'aviso_descarga' not in info
+
+
+def test_uniones_limitadas_a_las_cumbres_mas_prominentes():
+    x = np.linspace(0, 10000, 2001)
+    cumbres = [(500 + 400 * k, 2 + k, 100) for k in range(24)]
+    red, _ = construir_red_moc(_datos(_perfil(x, 62.0, cumbres)))
+    impulsion = red.tuberias[1:]
+    assert len(impulsion) == TRAMOS_IMPULSION_MAX
+    juntas = np.cumsum([t['longitud'] for t in impulsion])[:-1]
+    np.testing.assert_allclose(juntas, [500 + 400 * k for k in range(13, 24)])
+
+
+def test_descarga_a_la_cota_final_del_perfil():
+    x = np.linspace(0, 2000, 201)
+    red, info = construir_red_moc(_datos(_perfil(x, 40.0, [(800, 10, 200)])))
+    assert red.h_descarga == pytest.approx(40.0)
+    assert red.tuberias[-1]['z_fin'] == pytest.approx(40.0)
+    assert '62.00' in info['aviso_descarga']
+    # El régimen permanente es estable con la descarga en la cota del perfil
+    e = red.run(5, info['q_m3s'])['envolvente']
+    assert np.ptp(e['H_max'] - e['H0']) < 1e-6
@@ -313,17 +313,11 @@ def render_analysis_tab():
             x_max_comun = max(x_sis.max(), x_bom.max())
             x_end_range = x_max_comun * 2.0
             
-            def intersection_func_base(q):
-                return np.polyval(coef_bom_calc, q) - np.polyval(coef_sis_calc, q)
-            
-            initial_guesses = np.linspace(0, x_max_comun, 20)
-            for guess in initial_guesses:
-                q_int, = fsolve(intersection_func_base, guess)
-                h_int = np.polyval(coef_sis_calc, q_int)
-                if 0 <= q_int <= x_end_range and h_int >= 0:
-                    interseccion = (q_int, h_int)
-                    st.session_state['interseccion'] = interseccion
-                    break
+            from core.operating_point import resolver_interseccion_polinomios
+            sol = resolver_interseccion_polinomios(coef_bom_calc, coef_sis_calc, 0.0, x_end_range)
+            if sol['convergido'] and sol['h'] >= 0:
+                interseccion = (sol['q'], sol['h'])
+                st.session_state['interseccion'] = interseccion
         except Exception as e:
             pass
     
@@ -1228,13 +1222,12 @@ def render_analysis_tab():
         # 2. Punto de Intersección VFD
         interseccion_vfd = None
         if coef_bom_vfd is not None and coef_sis is not None:
-            def f_vfd(q): return np.polyval(coef_bom_vfd, q) - np.polyval(coef_sis, q)
             try:
-                q_start = interseccion[0] * eta if interseccion else caudal_nominal * 0.8
-                q_int, = fsolve(f_vfd, q_start)
-                h_int = np.polyval(coef_bom_vfd, q_int)
-                if q_int > 0:
-                    interseccion_vfd = (q_int, h_int)
+                from core.operating_point import resolver_interseccion_polinomios
+                q_max_vfd = 2.0 * max(caudal_nominal, interseccion[0] if interseccion else 0.0)
+                sol_vfd = resolver_interseccion_polinomios(coef_bom_vfd, coef_sis, 0.0, q_max_vfd)
+                if sol_vfd['convergido'] and sol_vfd['q'] > 0:
+                    interseccion_vfd = (sol_vfd['q'], float(np.polyval(coef_bom_vfd, sol_vfd['q'])))
             except:
                 interseccion_vfd = None
 
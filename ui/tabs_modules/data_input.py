@@ -1984,7 +1984,7 @@ def render_data_input_tab():
             # Selector de marca
             marca_bomba = st.selectbox(
                 "Marca:",
-                options=["Grundfos", "Ebara", "KSB", "Pedrollo"],
+                options=["Grundfos", "Ebara", "KSB", "Pedrollo", "Todas las marcas"],
                 index=0,
                 key="marca_bomba_comercial",
                 help="Selecciona el fabricante de bombas"
@@ -1997,11 +1997,16 @@ def render_data_input_tab():
                 url_catalogo = "https://www.pumpsebara.com/es"
             elif marca_bomba == "KSB":
                 url_catalogo = "https://www.ksb.com/es-ec"
-            else: # Pedrollo
+            elif marca_bomba == "Pedrollo":
                 url_catalogo = "https://www.pedrollo.com/es"
+            else: # Todas las marcas
+                url_catalogo = None
             
-            st.markdown(f"[📘 Ver Catálogo Online]({url_catalogo})")
-            st.caption(f"Catálogo completo de {marca_bomba}")
+            if url_catalogo:
+                st.markdown(f"[📘 Ver Catálogo Online]({url_catalogo})")
+                st.caption(f"Catálogo completo de {marca_bomba}")
+            else:
+                st.caption("Cribado de todos los catálogos por punto de operación real")
         
         with col_criterios:
             col_q, col_h, col_margen = st.columns(3)
@@ -2072,13 +2077,30 @@ def render_data_input_tab():
         
         if buscar_clicked:
             try:
-                # Cargar base de datos
-                db = load_pump_database(marca_bomba)
-                
-                # Filtrar bombas
-                bombas_compatibles = filter_pumps_by_requirements(
-                    db, caudal_diseno, altura_diseno, margen
-                )
+                if marca_bomba == "Todas las marcas":
+                    # Curva de sistema que pasa por el punto de diseño: H = H0 + k·Q^1.852
+                    from core.calculations import calcular_altura_estatica_total
+                    from core.pump_screening import get_pump_screening_engine
+                    h0 = calcular_altura_estatica_total({
+                        'altura_succion': st.session_state.get('altura_succion_input', 1.65),
+                        'altura_descarga': st.session_state.get('altura_descarga', 80.0),
+                        'bomba_inundada': st.session_state.get('bomba_inundada', False)
+                    })
+                    if not 0 <= h0 < altura_diseno:
+                        h0 = 0.6 * altura_diseno
+                    k_sistema = (altura_diseno - h0) / caudal_diseno ** 1.852
+                    # Solo las bombas cuyo punto de operación cae dentro del margen de caudal
+                    bombas_compatibles = get_pump_screening_engine().ranking(
+                        h0, k_sistema, caudal_objetivo=caudal_diseno, margen_caudal_perc=margen
+                    )
+                else:
+                    # Cargar base de datos
+                    db = load_pump_database(marca_bomba)
+                    
+                    # Filtrar bombas
+                    bombas_compatibles = filter_pumps_by_requirements(
+                        db, caudal_diseno, altura_diseno, margen
+                    )
                 
                 # Guardar en session state
                 st.session_state['bombas_compatibles'] = bombas_compatibles
@@ -2122,7 +2144,12 @@ def render_data_input_tab():
                         
                         with col_header:
                             tipo_icono = "↕️" if "Vertical" in bomba.get('tipo_bomba', '') else "↔️"
-                            st.markdown(f"**{tipo_icono} {bomba['modelo']}** - {bomba['serie']}")
+                            marca_txt = f" ({bomba['_marca']})" if '_marca' in bomba else ""
+                            st.markdown(f"**{tipo_icono} {bomba['modelo']}** - {bomba['serie']}{marca_txt}")
+                            if '_q_op' in bomba:
+                                st.caption(f"Punto de operación: Q = {bomba['_q_op']:.2f} L/s · H = {bomba['_h_op']:.1f} m · "
+                                           f"η = {bomba['_eta_op']:.1f}% · P = {bomba['_p_kw']:.2f} kW"
+                                           + (" · ⚠️ sobrecarga del motor" if bomba.get('_sobrecarga_motor') else ""))
                         
                         with col_score:
                             # Score de ajuste (menor es mejor)
@@ -2186,7 +2213,7 @@ def render_data_input_tab():
                                 key=f"usar_bomba_{idx}", 
                                 use_container_width=True,
                                 on_click=callback_seleccionar_bomba,
-                                args=(bomba, marca_actual)
+                                args=(bomba, bomba.get('_marca', marca_actual))
                             )
                         
                         with col_btn2:
@@ -8,6 +8,8 @@ import math
 from core.diameter_selection import PipeDiameterAnalyzer
 from core.hydraulics import obtener_rugosidad_absoluta, obtener_viscosidad_cinematica
 from core.calculations import interpolar_propiedad
+from core.surge_screening import cribado_golpe_ariete
+from core.wave_speed import get_wave_speed_service
 from ui.tabs_modules.common import render_footer
 from ui.tabs_modules.diameter_selection_docs import render_technical_documentation
 from utils.sync_manager import sync_pipe_data
@@ -919,8 +921,15 @@ def render_analysis_section(q_sess_lps, p_atm, temp, p_vap, nr, length_sess, h_e
         # Dashboard de Resultados (Envolvente)
         p_mpa = pt['pressure_kpa'] / 1000.0
         p_static_mpa = h_est * 0.00981
-        p_surge_pt = (350 if any(m in mat.upper() for m in ["PVC", "PEAD", "HDPE"]) else 1100) * pt['velocity'] / 9.81 * 0.00981
         pn_ref = st.session_state.get('presion_nominal_succion' if is_suc else 'presion_nominal_impulsion', 1.0)
+        # Celeridad del catálogo (clase de PN más cercana) para el diámetro evaluado
+        a_pt = get_wave_speed_service().celeridad_catalogo(mat, di_eval / 1000.0, pn_m=pn_ref * 101.97)
+        if is_suc:
+            p_surge_pt = a_pt * pt['velocity'] / 9.81 * 0.00981
+        else:
+            # Mendiluce: Allievi en conducción larga, Michaud en conducción corta
+            p_surge_pt = float(cribado_golpe_ariete(l_eval, pt['velocity'], p_mpa / 0.00981,
+                                                    celeridad=a_pt)['sobrepresion']) * 0.00981
         p_test_pt = pn_ref * 1.5
         
         st.markdown(f"""
@@ -1073,18 +1082,24 @@ def render_analysis_section(q_sess_lps, p_atm, temp, p_vap, nr, length_sess, h_e
             o_ia = get_val(df, di_ia, 'energy_cost_annual')
 
         # Criterios de Presión (Golpe de Ariete y Otros)
-        def calc_surge(v_val, material):
-            # Celeridad aproximada (m/s)
-            a = 350 if any(m in material.upper() for m in ["PVC", "PEAD", "HDPE", "POLIET"]) else 1100
-            return (a * v_val) / 9.81 * 0.00981 # MPa
-        
+        # Celeridad del catálogo para todo el barrido de diámetros (consulta vectorizada)
+        pn_ref = st.session_state.get('presion_nominal_succion' if is_suc else 'presion_nominal_impulsion', 1.0)
+        a_tendencia = get_wave_speed_service().celeridad_catalogo(mat, df['di_mm'].values / 1000.0, pn_m=pn_ref * 101.97)
+
         df['p_mpa'] = df['pressure_kpa'] / 1000.0
         df['p_static_mpa'] = h_est * 0.00981 # Aproximación rápida 1 mca = 0.00981 MPa
-        df['p_surge_delta'] = df.apply(lambda row: calc_surge(row['velocity'], mat), axis=1)
+        if is_suc:
+            df['p_surge_delta'] = a_tendencia * df['velocity'].values / 9.81 * 0.00981 # MPa
+            df['seguro_ariete'] = True
+        else:
+            # Cribado de Mendiluce de todos los diámetros a la vez (criterio: 80% de la PN)
+            ariete = cribado_golpe_ariete(l_eval, df['velocity'].values, df['p_mpa'].values / 0.00981,
+                                          celeridad=a_tendencia, presion_nominal=pn_ref * 0.8 * 101.97)
+            df['p_surge_delta'] = ariete['sobrepresion'] * 0.00981 # MPa
+            df['seguro_ariete'] = ariete['es_seguro']
         df['p_total_surge'] = df['p_mpa'] + df['p_surge_delta']
         
         # Presión de Prueba (1.5 * Operativa o 1.5 * PN)
-        pn_ref = st.session_state.get('presion_nominal_succion' if is_suc else 'presion_nominal_impulsion', 1.0)
         df['p_test'] = pn_ref * 1.5
         
         # Presión de Vapor (Solo para Succión - Límite Inferior)
@@ -1231,6 +1246,11 @@ def render_analysis_section(q_sess_lps, p_atm, temp, p_vap, nr, length_sess, h_e
             # Línea de Presión de Vapor (Cavitación) - Rojo Alerta
             fp.add_trace(go.Scatter(x=df['di_mm'], y=[p_vap_gauge_mpa]*len(df), mode='lines', name='P. Vapor (Límite)', line=dict(color='#dc3545', width=2, dash='longdash')))
 
+        # Diámetros cuya presión con golpe de ariete supera el 80% de la PN
+        riesgo = df[~df['seguro_ariete']]
+        if not riesgo.empty:
+            fp.add_trace(go.Scatter(x=riesgo['di_mm'], y=riesgo['p_mpa'], mode='markers', name='Riesgo Ariete (>80% PN)', marker=dict(size=8, color='#fd7e14', symbol='x')))
+
         # Puntos de Referencia
         fp.add_trace(go.Scatter(x=[di_eval], y=[pt['pressure_kpa'] / 1000.0], mode='markers', name='Análisis Manual', marker=dict(size=12, color='red', symbol='star', line=dict(color='black', width=1))))
         fp.add_trace(go.Scatter(x=[dn_actual], y=[p_actual / 1000.0], mode='markers', name='Diseño Actual', marker=dict(size=10, color='cyan', symbol='diamond', line=dict(color='black', width=1))))
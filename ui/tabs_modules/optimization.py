@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-from core.genetic_optimizer import GeneticOptimizer
+from core.genetic_optimizer import GeneticOptimizer, SegmentedGeneticOptimizer
 from ui.tabs_modules.common import render_footer
 
 def render_optimization_tab():
@@ -40,6 +40,12 @@ def render_optimization_tab():
         with st.expander("📏 Longitudes de Tubería", expanded=True):
             l_succion = st.number_input("Longitud Succión (m)", value=l_succion_def, step=1.0)
             l_impulsion = st.number_input("Longitud Impulsión (m)", value=l_impulsion_def, step=1.0)
+            n_tramos = st.number_input("Tramos de Impulsión", min_value=1, max_value=30, value=1, step=1,
+                                       help="Con más de un tramo se optimiza una impulsión telescópica con tuberías reales del catálogo (material, serie/clase y DN), verificando la presión nominal de cada tramo.")
+            comparar_dp = st.checkbox("Comparar con el óptimo exacto (Programación Dinámica)", value=False, disabled=n_tramos == 1,
+                                      help="Calcula el frente de Pareto exacto CAPEX vs. OPEX sobre el catálogo real y mide la brecha de la solución del AG.")
+            verificar_ariete = st.checkbox("Penalizar golpe de ariete (Mendiluce)", value=False, disabled=n_tramos == 1,
+                                           help="Suma a la presión de cada tramo la sobrepresión por parada de bomba (Allievi / Michaud) y penaliza los tramos que superan su presión nominal.")
 
         with st.expander("💰 Parámetros Económicos", expanded=False):
             costo_kwh = st.number_input("Costo Energía (USD/kWh)", value=0.09, step=0.01, help="Tarifa ARCONEL 2025 para bombeo público.")
@@ -48,8 +54,14 @@ def render_optimization_tab():
             tasa = st.number_input("Tasa de Descuento Anual (%)", value=5.0, step=0.5, help="Tasa usada para traer costos futuros al presente (Valor Presente Neto).") / 100.0
 
         with st.expander("🧬 Parámetros Genéticos (IA)", expanded=False):
-            pop = st.slider("Tamaño de Población (Individuos)", 20, 100, 40, help="Número de combinaciones aleatorias generadas en cada generación.")
-            gens = st.slider("Generaciones Máximas (Iteraciones)", 10, 200, 50, help="Número de ciclos de 'evolución' que realizará el algoritmo.")
+            pop = st.slider("Tamaño de Población (Individuos)", 20, 300, 40 if n_tramos == 1 else 150, help="Número de combinaciones aleatorias generadas en cada generación.")
+            gens = st.slider("Generaciones Máximas (Iteraciones)", 10, 600, 50 if n_tramos == 1 else 400, help="Número de ciclos de 'evolución' que realizará el algoritmo.")
+            modo_busqueda = st.radio("Modo de Búsqueda", ["Población única", "Modelo de islas (multiproceso)", "Multiobjetivo (NSGA-II)"],
+                                     help="El modelo de islas evoluciona varias subpoblaciones en procesos paralelos e intercambia sus mejores individuos periódicamente. "
+                                          "El modo multiobjetivo devuelve el frente de Pareto CAPEX / OPEX / velocidad en una sola corrida.")
+            if modo_busqueda == "Modelo de islas (multiproceso)":
+                n_islas = st.slider("Número de Islas", 2, 8, 4)
+                intervalo_migracion = st.slider("Generaciones entre Migraciones", 5, 50, 10)
 
         with st.expander("📈 Costos de Mercado (Plastigama/Rival)", expanded=False):
             st.info("Calibra el costo por metro: $Base \cdot (D_{pulg})^{Factor}$")
@@ -129,7 +141,7 @@ def render_optimization_tab():
 
             if btn_run:
                 with st.status("🧬 Evolucionando población...", expanded=True) as status:
-                    optimizer_engine = GeneticOptimizer(
+                    parametros_ga = dict(
                         caudal_lps=caudal,
                         long_succion=l_succion,
                         long_impulsion=l_impulsion,
@@ -140,15 +152,37 @@ def render_optimization_tab():
                         tasa_interes=tasa,
                         costos_personalizados=dict_costos
                     )
+                    if n_tramos > 1:
+                        optimizer_engine = SegmentedGeneticOptimizer(**parametros_ga, n_tramos=int(n_tramos),
+                                                                   verificar_ariete=verificar_ariete)
+                    else:
+                        optimizer_engine = GeneticOptimizer(**parametros_ga)
                     optimizer_engine.pop_size = pop
                     optimizer_engine.generations = gens
                     
-                    history, best_ind = optimizer_engine.optimize()
+                    frente_nsga = None
+                    if modo_busqueda == "Modelo de islas (multiproceso)":
+                        history, best_ind = optimizer_engine.optimize_islands(
+                            n_islands=n_islas, migration_interval=intervalo_migracion)
+                    elif modo_busqueda == "Multiobjetivo (NSGA-II)":
+                        history, frente_nsga = optimizer_engine.optimize_nsga2()
+                        best_ind = min(frente_nsga, key=lambda x: x["real_cost"])["genome"]
+                    else:
+                        history, best_ind = optimizer_engine.optimize()
+                    
+                    resultado_dp = None
+                    if n_tramos > 1 and comparar_dp:
+                        from core.economic_dp import EconomicDiameterDP
+                        st.write("📐 Resolviendo el óptimo exacto por programación dinámica...")
+                        resultado_dp = EconomicDiameterDP(**parametros_ga, n_tramos=int(n_tramos)).solve()
                     
                     # Guardar en session_state para persistencia
                     st.session_state.ga_results = {
                         "history": history,
                         "best_ind": best_ind,
+                        "tramos": optimizer_engine.describir_tramos(best_ind) if n_tramos > 1 else None,
+                        "dp": resultado_dp,
+                        "frente": frente_nsga,
                         "params": {
                             "caudal": caudal, "l_s": l_succion, "l_i": l_impulsion, 
                             "h_est": h_est, "años": años, "costo_kwh": costo_kwh, 
@@ -183,9 +217,68 @@ def render_optimization_tab():
                 with c1:
                     st.metric("Succión Óptima", best_data["suction"])
                 with c2:
-                    st.metric("Impulsión Óptima", best_data["discharge"])
+                    if results.get("tramos"):
+                        st.metric("Impulsión Óptima", f"{len(results['tramos'])} tubería(s)")
+                    else:
+                        st.metric("Impulsión Óptima", best_data["discharge"])
                 with c3:
                     st.metric("Costo Vida Útil", f"${best_data['real_cost']:,.2f}")
+                
+                if results.get("tramos"):
+                    df_tramos = pd.DataFrame(results["tramos"]).rename(columns={
+                        "tuberia": "Tubería", "tramos": "Tramos", "longitud_m": "Longitud (m)"})
+                    st.dataframe(df_tramos, use_container_width=True, hide_index=True)
+                    st.caption(f"Presión máxima en la impulsión: {best_data['p_max']:.1f} m "
+                               f"({best_data['p_ratio'] * 100:.0f}% de la presión nominal del tramo más exigido).")
+                    if 'p_ratio_ariete' in best_data:
+                        st.caption(f"Con golpe de ariete por parada de bomba (Mendiluce): "
+                                   f"{best_data['p_ratio_ariete'] * 100:.0f}% de la presión nominal.")
+                
+                resultado_dp = results.get("dp")
+                if resultado_dp and resultado_dp.get("optimo"):
+                    optimo_dp = resultado_dp["optimo"]
+                    brecha = (best_data["real_cost"] - optimo_dp["real_cost"]) / optimo_dp["real_cost"]
+                    d1, d2 = st.columns(2)
+                    d1.metric("Óptimo Exacto (DP)", f"${optimo_dp['real_cost']:,.2f}")
+                    d2.metric("Brecha del AG", f"{brecha * 100:.2f}%")
+                    
+                    df_frente = pd.DataFrame(resultado_dp["frente"])
+                    fig_frente = go.Figure()
+                    fig_frente.add_trace(go.Scatter(x=df_frente["capex"], y=df_frente["opex"], mode="lines+markers",
+                                                    name="Frente de Pareto (DP)", line=dict(color="#2980B9")))
+                    fig_frente.add_trace(go.Scatter(x=[best_data["capex"]], y=[best_data["opex"]], mode="markers",
+                                                    name="Solución AG", marker=dict(color="#FFD700", size=14, symbol="star")))
+                    fig_frente.update_layout(title="CAPEX vs. OPEX: frente exacto y solución del AG",
+                                             xaxis_title="CAPEX (USD)", yaxis_title="OPEX en valor presente (USD)")
+                    st.plotly_chart(fig_frente, use_container_width=True)
+                    st.caption(f"📐 {len(resultado_dp['frente'])} soluciones no dominadas, "
+                               f"{resultado_dp['evaluaciones']:,} combinaciones evaluadas en {resultado_dp['tiempo_s']:.2f} s.")
+                
+                if results.get("frente"):
+                    st.subheader("🧭 Frente de Pareto (NSGA-II)")
+                    df_pareto = pd.DataFrame(results["frente"])
+                    f1, f2 = st.columns(2)
+                    with f1:
+                        peso_opex = st.slider("Peso de la Energía (OPEX) frente a la Inversión", 0.0, 3.0, 1.0, 0.1,
+                                              help="Elige del frente la solución que minimiza CAPEX + peso × OPEX, sin volver a ejecutar el AG.")
+                    with f2:
+                        v_aceptada = st.slider("Velocidad Máxima Aceptada en Impulsión (m/s)", 0.5, 3.0,
+                                               float(min(3.0, max(0.5, df_pareto["v_d"].max()))), 0.1)
+                    candidatas = df_pareto[df_pareto["v_d"] <= v_aceptada]
+                    if candidatas.empty:
+                        st.warning("Ninguna solución del frente cumple la velocidad aceptada.")
+                    else:
+                        elegida = candidatas.loc[(candidatas["capex"] + peso_opex * candidatas["opex"]).idxmin()]
+                        fig_pareto = px.scatter(df_pareto, x="capex", y="opex", color="v_d",
+                                                hover_data=["suction", "discharge", "real_cost"],
+                                                labels={"capex": "CAPEX (USD)", "opex": "OPEX en valor presente (USD)", "v_d": "V impulsión (m/s)"},
+                                                title="Soluciones no dominadas: CAPEX / OPEX / velocidad",
+                                                color_continuous_scale="Turbo")
+                        fig_pareto.add_trace(go.Scatter(x=[elegida["capex"]], y=[elegida["opex"]], mode="markers", name="Selección",
+                                                        marker=dict(color="#FFD700", size=16, symbol="star", line=dict(color="black", width=1))))
+                        st.plotly_chart(fig_pareto, use_container_width=True)
+                        st.markdown(f"**Selección:** succión {elegida['suction']} · impulsión {elegida['discharge']} · "
+                                    f"V = {elegida['v_d']:.2f} m/s · costo total ${elegida['real_cost']:,.2f}")
                     
                 # Gráficos de Resultados
                 res_tab1, res_tab2 = st.tabs(["📊 Análisis Económico", "📈 Evolución Genética"])
@@ -215,8 +308,16 @@ def render_optimization_tab():
                     st.plotly_chart(fig_conv, use_container_width=True)
                     
                     st.info(f"💡 **Interpretación**: Esta curva muestra cómo la 'inteligencia' del algoritmo mejora el diseño en cada iteración.")
+                    
+                    if best_data.get("mode") == "exhaustive":
+                        st.caption(f"🔎 El espacio de búsqueda ({best_data['cache_misses']} combinaciones) es menor que Población × Generaciones: se evaluaron todas las combinaciones (óptimo garantizado).")
+                    elif "cache_hits" in best_data:
+                        st.caption(f"🗃️ Caché de aptitud: {best_data['cache_hits']} aciertos / {best_data['cache_misses']} evaluaciones nuevas.")
 
                 # --- ANÁLISIS DE SENSIBILIDAD ---
+                if results.get("tramos"):
+                    # La comparativa manual aplica al genoma de 4 genes (una sola tubería de impulsión)
+                    return
                 st.divider()
                 st.subheader("🔍 Comparativa Manual (Análisis de Sensibilidad)")
                 st.markdown("Verifica por qué el algoritmo descartó otros materiales o diámetros:")
@@ -2,7 +2,8 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 from core.optimization_logic import CentrifugalPumpDesigner
-from scipy.optimize import fsolve
+from core.pump_curve_model import PumpCurveModel
+from core.operating_point import resolver_interseccion_polinomios
 
 def default_hourly_factors():
     """Factores horarios por defecto (curva de demanda típica)"""
@@ -26,6 +27,20 @@ def verificar_datos_minimos():
     
     return len(missing) == 0, missing
 
+def crear_modelo_curvas():
+    """Modelo de la bomba con las curvas ajustadas del proyecto (None si no hay curvas suficientes)"""
+    if not st.session_state.get('sim_use_real_curves', True):
+        return None
+    curva_inputs = st.session_state.get('curva_inputs', {})
+    if len(curva_inputs.get('bomba', [])) < 2:
+        return None
+    ajuste_tipo = st.session_state.get('ajuste_tipo', 'Cuadrática (2do grado)')
+    grado = 1 if ajuste_tipo == "Lineal" else 2 if ajuste_tipo == "Cuadrática (2do grado)" else 3
+    try:
+        return PumpCurveModel.desde_curva_inputs(curva_inputs, st.session_state.get('flow_unit', 'L/s'), grado)
+    except ValueError:
+        return None
+
 def crear_simulador():
     """Crea instancia del simulador con datos de session_state y sidebar"""
     q_design_lps = st.session_state.get('caudal_lps', 10.0)
@@ -62,6 +77,25 @@ def crear_simulador():
     
     tank_round_m3 = st.session_state.get('sim_tank_round_m3', 50.0)
     
+    time_step_s = st.session_state.get('sim_time_step_min', 60) * 60.0
+    
+    # Serie de demanda importada (factores de Q diseño) o None para repetir los 24 factores horarios
+    demand_series = st.session_state.get('sim_demand_series')
+    demand_step_s = st.session_state.get('sim_demand_step_min', 60) * 60.0
+    
+    # Niveles de arranque/parada por bomba (%); None = todas las bombas operan juntas hasta llenar
+    pump_start_levels = st.session_state.get('sim_pump_start_levels')
+    pump_stop_levels = st.session_state.get('sim_pump_stop_levels')
+    if pump_start_levels is not None and len(pump_start_levels) != n_parallel:
+        pump_start_levels = pump_stop_levels = None
+    
+    # Curvas H-Q, η-Q y P-Q del proyecto; sin ellas se usa la curva parabólica estimada
+    pump_curve = crear_modelo_curvas()
+    
+    # Altura estática variable: profundidad útil del tanque y nivel horario de la fuente (m)
+    tank_depth_m = st.session_state.get('sim_tank_depth_m')
+    source_level_m = st.session_state.get('sim_source_levels')
+    
     try:
         simulator = CentrifugalPumpDesigner(
             q_design=q_design_m3s,
@@ -78,13 +112,148 @@ def crear_simulador():
             initial_tank_level_perc=initial_tank_level_perc,
             simulation_days=simulation_days,
             tank_capacity_m3=tank_capacity_m3,
-            tank_round_m3=tank_round_m3
+            tank_round_m3=tank_round_m3,
+            time_step_s=time_step_s,
+            demand_series=demand_series,
+            demand_step_s=demand_step_s,
+            pump_start_levels_perc=None if pump_start_levels is None else np.array(pump_start_levels) / 100.0,
+            pump_stop_levels_perc=None if pump_stop_levels is None else np.array(pump_stop_levels) / 100.0,
+            pump_curve=pump_curve,
+            tank_depth_m=tank_depth_m,
+            source_level_m=None if source_level_m is None else np.array(source_level_m)
         )
         return simulator
     except Exception as e:
         st.error(f"Error al crear simulador: {str(e)}")
         return None
 
+def default_hourly_tariffs():
+    """Tarifas horarias por defecto (USD/kWh): valle nocturno, llano y punta de 18 a 23 h"""
+    return [0.06] * 7 + [0.12] * 11 + [0.25] * 5 + [0.06]
+
+def render_programacion_tarifa(simulator):
+    """Programa de bombeo de mínimo costo con tarifa horaria frente al control por niveles"""
+    st.markdown("#### 🕒 Programación con Tarifa Horaria")
+    st.caption("Programación dinámica sobre el volumen del tanque: decide en cada paso cuántas bombas "
+               "operan y a qué velocidad, respetando la reserva mínima, la capacidad y los tiempos "
+               "mínimos de marcha/parada; el tanque termina al menos con el volumen final del control "
+               "por niveles, de modo que ambos costos corresponden al mismo volumen bombeado.")
+
+    col_p1, col_p2 = st.columns([2, 2])
+    with col_p1:
+        tarifas_text = st.text_area(
+            "Tarifas (24 valores USD/kWh separados por coma)",
+            value=",".join(str(t) for t in default_hourly_tariffs()),
+            height=100,
+            key="sim_tariff_text"
+        )
+        velocidades_text = st.text_input(
+            "Velocidades disponibles (% nominal)",
+            value="100",
+            key="sim_schedule_speeds",
+            help="Sin VFD: 100. Con VFD, p. ej. 100, 90, 80"
+        )
+    with col_p2:
+        c1, c2 = st.columns(2)
+        with c1:
+            horizonte = st.selectbox("Horizonte (días)", options=[1, 2, 3, 7], index=3, key="sim_schedule_days")
+            min_marcha = st.number_input("Marcha mínima (h)", min_value=0.25, max_value=24.0, value=1.0,
+                                         step=0.25, key="sim_schedule_min_run")
+        with c2:
+            paso_min = st.selectbox("Paso (min)", options=[60, 30, 15], index=2, key="sim_schedule_step_min")
+            min_parada = st.number_input("Parada mínima (h)", min_value=0.25, max_value=24.0, value=1.0,
+                                         step=0.25, key="sim_schedule_min_stop")
+
+    try:
+        tarifas = [float(x.strip()) for x in tarifas_text.split(',')]
+        velocidades = [float(x.strip()) / 100.0 for x in velocidades_text.split(',') if x.strip()]
+        if len(tarifas) != 24:
+            st.error(f"⚠️ Se requieren 24 tarifas. Ingresadas: {len(tarifas)}")
+            return
+        if not velocidades or any(not 0 < v <= 1.2 for v in velocidades):
+            st.error("⚠️ Las velocidades deben estar entre 1 y 120 %")
+            return
+    except ValueError:
+        st.error("⚠️ Formato inválido. Use números separados por coma.")
+        return
+
+    if st.button("⚙️ Optimizar Programa de Bombeo", key="sim_schedule_run"):
+        with st.spinner("Optimizando programa de bombeo..."):
+            st.session_state.sim_schedule_result = simulator.optimal_schedule(
+                tarifas, speed_ratios=velocidades, min_run_h=min_marcha, min_stop_h=min_parada,
+                horizon_days=horizonte, time_step_s=paso_min * 60.0)
+
+    programa = st.session_state.get('sim_schedule_result')
+    if programa is None:
+        return
+
+    ahorro = programa['level_control_cost'] - programa['costo_total']
+    col_r1, col_r2, col_r3, col_r4 = st.columns(4)
+    with col_r1:
+        st.metric("Costo Programa Óptimo", f"${programa['costo_total']:.2f}")
+    with col_r2:
+        st.metric("Costo Control por Niveles", f"${programa['level_control_cost']:.2f}")
+    with col_r3:
+        pct = ahorro / programa['level_control_cost'] * 100 if programa['level_control_cost'] > 0 else 0.0
+        st.metric("Ahorro", f"${ahorro:.2f}", f"{pct:.1f}%")
+    with col_r4:
+        st.metric("Arranques", f"{programa['arranques']}")
+        st.caption(f"Resuelto en {programa['tiempo_s']:.2f} s")
+    st.caption(f"Volumen final: programa {programa['volumen'][-1]:.0f} m³ · control por niveles "
+               f"{programa['level_control_volume'][-1]:.0f} m³")
+    if programa['penalizacion'] > 1e-6:
+        st.warning(f"⚠️ El programa no respeta los límites del tanque en {programa['penalizacion']:.0f} m³: "
+                   "la capacidad de bombeo no alcanza para la demanda con estas restricciones.")
+
+    fig_programa = simulator.plot_schedule(programa)
+    st.plotly_chart(fig_programa, use_container_width=True, key="sim_schedule_plot")
+
+def render_dimensionamiento_monte_carlo(simulator):
+    """Capacidad del tanque por confiabilidad con demanda estocástica (Monte Carlo)"""
+    with st.expander("🎲 Dimensionamiento con Incertidumbre de Demanda (Monte Carlo)", expanded=False):
+        st.caption("Trazas de demanda con variación diaria, días pico y ruido horario sobre la curva de "
+                   "demanda; la capacidad con confiabilidad P cubre el P% de las trazas (pico secuente).")
+        col_mc1, col_mc2, col_mc3 = st.columns(3)
+        with col_mc1:
+            n_trazas = st.number_input("Número de trazas", min_value=100, max_value=50000, value=10000,
+                                       step=1000, key="sim_mc_traces")
+            dias = st.number_input("Días por traza", min_value=1, max_value=365, value=30, step=1,
+                                   key="sim_mc_days")
+        with col_mc2:
+            cv_diario = st.number_input("CV diario (%)", min_value=0.0, max_value=100.0, value=10.0,
+                                        step=1.0, key="sim_mc_daily_cv") / 100.0
+            cv_horario = st.number_input("CV horario (%)", min_value=0.0, max_value=100.0, value=5.0,
+                                         step=1.0, key="sim_mc_hourly_cv") / 100.0
+        with col_mc3:
+            mult_pico = st.number_input("Multiplicador día pico", min_value=1.0, max_value=3.0, value=1.3,
+                                        step=0.05, key="sim_mc_peak_mult")
+            prob_pico = st.number_input("Probabilidad día pico (%)", min_value=0.0, max_value=100.0, value=5.0,
+                                        step=1.0, key="sim_mc_peak_prob") / 100.0
+
+        if st.button("🎲 Ejecutar Monte Carlo", key="sim_mc_run"):
+            with st.spinner("Simulando trazas de demanda..."):
+                st.session_state.sim_mc_result = simulator.size_reservoir_monte_carlo(
+                    n_traces=n_trazas, days=dias, daily_cv=cv_diario, hourly_cv=cv_horario,
+                    peak_day_multiplier=mult_pico, peak_day_probability=prob_pico)
+
+        resultado = st.session_state.get('sim_mc_result')
+        if resultado is None:
+            return
+
+        columnas = st.columns(len(resultado['capacidades']) + 1)
+        with columnas[0]:
+            st.metric("Determinístico (pico secuente)", f"{resultado['deterministico']:.0f} m³",
+                      help="Curva de demanda base evaluada con el mismo criterio que las trazas")
+        for col, (confiabilidad, capacidad) in zip(columnas[1:], resultado['capacidades'].items()):
+            with col:
+                st.metric(f"Confiabilidad {confiabilidad * 100:.0f}%", f"{capacidad:.0f} m³")
+        st.caption(f"ℹ️ Todas las capacidades usan el pico secuente (mayor descenso de la curva de masas "
+                   f"con el tanque que rebosa al llenarse), igual que el dimensionamiento automático de arriba "
+                   f"({simulator.tank_capacity_m3:.0f} m³ si no se fijó una capacidad), que además se redondea "
+                   f"al múltiplo configurado.")
+        st.plotly_chart(simulator.plot_storage_distribution(resultado), use_container_width=True,
+                        key="sim_mc_histogram")
+
 def render_theory_column_curvas():
     """Renderiza teoría para tab Curvas y Operación"""
     with st.expander("📐 Fundamentos Teóricos", expanded=False):
@@ -337,11 +506,19 @@ def render_simulation_tab():
     simulation_days = st.sidebar.number_input(
         "Días de Simulación",
         min_value=1,
-        max_value=30,
+        max_value=365,
         value=1,
         step=1,
         key="sim_days",
-        help="Número de días consecutivos a simular"
+        help="Número de días consecutivos a simular (hasta un año)"
+    )
+    
+    st.sidebar.selectbox(
+        "Paso de Simulación (min)",
+        options=[60, 30, 15, 5],
+        index=0,
+        key="sim_time_step_min",
+        help="Paso de tiempo del balance del tanque; los factores horarios se mantienen constantes dentro de cada hora"
     )
     
     col_tank1, col_tank2 = st.sidebar.columns(2)
@@ -433,6 +610,83 @@ def render_simulation_tab():
                 hourly_factors_list = default_hourly_factors()
                 st.session_state.sim_hourly_factors = hourly_factors_list
     
+    with st.sidebar.expander("📈 Serie de Demanda (CSV)", expanded=False):
+        st.caption("Una columna con factores de Q diseño (p. ej. 8760 valores horarios); se repite si el horizonte es más largo")
+        archivo_demanda = st.file_uploader("Serie de demanda", type=["csv", "txt"], key="sim_demand_csv")
+        st.number_input("Intervalo de la serie (min)", min_value=1, max_value=1440, value=60, step=5,
+                        key="sim_demand_step_min")
+        if archivo_demanda is not None:
+            try:
+                texto = archivo_demanda.getvalue().decode("utf-8-sig")
+                valores = []
+                for linea in texto.splitlines():
+                    campo = linea.replace(";", ",").split(",")[-1].strip()
+                    try:
+                        valores.append(float(campo))
+                    except ValueError:
+                        continue  # encabezados o líneas vacías
+                if not valores:
+                    raise ValueError("sin valores numéricos")
+                st.session_state.sim_demand_series = valores
+                st.caption(f"✅ {len(valores)} valores cargados")
+            except Exception as e:
+                st.error(f"⚠️ No se pudo leer la serie: {e}")
+                st.session_state.sim_demand_series = None
+        else:
+            st.session_state.sim_demand_series = None
+    
+    n_bombas_sim = int(st.session_state.get('num_bombas', 1))
+    with st.sidebar.expander("🔁 Control por Niveles", expanded=False):
+        escalonado = st.checkbox("Arranque/parada por niveles (histéresis)", value=False, key="sim_use_levels",
+                                 help="Sin activar, todas las bombas operan juntas mientras el tanque no está lleno")
+        if escalonado:
+            arranques, paradas = [], []
+            for i in range(n_bombas_sim):
+                c1, c2 = st.columns(2)
+                with c1:
+                    arranques.append(st.number_input(f"B{i + 1} arranca (%)", min_value=0, max_value=100,
+                                                     value=max(60 - 15 * i, 5), step=5, key=f"sim_start_level_{i}"))
+                with c2:
+                    paradas.append(st.number_input(f"B{i + 1} para (%)", min_value=0, max_value=100,
+                                                   value=max(95 - 10 * i, 10), step=5, key=f"sim_stop_level_{i}"))
+            if any(a > p for a, p in zip(arranques, paradas)):
+                st.error("⚠️ El nivel de arranque debe ser menor que el de parada")
+                st.session_state.sim_pump_start_levels = st.session_state.sim_pump_stop_levels = None
+            else:
+                st.session_state.sim_pump_start_levels = arranques
+                st.session_state.sim_pump_stop_levels = paradas
+        else:
+            st.session_state.sim_pump_start_levels = st.session_state.sim_pump_stop_levels = None
+    
+    with st.sidebar.expander("🌊 Altura Estática Variable", expanded=False):
+        variable = st.checkbox("Altura según niveles del tanque y de la fuente", value=False,
+                               key="sim_use_variable_head",
+                               help="La altura estática ingresada corresponde al tanque vacío y la fuente en su "
+                                    "nivel medio; el punto de operación de cada paso se interpola en una tabla")
+        if variable:
+            st.session_state.sim_tank_depth_m = st.number_input(
+                "Profundidad útil del tanque (m)", min_value=0.0, max_value=30.0, value=4.0, step=0.5,
+                key="sim_tank_depth_input")
+            amplitud = st.number_input(
+                "Variación diaria del nivel de la fuente (± m)", min_value=0.0, max_value=20.0, value=0.0,
+                step=0.5, key="sim_source_amplitude",
+                help="Ciclo diario sinusoidal del nivel de la fuente (bombeo desde pozo o cisterna)")
+            hora_min = st.number_input("Hora del nivel mínimo de la fuente", min_value=0, max_value=23,
+                                       value=18, step=1, key="sim_source_min_hour")
+            horas = np.arange(24)
+            st.session_state.sim_source_levels = (
+                (-amplitud * np.cos(2 * np.pi * (horas - hora_min) / 24)).tolist() if amplitud > 0 else None)
+        else:
+            st.session_state.sim_tank_depth_m = st.session_state.sim_source_levels = None
+    
+    st.sidebar.checkbox(
+        "Usar curvas reales de la bomba",
+        value=True,
+        key="sim_use_real_curves",
+        help="Usa las curvas H-Q, η-Q y P-Q ajustadas del proyecto (o de la bomba de catálogo cargada); "
+             "sin curvas se estima una parábola con H0 = 1.33·H diseño"
+    )
+    
     st.sidebar.markdown("---")
     
     simulator = crear_simulador()
@@ -440,6 +694,9 @@ def render_simulation_tab():
     if simulator is None:
         st.error("⚠️ Error al crear el simulador. Verifique los datos de entrada.")
         return
+    if simulator.pump_curve is None:
+        st.caption("ℹ️ Simulación con curva de bomba estimada (parábola); cargue las curvas en "
+                   "'Análisis de Curvas' para usar las reales.")
     
     # Leer valores de operación de Análisis de Curvas
     q_op_100_lps = st.session_state.get('caudal_operacion', 0)
@@ -514,13 +771,14 @@ def render_simulation_tab():
             # Esto replica EXACTAMENTE analysis.py líneas 351-366
             
             # Calcular intersección para 100%
-            def intersection_func_100(q):
-                return np.polyval(coef_bom, q) - np.polyval(coef_sis, q)
+            q_max_busqueda = 2.0 * max(x_sis.max(), x_bom.max())
             
             try:
-                from scipy.optimize import fsolve
-                q_op_100_calc = fsolve(intersection_func_100, 10.0)[0]  # Usar guess genérico
-                h_op_100_calc = np.polyval(coef_sis, q_op_100_calc)
+                sol_100 = resolver_interseccion_polinomios(coef_bom, coef_sis, 0.0, q_max_busqueda)
+                if not sol_100['convergido']:
+                    raise ValueError("Sin intersección bomba-sistema en el rango de caudales")
+                q_op_100_calc = sol_100['q']
+                h_op_100_calc = sol_100['h']
                 
                 # Interpolar rendimiento DIRECTAMENTE (igual que analysis.py línea 359)
                 eff_op_100_calc = 0
@@ -554,13 +812,13 @@ def render_simulation_tab():
             y_bom_vfd = y_bom * speed_ratio**2
             coef_bom_vfd = np.polyfit(x_bom_vfd, y_bom_vfd, grado)
             
-            def intersection_func_vfd(q):
-                return np.polyval(coef_bom_vfd, q) - np.polyval(coef_sis, q)
-            
             try:
                 # Calcular intersección para VFD
-                q_op_vfd_lps = fsolve(intersection_func_vfd, q_op_100_lps * speed_ratio)[0]
-                h_op_vfd = np.polyval(coef_sis, q_op_vfd_lps)
+                sol_vfd = resolver_interseccion_polinomios(coef_bom_vfd, coef_sis, 0.0, q_max_busqueda)
+                if not sol_vfd['convergido']:
+                    raise ValueError("Sin intersección bomba-sistema a velocidad reducida")
+                q_op_vfd_lps = sol_vfd['q']
+                h_op_vfd = sol_vfd['h']
                 
                 # CRÍTICO: Interpolar DIRECTAMENTE en puntos originales (NO en curvas VFD)
                 # Exactamente como lo hace analysis.py línea 359
@@ -815,6 +1073,10 @@ def render_simulation_tab():
         with col_cost3:
             monthly_cost = total_cost * 30 / simulation_days
             st.metric("Proyección Mensual", f"${monthly_cost:.2f}")
+
+        st.markdown("---")
+
+        render_programacion_tarifa(simulator)
     
     # Tab 3: Simulación de Tanque
     with tab3:
@@ -851,10 +1113,24 @@ def render_simulation_tab():
             st.metric("Reserva Mínima", f"{reserve:.0f} m³")
         
         with col_tank4:
-            pump_on_hours = np.sum(simulator.pump_on_hourly)
-            duty_cycle = (pump_on_hours / len(simulator.pump_on_hourly)) * 100
+            step_hours = simulator.time_step_s / 3600.0
+            pump_on_hours = np.sum(simulator.pump_on_hourly) * step_hours
+            total_hours = len(simulator.pump_on_hourly) * step_hours
+            duty_cycle = (pump_on_hours / total_hours) * 100
             st.metric("Ciclo de Bombeo", f"{duty_cycle:.1f}%")
-            st.caption(f"{pump_on_hours:.0f}/{len(simulator.pump_on_hourly)} horas")
+            st.caption(f"{pump_on_hours:.0f}/{total_hours:.0f} horas · "
+                       f"{int(simulator.operation['arranques'].sum())} arranques")
+            if simulator.operation['deficit_m3'] > 0:
+                st.caption(f"⚠️ Demanda no servida: {simulator.operation['deficit_m3']:.0f} m³")
+        
+        if simulator.variable_head:
+            altura = simulator.operation['altura_estatica']
+            en_marcha = simulator.operation['bombas_en_marcha'] > 0
+            q_marcha = simulator.operation['caudal_bombeo'][en_marcha].mean() * 1000 if en_marcha.any() else 0.0
+            st.caption(f"🌊 Altura estática variable: {altura.min():.1f} – {altura.max():.1f} m "
+                       f"(media {altura.mean():.1f} m); caudal bombeado medio en marcha {q_marcha:.1f} L/s")
+
+        render_dimensionamiento_monte_carlo(simulator)
     
     # Tab 4: Resumen Ejecutivo
     with tab4:
@@ -131,6 +131,13 @@ def render_hazen_williams_editor():
     else:
         st.warning("No hay datos disponibles")
 
+def _guardar_accesorios(data: Dict[str, Any]):
+    """Guarda la tabla de accesorios e invalida el catálogo indexado en memoria"""
+    from core.accessory_catalog import recargar_catalogo_accesorios
+    with open("data_tablas/accesorios_data.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    recargar_catalogo_accesorios(data)
+
 def render_accessories_editor():
     """Editor para tabla de accesorios"""
     st.subheader("Accesorios de Tubería")
@@ -173,8 +180,7 @@ def render_accessories_editor():
                 if st.button("💾 Guardar Válvulas", key="save_valvulas"):
                     try:
                         data["valvulas"] = edited_df.to_dict("records")
-                        with open("data_tablas/accesorios_data.json", "w", encoding="utf-8") as f:
-                            json.dump(data, f, indent=2, ensure_ascii=False)
+                        _guardar_accesorios(data)
                         st.success("✅ Válvulas guardadas")
                         st.rerun()
                     except Exception as e:
@@ -213,8 +219,7 @@ def render_accessories_editor():
                 if st.button("💾 Guardar Accesorios", key="save_accesorios"):
                     try:
                         data["accesorios"] = edited_df.to_dict("records")
-                        with open("data_tablas/accesorios_data.json", "w", encoding="utf-8") as f:
-                            json.dump(data, f, indent=2, ensure_ascii=False)
+                        _guardar_accesorios(data)
                         st.success("✅ Accesorios guardados")
                         st.rerun()
                     except Exception as e:
@@ -251,8 +256,7 @@ def render_accessories_editor():
                 if st.button("💾 Guardar Medidores", key="save_medidores"):
                     try:
                         data["medidores"] = edited_df.to_dict("records")
-                        with open("data_tablas/accesorios_data.json", "w", encoding="utf-8") as f:
-                            json.dump(data, f, indent=2, ensure_ascii=False)
+                        _guardar_accesorios(data)
                         st.success("✅ Medidores guardados")
                         st.rerun()
                     except Exception as e:
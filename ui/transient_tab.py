@@ -2,6 +2,7 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 from typing import Dict, Any
 from core.transient_analysis import (
@@ -9,9 +10,9 @@ from core.transient_analysis import (
     simular_transiente, 
     generar_recomendaciones,
     guardar_resultados_transientes,
-    load_wave_speeds_data,
-    buscar_material_en_celeridad
+    load_wave_speeds_data
 )
+from core.wave_speed import buscar_material_en_celeridad
 
 def render_transient_tab():
     """Renderiza la pestaña de Simulación de Transientes"""
@@ -38,6 +39,10 @@ def render_transient_tab():
             'altura_succion': st.session_state.get('altura_succion_input', 0.0),
             'altura_descarga': st.session_state.get('altura_descarga', 0.0),
             'densidad_liquido': st.session_state.get('densidad_liquido', 1.0),
+            'rpm': st.session_state.get('rpm', 3500),
+            'potencia_motor_kw': st.session_state.get('potencia_motor_kw', 0.0),
+            'eficiencia_operacion': st.session_state.get('eficiencia_operacion', 75.0),
+            'inercia_bomba': st.session_state.get('inercia_bomba_transientes', 0.0),
             # Estructura anidada para succión (requerida por generar_inp_transientes)
             'succion': {
                 'longitud': st.session_state.get('long_succion', 0.0),  # ✅ Corregido
@@ -51,7 +56,9 @@ def render_transient_tab():
                 'diametro_interno': st.session_state.get('diam_impulsion_mm', 0.0),  # ✅ Corregido
                 'material': st.session_state.get('mat_impulsion', 'PVC'),  # ✅ Corregido
                 'espesor': st.session_state.get('espesor_impulsion', 8.0)
-            }
+            },
+            # Perfil longitudinal [(abscisa, cota), ...] importado en esta pestaña (opcional)
+            'perfil_impulsion': st.session_state.get('perfil_impulsion')
         },
         'resultados': {
             'alturas': {
@@ -68,7 +75,8 @@ def render_transient_tab():
                 'disponible': st.session_state.get('npshd_mca', 0.0)
             },
             'bomba_seleccionada': {
-                'curva_completa': st.session_state.get('curva_bomba_completa', [])
+                'curva_completa': st.session_state.get('curva_bomba_completa') or st.session_state.get('curva_inputs', {}).get('bomba', []),
+                'curva_rendimiento': st.session_state.get('curva_inputs', {}).get('rendimiento', [])
             }
         }
     }
@@ -221,6 +229,25 @@ def render_transient_tab():
             
             # Guardar en session_state
             st.session_state['tiempo_simulacion_transientes'] = tiempo_simulacion_editado
+
+            decimacion_editada = st.number_input(
+                "Decimación de la serie de salida (0 = automática)",
+                value=int(st.session_state.get('decimacion_salida_transientes', 0)),
+                min_value=0,
+                max_value=1000,
+                step=1,
+                key="transient_decimacion_salida",
+                help="Se guarda 1 de cada N pasos de tiempo en la serie del nudo de análisis. Las envolventes y los extremos se calculan con todos los pasos."
+            )
+            st.session_state['decimacion_salida_transientes'] = decimacion_editada
+
+            cavitacion_editada = st.checkbox(
+                "Modelar separación de columna (cavitación, DVCM)",
+                value=st.session_state.get('cavitacion_transientes', True),
+                key="transient_cavitacion",
+                help="Solver MOC nativo: forma cavidades de vapor donde la presión cae a la de vapor y calcula la sobrepresión de su colapso."
+            )
+            st.session_state['cavitacion_transientes'] = cavitacion_editada
             
             # Selección de velocidad de onda
             st.markdown("**🌊 Configuración de Velocidad de Onda:**")
@@ -485,6 +512,22 @@ def render_transient_tab():
             - 🌊 **Ondas de depresión** que se propagan por el sistema
             - ⚠️ **Riesgo**: Implosión si presión muy baja
             """)
+
+            # Inercia del grupo motobomba para la parada por inercia
+            from core.transient_analysis import parametros_inercia_bomba
+            datos_proyecto['inputs']['inercia_bomba'] = 0.0
+            inercia_estimada = parametros_inercia_bomba(datos_proyecto)['inercia']
+            inercia_bomba = st.number_input(
+                "Inercia del grupo motobomba J (kg·m²)",
+                value=float(st.session_state.get('inercia_bomba_transientes') or round(inercia_estimada, 3)),
+                min_value=0.001,
+                step=0.01,
+                format="%.3f",
+                key="inercia_bomba_transientes",
+                help=f"Estimación de Thorley para este grupo: {inercia_estimada:.3f} kg·m². La velocidad decae según I·dω/dt = -T."
+            )
+            datos_proyecto['inputs']['inercia_bomba'] = inercia_bomba
+            st.caption(f"⏱️ Tiempo de parada por inercia ≈ {parametros_inercia_bomba(datos_proyecto)['t_parada']:.2f} s")
         
         # Opciones de ejecución
         st.markdown("#### ▶️ Opciones de Ejecución")
@@ -516,24 +559,7 @@ def render_transient_tab():
             # Verificar disponibilidad de TSNet
             from core.transient_analysis import TSNET_AVAILABLE
             if not TSNET_AVAILABLE:
-                st.error("❌ TSNet no está instalado")
-                st.markdown("""
-                **Para usar la simulación de transientes:**
-                
-                1. Instale TSNet ejecutando en terminal:
-                   ```bash
-                   pip install tsnet
-                   ```
-                
-                2. Reinicie la aplicación:
-                   ```bash
-                   streamlit run main.py
-                   ```
-                
-                3. Ejecute nuevamente la simulación
-                """)
-                st.session_state.ejecutar_simulacion_transiente = False
-                return
+                st.info("ℹ️ TSNet no está instalado: se usa el solver MOC nativo (parada por inercia y cierre de válvula).")
             
             with st.spinner("🔄 Ejecutando simulación transiente..."):
                 try:
@@ -567,6 +593,8 @@ def render_transient_tab():
                         
                         # Actualizar tiempo de simulación
                         datos_proyecto_modificado['inputs']['tiempo_simulacion_transientes'] = tiempo_simulacion_editado
+                        datos_proyecto_modificado['inputs']['decimacion_salida'] = decimacion_editada
+                        datos_proyecto_modificado['inputs']['cavitacion'] = cavitacion_editada
                         
                         # Agregar velocidades de onda seleccionadas por el usuario
                         datos_proyecto_modificado['inputs']['wave_speed_succion'] = wave_speed_succion
@@ -803,8 +831,21 @@ def render_transient_tab():
                 st.write(f"**Velocidad de onda impulsión**: {wave_speed_impulsion:.0f} m/s")
                 st.write(f"**Timestep utilizado**: {dt_usado:.4f} s")
                 
+                malla = resultados.get('malla')
+                if malla:
+                    # Malla de Courant: tramos por tubería y ajuste de celeridad (a' = L / (N·dt))
+                    df_malla = pd.DataFrame(malla)
+                    st.dataframe(df_malla.round(3), use_container_width=True, hide_index=True)
+                    cortas = df_malla.loc[df_malla['corta'], 'tuberia'].tolist()
+                    ajuste_max = df_malla.loc[~df_malla['corta'], 'ajuste_pct'].max()
+                    if cortas:
+                        st.info(f"ℹ️ Tuberías cortas con celeridad reducida para no imponer un dt diminuto: {', '.join(cortas)}")
+                    if ajuste_max > 2.0:
+                        st.warning(f"⚠️ Ajuste de celeridad de hasta {ajuste_max:.1f}% - Verificar la malla de cálculo")
+                    else:
+                        st.success("✅ Courant = 1 en todas las tuberías con ajuste de celeridad ≤ 2%")
                 # Verificación de estabilidad numérica
-                if dt_usado > 0.01:
+                elif dt_usado > 0.01:
                     st.warning("⚠️ Timestep elevado - Verificar estabilidad numérica")
                 else:
                     st.success("✅ Timestep adecuado para estabilidad")
@@ -892,6 +933,10 @@ def render_transient_tab():
         
         st.markdown('</div>', unsafe_allow_html=True)
     
+    render_perfil_longitudinal(datos_proyecto)
+    render_barrido_transientes(datos_proyecto, evento)
+    render_dimensionamiento_calderin(datos_proyecto)
+
     # Footer informativo
     st.markdown("""---""")
     st.markdown("""
@@ -899,3 +944,207 @@ def render_transient_tab():
     💡 <strong>Consejo:</strong> Para análisis precisos, verifique siempre los datos de entrada y considere múltiples escenarios de transientes
     </div>
     """, unsafe_allow_html=True)
+
+
+
+def _lista_numeros(texto: str):
+    """'1, 2.5, 5' -> [1.0, 2.5, 5.0]; vacío -> [None] (valor de la red)"""
+    valores = [float(x) for x in texto.replace(';', ',').split(',') if x.strip()]
+    return valores or [None]
+
+
+def render_perfil_longitudinal(datos_proyecto: Dict[str, Any]):
+    """Perfil longitudinal de la impulsión: importación CSV, piezométrica permanente y envolvente"""
+    with st.expander("📈 Perfil Longitudinal de la Impulsión", expanded=bool(st.session_state.get('perfil_impulsion'))):
+        import plotly.graph_objects as go
+        from core.pipeline_profile import leer_perfil_csv
+        from core.transient_analysis import construir_red_moc
+
+        st.caption("CSV con columnas abscisa (o progresiva/km) y cota. El perfil se simplifica conservando "
+                   "los puntos altos y se discretiza en los nudos del MOC y del archivo .inp; su longitud "
+                   "reemplaza a la de la impulsión.")
+        col_a, col_b = st.columns([3, 1])
+        with col_a:
+            archivo = st.file_uploader("Perfil (CSV)", type=["csv", "txt"], key="perfil_impulsion_csv")
+        with col_b:
+            tolerancia = st.number_input("Tolerancia de simplificación (m)", value=0.5, min_value=0.05,
+                                         step=0.1, key="perfil_tolerancia")
+            if st.button("🗑️ Quitar perfil", key="perfil_quitar"):
+                st.session_state['perfil_impulsion'] = None
+                st.session_state['perfil_impulsion_archivo'] = None
+                st.rerun()
+
+        if archivo is not None and st.session_state.get('perfil_impulsion_archivo') != (archivo.name, archivo.size):
+            try:
+                x, z = leer_perfil_csv(archivo.getvalue())
+                st.session_state['perfil_impulsion'] = np.column_stack([x, z]).tolist()
+                st.session_state['perfil_impulsion_archivo'] = (archivo.name, archivo.size)
+                # Los datos del proyecto de esta ejecución se armaron sin el perfil nuevo
+                st.rerun()
+            except ValueError as e:
+                st.error(f"Error leyendo el perfil: {e}")
+
+        if not st.session_state.get('perfil_impulsion'):
+            st.info("ℹ️ Sin perfil: la impulsión se modela como una recta entre la bomba y la descarga.")
+            return
+
+        datos = dict(datos_proyecto)
+        datos['inputs'] = dict(datos_proyecto['inputs'], tolerancia_perfil=tolerancia)
+        try:
+            red, info = construir_red_moc(datos)
+        except Exception as e:
+            st.error(f"Error discretizando el perfil: {e}")
+            return
+        if info.get('aviso_descarga'):
+            st.warning(f"⚠️ {info['aviso_descarga']}")
+        perfil = info['perfil']
+        crudo = np.asarray(st.session_state['perfil_impulsion'], dtype=float)
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Puntos del levantamiento", f"{len(crudo)}")
+        m2.metric("Vértices simplificados", f"{len(perfil['x'])}")
+        m3.metric("Longitud", f"{perfil['x'][-1]:.0f} m")
+        m4.metric("Presión mínima permanente", f"{perfil['presion_min']:.1f} m",
+                  delta=f"a {perfil['x_presion_min']:.0f} m", delta_color="off")
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=crudo[:, 0] - crudo[0, 0], y=crudo[:, 1] - crudo[0, 1], mode='lines',
+                                 line=dict(color='saddlebrown', width=1), name='Terreno (levantamiento)'))
+        fig.add_trace(go.Scatter(x=perfil['x'], y=perfil['z'], mode='markers',
+                                 marker=dict(color='saddlebrown', size=6), name='Vértices del perfil'))
+        fig.add_trace(go.Scatter(x=perfil['x'], y=perfil['hgl'], mode='lines',
+                                 line=dict(color='black', dash='dash'), name='Piezométrica permanente'))
+        envolvente = (st.session_state.get('transientes_resultados') or {}).get('envolvente')
+        if isinstance(envolvente, dict) and 'x' in envolvente:
+            # La envolvente se mide desde el reservorio de succión: se refiere a la bomba
+            x_env = np.asarray(envolvente['x']) - perfil['x_inicio']
+            en_impulsion = x_env >= 0
+            fig.add_trace(go.Scatter(x=x_env[en_impulsion], y=np.asarray(envolvente['H_max'])[en_impulsion],
+                                     mode='lines', line=dict(color='red'), name='Envolvente máxima'))
+            fig.add_trace(go.Scatter(x=x_env[en_impulsion], y=np.asarray(envolvente['H_min'])[en_impulsion],
+                                     mode='lines', line=dict(color='blue'), name='Envolvente mínima'))
+        fig.update_layout(xaxis_title="Distancia desde la bomba (m)", yaxis_title="Cota relativa al eje de la bomba (m)",
+                          height=420, margin=dict(l=20, r=20, t=30, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+        if perfil['presion_min'] < 0:
+            st.warning(f"⚠️ El terreno corta la piezométrica permanente: presión mínima {perfil['presion_min']:.1f} m "
+                       f"a {perfil['x_presion_min']:.0f} m de la bomba. Revise el trazado o prevea ventosas.")
+
+
+def render_barrido_transientes(datos_proyecto: Dict[str, Any], evento: str):
+    """Barrido paramétrico de transitorios (solver MOC nativo en un pool de procesos)"""
+    with st.expander("🔁 Barrido Paramétrico para Estudios de Protección", expanded=False):
+        from core.transient_analysis import construir_red_moc, parametros_inercia_bomba, calculate_wave_speed
+        from core.transient_sweep import barrido_transientes
+        from core.pipe_catalog import cargar_catalogo_tuberias
+
+        st.caption(f"Evento: **{evento}**. Deje un campo vacío para usar el valor actual del proyecto.")
+        col_a, col_b = st.columns(2)
+        with col_a:
+            texto_cierres = st.text_input(
+                "Tiempos de cierre / parada (s)", value="1, 2, 5, 10", key="barrido_tiempos_cierre",
+                help="Cierre de válvula, o parada lineal de la bomba. En corte de bomba, vacío = parada por inercia.")
+            texto_celeridades = st.text_input("Celeridades de la impulsión (m/s)", value="", key="barrido_celeridades")
+        with col_b:
+            texto_caudales = st.text_input("Caudales iniciales (L/s)", value="", key="barrido_caudales")
+            usar_clases = st.checkbox("Incluir las clases de tubería del catálogo (mismo material y DN)",
+                                      value=False, key="barrido_usar_clases")
+
+        inputs = datos_proyecto['inputs']
+        material = inputs['impulsion'].get('material', 'PVC')
+        di_actual = inputs['impulsion']['diametro_interno']
+        catalogo = cargar_catalogo_tuberias([material]) if material in ["PVC", "PEAD", "Hierro Dúctil"] else None
+        clases = [None]
+        pn_actual = None
+        if catalogo is not None and len(catalogo['dn_mm']):
+            # DN del catálogo cuyo diámetro interno es el más cercano al actual
+            i_actual = int(np.argmin(np.abs(catalogo['di_m'] * 1000 - di_actual)))
+            pn_actual = float(catalogo['pn_m'][i_actual])
+            if usar_clases:
+                clases = []
+                for i in np.flatnonzero(catalogo['dn_mm'] == catalogo['dn_mm'][i_actual]):
+                    di_mm = float(catalogo['di_m'][i] * 1000)
+                    clases.append({
+                        'clase': f"{catalogo['serie'][i]} DN{catalogo['dn_mm'][i]:.0f}",
+                        'diametro_interno_mm': di_mm,
+                        'pn_m': float(catalogo['pn_m'][i]),
+                        'celeridad': calculate_wave_speed(material, di_mm / 1000, catalogo['espesor_mm'][i] / 1000)
+                    })
+
+        if st.button("▶️ Ejecutar Barrido", key="barrido_ejecutar"):
+            try:
+                datos = dict(datos_proyecto)
+                datos['inputs'] = dict(inputs, tiempo_simulacion_transientes=st.session_state.get('tiempo_simulacion_transientes', 10.0))
+                red, info = construir_red_moc(datos)
+                inercia = parametros_inercia_bomba(datos)
+                with st.spinner("Simulando casos..."):
+                    filas = barrido_transientes(
+                        red, inputs['caudal_diseno_lps'], datos['inputs']['tiempo_simulacion_transientes'], evento,
+                        tiempos_cierre=_lista_numeros(texto_cierres),
+                        celeridades=_lista_numeros(texto_celeridades),
+                        clases=clases,
+                        caudales_lps=_lista_numeros(texto_caudales),
+                        parada={'inercia': inercia['inercia'], 'rpm': inercia['rpm'], 'eficiencia': inercia['eficiencia']},
+                        pn_m=pn_actual,
+                        cavitacion=st.session_state.get('cavitacion_transientes', True))
+                st.session_state['barrido_transientes'] = filas
+            except Exception as e:
+                st.error(f"Error en el barrido de transientes: {e}")
+
+        filas = st.session_state.get('barrido_transientes')
+        if filas:
+            df = pd.DataFrame(filas)
+            st.dataframe(df.round(2), use_container_width=True, hide_index=True)
+            n_pn = int(df['viola_pn'].sum())
+            n_vapor = int(df['bajo_vapor'].sum())
+            st.caption(f"{len(df)} casos · {n_pn} superan la PN · {n_vapor} alcanzan la presión de vapor · "
+                       f"{df['tiempo_s'].sum():.1f} s de cálculo")
+
+
+def render_dimensionamiento_calderin(datos_proyecto: Dict[str, Any]):
+    """Calderín de mínimo costo para el corte de bomba (solver MOC nativo)"""
+    with st.expander("🛡️ Dimensionamiento de Calderín (Cámara de Aire)", expanded=False):
+        from core.transient_analysis import construir_red_moc, parametros_inercia_bomba
+        from core.surge_vessel import dimensionar_calderin
+
+        st.caption("Busca el calderín más barato que mantiene la envolvente bajo la PN y sobre la presión de vapor tras un corte de energía con parada por inercia.")
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            pn_m = st.number_input("PN de la impulsión (m.c.a.)", value=100.0, min_value=10.0, step=10.0, key="calderin_pn")
+        with col_b:
+            costo_base = st.number_input("Costo fijo (USD)", value=3000.0, min_value=0.0, step=500.0, key="calderin_costo_base")
+        with col_c:
+            costo_m3 = st.number_input("Costo por m³ (USD)", value=2500.0, min_value=0.0, step=100.0, key="calderin_costo_m3")
+
+        if st.button("🔎 Dimensionar Calderín", key="calderin_ejecutar"):
+            try:
+                inputs = datos_proyecto['inputs']
+                red, info = construir_red_moc(datos_proyecto)
+                inercia = parametros_inercia_bomba(datos_proyecto)
+                with st.spinner("Buscando la configuración óptima..."):
+                    st.session_state['calderin_resultado'] = dimensionar_calderin(
+                        red, inputs['caudal_diseno_lps'], st.session_state.get('tiempo_simulacion_transientes', 10.0),
+                        parada={'inercia': inercia['inercia'], 'rpm': inercia['rpm'], 'eficiencia': inercia['eficiencia']},
+                        pn_m=pn_m, costo_base=costo_base, costo_m3=costo_m3)
+            except Exception as e:
+                st.error(f"Error en el dimensionamiento del calderín: {e}")
+
+        resultado = st.session_state.get('calderin_resultado')
+        if resultado:
+            sin = resultado['sin_proteccion']
+            st.write(f"**Sin protección:** P.máx {sin['p_max']:.1f} m · P.mín {sin['p_min']:.1f} m")
+            if not resultado['requiere']:
+                st.success("✅ El sistema no requiere calderín para este evento")
+            elif resultado['optimo'] is None:
+                st.error("❌ Ningún calderín dentro del rango explorado cumple los límites de presión")
+            else:
+                opt = resultado['optimo']
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Volumen total", f"{opt['volumen_total_m3']:.2f} m³")
+                m2.metric("Aire inicial", f"{opt['volumen_gas_m3']:.2f} m³")
+                m3.metric("Conexión", f"Ø {opt['diametro_orificio_mm']:.0f} mm")
+                m4.metric("Costo estimado", f"${opt['costo']:,.0f}")
+                st.write(f"**Con calderín:** P.máx {opt['p_max']:.1f} m · P.mín {opt['p_min']:.1f} m · aire máximo {opt['V_gas_max']:.2f} m³")
+            st.caption(f"{resultado['simulaciones']} simulaciones en {resultado['tiempo_s']:.1f} s")
+            with st.expander("Ver simulaciones realizadas", expanded=False):
+                st.dataframe(pd.DataFrame(resultado['evaluaciones']).round(3), use_container_width=True, hide_index=True)
@@ -6,12 +6,14 @@ Implementa cálculos de golpe de ariete por:
 """
 
 import streamlit as st
-import math
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from typing import Dict, Tuple, List
 
+from core.surge_screening import coeficiente_c, coeficiente_k
+from core.wave_speed import celeridad_allievi
+
 
 def calcular_coeficiente_ks(modulo_elasticidad: float) -> float:
     """Calcula K_s = 10^10 / E"""
@@ -19,60 +21,20 @@ def calcular_coeficiente_ks(modulo_elasticidad: float) -> float:
 
 
 def calcular_celeridad_onda(ks: float, diametro_interior: float, espesor: float) -> float:
-    """Calcula a = 9900 / √(48.3 + K_s * (Di / e))"""
-    # Validar parámetros para evitar división por cero o valores inválidos
-    if espesor <= 0 or diametro_interior <= 0 or ks <= 0:
-        return 400.0  # Valor típico por defecto (PVC)
-    denominador = 48.3 + ks * (diametro_interior / espesor)
-    if denominador <= 0:
-        return 400.0  # Valor por defecto si el cálculo es inválido
-    return 9900 / math.sqrt(denominador)
+    """Calcula a = 9900 / √(48.3 + K_s * (Di / e)); 400 m/s (PVC) si los parámetros no son válidos"""
+    return celeridad_allievi(ks, diametro_interior, espesor)
 
 
 def obtener_coeficiente_c(pendiente_hidraulica: float) -> float:
     """Determina coeficiente c según tabla de Mendiluce (interpolación por tramos)"""
-    # Tabla de Mendiluce (valores reales, no lineales)
+    # Tabla de Mendiluce (valores reales, no lineales) en core.surge_screening.TABLA_COEF_C
     # Fuente: Mendiluce - Golpe de Ariete
-    tabla = [
-        (0.00, 1.0),
-        (0.20, 1.0),
-        (0.25, 0.8),
-        (0.30, 0.6),
-        (0.35, 0.5),
-        (0.40, 0.0),
-        (1.00, 0.0)
-    ]
-    
-    # Interpolación lineal por tramos
-    for i in range(len(tabla) - 1):
-        m1, c1 = tabla[i]
-        m2, c2 = tabla[i + 1]
-        
-        if m1 <= pendiente_hidraulica <= m2:
-            # Interpolación lineal en este tramo
-            if m2 == m1:
-                return c1
-            return c1 + (pendiente_hidraulica - m1) * (c2 - c1) / (m2 - m1)
-    
-    # Fuera de rango
-    if pendiente_hidraulica < 0.00:
-        return 1.0
-    else:
-        return 0.0
+    return coeficiente_c(pendiente_hidraulica)
 
 
 def obtener_coeficiente_k(longitud: float) -> float:
     """Determina coeficiente k según longitud"""
-    if longitud < 500:
-        return 2.0
-    elif longitud == 500:
-        return 1.75
-    elif longitud < 1500:
-        return 1.5
-    elif longitud == 1500:
-        return 1.25
-    else:
-        return 1.0
+    return coeficiente_k(longitud)
 
 
 def calcular_tiempo_parada_mendiluce(c: float, k: float, longitud: float, 